@@ -0,0 +1,152 @@
+"""
+カタログモデルのメモリベンチマーク
+
+DBを使わずに合成したカタログ行（10,000 / 100,000カラム）から、
+カラムごとに dict を作る旧モデルと、__slots__ 付き dataclass と
+sys.intern による現在のモデル（_get_tables_info）を作成し、
+行を破棄したあとも保持されるメモリ量と作成時間を比較します。
+
+    uv run python benchmarks/bench_catalog_memory.py --columns 10000 100000
+"""
+
+import argparse
+import gc
+import tracemalloc
+from collections.abc import Callable
+from functools import partial
+from typing import Any
+
+from common import measure, print_result
+
+from pgmcp.tools.er_diagram import _get_tables_info
+
+COLUMNS_PER_TABLE = 20
+COMMON_COLUMNS = ("id", "name", "status", "created_at", "updated_at")
+DATA_TYPES = (
+    "integer",
+    "bigint",
+    "text",
+    "character varying(255)",
+    "timestamp with time zone",
+    "boolean",
+    "numeric(10,2)",
+)
+
+Row = tuple[str, str, str, bool, bool, str | None]
+
+
+def _decoded(value: str) -> str:
+    """psycopg2 と同様に、行ごとに別の文字列オブジェクトを作る"""
+    return value.encode().decode()
+
+
+def make_rows(columns: int) -> list[Row]:
+    """
+    _TABLES_INFO_QUERY の結果と同じ形の合成行を作成
+
+    各テーブルは共通カラム（id, name など）と固有カラムを持ち、
+    4カラムに1つはコメント付きとします。
+    """
+    rows = []
+    for i in range(columns):
+        table = i // COLUMNS_PER_TABLE
+        position = i % COLUMNS_PER_TABLE
+        if position < len(COMMON_COLUMNS):
+            column_name = COMMON_COLUMNS[position]
+        else:
+            column_name = f"attr_{position:02d}_{table % 50:02d}"
+        rows.append(
+            (
+                _decoded(f"table_{table:05d}"),
+                _decoded(column_name),
+                _decoded(DATA_TYPES[i % len(DATA_TYPES)]),
+                position == 0,
+                position == len(COMMON_COLUMNS),
+                _decoded(f"カラム{i}の説明") if i % 4 == 0 else None,
+            )
+        )
+    return rows
+
+
+def legacy_tables_info(rows: list[Row]) -> list[dict[str, Any]]:
+    """旧モデル（テーブル・カラムごとに dict を作る）"""
+    tables_dict: dict[str, list[dict[str, Any]]] = {}
+    for table_name, column_name, data_type, is_pk, is_fk, comment in rows:
+        if table_name not in tables_dict:
+            tables_dict[table_name] = []
+        tables_dict[table_name].append(
+            {
+                "column_name": column_name,
+                "data_type": data_type,
+                "is_primary_key": is_pk,
+                "is_foreign_key": is_fk,
+                "comment": comment,
+            }
+        )
+    return [
+        {"table_name": name, "columns": columns}
+        for name, columns in tables_dict.items()
+    ]
+
+
+class _RowsCursor:
+    """execute を無視して合成行を返すカーソル"""
+
+    def __init__(self, rows: list[Row]) -> None:
+        self._rows = rows
+
+    def execute(self, query: str, params: Any = None) -> None:
+        pass
+
+    def fetchall(self) -> list[Row]:
+        return self._rows
+
+
+def compact_tables_info(rows: list[Row]) -> Any:
+    """現在のモデル"""
+    return _get_tables_info(_RowsCursor(rows), "public")  # type: ignore[arg-type]
+
+
+def retained_bytes(columns: int, build: Callable[[list[Row]], Any]) -> int:
+    """行を破棄したあともモデルが保持しているメモリ量（バイト）"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        rows = make_rows(columns)
+        model = build(rows)
+        del rows
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - baseline
+        del model
+    finally:
+        tracemalloc.stop()
+    return retained
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--columns", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    builders = [
+        ("旧モデル (dict)", legacy_tables_info),
+        ("slots + intern", compact_tables_info),
+    ]
+    for columns in args.columns:
+        print(f"{columns} カラム / {columns // COLUMNS_PER_TABLE} テーブル:")
+        rows = make_rows(columns)
+        for name, build in builders:
+            retained = retained_bytes(columns, build)
+            print(
+                f"  {name:<20} 保持メモリ {retained / 1024 / 1024:8.2f} MB"
+                f"  ({retained / columns:6.1f} B/カラム)"
+            )
+            print_result(
+                f"  {name} 作成時間", measure(partial(build, rows), args.repeat)
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+カラム情報クエリのベンチマーク
+
+合成スキーマ（デフォルト500テーブル x 24カラム = 12,000カラム）と
+1,500カラムの横長テーブルを作成し、PK/FK判定を相関サブクエリで行う旧クエリと
+制約を事前集約して結合する新クエリを比較します。
+
+    uv run python benchmarks/bench_column_queries.py --tables 500
+"""
+
+import argparse
+from typing import Any
+
+from common import admin_connection, drop_schema, measure, print_result, run_batched
+
+from pgmcp.connection import pooled_connection
+from pgmcp.tools.er_diagram import _TABLES_INFO_QUERY
+from pgmcp.tools.schema import _TABLE_SCHEMA_QUERY
+
+SCHEMA = "bench_column_queries"
+COLUMNS_PER_TABLE = 24
+WIDE_TABLE = "wide_table"
+WIDE_COLUMNS = 1500
+
+OLD_TABLES_INFO_QUERY = """
+    SELECT
+        c.relname AS table_name,
+        a.attname AS column_name,
+        pg_catalog.format_type(a.atttypid, a.atttypmod) AS data_type,
+        COALESCE(
+            (SELECT TRUE
+             FROM pg_catalog.pg_constraint con
+             WHERE con.conrelid = a.attrelid
+               AND a.attnum = ANY(con.conkey)
+               AND con.contype = 'p'),
+            FALSE
+        ) AS is_primary_key,
+        COALESCE(
+            (SELECT TRUE
+             FROM pg_catalog.pg_constraint con
+             WHERE con.conrelid = a.attrelid
+               AND a.attnum = ANY(con.conkey)
+               AND con.contype = 'f'),
+            FALSE
+        ) AS is_foreign_key,
+        pg_catalog.col_description(a.attrelid, a.attnum) AS column_comment
+    FROM pg_catalog.pg_attribute a
+    JOIN pg_catalog.pg_class c ON c.oid = a.attrelid
+    JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = %(schema)s
+      AND c.relkind = 'r'
+      AND (%(tables)s::text[] IS NULL OR c.relname = ANY(%(tables)s::text[]))
+      AND a.attnum > 0
+      AND NOT a.attisdropped
+    ORDER BY c.relname, a.attnum
+"""
+
+OLD_TABLE_SCHEMA_QUERY = """
+    SELECT
+        a.attname AS column_name,
+        pg_catalog.format_type(a.atttypid, a.atttypmod) AS data_type,
+        CASE WHEN a.attnotnull THEN 'NO' ELSE 'YES' END AS is_nullable,
+        pg_catalog.pg_get_expr(d.adbin, d.adrelid) AS column_default,
+        COALESCE(
+            (SELECT TRUE
+             FROM pg_catalog.pg_constraint con
+             WHERE con.conrelid = a.attrelid
+               AND a.attnum = ANY(con.conkey)
+               AND con.contype = 'p'),
+            FALSE
+        ) AS is_primary_key,
+        pg_catalog.col_description(a.attrelid, a.attnum) AS column_comment
+    FROM pg_catalog.pg_attribute a
+    JOIN pg_catalog.pg_class c ON c.oid = a.attrelid
+    JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+    LEFT JOIN pg_catalog.pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+    WHERE c.relname = %s
+      AND n.nspname = %s
+      AND a.attnum > 0
+      AND NOT a.attisdropped
+    ORDER BY a.attnum
+"""
+
+
+def _table_ddl(i: int) -> str:
+    """主キー・外部キー・UNIQUE制約を持つテーブルのDDL"""
+    columns = [
+        "id integer PRIMARY KEY",
+        "code text UNIQUE",
+        (
+            f"parent_id integer REFERENCES {SCHEMA}.table_{i - 1:05d}(id)"
+            if i > 0
+            else "parent_id integer"
+        ),
+    ]
+    columns += [f"col_{n:02d} text" for n in range(COLUMNS_PER_TABLE - len(columns))]
+    return f"CREATE TABLE {SCHEMA}.table_{i:05d} ({', '.join(columns)})"
+
+
+def create_schema(tables: int) -> None:
+    """合成スキーマを作成"""
+    with admin_connection() as conn:
+        drop_schema(conn, SCHEMA)
+        with conn.cursor() as cur:
+            cur.execute(f"CREATE SCHEMA {SCHEMA}")
+        run_batched(conn, [_table_ddl(i) for i in range(tables)])
+        wide_columns = ", ".join(
+            [
+                "id1 integer",
+                "id2 integer",
+                *(f"col_{n:04d} integer" for n in range(WIDE_COLUMNS - 2)),
+                "PRIMARY KEY (id1, id2)",
+            ]
+        )
+        with conn.cursor() as cur:
+            cur.execute(f"CREATE TABLE {SCHEMA}.{WIDE_TABLE} ({wide_columns})")
+
+
+def run_query(query: str, params: Any) -> None:
+    """クエリを実行して全行を取得"""
+    with pooled_connection() as conn, conn.cursor() as cur:
+        cur.execute(query, params)
+        cur.fetchall()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tables", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--keep", action="store_true", help="終了後も合成スキーマを残す"
+    )
+    args = parser.parse_args()
+
+    total = args.tables * COLUMNS_PER_TABLE + WIDE_COLUMNS
+    print(
+        f"合成スキーマ {SCHEMA} に {args.tables} テーブル（{total} カラム）を作成中..."
+    )
+    create_schema(args.tables)
+    er_params = {"schema": SCHEMA, "tables": None}
+    wide_params = (WIDE_TABLE, SCHEMA)
+    try:
+        print_result(
+            "ER図カラム (相関サブクエリ, 全テーブル)",
+            measure(lambda: run_query(OLD_TABLES_INFO_QUERY, er_params), args.repeat),
+        )
+        print_result(
+            "ER図カラム (事前集約JOIN, 全テーブル)",
+            measure(lambda: run_query(_TABLES_INFO_QUERY, er_params), args.repeat),
+        )
+        print_result(
+            f"get_table_schema (相関サブクエリ, {WIDE_COLUMNS}カラム)",
+            measure(
+                lambda: run_query(OLD_TABLE_SCHEMA_QUERY, wide_params), args.repeat
+            ),
+        )
+        print_result(
+            f"get_table_schema (事前集約JOIN, {WIDE_COLUMNS}カラム)",
+            measure(lambda: run_query(_TABLE_SCHEMA_QUERY, wide_params), args.repeat),
+        )
+    finally:
+        if not args.keep:
+            with admin_connection() as conn:
+                drop_schema(conn, SCHEMA)
+
+
+if __name__ == "__main__":
+    main()
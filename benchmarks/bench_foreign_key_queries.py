@@ -0,0 +1,191 @@
+"""
+外部キークエリのベンチマーク
+
+合成スキーマ（デフォルト2,000テーブル、3カラムの複合外部キーを各2本 = 約4,000本）と
+100本の複合外部キーを持つハブテーブルを作成し、conkey / confkey を
+ANY と array_position で突き合わせる旧クエリと、unnest(conkey, confkey)
+WITH ORDINALITY で展開して結合する新クエリを比較します。
+あわせて、ER図の外部キー関係を制約ごとの辺にまとめた件数と、
+Mermaid 形式のER図の関係線の数・サイズを表示します。
+
+    uv run python benchmarks/bench_foreign_key_queries.py --tables 2000
+"""
+
+import argparse
+from typing import Any
+
+from common import admin_connection, drop_schema, measure, print_result, run_batched
+
+from pgmcp.connection import pooled_connection
+from pgmcp.tools.er_diagram import (
+    _FOREIGN_KEY_RELATIONS_QUERY,
+    _get_foreign_key_relations,
+    generate_er_diagram_impl,
+)
+from pgmcp.tools.foreign_keys import _FOREIGN_KEYS_QUERY
+
+SCHEMA = "bench_foreign_key_queries"
+FKS_PER_TABLE = 2
+HUB_TABLE = "hub_table"
+HUB_FKS = 100
+
+OLD_FOREIGN_KEYS_QUERY = """
+    SELECT
+        con.conname AS constraint_name,
+        a.attname AS column_name,
+        ref_class.relname AS foreign_table,
+        ref_attr.attname AS foreign_column
+    FROM pg_catalog.pg_constraint con
+    JOIN pg_catalog.pg_class cls ON cls.oid = con.conrelid
+    JOIN pg_catalog.pg_namespace nsp ON nsp.oid = cls.relnamespace
+    JOIN pg_catalog.pg_attribute a ON a.attrelid = con.conrelid
+        AND a.attnum = ANY(con.conkey)
+    JOIN pg_catalog.pg_class ref_class ON ref_class.oid = con.confrelid
+    JOIN pg_catalog.pg_attribute ref_attr ON ref_attr.attrelid = con.confrelid
+        AND ref_attr.attnum = ANY(con.confkey)
+        AND array_position(con.conkey, a.attnum) = array_position(con.confkey, ref_attr.attnum)
+    WHERE con.contype = 'f'
+      AND cls.relname = %s
+      AND nsp.nspname = %s
+    ORDER BY con.conname, a.attnum
+"""
+
+OLD_FOREIGN_KEY_RELATIONS_QUERY = """
+    WITH ns AS (
+        SELECT oid FROM pg_catalog.pg_namespace
+        WHERE nspname = ANY(%(schemas)s::text[])
+    )
+    SELECT DISTINCT
+        nsp.nspname AS from_schema,
+        cls.relname AS from_table,
+        a.attname AS from_column,
+        ref_nsp.nspname AS to_schema,
+        ref_class.relname AS to_table,
+        ref_attr.attname AS to_column,
+        con.confrelid AS to_relid
+    FROM pg_catalog.pg_constraint con
+    JOIN pg_catalog.pg_class cls ON cls.oid = con.conrelid
+    JOIN pg_catalog.pg_namespace nsp ON nsp.oid = cls.relnamespace
+    JOIN pg_catalog.pg_attribute a ON a.attrelid = con.conrelid
+        AND a.attnum = ANY(con.conkey)
+    JOIN pg_catalog.pg_class ref_class ON ref_class.oid = con.confrelid
+    JOIN pg_catalog.pg_namespace ref_nsp ON ref_nsp.oid = ref_class.relnamespace
+    JOIN pg_catalog.pg_attribute ref_attr ON ref_attr.attrelid = con.confrelid
+        AND ref_attr.attnum = ANY(con.confkey)
+        AND array_position(con.conkey, a.attnum) = array_position(con.confkey, ref_attr.attnum)
+    WHERE con.contype = 'f'
+      AND con.connamespace IN (SELECT oid FROM ns)
+      AND (%(tables)s::text[] IS NULL OR cls.relname = ANY(%(tables)s::text[]))
+      AND (
+        %(tables)s::text[] IS NULL
+        OR ref_class.relnamespace NOT IN (SELECT oid FROM ns)
+        OR ref_class.relname = ANY(%(tables)s::text[])
+      )
+    ORDER BY nsp.nspname, cls.relname, ref_nsp.nspname, ref_class.relname
+"""
+
+
+def _composite_fk(column_prefix: str, table: str) -> list[str]:
+    """3カラムの複合外部キーのカラム定義と制約"""
+    columns = [f"{column_prefix}_k{n} integer" for n in range(3)]
+    keys = ", ".join(f"{column_prefix}_k{n}" for n in range(3))
+    columns.append(f"FOREIGN KEY ({keys}) REFERENCES {SCHEMA}.{table} (k0, k1, k2)")
+    return columns
+
+
+def _table_ddl(i: int) -> str:
+    """3カラムの複合主キーと、前のテーブルへの複合外部キーを持つテーブルのDDL"""
+    columns = ["k0 integer", "k1 integer", "k2 integer", "name text"]
+    for n in range(1, FKS_PER_TABLE + 1):
+        if i - n >= 0:
+            columns += _composite_fk(f"ref{n}", f"table_{i - n:05d}")
+    columns.append("PRIMARY KEY (k0, k1, k2)")
+    return f"CREATE TABLE {SCHEMA}.table_{i:05d} ({', '.join(columns)})"
+
+
+def create_schema(tables: int) -> None:
+    """合成スキーマを作成"""
+    with admin_connection() as conn:
+        drop_schema(conn, SCHEMA)
+        with conn.cursor() as cur:
+            cur.execute(f"CREATE SCHEMA {SCHEMA}")
+        run_batched(conn, [_table_ddl(i) for i in range(tables)])
+        hub_columns = ["id integer PRIMARY KEY"]
+        for n in range(HUB_FKS):
+            hub_columns += _composite_fk(f"fk{n:03d}", f"table_{n % tables:05d}")
+        with conn.cursor() as cur:
+            cur.execute(f"CREATE TABLE {SCHEMA}.{HUB_TABLE} ({', '.join(hub_columns)})")
+
+
+def run_query(query: str, params: Any) -> int:
+    """クエリを実行して行数を返す"""
+    with pooled_connection() as conn, conn.cursor() as cur:
+        cur.execute(query, params)
+        return len(cur.fetchall())
+
+
+def count_edges() -> int:
+    """制約ごとにまとめた外部キー関係の件数"""
+    with pooled_connection() as conn, conn.cursor() as cur:
+        return len(_get_foreign_key_relations(cur, [SCHEMA]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tables", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--keep", action="store_true", help="終了後も合成スキーマを残す"
+    )
+    args = parser.parse_args()
+
+    total = (args.tables - 1) * FKS_PER_TABLE + HUB_FKS
+    print(
+        f"合成スキーマ {SCHEMA} に {args.tables} テーブル"
+        f"（複合外部キー 約{total} 本）を作成中..."
+    )
+    create_schema(args.tables)
+    hub_params = (HUB_TABLE, SCHEMA)
+    er_params = {"schemas": [SCHEMA], "tables": None}
+    try:
+        print_result(
+            f"get_foreign_keys (array_position, {HUB_FKS}本)",
+            measure(lambda: run_query(OLD_FOREIGN_KEYS_QUERY, hub_params), args.repeat),
+        )
+        print_result(
+            f"get_foreign_keys (unnest, {HUB_FKS}本)",
+            measure(lambda: run_query(_FOREIGN_KEYS_QUERY, hub_params), args.repeat),
+        )
+        print_result(
+            "ER図の外部キー関係 (array_position)",
+            measure(
+                lambda: run_query(OLD_FOREIGN_KEY_RELATIONS_QUERY, er_params),
+                args.repeat,
+            ),
+        )
+        print_result(
+            "ER図の外部キー関係 (unnest)",
+            measure(
+                lambda: run_query(_FOREIGN_KEY_RELATIONS_QUERY, er_params),
+                args.repeat,
+            ),
+        )
+        print(
+            "  行数: "
+            f"{run_query(OLD_FOREIGN_KEY_RELATIONS_QUERY, er_params)} → "
+            f"{run_query(_FOREIGN_KEY_RELATIONS_QUERY, er_params)}"
+            f"（制約ごとの辺 {count_edges()} 本）"
+        )
+        diagram = generate_er_diagram_impl(schema=SCHEMA)
+        print(
+            f"  Mermaid: 関係線 {diagram.count('||--o{')} 本, "
+            f"{len(diagram.encode()) / 1024:.1f} KiB"
+        )
+    finally:
+        if not args.keep:
+            with admin_connection() as conn:
+                drop_schema(conn, SCHEMA)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+list_tables のベンチマーク
+
+合成スキーマ（デフォルト20,000テーブル）を作成し、旧実装の
+information_schema.tables クエリと pg_class ベースの新実装を比較します。
+
+    uv run python benchmarks/bench_list_tables.py --tables 20000
+"""
+
+import argparse
+
+from common import admin_connection, drop_schema, measure, print_result, run_batched
+
+from pgmcp.connection import pooled_connection
+from pgmcp.tools import list_tables_impl
+
+SCHEMA = "bench_list_tables"
+
+INFORMATION_SCHEMA_QUERY = """
+    SELECT
+        table_name,
+        table_type
+    FROM information_schema.tables
+    WHERE table_schema = %s
+    ORDER BY table_name
+"""
+
+
+def create_schema(tables: int) -> None:
+    """合成スキーマを作成"""
+    with admin_connection() as conn:
+        drop_schema(conn, SCHEMA)
+        with conn.cursor() as cur:
+            cur.execute(f"CREATE SCHEMA {SCHEMA}")
+        run_batched(
+            conn,
+            [
+                f"CREATE TABLE {SCHEMA}.table_{i:05d} (id integer PRIMARY KEY)"
+                for i in range(tables)
+            ],
+        )
+
+
+def information_schema_list() -> None:
+    """旧実装（information_schema.tables の全件取得）"""
+    with pooled_connection() as conn, conn.cursor() as cur:
+        cur.execute(INFORMATION_SCHEMA_QUERY, (SCHEMA,))
+        cur.fetchall()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tables", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--keep", action="store_true", help="終了後も合成スキーマを残す"
+    )
+    args = parser.parse_args()
+
+    print(f"合成スキーマ {SCHEMA} に {args.tables} テーブルを作成中...")
+    create_schema(args.tables)
+    try:
+        print_result(
+            "information_schema.tables (全件)",
+            measure(information_schema_list, args.repeat),
+        )
+        print_result(
+            "pg_class (全件)",
+            measure(lambda: list_tables_impl(SCHEMA, limit=args.tables), args.repeat),
+        )
+        print_result(
+            "pg_class (1ページ目, limit=1000)",
+            measure(lambda: list_tables_impl(SCHEMA), args.repeat),
+        )
+        print_result(
+            "pg_class (中間ページ, limit=1000)",
+            measure(
+                lambda: list_tables_impl(SCHEMA, after=f"table_{args.tables // 2:05d}"),
+                args.repeat,
+            ),
+        )
+        print_result(
+            "pg_class (パターン 'table_1%')",
+            measure(lambda: list_tables_impl(SCHEMA, pattern="table_1%"), args.repeat),
+        )
+    finally:
+        if not args.keep:
+            with admin_connection() as conn:
+                drop_schema(conn, SCHEMA)
+
+
+if __name__ == "__main__":
+    main()
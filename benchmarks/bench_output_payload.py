@@ -0,0 +1,237 @@
+"""
+出力形式ごとのペイロードサイズのベンチマーク
+
+DBを使わずに合成したカタログ行（幅の広いテーブルのカラム情報、インデックス、
+外部キー、テーブル一覧、ER図のスキーマグラフ）を markdown / json / tsv で
+出力し、UTF-8 のバイト数とフォーマット時間を比較します。
+
+    uv run python benchmarks/bench_output_payload.py --columns 50 200 1000
+"""
+
+import argparse
+from collections.abc import Callable
+from typing import Any
+
+from common import measure
+
+from pgmcp.tools.er_diagram import _GRAPH_TSV_COLUMNS, _graph_records
+from pgmcp.tools.foreign_keys import (
+    _FOREIGN_KEYS_COLUMNS,
+    _foreign_key_records,
+    _format_foreign_keys,
+)
+from pgmcp.tools.indexes import _TABLE_INDEXES_COLUMNS, _format_table_indexes
+from pgmcp.tools.output import format_rows, to_json
+from pgmcp.tools.schema import (
+    _TABLE_LIST_COLUMNS,
+    _TABLE_SCHEMA_COLUMNS,
+    _format_table_list,
+    _format_table_schema,
+    _table_schema_records,
+)
+from pgmcp.tools.schema_graph import (
+    GraphColumn,
+    GraphEdge,
+    GraphTable,
+    build_schema_graph,
+    graph_document,
+    render_mermaid,
+)
+
+DATA_TYPES = (
+    "integer",
+    "bigint",
+    "text",
+    "character varying(255)",
+    "timestamp with time zone",
+    "boolean",
+    "numeric(10,2)",
+)
+
+Formatters = dict[str, Callable[[], str]]
+
+
+def schema_rows(columns: int) -> list[tuple[Any, ...]]:
+    """幅の広いテーブルのカラム情報（3カラムに1つはコメント付き）"""
+    rows: list[tuple[Any, ...]] = [
+        ("id", "bigint", "NO", "nextval('wide_table_id_seq'::regclass)", True, "ID")
+    ]
+    for i in range(1, columns):
+        rows.append(
+            (
+                f"attribute_{i:04d}",
+                DATA_TYPES[i % len(DATA_TYPES)],
+                "YES" if i % 2 else "NO",
+                None if i % 5 else "0",
+                False,
+                f"属性{i}の説明" if i % 3 == 0 else None,
+            )
+        )
+    return rows
+
+
+def index_rows(columns: int) -> list[tuple[Any, ...]]:
+    """10カラムに1つのインデックス"""
+    return [
+        (
+            f"wide_table_attribute_{i:04d}_idx",
+            f"attribute_{i:04d}",
+            False,
+            "btree",
+            f"CREATE INDEX wide_table_attribute_{i:04d}_idx "
+            f"ON public.wide_table USING btree (attribute_{i:04d})",
+        )
+        for i in range(1, columns, 10)
+    ]
+
+
+def foreign_key_rows(columns: int) -> list[tuple[Any, ...]]:
+    """20カラムに1つの外部キー"""
+    return [
+        (
+            f"wide_table_attribute_{i:04d}_fkey",
+            f"attribute_{i:04d}",
+            f"master_{i:04d}",
+            "id",
+            "a",
+            "c",
+            False,
+            False,
+        )
+        for i in range(1, columns, 20)
+    ]
+
+
+def table_list_rows(tables: int) -> list[tuple[Any, ...]]:
+    return [(f"table_{i:05d}", "BASE TABLE") for i in range(tables)]
+
+
+def er_graph(tables: int) -> Any:
+    """各テーブルが12カラムと前のテーブルへの外部キーを持つスキーマグラフ"""
+    graph_tables = []
+    relations = []
+    for i in range(tables):
+        columns = [GraphColumn("id", "integer", True, False, f"テーブル{i}のID")]
+        columns += [
+            GraphColumn(f"attribute_{n:02d}", DATA_TYPES[n % 7], False, False, None)
+            for n in range(10)
+        ]
+        if i:
+            columns.append(GraphColumn("parent_id", "integer", False, True, None))
+            relations.append(
+                GraphEdge(
+                    f"table_{i:05d}",
+                    ("parent_id",),
+                    f"table_{i - 1:05d}",
+                    ("id",),
+                    "real",
+                )
+            )
+        graph_tables.append(GraphTable(f"table_{i:05d}", tuple(columns)))
+    return build_schema_graph("public", graph_tables, relations, [])
+
+
+def table_schema_formatters(rows: list[tuple[Any, ...]]) -> Formatters:
+    """get_table_schema の結果を各形式に整形する関数"""
+    return {
+        "markdown": lambda: _format_table_schema(rows),
+        "json": lambda: format_rows(
+            "json",
+            _TABLE_SCHEMA_COLUMNS,
+            _table_schema_records(rows),
+            schema="public",
+            table="wide_table",
+        ),
+        "tsv": lambda: format_rows(
+            "tsv", _TABLE_SCHEMA_COLUMNS, _table_schema_records(rows)
+        ),
+    }
+
+
+def report(name: str, formatters: Formatters, repeat: int) -> None:
+    """形式ごとのバイト数と、markdown に対する比率・フォーマット時間を表示"""
+    print(f"{name}:")
+    baseline = len(formatters["markdown"]().encode())
+    for output_format, format_ in formatters.items():
+        size = len(format_().encode())
+        timing = measure(format_, repeat)
+        print(
+            f"  {output_format:<8} {size / 1024:9.1f} KiB  ({size / baseline:6.1%})"
+            f"  median {timing['median_ms']:8.2f} ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--columns", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--tables", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for columns in args.columns:
+        rows = schema_rows(columns)
+        report(
+            f"get_table_schema（{columns}カラム）",
+            table_schema_formatters(rows),
+            args.repeat,
+        )
+
+    columns = max(args.columns)
+    indexes = index_rows(columns)
+    report(
+        f"get_table_indexes（{len(indexes)}インデックス）",
+        {
+            "markdown": lambda: _format_table_indexes(indexes),
+            "json": lambda: format_rows(
+                "json", _TABLE_INDEXES_COLUMNS, indexes, schema="public", table="t"
+            ),
+            "tsv": lambda: format_rows("tsv", _TABLE_INDEXES_COLUMNS, indexes),
+        },
+        args.repeat,
+    )
+    foreign_keys = foreign_key_rows(columns)
+    report(
+        f"get_foreign_keys（{len(foreign_keys)}本）",
+        {
+            "markdown": lambda: _format_foreign_keys(foreign_keys),
+            "json": lambda: format_rows(
+                "json",
+                _FOREIGN_KEYS_COLUMNS,
+                _foreign_key_records(foreign_keys),
+                schema="public",
+                table="t",
+            ),
+            "tsv": lambda: format_rows(
+                "tsv", _FOREIGN_KEYS_COLUMNS, _foreign_key_records(foreign_keys)
+            ),
+        },
+        args.repeat,
+    )
+    tables = table_list_rows(args.tables)
+    report(
+        f"list_tables（{args.tables}テーブル）",
+        {
+            "markdown": lambda: _format_table_list(tables),
+            "json": lambda: format_rows(
+                "json", _TABLE_LIST_COLUMNS, tables, schema="public", next_after=None
+            ),
+            "tsv": lambda: format_rows("tsv", _TABLE_LIST_COLUMNS, tables),
+        },
+        args.repeat,
+    )
+    graph = er_graph(args.tables // 10)
+    report(
+        f"generate_er_diagram（{len(graph.tables)}テーブル、markdown は Mermaid）",
+        {
+            "markdown": lambda: render_mermaid(graph),
+            "json": lambda: to_json(graph_document(graph)),
+            "tsv": lambda: format_rows(
+                "tsv", _GRAPH_TSV_COLUMNS, _graph_records(graph)
+            ),
+        },
+        args.repeat,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+記録したカタログによるDB不要のベンチマーク
+
+--record ではテスト用DBに合成スキーマ（catalog_generator.py）を作成し、
+ベンチマークスイートと同じツール呼び出しのクエリ結果をファイルに記録します。
+それ以外の場合は記録したファイルだけを使い、データベースに接続せずに
+次の処理を計測します。
+
+- ツール全体（クエリの結果は記録から返すため、整形・グラフの組み立ての時間）
+- _format_table_list / _format_table_schema / _format_table_indexes /
+  _format_foreign_keys / _format_bulk_table_schema（1テーブル分の結果は
+  記録した行を繰り返して --format-rows 行にする）
+- _get_tables_info / _load_graph（記録した行からのグラフの組み立て）
+- _detect_virtual_foreign_keys
+- render_mermaid ほか各形式のER図の出力
+
+    uv run python benchmarks/bench_replay.py --record --tables 10000
+    uv run python benchmarks/bench_replay.py --fixture replay_catalog.json.gz
+"""
+
+import argparse
+import os
+from dataclasses import asdict
+from functools import partial
+from typing import Any, cast
+
+# 毎回クエリ（の再生）と整形を行うよう、pgmcp の読み込み前にキャッシュを無効化する
+os.environ["PGMCP_CACHE_ENABLED"] = "0"
+
+from bench_suite import build_cases
+from catalog_generator import CatalogSpec, create_catalog, remove_catalog
+from common import measure, print_result
+from psycopg2.extensions import cursor
+
+from pgmcp.replay import Recording, ReplayCursor, recording, replaying
+from pgmcp.tools.budget import OutputBudget
+from pgmcp.tools.describe import _BULK_TABLE_SCHEMA_QUERY, _format_bulk_table_schema
+from pgmcp.tools.er_diagram import (
+    _detect_virtual_foreign_keys,
+    _get_tables_info,
+    _load_graph,
+)
+from pgmcp.tools.foreign_keys import _FOREIGN_KEYS_QUERY, _format_foreign_keys
+from pgmcp.tools.indexes import _TABLE_INDEXES_QUERY, _format_table_indexes
+from pgmcp.tools.schema import (
+    _TABLE_SCHEMA_QUERY,
+    _format_table_list,
+    _format_table_schema,
+)
+from pgmcp.tools.schema_graph import get_renderer
+
+Row = tuple[Any, ...]
+
+
+def replay_cursor(recorded: Recording) -> cursor:
+    """記録した行を返すカーソル（ツールの関数が使うメソッドだけを実装）"""
+    return cast(cursor, ReplayCursor(recorded))
+
+
+def record(path: str, spec: CatalogSpec, schema: str) -> None:
+    """合成スキーマを作成し、ベンチマークスイートのツール呼び出しを記録"""
+    os.environ["PGMCP_STATEMENT_TIMEOUT"] = "0"
+    print(f"合成スキーマ {schema} に {spec.tables} テーブルを作成中...")
+    print(f"作成しました（{create_catalog(schema, spec):.1f} 秒）。")
+    try:
+        with recording({"schema": schema, "spec": asdict(spec)}) as recorded:
+            for _, _, func in build_cases(schema, spec):
+                func()
+    finally:
+        remove_catalog(schema)
+    recorded.save(path)
+    size = os.path.getsize(path) / 2**20
+    print(f"{len(recorded)} 件のクエリ結果を {path} に記録しました（{size:.1f} MiB）。")
+
+
+def largest(recorded: Recording, query: str) -> list[Row]:
+    """クエリに対して記録した結果のうち最も行数の多いもの"""
+    results = recorded.results(query)
+    if not results:
+        raise SystemExit(f"記録にクエリがありません:\n{query}")
+    return max((rows for _, rows in results), key=len)
+
+
+def run_tools(recorded: Recording, schema: str, spec: CatalogSpec, repeat: int) -> None:
+    print("\n[ツール全体（クエリの結果は記録から再生）]")
+    with replaying(recorded):
+        for name, _, func in build_cases(schema, spec):
+            print_result(name, measure(func, repeat))
+
+
+def scale_rows(rows: list[Row], count: int) -> list[Row]:
+    """記録した行を繰り返して count 行にする（count 行以上の場合はそのまま）"""
+    if not rows or len(rows) >= count:
+        return rows
+    return (rows * -(-count // len(rows)))[:count]
+
+
+def run_formatters(
+    recorded: Recording, schema: str, repeat: int, format_rows: int
+) -> None:
+    print("\n[結果の整形]")
+    cur = replay_cursor(recorded)
+    tables = _get_tables_info(cur, [schema])[schema]
+    table_rows = [(table.name, "BASE TABLE") for table in tables]
+    cases: list[tuple[str, Any]] = [
+        (
+            f"_format_table_list ({len(table_rows)} rows)",
+            partial(_format_table_list, table_rows, None),
+        ),
+    ]
+    for label, query, formatter in (
+        ("_format_table_schema", _TABLE_SCHEMA_QUERY, _format_table_schema),
+        ("_format_table_indexes", _TABLE_INDEXES_QUERY, _format_table_indexes),
+        ("_format_foreign_keys", _FOREIGN_KEYS_QUERY, _format_foreign_keys),
+    ):
+        rows = scale_rows(largest(recorded, query), format_rows)
+        cases.append((f"{label} ({len(rows)} rows)", partial(formatter, rows)))
+    rows = largest(recorded, _BULK_TABLE_SCHEMA_QUERY)
+    cases.append(
+        (
+            f"_format_bulk_table_schema ({len(rows)} rows)",
+            partial(_format_bulk_table_schema, schema, rows, OutputBudget()),
+        )
+    )
+    for name, func in cases:
+        print_result(name, measure(func, repeat))
+
+
+def run_er_engine(recorded: Recording, schema: str, repeat: int) -> None:
+    print("\n[ER図のエンジン]")
+    cur = replay_cursor(recorded)
+    tables = _get_tables_info(cur, [schema])[schema]
+    columns = sum(len(table.columns) for table in tables)
+    graph = _load_graph(cur, [schema], None)
+    print(f"  {len(tables)} テーブル / {columns} カラム / {len(graph.edges)} 本の関係")
+    cases: list[tuple[str, Any]] = [
+        ("_get_tables_info", partial(_get_tables_info, cur, [schema])),
+        ("_load_graph", partial(_load_graph, cur, [schema], None)),
+        (
+            "_detect_virtual_foreign_keys",
+            partial(_detect_virtual_foreign_keys, tables, schema),
+        ),
+    ]
+    cases += [
+        (f"render ({diagram_format})", partial(get_renderer(diagram_format), graph))
+        for diagram_format in ("mermaid", "dot", "plantuml", "json")
+    ]
+    for name, func in cases:
+        print_result(name, measure(func, repeat))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--fixture", default="replay_catalog.json.gz")
+    parser.add_argument(
+        "--record", action="store_true", help="テスト用DBから記録してから計測する"
+    )
+    parser.add_argument("--schema", default="bench_replay")
+    parser.add_argument("--tables", type=int, default=10000, help="記録時のテーブル数")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--format-rows",
+        type=int,
+        default=10000,
+        help="1テーブル分の結果を整形するベンチマークの行数",
+    )
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.fixture, CatalogSpec(tables=args.tables), args.schema)
+
+    recorded = Recording.load(args.fixture)
+    schema = recorded.meta["schema"]
+    spec = CatalogSpec(**recorded.meta["spec"])
+    print(
+        f"{args.fixture}: {schema}（{spec.tables} テーブル、{len(recorded)} 件の結果）"
+    )
+
+    run_tools(recorded, schema, spec, args.repeat)
+    run_formatters(recorded, schema, args.repeat, args.format_rows)
+    run_er_engine(recorded, schema, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+ツールごとのベンチマークスイート
+
+規模ごとに合成スキーマ（catalog_generator.py）を作成し、各ツールの
+接続の取得・クエリの実行・結果の取得・整形の時間を計測します。
+フェーズごとの時間はサーバーと同じメトリクス（pgmcp.metrics）から取得するため、
+ツールの実装には手を加えずに計測できます。
+
+結果は JSON に書き出します。--baseline に以前の結果を指定すると、
+ケースごとの合計時間（中央値）を比較し、閾値を超えて遅くなったケースが
+あれば終了コード1で終了します（リリース間の性能劣化の検出用）。
+
+    uv run python benchmarks/bench_suite.py --scales 1000 10000 --output results.json
+    uv run python benchmarks/bench_suite.py --scales 1000 --baseline results.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+from collections.abc import Callable
+from dataclasses import asdict
+from typing import Any
+
+from catalog_generator import (
+    CatalogSpec,
+    create_catalog,
+    is_partitioned,
+    is_wide,
+    remove_catalog,
+    table_name,
+)
+from common import environment
+
+from pgmcp.cache import reset_catalog_cache
+from pgmcp.connection import close_pool, snapshot_connection
+from pgmcp.metrics import PHASES, get_metrics, measure_call, reset_metrics
+from pgmcp.tools import (
+    describe_table_impl,
+    describe_tables_impl,
+    generate_er_diagram_impl,
+    get_foreign_keys_impl,
+    get_table_indexes_impl,
+    get_table_schema_impl,
+    list_tables_impl,
+)
+from pgmcp.tools.er_diagram import _detect_virtual_foreign_keys, _get_tables_info
+
+# (ケース名, ツール名, 実行する処理)
+Case = tuple[str, str, Callable[[], str]]
+
+
+def build_cases(schema: str, spec: CatalogSpec) -> list[Case]:
+    """規模に応じた計測ケース（幅の広いテーブル・外部キーの多いテーブルを含む）"""
+    last = table_name(spec.tables - 1)
+    wide = next((table_name(i) for i in range(spec.tables) if is_wide(spec, i)), last)
+    partitioned = next(
+        (table_name(i) for i in range(spec.tables) if is_partitioned(spec, i)), last
+    )
+    return [
+        ("list_tables (1ページ目)", "list_tables", lambda: list_tables_impl(schema)),
+        (
+            "list_tables (全件)",
+            "list_tables",
+            lambda: list_tables_impl(schema, limit=spec.tables * 2),
+        ),
+        (
+            "get_table_schema (幅の広いテーブル)",
+            "get_table_schema",
+            lambda: get_table_schema_impl(wide, schema),
+        ),
+        (
+            "get_table_indexes",
+            "get_table_indexes",
+            lambda: get_table_indexes_impl(last, schema),
+        ),
+        (
+            "get_foreign_keys",
+            "get_foreign_keys",
+            lambda: get_foreign_keys_impl(last, schema),
+        ),
+        (
+            "describe_table (パーティションテーブル)",
+            "describe_table",
+            lambda: describe_table_impl(partitioned, schema),
+        ),
+        (
+            "describe_tables (1ページ目)",
+            "describe_tables",
+            lambda: describe_tables_impl(schema),
+        ),
+        (
+            "generate_er_diagram (seed depth=2)",
+            "generate_er_diagram",
+            lambda: generate_er_diagram_impl(
+                schema, seed_tables=[last], depth=2, include_virtual_fks=True
+            ),
+        ),
+        (
+            "generate_er_diagram (split_clusters)",
+            "generate_er_diagram",
+            lambda: generate_er_diagram_impl(schema, split_clusters=True),
+        ),
+        (
+            "generate_er_diagram (全体)",
+            "generate_er_diagram",
+            lambda: generate_er_diagram_impl(schema),
+        ),
+    ]
+
+
+def count_virtual_fks(schema: str) -> int:
+    """合成スキーマから検出される Virtual Foreign Keys の本数"""
+    with snapshot_connection() as conn, conn.cursor() as cur:
+        tables = _get_tables_info(cur, [schema]).get(schema, [])
+    return len(_detect_virtual_foreign_keys(tables, schema))
+
+
+def run_case(tool: str, func: Callable[[], str], repeat: int) -> dict[str, Any]:
+    """
+    ケースを repeat 回実行し、フェーズごとの時間の中央値などを集計
+
+    Returns:
+        phases（フェーズごとの median_ms / min_ms / max_ms）, rows, output_bytes,
+        queries を含む dict
+    """
+    registry = get_metrics()
+    # ウォームアップ（接続の確立など）
+    measure_call(tool, func)
+    samples: dict[str, list[float]] = {phase: [] for phase in PHASES}
+    snapshot: dict[str, Any] = {}
+    for _ in range(repeat):
+        registry.clear()
+        measure_call(tool, func)
+        snapshot = registry.snapshot()[tool]
+        for phase in PHASES:
+            samples[phase].append(snapshot["phases"][phase]["sum"] * 1000)
+    return {
+        "phases": {
+            phase: {
+                "median_ms": statistics.median(values),
+                "min_ms": min(values),
+                "max_ms": max(values),
+            }
+            for phase, values in samples.items()
+        },
+        "rows": snapshot["rows"]["sum"],
+        "output_bytes": snapshot["output_bytes"]["sum"],
+        "queries": snapshot["queries"],
+    }
+
+
+def print_case(name: str, result: dict[str, Any]) -> None:
+    phases = result["phases"]
+    print(
+        f"  {name:<40} total {phases['total']['median_ms']:9.2f} ms"
+        f"  (connect {phases['connect']['median_ms']:.2f}"
+        f" / execute {phases['execute']['median_ms']:.2f}"
+        f" / fetch {phases['fetch']['median_ms']:.2f}"
+        f" / format {phases['format']['median_ms']:.2f})"
+        f"  {result['rows']:>8} rows  {result['output_bytes'] / 1024:9.1f} KiB"
+    )
+
+
+def compare(
+    results: list[dict[str, Any]], baseline: dict[str, Any], threshold: float
+) -> list[str]:
+    """
+    以前の結果と合計時間（中央値）を比較
+
+    Returns:
+        threshold 倍を超えて遅くなったケースの説明のリスト
+    """
+    previous = {
+        (scale["tables"], case["name"]): case["phases"]["total"]["median_ms"]
+        for scale in baseline["results"]
+        for case in scale["cases"]
+    }
+    regressions = []
+    print("\nベースラインとの比較（合計時間の中央値）:")
+    for scale in results:
+        for case in scale["cases"]:
+            before = previous.get((scale["tables"], case["name"]))
+            if not before:
+                continue
+            after = case["phases"]["total"]["median_ms"]
+            ratio = after / before
+            mark = "  ← 劣化" if ratio > threshold else ""
+            print(
+                f"  {scale['tables']:>6} {case['name']:<40}"
+                f" {before:9.2f} → {after:9.2f} ms ({ratio:5.2f}x){mark}"
+            )
+            if mark:
+                regressions.append(f"{scale['tables']} {case['name']}: {ratio:.2f}x")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--scales",
+        type=int,
+        nargs="+",
+        default=[1000, 5000],
+        help="テーブル数（1,000〜50,000程度）",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="bench_suite.json")
+    parser.add_argument("--baseline", help="比較する以前の結果（JSON）")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.2,
+        help="劣化とみなす合計時間の比率（デフォルト: 1.2）",
+    )
+    parser.add_argument(
+        "--keep", action="store_true", help="終了後も合成スキーマを残す"
+    )
+    args = parser.parse_args()
+
+    # 毎回カタログクエリを実行し、大規模スキーマでも打ち切らずに計測する
+    os.environ["PGMCP_CACHE_ENABLED"] = "0"
+    os.environ["PGMCP_STATEMENT_TIMEOUT"] = "0"
+    os.environ["PGMCP_METRICS_ENABLED"] = "1"
+    reset_catalog_cache()
+    reset_metrics()
+
+    results = []
+    for tables in args.scales:
+        schema = f"bench_suite_{tables}"
+        spec = CatalogSpec(tables=tables)
+        print(f"合成スキーマ {schema} に {tables} テーブルを作成中...")
+        setup_seconds = create_catalog(schema, spec)
+        print(f"作成しました（{setup_seconds:.1f} 秒）。")
+        try:
+            # include_virtual_fks=True のケースが検出処理を計測していることを確認する
+            virtual_fks = count_virtual_fks(schema)
+            print(f"Virtual Foreign Keys: {virtual_fks} 本")
+            if spec.virtual_fks_per_table and tables > 1 and not virtual_fks:
+                raise SystemExit(
+                    "合成スキーマから Virtual Foreign Keys が検出されません。"
+                )
+            cases = []
+            for name, tool, func in build_cases(schema, spec):
+                result = run_case(tool, func, args.repeat)
+                print_case(name, result)
+                cases.append({"name": name, "tool": tool, **result})
+        finally:
+            close_pool()
+            if not args.keep:
+                remove_catalog(schema)
+        results.append(
+            {
+                "tables": tables,
+                "spec": asdict(spec),
+                "setup_seconds": setup_seconds,
+                "virtual_fks": virtual_fks,
+                "cases": cases,
+            }
+        )
+
+    document = {
+        "environment": environment(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(document, file, ensure_ascii=False, indent=2)
+    print(f"\n結果を {args.output} に書き出しました。")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        if regressions:
+            print("\n性能が劣化したケースがあります:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Virtual Foreign Key 検出のマイクロベンチマーク
+
+DBを使わずに合成したテーブル情報（100 / 1,000 / 10,000テーブル）に対して
+_detect_virtual_foreign_keys を計測します。--legacy-max 以下のテーブル数では、
+全テーブルのPKを走査する旧実装とも比較します。
+
+    uv run python benchmarks/bench_virtual_fks.py --sizes 100 1000 10000
+"""
+
+import argparse
+import random
+from functools import partial
+
+from common import measure, print_result
+
+from pgmcp.tools.er_diagram import _detect_virtual_foreign_keys
+from pgmcp.tools.schema_graph import GraphColumn, GraphTable
+
+COLUMNS_PER_TABLE = 12
+
+
+def _column(name: str, pk: bool = False, fk: bool = False) -> GraphColumn:
+    return GraphColumn(name, "integer", pk, fk, None)
+
+
+def make_tables_info(tables: int, seed: int = 0) -> list[GraphTable]:
+    """
+    合成テーブル情報を作成
+
+    10テーブルに1つはPKが code_NNNNN のマスタテーブルとし、
+    他のテーブルは _id 参照・PK同名参照・推測できないカラムを持ちます。
+    """
+    rng = random.Random(seed)  # noqa: S311
+    masters = list(range(0, tables, 10))
+    tables_info = []
+    for i in range(tables):
+        if i % 10 == 0:
+            name = f"master_{i:05d}"
+            columns = [_column(f"code_{i:05d}", pk=True)]
+        else:
+            name = f"entity_{i:05d}s"
+            columns = [_column("id", pk=True)]
+        columns.append(_column("name"))
+        columns.append(_column(f"entity_{rng.randrange(tables):05d}_id", fk=True))
+        columns.append(_column(f"entity_{rng.randrange(tables):05d}_id"))
+        columns.append(_column(f"code_{rng.choice(masters):05d}"))
+        while len(columns) < COLUMNS_PER_TABLE:
+            columns.append(_column(f"attr_{len(columns):02d}_id"))
+        tables_info.append(GraphTable(name, tuple(columns)))
+    return tables_info
+
+
+def legacy_detect(tables_info: list[GraphTable]) -> list[dict[str, str]]:
+    """旧実装（パターン2で全テーブルのPKを走査する）"""
+    table_names = {t.name for t in tables_info}
+    pk_columns = {
+        t.name: {c.name for c in t.columns if c.is_primary_key} for t in tables_info
+    }
+    virtual_fks = []
+    for table in tables_info:
+        for col in table.columns:
+            column_name = col.name
+            if col.is_foreign_key or col.is_primary_key:
+                continue
+            matched_table = None
+            matched_column = None
+            for suffix in ("_id", "_no"):
+                if column_name.endswith(suffix):
+                    base = column_name[: -len(suffix)]
+                    candidates = [base, base + "s", base + "es"]
+                    if base.endswith("y"):
+                        candidates.append(base[:-1] + "ies")
+                    for pt in candidates:
+                        if pt in table_names and pt != table.name:
+                            matched_table = pt
+                            ref_pk = pk_columns.get(pt, set())
+                            matched_column = "id" if "id" in ref_pk else "no"
+                            break
+                    if matched_table:
+                        break
+            if not matched_table:
+                for other_table in tables_info:
+                    if other_table.name == table.name:
+                        continue
+                    if column_name in pk_columns[other_table.name]:
+                        matched_table = other_table.name
+                        matched_column = column_name
+                        break
+            if matched_table and matched_column:
+                virtual_fks.append(
+                    {
+                        "from_table": table.name,
+                        "from_column": column_name,
+                        "to_table": matched_table,
+                        "to_column": matched_column,
+                    }
+                )
+    return virtual_fks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--legacy-max",
+        type=int,
+        default=1000,
+        help="旧実装と比較する最大テーブル数（旧実装はテーブル数の2乗で遅くなる）",
+    )
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        tables_info = make_tables_info(size)
+        detected = _detect_virtual_foreign_keys(tables_info, "public")
+        print(f"{size} テーブル / {size * COLUMNS_PER_TABLE} カラム:")
+        if size <= args.legacy_max:
+            print_result(
+                "  旧実装 (PK全走査)",
+                measure(partial(legacy_detect, tables_info), args.repeat),
+            )
+        print_result(
+            "  索引による検出",
+            measure(
+                partial(_detect_virtual_foreign_keys, tables_info, "public"),
+                args.repeat,
+            ),
+        )
+        print(f"  検出件数: {len(detected)}")
+
+
+if __name__ == "__main__":
+    main()
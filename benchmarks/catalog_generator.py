@@ -0,0 +1,224 @@
+"""
+大規模カタログの合成スキーマ生成
+
+テスト用DB（docker compose）に、テーブル数・カラム数・外部キーの密度・
+インデックス数・パーティションテーブルの割合を指定した合成スキーマを作成します。
+ベンチマークスイート（bench_suite.py）や負荷試験から利用するほか、
+単体でも実行できます。
+
+    uv run python benchmarks/catalog_generator.py --schema bench_catalog --tables 10000
+    uv run python benchmarks/catalog_generator.py --schema bench_catalog --drop
+"""
+
+import argparse
+import random
+import time
+from dataclasses import dataclass
+
+from common import admin_connection, drop_schema, run_batched
+
+# 外部キーの参照先もロックされるため、削除は小さなバッチで行う
+DROP_BATCH_SIZE = 100
+
+DATA_TYPES = (
+    "integer",
+    "bigint",
+    "text",
+    "character varying(255)",
+    "timestamp with time zone",
+    "boolean",
+    "numeric(10,2)",
+)
+
+
+@dataclass(frozen=True)
+class CatalogSpec:
+    """
+    合成スキーマの形
+
+    Attributes:
+        tables: テーブル数（パーティションテーブルの親を含み、パーティションは含まない）
+        columns: 通常のテーブルのカラム数（id と外部キーのカラムを除く）
+        wide_every: このテーブル数ごとに1つを幅の広いテーブルにする（0で作らない）
+        wide_columns: 幅の広いテーブルのカラム数
+        fks_per_table: 各テーブルから前のテーブルへの外部キーの数
+        virtual_fks_per_table: 制約のない「<テーブル名>_id」カラムの数
+        indexes_per_table: 各テーブルのセカンダリインデックスの数
+        partitioned_every: このテーブル数ごとに1つをパーティションテーブルにする
+            （0で作らない）
+        partitions: パーティションテーブルあたりのパーティション数
+        comment_every: このカラム数ごとに1つコメントを付ける（0で付けない）
+        seed: 外部キーの参照先を決める乱数のシード
+    """
+
+    tables: int = 1000
+    columns: int = 10
+    wide_every: int = 100
+    wide_columns: int = 200
+    fks_per_table: int = 2
+    virtual_fks_per_table: int = 1
+    indexes_per_table: int = 2
+    partitioned_every: int = 200
+    partitions: int = 4
+    comment_every: int = 4
+    seed: int = 0
+
+
+def table_name(index: int) -> str:
+    return f"t_{index:05d}"
+
+
+def is_partitioned(spec: CatalogSpec, index: int) -> bool:
+    return spec.partitioned_every > 0 and index % spec.partitioned_every == (
+        spec.partitioned_every - 1
+    )
+
+
+def is_wide(spec: CatalogSpec, index: int) -> bool:
+    return spec.wide_every > 0 and index % spec.wide_every == spec.wide_every // 2
+
+
+def generate_statements(schema: str, spec: CatalogSpec) -> list[str]:
+    """
+    合成スキーマを作成するDDLのリスト
+
+    外部キーは前に作成したテーブル（パーティションテーブルを除く）から
+    シード付きの乱数で選ぶため、同じ spec からは常に同じスキーマになります。
+    """
+    rng = random.Random(spec.seed)  # noqa: S311
+    statements: list[str] = []
+    targets: list[str] = []
+    comment_counter = 0
+
+    for i in range(spec.tables):
+        name = table_name(i)
+        qualified = f"{schema}.{name}"
+        partitioned = is_partitioned(spec, i)
+        width = spec.wide_columns if is_wide(spec, i) else spec.columns
+
+        references = (
+            rng.sample(targets, min(spec.fks_per_table, len(targets)))
+            if targets
+            else []
+        )
+        virtual = (
+            rng.sample(targets, min(spec.virtual_fks_per_table, len(targets)))
+            if targets
+            else []
+        )
+
+        columns = ["id integer NOT NULL"]
+        columns += [
+            f"{target}_id integer REFERENCES {schema}.{target} (id)"
+            for target in references
+        ]
+        # 制約のない外部キー風のカラム（Virtual Foreign Keys の検出対象）
+        columns += [
+            f"{target}_id integer" for target in virtual if target not in references
+        ]
+        columns += [
+            f"attr_{n:03d} {DATA_TYPES[(i + n) % len(DATA_TYPES)]}"
+            for n in range(width)
+        ]
+        if partitioned:
+            columns += ["created_on date NOT NULL", "PRIMARY KEY (id, created_on)"]
+            statements.append(
+                f"CREATE TABLE {qualified} ({', '.join(columns)})"
+                " PARTITION BY RANGE (created_on)"
+            )
+            for p in range(spec.partitions):
+                statements.append(
+                    f"CREATE TABLE {qualified}_p{p} PARTITION OF {qualified}"
+                    f" FOR VALUES FROM ('{2000 + p}-01-01') TO ('{2001 + p}-01-01')"
+                )
+        else:
+            columns.append("PRIMARY KEY (id)")
+            statements.append(f"CREATE TABLE {qualified} ({', '.join(columns)})")
+            targets.append(name)
+
+        for n in range(min(spec.indexes_per_table, width)):
+            statements.append(
+                f"CREATE INDEX {name}_attr_{n:03d}_idx ON {qualified} (attr_{n:03d})"
+            )
+
+        statements.append(f"COMMENT ON TABLE {qualified} IS 'テーブル{i}'")
+        if spec.comment_every > 0:
+            for n in range(width):
+                comment_counter += 1
+                if comment_counter % spec.comment_every == 0:
+                    statements.append(
+                        f"COMMENT ON COLUMN {qualified}.attr_{n:03d} IS '属性{n}の説明'"
+                    )
+
+    return statements
+
+
+def create_catalog(schema: str, spec: CatalogSpec) -> float:
+    """
+    合成スキーマを作り直す
+
+    Returns:
+        作成にかかった秒数
+    """
+    started = time.perf_counter()
+    with admin_connection() as conn:
+        drop_schema(conn, schema, DROP_BATCH_SIZE)
+        with conn.cursor() as cur:
+            cur.execute(f"CREATE SCHEMA {schema}")
+        run_batched(conn, generate_statements(schema, spec))
+        # カタログの統計情報を更新して、計測時の実行計画を安定させる
+        with conn.cursor() as cur:
+            cur.execute(
+                "ANALYZE pg_catalog.pg_class, pg_catalog.pg_attribute,"
+                " pg_catalog.pg_constraint, pg_catalog.pg_index,"
+                " pg_catalog.pg_description, pg_catalog.pg_attrdef"
+            )
+    return time.perf_counter() - started
+
+
+def remove_catalog(schema: str) -> None:
+    """合成スキーマを削除"""
+    with admin_connection() as conn:
+        drop_schema(conn, schema, DROP_BATCH_SIZE)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--schema", default="bench_catalog")
+    parser.add_argument("--tables", type=int, default=CatalogSpec.tables)
+    parser.add_argument("--columns", type=int, default=CatalogSpec.columns)
+    parser.add_argument("--wide-every", type=int, default=CatalogSpec.wide_every)
+    parser.add_argument("--wide-columns", type=int, default=CatalogSpec.wide_columns)
+    parser.add_argument("--fks-per-table", type=int, default=CatalogSpec.fks_per_table)
+    parser.add_argument(
+        "--indexes-per-table", type=int, default=CatalogSpec.indexes_per_table
+    )
+    parser.add_argument(
+        "--partitioned-every", type=int, default=CatalogSpec.partitioned_every
+    )
+    parser.add_argument("--seed", type=int, default=CatalogSpec.seed)
+    parser.add_argument("--drop", action="store_true", help="合成スキーマを削除する")
+    args = parser.parse_args()
+
+    if args.drop:
+        remove_catalog(args.schema)
+        print(f"合成スキーマ {args.schema} を削除しました。")
+        return
+
+    spec = CatalogSpec(
+        tables=args.tables,
+        columns=args.columns,
+        wide_every=args.wide_every,
+        wide_columns=args.wide_columns,
+        fks_per_table=args.fks_per_table,
+        indexes_per_table=args.indexes_per_table,
+        partitioned_every=args.partitioned_every,
+        seed=args.seed,
+    )
+    print(f"合成スキーマ {args.schema} に {spec.tables} テーブルを作成中...")
+    elapsed = create_catalog(args.schema, spec)
+    print(f"作成しました（{elapsed:.1f} 秒）。")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+ベンチマーク共通ユーティリティ
+
+ベンチマークはローカルのテスト用DB（docker compose）に対して実行します。
+接続情報は統合テストと同じく PG* 環境変数で指定します。
+"""
+
+import os
+import platform
+import statistics
+import subprocess
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any
+
+import psycopg2
+from psycopg2.extensions import connection
+
+# 統合テストと同じテスト用DBをデフォルトにする
+os.environ.setdefault("PGHOST", "localhost")
+os.environ.setdefault("PGPORT", "5433")
+os.environ.setdefault("PGDATABASE", "testdb")
+os.environ.setdefault("PGUSER", "testuser")
+os.environ.setdefault("PGPASSWORD", "testpass")
+
+
+@contextmanager
+def admin_connection() -> Iterator[connection]:
+    """合成スキーマの作成に使う書き込み可能な接続（autocommit）"""
+    conn = psycopg2.connect(
+        host=os.environ["PGHOST"],
+        port=os.environ["PGPORT"],
+        database=os.environ["PGDATABASE"],
+        user=os.environ["PGUSER"],
+        password=os.environ["PGPASSWORD"],
+    )
+    conn.autocommit = True
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def run_batched(conn: connection, statements: list[str], batch_size: int = 500) -> None:
+    """
+    DDLをまとめて実行
+
+    1トランザクションで大量のテーブルを作るとロックテーブルが溢れるため、
+    batch_size 件ずつ別トランザクションで実行します。
+    """
+    with conn.cursor() as cur:
+        for start in range(0, len(statements), batch_size):
+            cur.execute(";\n".join(statements[start : start + batch_size]))
+
+
+def drop_schema(conn: connection, schema: str, batch_size: int = 500) -> None:
+    """
+    合成スキーマを削除
+
+    DROP SCHEMA CASCADE は全テーブルのロックを1トランザクションで取得するため、
+    先にテーブルを batch_size 件ずつ削除してからスキーマを削除します。
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT format('DROP TABLE IF EXISTS %%I.%%I CASCADE', n.nspname, c.relname)
+            FROM pg_catalog.pg_class c
+            JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = %s AND c.relkind IN ('r', 'p')
+              AND NOT c.relispartition
+            """,
+            (schema,),
+        )
+        statements = [row[0] for row in cur.fetchall()]
+    run_batched(conn, statements, batch_size)
+    with conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+
+
+def measure(
+    func: Callable[[], Any], repeat: int = 5, warmup: int = 1
+) -> dict[str, float]:
+    """
+    関数の実行時間を計測
+
+    Returns:
+        min / median / max（ミリ秒）
+    """
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {
+        "min_ms": min(samples),
+        "median_ms": statistics.median(samples),
+        "max_ms": max(samples),
+    }
+
+
+def print_result(name: str, result: dict[str, float]) -> None:
+    """計測結果を1行で表示"""
+    print(
+        f"{name:<40} median {result['median_ms']:9.2f} ms"
+        f"  (min {result['min_ms']:.2f} / max {result['max_ms']:.2f})"
+    )
+
+
+def environment() -> dict[str, Any]:
+    """結果を比較するときに参照する実行環境の情報"""
+    try:
+        commit = subprocess.run(  # noqa: S603
+            ["git", "rev-parse", "--short", "HEAD"],  # noqa: S607
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    with admin_connection() as conn, conn.cursor() as cur:
+        cur.execute("SHOW server_version")
+        row = cur.fetchone()
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "postgres_version": row[0] if row else None,
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+    }
@@ -0,0 +1,354 @@
+"""
+MCPサーバーの負荷試験
+
+FastMCP のインメモリクライアントから pgmcp.server.mcp を直接呼び出し、
+多数のエージェントが同時にツールを呼び出した場合のスループット・レイテンシ・
+PostgreSQL のバックエンド数・メモリ使用量を計測します。
+
+同時実行数ごとに、各ワーカー（1ワーカー = 1クライアントセッション）が
+--mix の比率でツールを選び、--duration 秒のあいだ呼び出しを繰り返します。
+対象は catalog_generator.py で作成する合成スキーマです。結果は JSON に
+書き出し、エラー率が --max-error-rate を超えた場合は終了コード1で終了します。
+
+    uv run python benchmarks/load_test.py --concurrency 50 100 500 --output load.json
+    uv run python benchmarks/load_test.py --mix list_tables=1,generate_er_diagram=1
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import statistics
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import asdict
+from typing import Any
+
+from catalog_generator import CatalogSpec, create_catalog, remove_catalog, table_name
+from common import admin_connection, environment
+from fastmcp import Client
+
+from pgmcp.cache import get_catalog_cache, reset_catalog_cache
+from pgmcp.connection import close_pool, pool_stats
+from pgmcp.executor import shutdown_executor
+from pgmcp.metrics import reset_metrics
+from pgmcp.server import mcp
+from pgmcp.singleflight import get_single_flight, reset_single_flight
+
+DEFAULT_MIX = "list_tables=4,describe_table=4,describe_tables=1,generate_er_diagram=1"
+
+# ツール名 → (乱数, スキーマ名, テーブル名のリスト) から引数を作る関数
+ARGUMENTS: dict[str, Callable[[random.Random, str, list[str]], dict[str, Any]]] = {
+    "list_tables": lambda rng, schema, tables: {"schema": schema},
+    "get_table_schema": lambda rng, schema, tables: {
+        "table_name": rng.choice(tables),
+        "schema": schema,
+    },
+    "describe_table": lambda rng, schema, tables: {
+        "table_name": rng.choice(tables),
+        "schema": schema,
+    },
+    "describe_tables": lambda rng, schema, tables: {
+        "schema": schema,
+        "tables": rng.sample(tables, min(10, len(tables))),
+    },
+    "generate_er_diagram": lambda rng, schema, tables: {
+        "schema": schema,
+        "seed_tables": [rng.choice(tables)],
+        "depth": 1,
+    },
+}
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    """「ツール名=重み」のカンマ区切りを dict に変換"""
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in ARGUMENTS:
+            raise argparse.ArgumentTypeError(
+                f"未対応のツールです: {name}（{', '.join(ARGUMENTS)} のいずれか）"
+            )
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    """p50 / p95 / p99 / max / mean（ミリ秒、最近傍順位）"""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def rank(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+    return {
+        "p50_ms": rank(0.50),
+        "p95_ms": rank(0.95),
+        "p99_ms": rank(0.99),
+        "max_ms": ordered[-1],
+        "mean_ms": statistics.fmean(ordered),
+    }
+
+
+def rss_mb() -> float | None:
+    """現在の常駐メモリ（MiB。/proc が無い環境では None）"""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as file:
+            pages = int(file.read().split()[1])
+    except OSError:
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+class Sampler(threading.Thread):
+    """
+    バックエンド数と常駐メモリを一定間隔で記録するスレッド
+
+    バックエンド数は pg_stat_activity のうち同じデータベースに接続している
+    クライアントバックエンドの数（このスレッドの接続を除く）です。
+    """
+
+    def __init__(self, interval: float) -> None:
+        super().__init__(name="load-test-sampler", daemon=True)
+        self.interval = interval
+        self.backends: list[int] = []
+        self.rss: list[float] = []
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        with admin_connection() as conn, conn.cursor() as cur:
+            while not self._stop_event.is_set():
+                cur.execute(
+                    """
+                    SELECT count(*) FROM pg_catalog.pg_stat_activity
+                    WHERE datname = current_database()
+                      AND backend_type = 'client backend'
+                      AND pid <> pg_backend_pid()
+                    """
+                )
+                row = cur.fetchone()
+                self.backends.append(row[0] if row else 0)
+                rss = rss_mb()
+                if rss is not None:
+                    self.rss.append(rss)
+                self._stop_event.wait(self.interval)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+async def worker(
+    client: Client,
+    rng: random.Random,
+    schema: str,
+    tables: list[str],
+    mix: dict[str, int],
+    deadline: float,
+    latencies: dict[str, list[float]],
+    errors: Counter[str],
+) -> None:
+    """deadline まで mix の比率でツールを選んで呼び出しを繰り返す"""
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        tool = rng.choices(names, weights)[0]
+        arguments = ARGUMENTS[tool](rng, schema, tables)
+        started = time.perf_counter()
+        try:
+            await client.call_tool(tool, arguments)
+        except Exception as e:
+            errors[f"{tool}: {type(e).__name__}"] += 1
+        else:
+            latencies[tool].append((time.perf_counter() - started) * 1000)
+
+
+async def run_level(
+    concurrency: int,
+    args: argparse.Namespace,
+    tables: list[str],
+    mix: dict[str, int],
+) -> dict[str, Any]:
+    """同時実行数 concurrency で --duration 秒間呼び出し、結果を集計"""
+    reset_single_flight()
+    latencies: dict[str, list[float]] = {tool: [] for tool in mix}
+    errors: Counter[str] = Counter()
+    sampler = Sampler(args.sample_interval)
+    if args.tracemalloc:
+        tracemalloc.start()
+    rss_before = rss_mb()
+
+    clients = [Client(mcp) for _ in range(concurrency)]
+    for client in clients:
+        await client.__aenter__()
+    try:
+        sampler.start()
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(
+            *(
+                worker(
+                    client,
+                    random.Random(args.seed + i),  # noqa: S311
+                    args.schema,
+                    tables,
+                    mix,
+                    deadline,
+                    latencies,
+                    errors,
+                )
+                for i, client in enumerate(clients)
+            )
+        )
+        elapsed = time.perf_counter() - started
+    finally:
+        sampler.stop()
+        for client in clients:
+            await client.__aexit__(None, None, None)
+
+    traced_peak = None
+    if args.tracemalloc:
+        traced_peak = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+
+    completed = sum(len(values) for values in latencies.values())
+    failed = sum(errors.values())
+    return {
+        "concurrency": concurrency,
+        "duration_s": elapsed,
+        "requests": completed + failed,
+        "errors": failed,
+        "error_rate": failed / (completed + failed) if completed + failed else 0.0,
+        "error_types": dict(errors),
+        "throughput_rps": completed / elapsed,
+        "latency": percentiles([v for values in latencies.values() for v in values]),
+        "tools": {
+            tool: {"requests": len(values), **percentiles(values)}
+            for tool, values in latencies.items()
+        },
+        "backends": {
+            "max": max(sampler.backends, default=0),
+            "mean": statistics.fmean(sampler.backends) if sampler.backends else 0,
+        },
+        "memory": {
+            "rss_before_mb": rss_before,
+            "rss_peak_mb": max(sampler.rss, default=None),
+            "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "tracemalloc_peak_mb": traced_peak,
+        },
+        "pool": asdict(pool_stats()),
+        "cache": asdict(get_catalog_cache().stats()),
+        "singleflight": asdict(get_single_flight().stats()),
+    }
+
+
+def print_level(result: dict[str, Any]) -> None:
+    latency = result["latency"]
+    memory = result["memory"]
+    print(
+        f"  同時実行数 {result['concurrency']:>4}: {result['throughput_rps']:8.1f} req/s"
+        f"  p50 {latency.get('p50_ms', 0):8.1f} / p95 {latency.get('p95_ms', 0):8.1f}"
+        f" / p99 {latency.get('p99_ms', 0):8.1f} ms"
+        f"  エラー {result['errors']}"
+        f"  バックエンド最大 {result['backends']['max']}"
+        f"  RSS最大 {memory['rss_peak_mb'] or 0:.0f} MiB"
+        f"  合流率 {result['singleflight']['coalescing_rate']:.0%}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        nargs="+",
+        default=[50, 100, 500],
+        help="同時実行数（クライアントセッション数）",
+    )
+    parser.add_argument("--duration", type=float, default=15.0, help="各段階の秒数")
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=parse_mix(DEFAULT_MIX),
+        help=f"ツールの比率（デフォルト: {DEFAULT_MIX}）",
+    )
+    parser.add_argument("--schema", default="bench_load")
+    parser.add_argument(
+        "--tables", type=int, default=1000, help="合成スキーマのテーブル数"
+    )
+    parser.add_argument(
+        "--reuse-schema",
+        action="store_true",
+        help="既存の合成スキーマを使う（作成・削除しない）",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="カタログキャッシュを無効にする"
+    )
+    parser.add_argument(
+        "--tracemalloc",
+        action="store_true",
+        help="Python のメモリ割り当てのピークも計測する（スループットは低下する）",
+    )
+    parser.add_argument("--sample-interval", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="load_test.json")
+    parser.add_argument(
+        "--max-error-rate",
+        type=float,
+        default=0.0,
+        help="これを超えるエラー率で終了コード1にする（デフォルト: 0）",
+    )
+    args = parser.parse_args()
+
+    if args.no_cache:
+        os.environ["PGMCP_CACHE_ENABLED"] = "0"
+    reset_catalog_cache()
+    reset_metrics()
+
+    spec = CatalogSpec(tables=args.tables)
+    if not args.reuse_schema:
+        print(f"合成スキーマ {args.schema} に {spec.tables} テーブルを作成中...")
+        print(f"作成しました（{create_catalog(args.schema, spec):.1f} 秒）。")
+    tables = [table_name(i) for i in range(spec.tables)]
+
+    results = []
+    try:
+        for concurrency in args.concurrency:
+            result = asyncio.run(run_level(concurrency, args, tables, args.mix))
+            print_level(result)
+            results.append(result)
+    finally:
+        shutdown_executor()
+        close_pool()
+        if not args.reuse_schema:
+            remove_catalog(args.schema)
+
+    document = {
+        "environment": environment(),
+        "settings": {
+            "duration_s": args.duration,
+            "mix": args.mix,
+            "tables": args.tables,
+            "cache": not args.no_cache,
+            "pool_max_size": pool_stats().max_size,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(document, file, ensure_ascii=False, indent=2)
+    print(f"\n結果を {args.output} に書き出しました。")
+
+    if any(result["error_rate"] > args.max_error_rate for result in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -74,6 +74,16 @@ CREATE TABLE audit.logs (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- reportingスキーマを作成（他スキーマを参照する外部キーのテスト用）
+CREATE SCHEMA reporting;
+
+-- reporting.user_summariesテーブル（public.usersを参照）
+CREATE TABLE reporting.user_summaries (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES public.users(id),
+    order_count INTEGER NOT NULL DEFAULT 0
+);
+
 -- =============================================================================
 -- データ型のバリエーション
 -- =============================================================================
@@ -228,6 +238,25 @@ CREATE TABLE cascade_set_null (
     value TEXT
 );
 
+-- 複合外部キーテスト用テーブル（参照先の主キーと逆順のカラムで参照する）
+CREATE TABLE composite_parent (
+    region_code VARCHAR(10) NOT NULL,
+    item_no INTEGER NOT NULL,
+    name VARCHAR(100),
+    PRIMARY KEY (region_code, item_no)
+);
+
+CREATE TABLE composite_child (
+    id SERIAL PRIMARY KEY,
+    parent_item_no INTEGER NOT NULL,
+    parent_region_code VARCHAR(10) NOT NULL,
+    CONSTRAINT composite_child_parent_fkey
+        FOREIGN KEY (parent_item_no, parent_region_code)
+        REFERENCES composite_parent (item_no, region_code)
+        ON DELETE RESTRICT
+        DEFERRABLE INITIALLY DEFERRED
+);
+
 -- Virtual Foreign Key (UUID PK with *_id)
 CREATE TABLE vfk_uuid_parent (
     vfk_uuid_parent_id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -0,0 +1,317 @@
+"""
+カタログキャッシュ
+
+スキーマのメタデータはめったに変わらないため、カタログクエリの結果や
+それをもとに組み立てた値を (データベース, スキーマ, キー) 単位でプロセス内に
+キャッシュします。キャッシュの鮮度はスキーマ単位の軽量なフィンガープリント
+クエリで確認し、フィンガープリントが変化した場合はそのスキーマのエントリを
+全て破棄します。
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, TypeVar, cast
+
+from psycopg2.extensions import cursor
+
+from pgmcp.connection import connection_target, env_float, env_int
+
+T = TypeVar("T")
+
+# スキーマ内のカタログ行の件数と最大xminを集計する。
+# DDLやCOMMENTはいずれかのカタログ行を追加・更新・削除するため、
+# 件数か最大xminのどちらかが必ず変化する。
+_FINGERPRINT_QUERY = """
+    WITH ns AS (
+        SELECT oid FROM pg_catalog.pg_namespace WHERE nspname = %s
+    ),
+    rels AS (
+        SELECT c.oid, c.xmin
+        FROM pg_catalog.pg_class c
+        WHERE c.relnamespace IN (SELECT oid FROM ns)
+    )
+    SELECT
+        (SELECT count(*) FROM rels),
+        (SELECT max(xmin::text::bigint) FROM rels),
+        (SELECT count(*) FROM pg_catalog.pg_attribute a
+         WHERE a.attrelid IN (SELECT oid FROM rels)),
+        (SELECT max(a.xmin::text::bigint) FROM pg_catalog.pg_attribute a
+         WHERE a.attrelid IN (SELECT oid FROM rels)),
+        (SELECT count(*) FROM pg_catalog.pg_constraint con
+         WHERE con.connamespace IN (SELECT oid FROM ns)),
+        (SELECT max(con.xmin::text::bigint) FROM pg_catalog.pg_constraint con
+         WHERE con.connamespace IN (SELECT oid FROM ns)),
+        (SELECT count(*) FROM pg_catalog.pg_index ix
+         WHERE ix.indrelid IN (SELECT oid FROM rels)),
+        (SELECT max(ix.xmin::text::bigint) FROM pg_catalog.pg_index ix
+         WHERE ix.indrelid IN (SELECT oid FROM rels)),
+        (SELECT count(*) FROM pg_catalog.pg_attrdef ad
+         WHERE ad.adrelid IN (SELECT oid FROM rels)),
+        (SELECT max(ad.xmin::text::bigint) FROM pg_catalog.pg_attrdef ad
+         WHERE ad.adrelid IN (SELECT oid FROM rels)),
+        (SELECT count(*) FROM pg_catalog.pg_description d
+         WHERE d.classoid = 'pg_catalog.pg_class'::regclass
+           AND d.objoid IN (SELECT oid FROM rels)),
+        (SELECT max(d.xmin::text::bigint) FROM pg_catalog.pg_description d
+         WHERE d.classoid = 'pg_catalog.pg_class'::regclass
+           AND d.objoid IN (SELECT oid FROM rels))
+"""
+
+
+@dataclass(frozen=True)
+class CacheConfig:
+    """
+    カタログキャッシュの設定
+
+    Attributes:
+        enabled: キャッシュを有効にするか
+        check_interval: フィンガープリントを確認する最短間隔（秒）
+        max_entries: 保持するエントリ数の上限（超えた分は古いものから破棄）
+    """
+
+    enabled: bool = True
+    check_interval: float = 5.0
+    max_entries: int = 1024
+
+    @classmethod
+    def from_env(cls) -> "CacheConfig":
+        """環境変数から設定を読み込む"""
+        default = cls()
+        enabled = os.environ.get("PGMCP_CACHE_ENABLED")
+        return cls(
+            enabled=(
+                enabled.lower() not in ("0", "false", "no", "off")
+                if enabled
+                else default.enabled
+            ),
+            check_interval=env_float(
+                "PGMCP_CACHE_CHECK_INTERVAL", default.check_interval
+            ),
+            max_entries=env_int("PGMCP_CACHE_MAX_ENTRIES", default.max_entries),
+        )
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """
+    カタログキャッシュの統計情報
+
+    Attributes:
+        hits: キャッシュから結果を返した回数
+        misses: カタログクエリを実行した回数
+        invalidations: フィンガープリントの変化でスキーマを破棄した回数
+        fingerprint_checks: フィンガープリントクエリを実行した回数
+        entries: 現在のエントリ数
+    """
+
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+    fingerprint_checks: int = 0
+    entries: int = 0
+
+
+@dataclass
+class _SchemaState:
+    """スキーマごとのフィンガープリントと最終確認時刻"""
+
+    fingerprint: tuple[Any, ...]
+    checked_at: float
+
+
+class CatalogCache:
+    """
+    スキーマ単位で鮮度を確認するスレッドセーフなカタログキャッシュ
+    """
+
+    def __init__(self, config: CacheConfig | None = None) -> None:
+        self.config = config or CacheConfig()
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[str, ...], Any] = OrderedDict()
+        self._schemas: dict[tuple[str, str], _SchemaState] = {}
+        # スキーマのエントリを破棄するたびに進める世代。ロック外で作成した値が
+        # 作成中に破棄されたスキーマのものであれば保存しない
+        self._generations: dict[tuple[str, str], int] = {}
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._fingerprint_checks = 0
+
+    def _validate(self, cur: cursor, database: str, schema: str) -> None:
+        """必要であればフィンガープリントを確認し、変化していればスキーマを破棄"""
+        state_key = (database, schema)
+        now = time.monotonic()
+        with self._lock:
+            if self._is_fresh(database, schema, now):
+                return
+
+        cur.execute(_FINGERPRINT_QUERY, (schema,))
+        fingerprint = tuple(cur.fetchone() or ())
+
+        with self._lock:
+            self._fingerprint_checks += 1
+            state = self._schemas.get(state_key)
+            if state is not None and state.fingerprint != fingerprint:
+                self._invalidations += 1
+                self._generations[state_key] = self._generations.get(state_key, 0) + 1
+                stale = [key for key in self._entries if key[:2] == (database, schema)]
+                for key in stale:
+                    del self._entries[key]
+            self._schemas[state_key] = _SchemaState(fingerprint, now)
+
+    def _is_fresh(self, database: str, schema: str, now: float) -> bool:
+        """確認間隔内にフィンガープリントを確認済みか（ロック内で呼び出すこと）"""
+        state = self._schemas.get((database, schema))
+        return state is not None and now - state.checked_at < self.config.check_interval
+
+    def peek(self, schema: str, key: tuple[str, ...]) -> Any | None:
+        """
+        データベースに問い合わせずにキャッシュ済みの値を取得
+
+        フィンガープリントを確認間隔内に確認済みで、値がキャッシュされている
+        場合のみ返します。それ以外は None を返すので get_or_build で取得します。
+
+        Args:
+            schema: 鮮度確認の単位となるスキーマ名
+            key: スキーマ内でエントリを識別するキー
+
+        Returns:
+            キャッシュ済みの値、または None
+        """
+        if not self.config.enabled:
+            return None
+        database = connection_target()
+        entry_key = (database, schema, *key)
+        with self._lock:
+            if not self._is_fresh(database, schema, time.monotonic()):
+                return None
+            value = self._entries.get(entry_key)
+            if value is not None:
+                self._entries.move_to_end(entry_key)
+                self._hits += 1
+            return value
+
+    def get_or_build(
+        self,
+        cur: cursor,
+        schema: str,
+        key: tuple[str, ...],
+        build: Callable[[], T],
+        cacheable: Callable[[T], bool] | None = None,
+    ) -> T:
+        """
+        キャッシュ済みの値を取得し、無ければ build で作成してキャッシュ
+
+        Args:
+            cur: フィンガープリントの確認に使うカーソル
+            schema: 鮮度確認の単位となるスキーマ名
+            key: スキーマ内でエントリを識別するキー（例: ("er_graph", "all")）
+            build: キャッシュミス時に値を作成する関数
+            cacheable: 作成した値をキャッシュするかを判定する関数
+                （省略時は常にキャッシュ）
+
+        Returns:
+            キャッシュ済みまたは作成した値
+        """
+        if not self.config.enabled:
+            return build()
+
+        database = connection_target()
+        self._validate(cur, database, schema)
+
+        entry_key = (database, schema, *key)
+        with self._lock:
+            value = self._entries.get(entry_key)
+            if value is not None:
+                self._entries.move_to_end(entry_key)
+                self._hits += 1
+                return cast(T, value)
+            self._misses += 1
+            generation = self._generations.get((database, schema), 0)
+
+        value = build()
+        if cacheable is not None and not cacheable(value):
+            return value
+
+        with self._lock:
+            # 作成中に別のスレッドがスキーマを破棄した場合は古い値の可能性がある
+            if self._generations.get((database, schema), 0) != generation:
+                return value
+            self._entries[entry_key] = value
+            self._entries.move_to_end(entry_key)
+            while len(self._entries) > self.config.max_entries:
+                self._entries.popitem(last=False)
+
+        return value
+
+    def fetch(
+        self,
+        cur: cursor,
+        schema: str,
+        key: tuple[str, ...],
+        query: str,
+        params: tuple[Any, ...],
+    ) -> list[tuple[Any, ...]]:
+        """
+        カタログクエリの結果をキャッシュ経由で取得
+
+        Args:
+            cur: クエリを実行するカーソル
+            schema: 鮮度確認の単位となるスキーマ名
+            key: スキーマ内でエントリを識別するキー（例: ("columns", "users")）
+            query: キャッシュミス時に実行するクエリ
+            params: クエリパラメータ
+
+        Returns:
+            クエリ結果の行のリスト
+        """
+
+        def run_query() -> list[tuple[Any, ...]]:
+            cur.execute(query, params)
+            return cur.fetchall()
+
+        return self.get_or_build(cur, schema, key, run_query)
+
+    def clear(self) -> None:
+        """全てのエントリとフィンガープリントを破棄"""
+        with self._lock:
+            for state_key in self._schemas:
+                self._generations[state_key] = self._generations.get(state_key, 0) + 1
+            self._entries.clear()
+            self._schemas.clear()
+
+    def stats(self) -> CacheStats:
+        """統計情報のスナップショットを取得"""
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                invalidations=self._invalidations,
+                fingerprint_checks=self._fingerprint_checks,
+                entries=len(self._entries),
+            )
+
+
+_catalog_cache: CatalogCache | None = None
+_catalog_cache_lock = threading.Lock()
+
+
+def get_catalog_cache() -> CatalogCache:
+    """プロセス共有のカタログキャッシュを取得（初回呼び出し時に作成）"""
+    global _catalog_cache
+    if _catalog_cache is None:
+        with _catalog_cache_lock:
+            if _catalog_cache is None:
+                _catalog_cache = CatalogCache(CacheConfig.from_env())
+    return _catalog_cache
+
+
+def reset_catalog_cache() -> None:
+    """プロセス共有のカタログキャッシュを破棄（次回取得時に設定を読み直す）"""
+    global _catalog_cache
+    with _catalog_cache_lock:
+        _catalog_cache = None
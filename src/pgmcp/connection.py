@@ -1,11 +1,74 @@
 """
 データベース接続管理
+
+ツールからの接続はプロセス共有のコネクションプールを経由して取得します。
+プールの設定は環境変数で変更できます。
+
+貸し出した接続のトランザクションには statement_timeout と lock_timeout を
+SET LOCAL で設定するため、マイグレーション中のロック待ちなどでツールの
+呼び出しが無期限に止まることはありません。
 """
 
+import atexit
 import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, suppress
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
 
 import psycopg2
-from psycopg2.extensions import connection
+from psycopg2.extensions import (
+    TRANSACTION_STATUS_IDLE,
+    QueryCanceledError,
+    connection,
+    cursor,
+)
+from psycopg2.pool import PoolError
+
+from pgmcp.metrics import current_call
+
+
+class InstrumentedCursor(cursor):
+    """
+    計測中のツール呼び出しにクエリの実行・取得時間と行数を加算するカーソル
+
+    計測していない場合はコンテキスト変数を参照するだけで通常のカーソルと
+    同じように動作します。
+    """
+
+    def execute(self, query: Any, vars: Any = None) -> None:
+        call = current_call()
+        if call is None:
+            return super().execute(query, vars)
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            call.execute += time.perf_counter() - started
+            call.queries += 1
+
+    def fetchone(self) -> tuple[Any, ...] | None:
+        call = current_call()
+        if call is None:
+            return super().fetchone()
+        started = time.perf_counter()
+        row = super().fetchone()
+        call.fetch += time.perf_counter() - started
+        call.rows += row is not None
+        return row
+
+    def fetchall(self) -> list[tuple[Any, ...]]:
+        call = current_call()
+        if call is None:
+            return super().fetchall()
+        started = time.perf_counter()
+        rows = super().fetchall()
+        call.fetch += time.perf_counter() - started
+        call.rows += len(rows)
+        return rows
 
 
 def get_connection() -> connection:
@@ -16,9 +79,475 @@ def get_connection() -> connection:
         database=os.environ.get("PGDATABASE"),
         user=os.environ.get("PGUSER"),
         password=os.environ.get("PGPASSWORD"),
+        cursor_factory=InstrumentedCursor,
     )
 
     # 誤操作防止のため接続をリードオンリーに固定
     conn.set_session(readonly=True)
 
     return conn
+
+
+def connection_target() -> str:
+    """
+    接続先データベースを識別する文字列（host:port/dbname）
+
+    get_connection と同じ環境変数から求めるため、接続を確立せずに
+    接続先を識別できます。
+    """
+    host = os.environ.get("PGHOST", "localhost")
+    port = os.environ.get("PGPORT", "5432")
+    return f"{host}:{port}/{os.environ.get('PGDATABASE', '')}"
+
+
+def env_int(name: str, default: int) -> int:
+    """整数の環境変数を取得（未設定または空の場合は default）"""
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def env_float(name: str, default: float) -> float:
+    """小数の環境変数を取得（未設定または空の場合は default）"""
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    """
+    コネクションプールの設定
+
+    Attributes:
+        min_size: アイドルタイムアウトでも閉じずに保持する接続数
+        max_size: 同時に確立する接続数の上限
+        idle_timeout: アイドル状態の接続を閉じるまでの秒数
+        max_lifetime: 接続を作り直すまでの最大寿命（秒）
+        timeout: 接続が空くのを待つ最大秒数
+        check_interval: 貸し出し時に疎通確認を行うアイドル秒数（0で毎回）
+    """
+
+    min_size: int = 1
+    max_size: int = 10
+    idle_timeout: float = 300.0
+    max_lifetime: float = 3600.0
+    timeout: float = 30.0
+    check_interval: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> "PoolConfig":
+        """環境変数から設定を読み込む"""
+        default = cls()
+        return cls(
+            min_size=env_int("PGMCP_POOL_MIN_SIZE", default.min_size),
+            max_size=env_int("PGMCP_POOL_MAX_SIZE", default.max_size),
+            idle_timeout=env_float("PGMCP_POOL_IDLE_TIMEOUT", default.idle_timeout),
+            max_lifetime=env_float("PGMCP_POOL_MAX_LIFETIME", default.max_lifetime),
+            timeout=env_float("PGMCP_POOL_TIMEOUT", default.timeout),
+            check_interval=env_float(
+                "PGMCP_POOL_CHECK_INTERVAL", default.check_interval
+            ),
+        )
+
+
+@dataclass(frozen=True)
+class QueryTimeouts:
+    """
+    クエリの制限時間（ミリ秒。0は無制限）
+
+    PGMCP_STATEMENT_TIMEOUT / PGMCP_LOCK_TIMEOUT で全体の値を、
+    末尾にツール名を付けた PGMCP_STATEMENT_TIMEOUT_GENERATE_ER_DIAGRAM の
+    ような環境変数でツールごとの値を設定できます。
+
+    Attributes:
+        statement_timeout: 1つのクエリの最大実行時間
+        lock_timeout: ロックの取得を待つ最大時間
+    """
+
+    statement_timeout: int = 30000
+    lock_timeout: int = 5000
+
+    @classmethod
+    def from_env(cls, tool: str | None = None) -> "QueryTimeouts":
+        """
+        環境変数から設定を読み込む
+
+        Args:
+            tool: ツール名（指定するとツールごとの設定を優先）
+        """
+        default = cls()
+        statement_timeout = env_int(
+            "PGMCP_STATEMENT_TIMEOUT", default.statement_timeout
+        )
+        lock_timeout = env_int("PGMCP_LOCK_TIMEOUT", default.lock_timeout)
+        if tool:
+            suffix = tool.upper()
+            statement_timeout = env_int(
+                f"PGMCP_STATEMENT_TIMEOUT_{suffix}", statement_timeout
+            )
+            lock_timeout = env_int(f"PGMCP_LOCK_TIMEOUT_{suffix}", lock_timeout)
+        return cls(statement_timeout=statement_timeout, lock_timeout=lock_timeout)
+
+
+class QueryScope:
+    """
+    1回のツール呼び出しで実行するクエリの制限時間とキャンセル
+
+    スコープ内で貸し出した接続を記録し、cancel() で実行中のクエリを
+    サーバー側で中断します（クライアントがリクエストをキャンセルした場合）。
+    """
+
+    def __init__(self, timeouts: QueryTimeouts | None = None) -> None:
+        self.timeouts = timeouts or QueryTimeouts.from_env()
+        self._lock = threading.Lock()
+        self._connections: set[connection] = set()
+        self._cancelled = False
+
+    @property
+    def cancelled(self) -> bool:
+        """キャンセル済みか"""
+        return self._cancelled
+
+    def attach(self, conn: connection) -> None:
+        """
+        接続を記録
+
+        Raises:
+            QueryCanceledError: スコープが既にキャンセルされている場合
+        """
+        with self._lock:
+            if self._cancelled:
+                raise QueryCanceledError("リクエストはキャンセルされました。")
+            self._connections.add(conn)
+
+    def detach(self, conn: connection) -> None:
+        """
+        接続の記録を解除
+
+        cancel() の実行中は完了まで待つため、解除した接続（プールに返却して
+        別の呼び出しが使う接続）にキャンセル要求が届くことはありません。
+        """
+        with self._lock:
+            self._connections.discard(conn)
+
+    def cancel(self) -> None:
+        """実行中のクエリをキャンセルし、以降の接続の貸し出しを止める"""
+        with self._lock:
+            self._cancelled = True
+            # 記録中の接続だけに送るため、detach と同じロックを保持したまま送る
+            # （バックエンドへのキャンセル要求は別スレッドから呼び出し可能）
+            for conn in self._connections:
+                with suppress(psycopg2.Error):
+                    conn.cancel()
+
+
+_query_scope: ContextVar[QueryScope | None] = ContextVar(
+    "pgmcp_query_scope", default=None
+)
+
+
+@contextmanager
+def query_scope(scope: QueryScope) -> Iterator[QueryScope]:
+    """ブロック内で貸し出す接続に scope の制限時間とキャンセルを適用する"""
+    token = _query_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _query_scope.reset(token)
+
+
+def _internal_cursor(conn: connection) -> cursor:
+    """
+    ツールのクエリとして計測しない文（疎通確認・SET）を実行するカーソル
+
+    接続の cursor_factory（InstrumentedCursor）を使わないため、メトリクスの
+    クエリ数や execute の時間に含まれません。
+    """
+    return conn.cursor(cursor_factory=cursor)
+
+
+def _apply_timeouts(conn: connection, timeouts: QueryTimeouts) -> None:
+    """現在のトランザクションに制限時間を設定（ロールバックで元に戻る）"""
+    with _internal_cursor(conn) as cur:
+        cur.execute(
+            "SET LOCAL statement_timeout = %s; SET LOCAL lock_timeout = %s",
+            (timeouts.statement_timeout, timeouts.lock_timeout),
+        )
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    """
+    コネクションプールの利用状況
+
+    Attributes:
+        size: 確立済みの接続数（貸し出し中を含む）
+        idle: アイドル状態の接続数
+        max_size: 同時接続数の上限
+    """
+
+    size: int = 0
+    idle: int = 0
+    max_size: int = 0
+
+
+@dataclass
+class _PoolEntry:
+    """プール内の物理接続と利用状況"""
+
+    conn: connection
+    created_at: float
+    last_used_at: float
+
+
+def _close_quietly(conn: connection) -> None:
+    with suppress(psycopg2.Error):
+        conn.close()
+
+
+class ConnectionPool:
+    """
+    スレッドセーフなコネクションプール
+
+    物理接続はリードオンリー設定済みの状態で作成され、貸し出し時に
+    寿命・アイドル時間・疎通を確認してから再利用されます。
+    """
+
+    def __init__(
+        self,
+        config: PoolConfig | None = None,
+        connect: Callable[[], connection] = get_connection,
+    ) -> None:
+        self.config = config or PoolConfig()
+        if self.config.max_size < 1:
+            raise ValueError("max_size は1以上を指定してください。")
+        self._connect = connect
+        self._cond = threading.Condition()
+        self._idle: list[_PoolEntry] = []
+        self._size = 0
+        self._closed = False
+
+    @property
+    def size(self) -> int:
+        """確立済みの接続数（貸し出し中を含む）"""
+        return self._size
+
+    @property
+    def idle_count(self) -> int:
+        """アイドル状態の接続数"""
+        return len(self._idle)
+
+    def _is_expired(self, entry: _PoolEntry, now: float) -> bool:
+        if now - entry.created_at >= self.config.max_lifetime:
+            return True
+        return (
+            now - entry.last_used_at >= self.config.idle_timeout
+            and self._size > self.config.min_size
+        )
+
+    def _discard(self, entry: _PoolEntry) -> None:
+        """接続を閉じてプールから除外（ロック外で呼び出すこと）"""
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+        _close_quietly(entry.conn)
+
+    def _is_healthy(self, entry: _PoolEntry, now: float) -> bool:
+        conn = entry.conn
+        if conn.closed:
+            return False
+        if now - entry.last_used_at < self.config.check_interval:
+            return True
+        try:
+            with _internal_cursor(conn) as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+    def _acquire(self) -> _PoolEntry:
+        deadline = time.monotonic() + self.config.timeout
+        while True:
+            stale: list[_PoolEntry] = []
+            entry: _PoolEntry | None = None
+            create = False
+            with self._cond:
+                if self._closed:
+                    raise PoolError("コネクションプールは既にクローズされています。")
+                now = time.monotonic()
+                while self._idle:
+                    candidate = self._idle.pop()
+                    if self._is_expired(candidate, now):
+                        stale.append(candidate)
+                        self._size -= 1
+                        continue
+                    entry = candidate
+                    break
+                if entry is None and self._size < self.config.max_size:
+                    self._size += 1
+                    create = True
+                elif entry is None and not stale:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise PoolError(
+                            "コネクションプールから接続を取得できませんでした"
+                            f"（{self.config.timeout}秒でタイムアウト）。"
+                        )
+                    self._cond.wait(remaining)
+
+            for old in stale:
+                _close_quietly(old.conn)
+
+            if create:
+                try:
+                    conn = self._connect()
+                    created_at = time.monotonic()
+                    return _PoolEntry(conn, created_at, created_at)
+                except BaseException:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+
+            if entry is not None:
+                if self._is_healthy(entry, time.monotonic()):
+                    return entry
+                self._discard(entry)
+
+    def _release(self, entry: _PoolEntry) -> None:
+        conn = entry.conn
+        if not conn.closed:
+            # 読み取りトランザクションを終了してスナップショットを解放
+            with suppress(psycopg2.Error):
+                conn.rollback()
+        if conn.closed or conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+            self._discard(entry)
+            return
+
+        entry.last_used_at = time.monotonic()
+        with self._cond:
+            closed = self._closed
+            if closed:
+                self._size -= 1
+            else:
+                self._idle.append(entry)
+            self._cond.notify()
+        if closed:
+            _close_quietly(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[connection]:
+        """
+        プールから接続を借りるコンテキストマネージャ
+
+        ブロックを抜けるとトランザクションをロールバックして接続をプールに返却します。
+        """
+        entry = self._acquire()
+        try:
+            yield entry.conn
+        finally:
+            self._release(entry)
+
+    def stats(self) -> PoolStats:
+        """利用状況のスナップショットを取得"""
+        with self._cond:
+            return PoolStats(self._size, len(self._idle), self.config.max_size)
+
+    def close(self) -> None:
+        """アイドル接続を全て閉じ、以降の貸し出しを停止"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            _close_quietly(entry.conn)
+
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """プロセス共有のコネクションプールを取得（初回呼び出し時に作成）"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(PoolConfig.from_env())
+    return _pool
+
+
+def close_pool() -> None:
+    """プロセス共有のコネクションプールをクローズ"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+
+def replace_pool(pool: ConnectionPool | None) -> ConnectionPool | None:
+    """
+    プロセス共有のプールを差し替える（クローズはしない）
+
+    記録・再生（pgmcp.replay）で接続の取得先を切り替えるために使います。
+
+    Returns:
+        差し替える前のプール（未作成の場合は None）
+    """
+    global _pool
+    with _pool_lock:
+        previous, _pool = _pool, pool
+    return previous
+
+
+atexit.register(close_pool)
+
+
+def pool_stats() -> PoolStats:
+    """プロセス共有のプールの利用状況（未作成の場合は接続数0）"""
+    pool = _pool
+    if pool is None:
+        return PoolStats(max_size=PoolConfig.from_env().max_size)
+    return pool.stats()
+
+
+@contextmanager
+def pooled_connection() -> Iterator[connection]:
+    """
+    プロセス共有のプールから接続を借りる
+
+    現在の QueryScope（なければ環境変数）の制限時間を設定した
+    トランザクションの状態で貸し出します。
+    """
+    scope = _query_scope.get()
+    timeouts = scope.timeouts if scope is not None else QueryTimeouts.from_env()
+    call = current_call()
+    started = time.perf_counter() if call is not None else 0.0
+    with get_pool().connection() as conn:
+        if call is not None:
+            call.connect += time.perf_counter() - started
+        if scope is not None:
+            scope.attach(conn)
+        try:
+            # SET は SET TRANSACTION より前に実行してもスナップショットを取らない
+            _apply_timeouts(conn, timeouts)
+            yield conn
+        finally:
+            if scope is not None:
+                scope.detach(conn)
+
+
+@contextmanager
+def snapshot_connection() -> Iterator[connection]:
+    """
+    単一のスナップショットで複数のクエリを実行するための接続を借りる
+
+    REPEATABLE READ のトランザクションを開始した状態で貸し出すため、
+    ブロック内のクエリは全て同じ時点のカタログを参照します。
+    """
+    with pooled_connection() as conn:
+        with _internal_cursor(conn) as cur:
+            cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        yield conn
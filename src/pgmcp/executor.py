@@ -0,0 +1,146 @@
+"""
+ブロッキング処理の非同期実行
+
+psycopg2のクエリはブロッキングのため、ツールハンドラーからは専用の
+スレッドプールで実行してイベントループを塞がないようにします。
+クライアントがリクエストをキャンセルした場合は、ワーカースレッドで
+実行中のクエリもサーバー側でキャンセルします。
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import ParamSpec, TypeVar
+
+from pgmcp.connection import (
+    PoolConfig,
+    QueryScope,
+    QueryTimeouts,
+    connection_target,
+    env_int,
+    query_scope,
+)
+from pgmcp.metrics import measure_call
+from pgmcp.singleflight import get_single_flight
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _max_workers() -> int:
+    """
+    ワーカースレッド数を決定
+
+    PGMCP_EXECUTOR_THREADS が未設定の場合はコネクションプールの上限に合わせます。
+    プールの上限を超えるスレッドは接続待ちになるだけのためです。
+    """
+    return env_int("PGMCP_EXECUTOR_THREADS", PoolConfig.from_env().max_size)
+
+
+def get_executor() -> ThreadPoolExecutor | None:
+    """
+    ツール実行用のスレッドプールを取得
+
+    Returns:
+        スレッドプール。PGMCP_EXECUTOR_THREADS=0 の場合はNone（同期実行）
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = _max_workers()
+                if workers <= 0:
+                    return None
+                _executor = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix="pgmcp-tool"
+                )
+    return _executor
+
+
+def shutdown_executor() -> None:
+    """ツール実行用のスレッドプールを停止"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+def _tool_name(func: Callable[..., object]) -> str | None:
+    """実装関数名からツール名を求める（list_tables_impl → list_tables）"""
+    name = getattr(func, "__name__", None)
+    if not isinstance(name, str) or not name.endswith("_impl"):
+        return None
+    return name.removesuffix("_impl")
+
+
+async def run_blocking(func: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+    """
+    ブロッキング関数をワーカースレッドで実行して結果を待つ
+
+    呼び出し元のコンテキスト変数はワーカースレッドに引き継がれます。
+    スレッドプールが無効な場合はイベントループ上でそのまま実行します。
+
+    関数内で借りた接続には関数名から求めたツールごとの制限時間
+    （QueryTimeouts）を設定し、待機中のタスクがキャンセルされた場合は
+    実行中のクエリにキャンセル要求を送ります。ツールの実装関数
+    （*_impl）の場合は処理時間などをメトリクスに記録します。
+
+    Args:
+        func: 実行する関数
+        *args: 関数の位置引数
+        **kwargs: 関数のキーワード引数
+
+    Returns:
+        関数の戻り値
+    """
+    tool = _tool_name(func)
+    scope = QueryScope(QueryTimeouts.from_env(tool))
+
+    def call() -> T:
+        with query_scope(scope):
+            if tool is None:
+                return func(*args, **kwargs)
+            return measure_call(tool, lambda: func(*args, **kwargs))
+
+    executor = get_executor()
+    if executor is None:
+        return call()
+
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    try:
+        return await loop.run_in_executor(executor, functools.partial(ctx.run, call))
+    except asyncio.CancelledError:
+        # ワーカースレッドは止められないため、バックエンドのクエリを中断して
+        # 接続をすぐにプールへ返させる（キャンセル要求の送信はループ外で行う）
+        loop.run_in_executor(None, scope.cancel)
+        raise
+
+
+async def run_coalesced(func: Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+    """
+    run_blocking と同じく実行し、同じ呼び出しが実行中なら結果を共有する
+
+    関数・引数・接続先データベースが同じ呼び出しが実行中の場合は、
+    新たに実行せずにその結果を待ちます（single-flight）。
+
+    Args:
+        func: 実行する関数（副作用がなく、同じ引数なら同じ結果を返すもの）
+        *args: 関数の位置引数
+        **kwargs: 関数のキーワード引数
+
+    Returns:
+        関数の戻り値
+    """
+    # 引数には list を含むため repr でハッシュ可能なキーにする
+    key = (connection_target(), func, repr(args), repr(sorted(kwargs.items())))
+    return await get_single_flight().run(
+        key, lambda: run_blocking(func, *args, **kwargs)
+    )
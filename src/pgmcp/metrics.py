@@ -0,0 +1,395 @@
+"""
+ツール呼び出しのメトリクス
+
+ツールごとに接続の取得（connect）、クエリの実行（execute）、結果の取得
+（fetch）、それ以外の処理（format。結果の整形やグラフの組み立て）の時間と、
+取得した行数・出力のバイト数をヒストグラムに集計します。
+
+計測中のツール呼び出しはコンテキスト変数で受け渡すため、接続やカーソルは
+呼び出し元を意識せずに時間を加算できます。PGMCP_METRICS_ENABLED=0 の場合は
+コンテキスト変数を1回参照するだけで何も記録しません。
+"""
+
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+# 処理時間（秒）・行数・出力バイト数のバケットの上限
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+ROW_BUCKETS = (0, 1, 10, 100, 1_000, 10_000, 100_000)
+BYTE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+PHASES = ("connect", "execute", "fetch", "format", "total")
+
+
+class Histogram:
+    """
+    累積バケット形式のヒストグラム（Prometheus の histogram と同じ形）
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        # 末尾は +Inf のバケット
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """値を1つ記録"""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """(le, その値以下の件数) のリスト（最後は "+Inf"）"""
+        result = []
+        total = 0
+        for bound, count in zip((*self.buckets, None), self.counts, strict=True):
+            total += count
+            result.append(("+Inf" if bound is None else _format_number(bound), total))
+        return result
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": dict(self.cumulative()),
+        }
+
+
+@dataclass
+class CallMetrics:
+    """
+    1回のツール呼び出しで計測中の値（ワーカースレッド内でのみ更新）
+
+    Attributes:
+        connect: 接続の取得にかかった秒数
+        execute: クエリの実行にかかった秒数
+        fetch: 結果の取得にかかった秒数
+        queries: 実行したクエリ数
+        rows: 取得した行数
+    """
+
+    connect: float = 0.0
+    execute: float = 0.0
+    fetch: float = 0.0
+    queries: int = 0
+    rows: int = 0
+
+
+@dataclass
+class _ToolMetrics:
+    """ツールごとの集計値"""
+
+    calls: int = 0
+    errors: int = 0
+    queries: int = 0
+    phases: dict[str, Histogram] = field(
+        default_factory=lambda: {phase: Histogram(LATENCY_BUCKETS) for phase in PHASES}
+    )
+    rows: Histogram = field(default_factory=lambda: Histogram(ROW_BUCKETS))
+    output_bytes: Histogram = field(default_factory=lambda: Histogram(BYTE_BUCKETS))
+
+
+class MetricsRegistry:
+    """
+    ツールごとのメトリクスを集計するスレッドセーフなレジストリ
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._tools: dict[str, _ToolMetrics] = {}
+
+    def record(
+        self,
+        tool: str,
+        call: CallMetrics,
+        total: float,
+        output_bytes: int | None,
+        error: bool,
+    ) -> None:
+        """
+        ツール呼び出し1回分の計測値を記録
+
+        Args:
+            tool: ツール名
+            call: 接続・クエリ・取得の計測値
+            total: 呼び出し全体の秒数
+            output_bytes: 出力のバイト数（エラーの場合は None）
+            error: 例外で終了したか
+        """
+        formatting = max(total - call.connect - call.execute - call.fetch, 0.0)
+        with self._lock:
+            metrics = self._tools.get(tool)
+            if metrics is None:
+                metrics = self._tools[tool] = _ToolMetrics()
+            metrics.calls += 1
+            metrics.queries += call.queries
+            if error:
+                metrics.errors += 1
+            phases = metrics.phases
+            phases["connect"].observe(call.connect)
+            phases["execute"].observe(call.execute)
+            phases["fetch"].observe(call.fetch)
+            phases["format"].observe(formatting)
+            phases["total"].observe(total)
+            metrics.rows.observe(call.rows)
+            if output_bytes is not None:
+                metrics.output_bytes.observe(output_bytes)
+
+    def snapshot(self) -> dict[str, Any]:
+        """ツールごとの集計値を dict で取得"""
+        with self._lock:
+            return {
+                tool: {
+                    "calls": metrics.calls,
+                    "errors": metrics.errors,
+                    "queries": metrics.queries,
+                    "phases": {
+                        phase: histogram.to_dict()
+                        for phase, histogram in metrics.phases.items()
+                    },
+                    "rows": metrics.rows.to_dict(),
+                    "output_bytes": metrics.output_bytes.to_dict(),
+                }
+                for tool, metrics in sorted(self._tools.items())
+            }
+
+    def clear(self) -> None:
+        """全ての集計値を破棄"""
+        with self._lock:
+            self._tools.clear()
+
+
+_current_call: ContextVar[CallMetrics | None] = ContextVar(
+    "pgmcp_current_call", default=None
+)
+
+
+def current_call() -> CallMetrics | None:
+    """計測中のツール呼び出し（計測していない場合は None）"""
+    return _current_call.get()
+
+
+def measure_call(tool: str, call: Callable[[], T]) -> T:
+    """
+    call を実行し、ツール tool の呼び出しとして計測する
+
+    Args:
+        tool: ツール名
+        call: 実行する処理（戻り値が文字列の場合は出力のバイト数も記録）
+
+    Returns:
+        call の戻り値
+    """
+    registry = get_metrics()
+    if not registry.enabled:
+        return call()
+
+    metrics = CallMetrics()
+    token = _current_call.set(metrics)
+    started = time.perf_counter()
+    output_bytes: int | None = None
+    error = True
+    try:
+        result = call()
+        error = False
+        if isinstance(result, str):
+            output_bytes = len(result.encode())
+        return result
+    finally:
+        total = time.perf_counter() - started
+        _current_call.reset(token)
+        registry.record(tool, metrics, total, output_bytes, error)
+
+
+_metrics: MetricsRegistry | None = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """
+    プロセス共有のレジストリを取得（初回呼び出し時に作成）
+
+    PGMCP_METRICS_ENABLED=0 の場合は何も記録しないレジストリを返します。
+    """
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                enabled = os.environ.get("PGMCP_METRICS_ENABLED", "")
+                _metrics = MetricsRegistry(
+                    enabled.lower() not in ("0", "false", "no", "off")
+                )
+    return _metrics
+
+
+def reset_metrics() -> None:
+    """プロセス共有のレジストリを破棄（次回取得時に設定を読み直す）"""
+    global _metrics
+    with _metrics_lock:
+        _metrics = None
+
+
+def _format_number(value: float) -> str:
+    """Prometheus のテキスト形式の数値（整数は小数点なし）"""
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+# (メトリクス名, 種類, 説明, ラベル付きの値のリスト)
+Sample = tuple[str, str, str, Iterable[tuple[dict[str, str], float]]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+    return "{" + pairs + "}"
+
+
+def _render_histogram(
+    lines: list[str], name: str, labels: dict[str, str], histogram: dict[str, Any]
+) -> None:
+    for bound, count in histogram["buckets"].items():
+        lines.append(f"{name}_bucket{_labels({**labels, 'le': bound})} {count}")
+    lines.append(f"{name}_sum{_labels(labels)} {_format_number(histogram['sum'])}")
+    lines.append(f"{name}_count{_labels(labels)} {histogram['count']}")
+
+
+def render_prometheus(tools: dict[str, Any], samples: Iterable[Sample] = ()) -> str:
+    """
+    Prometheus のテキスト形式（0.0.4）に変換
+
+    Args:
+        tools: MetricsRegistry.snapshot() の値
+        samples: 追加で出力するカウンター・ゲージ（プール・キャッシュなど）
+
+    Returns:
+        テキスト形式のメトリクス
+    """
+    lines: list[str] = []
+    for name, kind, help_text, key in (
+        ("pgmcp_tool_calls_total", "counter", "ツールの呼び出し回数", "calls"),
+        ("pgmcp_tool_errors_total", "counter", "例外で終了した呼び出し回数", "errors"),
+        ("pgmcp_tool_queries_total", "counter", "実行したクエリ数", "queries"),
+    ):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for tool, metrics in tools.items():
+            lines.append(f"{name}{_labels({'tool': tool})} {metrics[key]}")
+
+    name = "pgmcp_tool_phase_seconds"
+    lines += [
+        f"# HELP {name} ツール呼び出しのフェーズごとの処理時間",
+        f"# TYPE {name} histogram",
+    ]
+    for tool, metrics in tools.items():
+        for phase, histogram in metrics["phases"].items():
+            _render_histogram(lines, name, {"tool": tool, "phase": phase}, histogram)
+
+    for name, help_text, key in (
+        ("pgmcp_tool_rows", "ツール呼び出しで取得した行数", "rows"),
+        ("pgmcp_tool_output_bytes", "ツールの出力のバイト数", "output_bytes"),
+    ):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for tool, metrics in tools.items():
+            _render_histogram(lines, name, {"tool": tool}, metrics[key])
+
+    for name, kind, help_text, values in samples:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for labels, value in values:
+            lines.append(f"{name}{_labels(labels)} {_format_number(value)}")
+
+    return "\n".join(lines) + "\n"
+
+
+class MetricsFileWriter:
+    """
+    Prometheus のテキスト形式を一定間隔でファイルに書き出すスレッド
+
+    node_exporter の textfile collector などで読み込めるよう、一時ファイルに
+    書き込んでから置き換えます。書き込みに失敗しても（ディスクの空き不足や
+    ディレクトリの削除など）スレッドは止めず、次の間隔で再試行します。警告は
+    失敗し始めたときと回復したときに1回ずつ記録します。
+    """
+
+    def __init__(self, path: str, render: Callable[[], str], interval: float) -> None:
+        self.path = path
+        self.interval = interval
+        self._render = render
+        self._stop = threading.Event()
+        self._failing = False
+        self._thread = threading.Thread(
+            target=self._run, name="pgmcp-metrics", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def write(self) -> None:
+        """現在の値を書き出す"""
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(self._render())
+        os.replace(temporary, self.path)
+
+    def _write_safely(self) -> None:
+        """書き出しの OSError を記録して握りつぶす"""
+        try:
+            self.write()
+        except OSError as error:
+            if not self._failing:
+                logger.warning(
+                    "メトリクスファイル %s に書き出せませんでした: %s", self.path, error
+                )
+            self._failing = True
+        else:
+            if self._failing:
+                logger.warning(
+                    "メトリクスファイル %s への書き出しが回復しました", self.path
+                )
+            self._failing = False
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._write_safely()
+
+    def stop(self) -> None:
+        """スレッドを止め、最後の値を書き出す"""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._write_safely()
@@ -0,0 +1,288 @@
+"""
+カタログクエリの記録と再生
+
+記録モードでは実際のデータベースに対してツールを実行し、クエリと
+パラメータごとに取得した行をファイルに保存します。再生モードでは
+保存した行を返す接続をプールに設定するため、ネットワークや
+PostgreSQL を使わずに同じツールを実行できます。結果の整形や
+ER図の組み立てを単独で計測するベンチマークやテストで使います。
+
+ファイルは gzip 圧縮した JSON で、同じクエリの文字列は1回だけ保存します。
+SET 文（制限時間・分離レベル）は実行時の設定に依存するため記録しません。
+"""
+
+import gzip
+import json
+import math
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any, cast
+
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, connection
+
+from pgmcp.cache import get_catalog_cache
+from pgmcp.connection import (
+    ConnectionPool,
+    InstrumentedCursor,
+    PoolConfig,
+    get_connection,
+    replace_pool,
+)
+
+FORMAT_VERSION = 1
+
+Row = tuple[Any, ...]
+
+
+class QueryNotRecordedError(psycopg2.ProgrammingError):
+    """再生中に記録されていないクエリを実行した"""
+
+
+def normalize_query(query: str) -> str:
+    """空白の違いを無視するため、連続する空白を1つにまとめる"""
+    return " ".join(query.split())
+
+
+def _params_key(params: Any) -> str:
+    return json.dumps(params, sort_keys=True, separators=(",", ":"))
+
+
+def _is_session_statement(query: str) -> bool:
+    return query.lstrip()[:4].upper() == "SET "
+
+
+class Recording:
+    """
+    クエリとパラメータごとの取得結果
+
+    Attributes:
+        meta: 記録時の情報（スキーマ名など。呼び出し元が自由に設定）
+    """
+
+    def __init__(self, meta: dict[str, Any] | None = None) -> None:
+        self.meta = dict(meta or {})
+        self._lock = threading.Lock()
+        # 正規化したクエリ → パラメータのJSON → 行
+        self._results: dict[str, dict[str, list[Row]]] = {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(results) for results in self._results.values())
+
+    def begin(self, query: str, params: Any) -> list[Row]:
+        """
+        クエリの実行を記録し、取得した行を追加するリストを返す
+
+        同じクエリとパラメータを再度実行した場合は後の結果で置き換えます。
+        """
+        rows: list[Row] = []
+        with self._lock:
+            self._results.setdefault(normalize_query(query), {})[
+                _params_key(params)
+            ] = rows
+        return rows
+
+    def lookup(self, query: str, params: Any) -> list[Row]:
+        """
+        記録した行を取得
+
+        Raises:
+            QueryNotRecordedError: クエリとパラメータの組が記録されていない場合
+        """
+        results = self._results.get(normalize_query(query), {})
+        rows = results.get(_params_key(params))
+        if rows is None:
+            raise QueryNotRecordedError(
+                "記録されていないクエリです"
+                f"（パラメータ: {_params_key(params)}、"
+                f"同じクエリの記録: {len(results)}件）。"
+            )
+        return rows
+
+    def results(self, query: str) -> list[tuple[Any, list[Row]]]:
+        """クエリに対して記録した (パラメータ, 行) のリスト"""
+        with self._lock:
+            results = dict(self._results.get(normalize_query(query), {}))
+        return [(json.loads(params), rows) for params, rows in results.items()]
+
+    def cursor_factory(self) -> type[InstrumentedCursor]:
+        """取得した行をこの記録に追加するカーソルクラス"""
+        return type("RecordingCursor", (_RecordingCursor,), {"recording": self})
+
+    def connect(self) -> connection:
+        """記録用の接続を作成（ConnectionPool の connect に指定する）"""
+        conn = get_connection()
+        conn.cursor_factory = self.cursor_factory()
+        return conn
+
+    def save(self, path: str) -> None:
+        """gzip 圧縮した JSON に保存"""
+        with self._lock:
+            items = [(query, dict(results)) for query, results in self._results.items()]
+        document = {
+            "version": FORMAT_VERSION,
+            "meta": self.meta,
+            "queries": [query for query, _ in items],
+            "results": [
+                [index, json.loads(params), rows]
+                for index, (_, results) in enumerate(items)
+                for params, rows in results.items()
+            ],
+        }
+        with gzip.open(path, "wt", encoding="utf-8") as file:
+            json.dump(document, file, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: str) -> "Recording":
+        """save で保存したファイルを読み込む"""
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            document = json.load(file)
+        if document.get("version") != FORMAT_VERSION:
+            raise ValueError(
+                f"対応していない形式です（version={document.get('version')}）。"
+            )
+        recording = cls(document["meta"])
+        queries = document["queries"]
+        for index, params, rows in document["results"]:
+            recording._results.setdefault(queries[index], {})[_params_key(params)] = [
+                tuple(row) for row in rows
+            ]
+        return recording
+
+
+class _RecordingCursor(InstrumentedCursor):
+    """実行したクエリと取得した行を Recording に追加するカーソル"""
+
+    recording: Recording
+    _recorded: list[Row] | None = None
+
+    def execute(self, query: Any, vars: Any = None) -> None:
+        super().execute(query, vars)
+        self._recorded = (
+            None if _is_session_statement(query) else self.recording.begin(query, vars)
+        )
+
+    def fetchone(self) -> Row | None:
+        row = super().fetchone()
+        if row is not None and self._recorded is not None:
+            self._recorded.append(row)
+        return row
+
+    def fetchall(self) -> list[Row]:
+        rows = super().fetchall()
+        if self._recorded is not None:
+            self._recorded.extend(rows)
+        return rows
+
+
+class ReplayCursor:
+    """Recording の行を返すカーソル（execute / fetchone / fetchall のみ）"""
+
+    def __init__(self, recording: Recording) -> None:
+        self._recording = recording
+        self._rows: list[Row] = []
+        self._position = 0
+
+    def __enter__(self) -> "ReplayCursor":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def execute(self, query: str, vars: Any = None) -> None:
+        self._rows = (
+            [] if _is_session_statement(query) else self._recording.lookup(query, vars)
+        )
+        self._position = 0
+
+    def fetchone(self) -> Row | None:
+        if self._position >= len(self._rows):
+            return None
+        self._position += 1
+        return self._rows[self._position - 1]
+
+    def fetchall(self) -> list[Row]:
+        rows = self._rows[self._position :]
+        self._position = len(self._rows)
+        return rows
+
+    def close(self) -> None:
+        self._rows = []
+
+
+class ReplayConnection:
+    """
+    Recording の行を返す接続
+
+    コネクションプールとツールが使うメソッドだけを実装しています。
+    """
+
+    def __init__(self, recording: Recording) -> None:
+        self.recording = recording
+        self.closed = 0
+
+    def cursor(self, cursor_factory: Any = None) -> ReplayCursor:
+        return ReplayCursor(self.recording)
+
+    def rollback(self) -> None:
+        pass
+
+    def cancel(self) -> None:
+        pass
+
+    def get_transaction_status(self) -> int:
+        return TRANSACTION_STATUS_IDLE
+
+    def close(self) -> None:
+        self.closed = 1
+
+
+@contextmanager
+def _installed(pool: ConnectionPool) -> Iterator[None]:
+    """ブロック内でツールが借りる接続を pool から貸し出す"""
+    # 切り替え前後の接続先で取得したエントリを混ぜない
+    get_catalog_cache().clear()
+    previous = replace_pool(pool)
+    try:
+        yield
+    finally:
+        replace_pool(previous)
+        pool.close()
+        get_catalog_cache().clear()
+
+
+@contextmanager
+def recording(meta: dict[str, Any] | None = None) -> Iterator[Recording]:
+    """
+    ブロック内でツールが実行したクエリの結果を記録する
+
+    PG* 環境変数のデータベースに接続します。保存は呼び出し元が
+    Recording.save で行います。
+
+    Args:
+        meta: 記録に保存する情報
+    """
+    target = Recording(meta)
+    with _installed(ConnectionPool(PoolConfig.from_env(), target.connect)):
+        yield target
+
+
+@contextmanager
+def replaying(source: Recording | str) -> Iterator[Recording]:
+    """
+    ブロック内のツールに記録した結果を返す（データベースには接続しない）
+
+    Args:
+        source: Recording または save で保存したファイルのパス
+    """
+    target = Recording.load(source) if isinstance(source, str) else source
+
+    def connect() -> connection:
+        return cast(connection, ReplayConnection(target))
+
+    # 疎通確認のクエリは記録に含まれないため行わない
+    config = PoolConfig(check_interval=math.inf)
+    with _installed(ConnectionPool(config, connect)):
+        yield target
@@ -4,9 +4,29 @@ pgmcp - PostgreSQL MCP Server
 PostgreSQLデータベースのテーブル一覧とスキーマ情報を提供するMCPサーバー
 """
 
+import json
+import os
+from dataclasses import asdict
+from typing import Any
+
 from fastmcp import FastMCP
+from fastmcp.tools import ToolResult
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
 
+from pgmcp.cache import get_catalog_cache
+from pgmcp.connection import close_pool, env_float, pool_stats
+from pgmcp.executor import run_coalesced, shutdown_executor
+from pgmcp.metrics import (
+    MetricsFileWriter,
+    Sample,
+    get_metrics,
+    render_prometheus,
+)
+from pgmcp.singleflight import get_single_flight
 from pgmcp.tools import (
+    describe_table_impl,
+    describe_tables_impl,
     generate_er_diagram_impl,
     get_foreign_keys_impl,
     get_table_indexes_impl,
@@ -18,75 +38,268 @@ from pgmcp.tools import (
 mcp = FastMCP("pgmcp")
 
 
+def _tool_result(text: str, output_format: str) -> ToolResult:
+    """
+    ツールの出力を ToolResult に変換
+
+    output_format="json" の場合は同じ内容を構造化コンテンツとしても返し、
+    クライアントがテキストを再パースせずに扱えるようにします。
+    """
+    if output_format == "json":
+        return ToolResult(content=text, structured_content=json.loads(text))
+    return ToolResult(content=text)
+
+
 @mcp.tool
-def list_tables(schema: str = "public") -> str:
+async def list_tables(
+    schema: str = "public",
+    pattern: str | None = None,
+    after: str | None = None,
+    limit: int = 1000,
+    output_format: str = "markdown",
+    max_chars: int | None = None,
+    max_tokens: int | None = None,
+    cursor: str | None = None,
+) -> ToolResult:
     """
     指定したスキーマのテーブル一覧を取得します。
 
     Args:
         schema: スキーマ名（デフォルト: "public"）
+        pattern: テーブル名のLIKEパターン（例: "user%"）。省略時は全テーブル
+        after: このテーブル名より後ろから取得（前ページ末尾に表示される値）
+        limit: 1ページあたりの最大件数（デフォルト: 1000）
+        output_format: 出力形式。"markdown"（デフォルト）、"json"（構造化コンテンツ
+            付きの {"columns": [...], "rows": [[...]]}）、"tsv"（ヘッダー行付き）
+        max_chars: 出力の最大文字数。超える場合は打ち切って省略した内容の要約と
+            続きを取得する cursor を付ける（省略時は無制限）
+        max_tokens: 出力の最大推定トークン数（ASCII 4文字、その他1文字で
+            1トークンとして概算。省略時は無制限）
+        cursor: 前回の出力に含まれていたカーソル。同じ引数とともに指定すると
+            続きを返す
 
     Returns:
-        テーブル情報のMarkdown Table形式の文字列。
+        テーブル情報の指定した形式の文字列。
+        続きがある場合は次ページ取得用の after の値を含む
+        （JSONは next_after、TSVは末尾の "# after=..." 行）。
     """
-    return list_tables_impl(schema)
+    result = await run_coalesced(
+        list_tables_impl,
+        schema,
+        pattern,
+        after,
+        limit,
+        output_format,
+        max_chars,
+        max_tokens,
+        cursor,
+    )
+    return _tool_result(result, output_format)
 
 
 @mcp.tool
-def get_table_schema(table_name: str, schema: str = "public") -> str:
+async def get_table_schema(
+    table_name: str,
+    schema: str = "public",
+    output_format: str = "markdown",
+    max_chars: int | None = None,
+    max_tokens: int | None = None,
+    cursor: str | None = None,
+) -> ToolResult:
     """
     指定したテーブルのカラム情報を取得します。
 
     Args:
         table_name: テーブル名
         schema: スキーマ名（デフォルト: "public"）
+        output_format: 出力形式。"markdown"（デフォルト）、"json"（構造化コンテンツ
+            付きの {"columns": [...], "rows": [[...]]}）、"tsv"（ヘッダー行付き）
+        max_chars: 出力の最大文字数。超える場合は打ち切って省略した内容の要約と
+            続きを取得する cursor を付ける（省略時は無制限）
+        max_tokens: 出力の最大推定トークン数（ASCII 4文字、その他1文字で
+            1トークンとして概算。省略時は無制限）
+        cursor: 前回の出力に含まれていたカーソル。同じ引数とともに指定すると
+            続きを返す
 
     Returns:
-        カラム情報のMarkdown Table形式の文字列。
+        カラム情報の指定した形式の文字列。
         各カラムはcolumn_name, data_type, nullable, default, PK, commentを含む。
     """
-    return get_table_schema_impl(table_name, schema)
+    result = await run_coalesced(
+        get_table_schema_impl,
+        table_name,
+        schema,
+        output_format,
+        max_chars,
+        max_tokens,
+        cursor,
+    )
+    return _tool_result(result, output_format)
 
 
 @mcp.tool
-def get_table_indexes(table_name: str, schema: str = "public") -> str:
+async def get_table_indexes(
+    table_name: str,
+    schema: str = "public",
+    output_format: str = "markdown",
+    max_chars: int | None = None,
+    max_tokens: int | None = None,
+    cursor: str | None = None,
+) -> ToolResult:
     """
     指定したテーブルのインデックス情報を取得します。
 
     Args:
         table_name: テーブル名
         schema: スキーマ名（デフォルト: "public"）
+        output_format: 出力形式。"markdown"（デフォルト）、"json"（構造化コンテンツ
+            付きの {"columns": [...], "rows": [[...]]}）、"tsv"（ヘッダー行付き）
+        max_chars: 出力の最大文字数。超える場合は打ち切って省略した内容の要約と
+            続きを取得する cursor を付ける（省略時は無制限）
+        max_tokens: 出力の最大推定トークン数（ASCII 4文字、その他1文字で
+            1トークンとして概算。省略時は無制限）
+        cursor: 前回の出力に含まれていたカーソル。同じ引数とともに指定すると
+            続きを返す
 
     Returns:
-        インデックス情報のMarkdown Table形式の文字列。
+        インデックス情報の指定した形式の文字列。
         各インデックスはindex_name, columns, unique, type, definitionを含む。
     """
-    return get_table_indexes_impl(table_name, schema)
+    result = await run_coalesced(
+        get_table_indexes_impl,
+        table_name,
+        schema,
+        output_format,
+        max_chars,
+        max_tokens,
+        cursor,
+    )
+    return _tool_result(result, output_format)
 
 
 @mcp.tool
-def get_foreign_keys(table_name: str, schema: str = "public") -> str:
+async def get_foreign_keys(
+    table_name: str,
+    schema: str = "public",
+    output_format: str = "markdown",
+    max_chars: int | None = None,
+    max_tokens: int | None = None,
+    cursor: str | None = None,
+) -> ToolResult:
     """
     指定したテーブルの外部キー情報を取得します。
 
     Args:
         table_name: テーブル名
         schema: スキーマ名（デフォルト: "public"）
+        output_format: 出力形式。"markdown"（デフォルト）、"json"（構造化コンテンツ
+            付きの {"columns": [...], "rows": [[...]]}）、"tsv"（ヘッダー行付き）
+        max_chars: 出力の最大文字数。超える場合は打ち切って省略した内容の要約と
+            続きを取得する cursor を付ける（省略時は無制限）
+        max_tokens: 出力の最大推定トークン数（ASCII 4文字、その他1文字で
+            1トークンとして概算。省略時は無制限）
+        cursor: 前回の出力に含まれていたカーソル。同じ引数とともに指定すると
+            続きを返す
 
     Returns:
-        外部キー情報のMarkdown Table形式の文字列。
-        各外部キーはconstraint_name, column_name, foreign_table, foreign_columnを含む。
+        外部キー情報の指定した形式の文字列。
+        各外部キーはconstraint_name, column_name, foreign_table, foreign_column,
+        on_update, on_delete, deferrableを含む。
     """
-    return get_foreign_keys_impl(table_name, schema)
+    result = await run_coalesced(
+        get_foreign_keys_impl,
+        table_name,
+        schema,
+        output_format,
+        max_chars,
+        max_tokens,
+        cursor,
+    )
+    return _tool_result(result, output_format)
 
 
 @mcp.tool
-def generate_er_diagram(
+async def describe_table(
+    table_name: str,
+    schema: str = "public",
+    max_chars: int | None = None,
+    max_tokens: int | None = None,
+    cursor: str | None = None,
+) -> str:
+    """
+    指定したテーブルのカラム・インデックス・外部キー情報をまとめて取得します。
+
+    get_table_schema, get_table_indexes, get_foreign_keys を続けて呼ぶ代わりに
+    使用でき、3つの情報を同じ時点のスナップショットから1回で返します。
+
+    Args:
+        table_name: テーブル名
+        schema: スキーマ名（デフォルト: "public"）
+        max_chars: 出力の最大文字数。超える場合は打ち切って省略した内容の要約と
+            続きを取得する cursor を付ける（省略時は無制限）
+        max_tokens: 出力の最大推定トークン数（ASCII 4文字、その他1文字で
+            1トークンとして概算。省略時は無制限）
+        cursor: 前回の出力に含まれていたカーソル。同じ引数とともに指定すると
+            続きを返す
+
+    Returns:
+        カラム・インデックス・外部キーの各セクションを含むMarkdown形式の文字列。
+    """
+    return await run_coalesced(
+        describe_table_impl, table_name, schema, max_chars, max_tokens, cursor
+    )
+
+
+@mcp.tool
+async def describe_tables(
     schema: str = "public",
     tables: list[str] | None = None,
+    after: str | None = None,
+    max_chars: int | None = None,
+    max_tokens: int | None = None,
 ) -> str:
     """
-    データベースのテーブル関係をMermaid形式のER図として生成します。
+    複数テーブルのカラム情報を一括で取得します。
+
+    get_table_schema をテーブルごとに呼ぶ代わりに使用でき、
+    スキーマ全体または指定したテーブルのカラム情報を1回で返します。
+    出力が大きい場合はページに分割されます。
+
+    Args:
+        schema: スキーマ名（デフォルト: "public"）
+        tables: 対象テーブルのリスト（省略時はスキーマ内の全テーブル）
+        after: このテーブル名より後ろから取得（前ページ末尾に表示される値）
+        max_chars: 1ページの最大文字数。テーブル単位で打ち切り、続きは after で
+            取得する（省略時はサーバーの設定値）
+        max_tokens: 1ページの最大推定トークン数（省略時は無制限）
+
+    Returns:
+        テーブルごとのカラム情報を含むMarkdown形式の文字列。
+        続きがある場合は次ページ取得用の after の値を末尾に含む。
+    """
+    return await run_coalesced(
+        describe_tables_impl, schema, tables, after, max_chars, max_tokens
+    )
+
+
+@mcp.tool
+async def generate_er_diagram(
+    schema: str = "public",
+    tables: list[str] | None = None,
+    seed_tables: list[str] | None = None,
+    depth: int = 1,
+    include_virtual_fks: bool = False,
+    split_clusters: bool = False,
+    page: int = 1,
+    diagram_format: str = "mermaid",
+    schemas: list[str] | None = None,
+    output_format: str = "markdown",
+    max_chars: int | None = None,
+    max_tokens: int | None = None,
+    cursor: str | None = None,
+) -> ToolResult:
+    """
+    データベースのテーブル関係をER図（Mermaid / DOT / PlantUML / JSON）として生成します。
 
     **[BETA]** この機能はベータ版です。特殊文字（!, @, #など）を含む
     テーブル名やカラム名はMermaid構文でサポートされていないため、
@@ -95,18 +308,191 @@ def generate_er_diagram(
     Args:
         schema: スキーマ名（デフォルト: "public"）
         tables: 対象テーブルのリスト（省略時は全テーブル）
+        seed_tables: 起点テーブルのリスト。指定すると外部キーで
+            depth ホップ以内につながるテーブルだけを出力（tablesとは併用不可）
+        depth: seed_tables からたどるホップ数（デフォルト: 1）
+        include_virtual_fks: seed_tables からの探索やクラスタ分割で
+            Virtual Foreign Keys もたどるか
+        split_clusters: スキーマ全体を外部キーでつながるクラスタに分割し、
+            クラスタ一覧とクラスタごとのER図をページ単位で出力するか
+        page: split_clusters のページ番号（1始まり）
+        diagram_format: 出力形式。"mermaid"（デフォルト）、"dot"（Graphviz）、
+            "plantuml"、"json"（隣接リスト）のいずれか
+        schemas: 複数スキーマを1つのER図にまとめる場合のスキーマ名のリスト
+            （指定時は schema より優先。テーブル名は「スキーマ名.テーブル名」で表示）
+        output_format: "markdown"（デフォルト）は diagram_format の図を返す。
+            "json" は隣接リストを構造化コンテンツ付きで、"tsv" は1行1カラムの
+            表（参照先を含む）を返す（diagram_format / split_clusters とは併用不可）
+        max_chars: 出力の最大文字数。超える場合はテーブルの境界で打ち切って
+            省略したテーブルの要約と続きを取得する cursor を付ける（省略時は無制限）
+        max_tokens: 出力の最大推定トークン数（ASCII 4文字、その他1文字で
+            1トークンとして概算。省略時は無制限）
+        cursor: 前回の出力に含まれていたカーソル。同じ引数とともに指定すると
+            続きを返す
 
     Returns:
-        Mermaid ER図形式の文字列。
+        指定した形式のER図の文字列。
         テーブル名、カラム名、型、主キー、コメント、外部キー関係を含む。
         Virtual Foreign Keys（命名規則から推測される外部キー）も含む。
+        他のスキーマを参照する外部キーは参照先テーブルも含めて出力する。
+    """
+    result = await run_coalesced(
+        generate_er_diagram_impl,
+        schema,
+        tables,
+        seed_tables,
+        depth,
+        include_virtual_fks,
+        split_clusters,
+        page,
+        diagram_format,
+        schemas,
+        output_format,
+        max_chars,
+        max_tokens,
+        cursor,
+    )
+    return _tool_result(result, output_format)
+
+
+@mcp.resource("pgmcp://cache/stats", mime_type="application/json")
+def cache_stats() -> str:
+    """
+    カタログキャッシュの統計情報を取得します。
+
+    Returns:
+        hits, misses, invalidations, fingerprint_checks, entries を含むJSON文字列。
+    """
+    return json.dumps(asdict(get_catalog_cache().stats()))
+
+
+@mcp.resource("pgmcp://singleflight/stats", mime_type="application/json")
+def single_flight_stats() -> str:
+    """
+    同一リクエストの合流（single-flight）の統計情報を取得します。
+
+    Returns:
+        calls, coalesced, in_flight, coalescing_rate を含むJSON文字列。
+    """
+    return json.dumps(asdict(get_single_flight().stats()))
+
+
+def _metrics_document() -> dict[str, Any]:
+    """ツールごとのメトリクスとプール・キャッシュ・合流の統計情報"""
+    registry = get_metrics()
+    return {
+        "enabled": registry.enabled,
+        "tools": registry.snapshot(),
+        "pool": asdict(pool_stats()),
+        "cache": asdict(get_catalog_cache().stats()),
+        "singleflight": asdict(get_single_flight().stats()),
+    }
+
+
+def _prometheus_text() -> str:
+    """メトリクスを Prometheus のテキスト形式で取得"""
+    document = _metrics_document()
+    pool, cache, flight = document["pool"], document["cache"], document["singleflight"]
+    samples: list[Sample] = [
+        (
+            "pgmcp_pool_connections",
+            "gauge",
+            "コネクションプールの接続数",
+            [
+                ({"state": "idle"}, pool["idle"]),
+                ({"state": "in_use"}, pool["size"] - pool["idle"]),
+            ],
+        ),
+        ("pgmcp_pool_max_size", "gauge", "同時接続数の上限", [({}, pool["max_size"])]),
+        (
+            "pgmcp_cache_requests_total",
+            "counter",
+            "カタログキャッシュの参照回数",
+            [({"result": "hit"}, cache["hits"]), ({"result": "miss"}, cache["misses"])],
+        ),
+        (
+            "pgmcp_cache_invalidations_total",
+            "counter",
+            "フィンガープリントの変化でスキーマを破棄した回数",
+            [({}, cache["invalidations"])],
+        ),
+        (
+            "pgmcp_cache_entries",
+            "gauge",
+            "キャッシュのエントリ数",
+            [({}, cache["entries"])],
+        ),
+        (
+            "pgmcp_singleflight_calls_total",
+            "counter",
+            "ツール呼び出しの回数（合流したものを含む）",
+            [({}, flight["calls"])],
+        ),
+        (
+            "pgmcp_singleflight_coalesced_total",
+            "counter",
+            "実行中の呼び出しに合流した回数",
+            [({}, flight["coalesced"])],
+        ),
+    ]
+    return render_prometheus(document["tools"], samples)
+
+
+@mcp.resource("pgmcp://metrics", mime_type="application/json")
+def metrics() -> str:
+    """
+    ツールごとの処理時間・行数・出力サイズのヒストグラムと、
+    コネクションプール・カタログキャッシュ・合流の統計情報を取得します。
+
+    Returns:
+        tools（ツールごとの calls, errors, queries, phases, rows, output_bytes）,
+        pool, cache, singleflight を含むJSON文字列。
+    """
+    return json.dumps(_metrics_document())
+
+
+async def prometheus_metrics(request: Request) -> PlainTextResponse:
+    """HTTP トランスポートで起動した場合の Prometheus 用エンドポイント"""
+    return PlainTextResponse(
+        _prometheus_text(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def _register_metrics_route() -> bool:
+    """
+    PGMCP_METRICS_HTTP が有効な場合に GET /metrics を登録
+
+    認証のないエンドポイントになるため、明示的に有効にした場合だけ公開します
+    （メトリクスを記録しない場合も登録しません）。
+
+    Returns:
+        登録したか
     """
-    return generate_er_diagram_impl(schema, tables)
+    enabled = os.environ.get("PGMCP_METRICS_HTTP", "")
+    if enabled.lower() not in ("1", "true", "yes", "on"):
+        return False
+    if not get_metrics().enabled:
+        return False
+    mcp.custom_route("/metrics", methods=["GET"])(prometheus_metrics)
+    return True
 
 
 def main() -> None:
     """MCPサーバーを起動"""
-    mcp.run()
+    _register_metrics_route()
+    writer = None
+    path = os.environ.get("PGMCP_METRICS_FILE")
+    if path:
+        interval = env_float("PGMCP_METRICS_FILE_INTERVAL", 15.0)
+        writer = MetricsFileWriter(path, _prometheus_text, interval)
+        writer.start()
+    try:
+        mcp.run()
+    finally:
+        if writer is not None:
+            writer.stop()
+        shutdown_executor()
+        close_pool()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,135 @@
+"""
+同一リクエストの合流（single-flight）
+
+複数のエージェントが同時に起動すると、同じ引数のツール呼び出し
+（list_tables("public") など）が同時に届きます。実行中の呼び出しと
+ツール・引数・接続先データベースが同じ呼び出しは新たにクエリを実行せず、
+実行中の結果を共有します。
+"""
+
+import asyncio
+import os
+import threading
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from typing import Any, TypeVar, cast
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class SingleFlightStats:
+    """
+    合流の統計情報
+
+    Attributes:
+        calls: 呼び出し回数
+        coalesced: 実行中の呼び出しに合流した回数
+        in_flight: 現在実行中のキーの数
+        coalescing_rate: 合流した割合（coalesced / calls）
+    """
+
+    calls: int = 0
+    coalesced: int = 0
+    in_flight: int = 0
+    coalescing_rate: float = 0.0
+
+
+@dataclass
+class _Flight:
+    """実行中の呼び出しと、結果を待っている呼び出し元の数"""
+
+    task: asyncio.Task[Any]
+    waiters: int = 1
+
+
+class SingleFlight:
+    """
+    キーが同じ同時呼び出しを1回の実行にまとめる
+
+    イベントループ上で使用します。結果を待つ呼び出し元が全てキャンセル
+    された場合だけ実行中の処理をキャンセルします。
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self._flights: dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._coalesced = 0
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        key の呼び出しが実行中ならその結果を待ち、無ければ call を実行
+
+        Args:
+            key: 呼び出しを識別するキー
+            call: 実行する処理
+
+        Returns:
+            call の戻り値（合流した場合は実行中の呼び出しの戻り値）
+        """
+        if not self.enabled:
+            return await call()
+
+        flight = self._flights.get(key)
+        with self._lock:
+            self._calls += 1
+            if flight is not None:
+                self._coalesced += 1
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(call()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._finish(key, flight))
+        else:
+            flight.waiters += 1
+
+        try:
+            # 1つの呼び出し元がキャンセルされても共有の処理は続ける
+            return cast(T, await asyncio.shield(flight.task))
+        except asyncio.CancelledError:
+            flight.waiters -= 1
+            if flight.waiters == 0:
+                self._finish(key, flight)
+                flight.task.cancel()
+            raise
+
+    def _finish(self, key: Hashable, flight: _Flight) -> None:
+        # 終了後に届いた同じキーの呼び出しは新しく実行する
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> SingleFlightStats:
+        """統計情報のスナップショットを取得"""
+        with self._lock:
+            calls, coalesced = self._calls, self._coalesced
+        return SingleFlightStats(
+            calls=calls,
+            coalesced=coalesced,
+            in_flight=len(self._flights),
+            coalescing_rate=coalesced / calls if calls else 0.0,
+        )
+
+
+_single_flight: SingleFlight | None = None
+
+
+def get_single_flight() -> SingleFlight:
+    """
+    プロセス共有の SingleFlight を取得（初回呼び出し時に作成）
+
+    PGMCP_SINGLEFLIGHT_ENABLED=0 の場合は合流せずに毎回実行します。
+    """
+    global _single_flight
+    if _single_flight is None:
+        enabled = os.environ.get("PGMCP_SINGLEFLIGHT_ENABLED", "")
+        _single_flight = SingleFlight(
+            enabled.lower() not in ("0", "false", "no", "off")
+        )
+    return _single_flight
+
+
+def reset_single_flight() -> None:
+    """プロセス共有の SingleFlight を破棄（次回取得時に設定を読み直す）"""
+    global _single_flight
+    _single_flight = None
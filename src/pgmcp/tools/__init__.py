@@ -3,6 +3,7 @@
 各ツールはサブモジュールで定義され、server.pyでMCPサーバーに登録されます。
 """
 
+from pgmcp.tools.describe import describe_table_impl, describe_tables_impl
 from pgmcp.tools.er_diagram import generate_er_diagram_impl
 from pgmcp.tools.foreign_keys import get_foreign_keys_impl
 from pgmcp.tools.indexes import get_table_indexes_impl
@@ -13,5 +14,7 @@ __all__ = [
     "get_table_schema_impl",
     "get_table_indexes_impl",
     "get_foreign_keys_impl",
+    "describe_table_impl",
+    "describe_tables_impl",
     "generate_er_diagram_impl",
 ]
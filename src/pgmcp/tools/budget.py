@@ -0,0 +1,297 @@
+"""
+出力サイズの上限と続きの取得
+
+ツールの出力が max_chars（文字数）または max_tokens（推定トークン数）を
+超える場合に、決まった位置で打ち切って省略した内容の要約と続きを取得する
+カーソルを付けます。カーソルには再開位置と出力全体のダイジェストだけを含むため、
+サーバーは状態を持たず、同じ引数とカーソルで呼び出すと続きを返します
+（カタログが変わって出力が変化した場合はエラーになります）。
+
+トークン数はトークナイザーを使わず、ASCII文字は4文字で1トークン、
+それ以外（日本語など）は1文字1トークンとして行ごとに概算します。
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any
+
+from pgmcp.tools.output import to_json
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    トークン数を概算
+
+    ASCII文字は4文字で1トークン、それ以外は1文字1トークンとして数えます。
+    実際のトークナイザーより多めに見積もる傾向があります。
+
+    Args:
+        text: 対象の文字列
+
+    Returns:
+        推定トークン数
+    """
+    if text.isascii():
+        return (len(text) + 3) // 4
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return (ascii_chars + 3) // 4 + len(text) - ascii_chars
+
+
+@dataclass(frozen=True)
+class OutputBudget:
+    """
+    出力サイズの上限
+
+    Attributes:
+        max_chars: 最大文字数（None は無制限）
+        max_tokens: 最大推定トークン数（None は無制限）
+    """
+
+    max_chars: int | None = None
+    max_tokens: int | None = None
+
+    def __post_init__(self) -> None:
+        if self.max_chars is not None and self.max_chars < 1:
+            raise ValueError("max_chars は1以上を指定してください。")
+        if self.max_tokens is not None and self.max_tokens < 1:
+            raise ValueError("max_tokens は1以上を指定してください。")
+
+    @property
+    def unlimited(self) -> bool:
+        """上限が指定されていないか"""
+        return self.max_chars is None and self.max_tokens is None
+
+    def fits(self, chars: int, tokens: int) -> bool:
+        """文字数・推定トークン数が上限以内か"""
+        return (self.max_chars is None or chars <= self.max_chars) and (
+            self.max_tokens is None or tokens <= self.max_tokens
+        )
+
+    def fits_text(self, text: str) -> bool:
+        """文字列が上限以内か（トークン数の上限がなければ推定を省く）"""
+        tokens = 0 if self.max_tokens is None else estimate_tokens(text)
+        return self.fits(len(text), tokens)
+
+
+def output_digest(text: str) -> str:
+    """出力全体のダイジェスト（カーソルの有効性の確認用）"""
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+
+def encode_cursor(offset: int, digest: str) -> str:
+    """再開位置とダイジェストから不透明なカーソル文字列を作成"""
+    payload = f"{offset}:{digest}".encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, digest: str) -> int:
+    """
+    カーソル文字列から再開位置を取得
+
+    Args:
+        cursor: encode_cursor で作成したカーソル
+        digest: 今回の出力全体のダイジェスト
+
+    Returns:
+        再開位置
+
+    Raises:
+        ValueError: カーソルが不正、または出力が変化している場合
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset, cursor_digest = base64.urlsafe_b64decode(padded).decode().split(":")
+        position = int(offset)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("cursor の形式が正しくありません。") from None
+    if cursor_digest != digest or position < 0:
+        raise ValueError(
+            "前回の呼び出しから出力が変化しています。"
+            "cursor を指定せずに最初から取得し直してください。"
+        )
+    return position
+
+
+def _resume_context(lines: list[str], start: int, output_format: str) -> list[str]:
+    """
+    途中から再開するページの先頭に繰り返す行
+
+    TSV はヘッダー行、Markdown は直前の見出しと、再開位置を含む
+    テーブルのヘッダー行・区切り行またはコードブロックの開始行を返します。
+    """
+    if start == 0:
+        return []
+    if output_format == "tsv":
+        return lines[:1]
+
+    heading: str | None = None
+    fence: list[str] = []
+    table_header: list[str] = []
+    for i in range(start):
+        line = lines[i]
+        if fence:
+            if line.startswith("```"):
+                fence = []
+            continue
+        if line.startswith("```"):
+            # 図の種類を表す行（erDiagram, digraph など）も一緒に繰り返す
+            fence = lines[i : min(i + 2, start)]
+            table_header = []
+        elif line.startswith("#"):
+            heading = line
+            table_header = []
+        elif line.startswith("|"):
+            if i + 1 < len(lines) and lines[i + 1].startswith("|-"):
+                table_header = [line, lines[i + 1]]
+        else:
+            table_header = []
+
+    body = fence or (table_header if lines[start].startswith("|") else [])
+    if not body:
+        return []
+    return ([heading, ""] if heading else []) + body
+
+
+def _truncation_notice(
+    output_format: str, omitted_lines: int, sections: int, cursor: str
+) -> str:
+    """行単位で打ち切った場合の末尾の要約"""
+    if output_format == "tsv":
+        return f"# truncated omitted_lines={omitted_lines} cursor={cursor}"
+    detail = f"（{sections}セクションを含む）" if sections else ""
+    return (
+        f"…出力が上限を超えたため、残り{omitted_lines}行{detail}を省略しました。"
+        f'続きは cursor="{cursor}" を指定して取得してください。'
+    )
+
+
+def _paginate_lines(
+    text: str, output_format: str, budget: OutputBudget, start: int, digest: str
+) -> str:
+    """Markdown / TSV を行単位で打ち切る"""
+    lines = text.split("\n")
+    if start >= len(lines):
+        raise ValueError("cursor の位置が出力の範囲外です。")
+
+    page = _resume_context(lines, start, output_format)
+    chars = sum(len(line) + 1 for line in page)
+    tokens = sum(estimate_tokens(line) for line in page)
+
+    # 要約の分を先に確保する（行数・セクション数は最大値で見積もる）
+    sections = sum(1 for line in lines[start:] if line.startswith("#"))
+    notice = _truncation_notice(
+        output_format, len(lines), sections, encode_cursor(len(lines), digest)
+    )
+    reserve_chars = len(notice) + 5
+    reserve_tokens = estimate_tokens(notice) + 2
+
+    rest_chars = sum(len(line) + 1 for line in lines[start:])
+    rest_tokens = sum(estimate_tokens(line) for line in lines[start:])
+    if budget.fits(chars + rest_chars, tokens + rest_tokens):
+        return "\n".join(page + lines[start:])
+
+    in_fence = any(line.startswith("```") for line in page)
+    end = start
+    while end < len(lines):
+        line = lines[end]
+        line_chars = chars + len(line) + 1
+        line_tokens = tokens + estimate_tokens(line)
+        # 進み続けるため、再開位置の行は上限を超えても必ず出力する
+        if end > start and not budget.fits(
+            line_chars + reserve_chars, line_tokens + reserve_tokens
+        ):
+            break
+        page.append(line)
+        chars, tokens = line_chars, line_tokens
+        if line.startswith("```"):
+            in_fence = not in_fence
+        end += 1
+
+    omitted = lines[end:]
+    if in_fence:
+        page.append("```")
+    if output_format != "tsv":
+        page.append("")
+    page.append(
+        _truncation_notice(
+            output_format,
+            len(omitted),
+            sum(1 for line in omitted if line.startswith("#")),
+            encode_cursor(end, digest),
+        )
+    )
+    return "\n".join(page)
+
+
+def _paginate_json(text: str, budget: OutputBudget, start: int, digest: str) -> str:
+    """{"columns": [...], "rows": [...]} 形式のJSONを行単位で打ち切る"""
+    document: dict[str, Any] = json.loads(text)
+    rows: list[Any] = document["rows"]
+    if start > len(rows):
+        raise ValueError("cursor の位置が出力の範囲外です。")
+
+    base = to_json(
+        {
+            **document,
+            "rows": [],
+            "omitted_rows": len(rows),
+            "next_cursor": encode_cursor(len(rows), digest),
+        }
+    )
+    chars, tokens = len(base), estimate_tokens(base)
+    end = start
+    while end < len(rows):
+        row = json.dumps(rows[end], ensure_ascii=False, separators=(",", ":"))
+        if end > start and not budget.fits(
+            chars + len(row) + 1, tokens + estimate_tokens(row) + 1
+        ):
+            break
+        chars += len(row) + 1
+        tokens += estimate_tokens(row) + 1
+        end += 1
+
+    page: dict[str, Any] = {**document, "rows": rows[start:end]}
+    if end < len(rows):
+        page["omitted_rows"] = len(rows) - end
+        page["next_cursor"] = encode_cursor(end, digest)
+    else:
+        page["next_cursor"] = None
+    return to_json(page)
+
+
+def paginate_output(
+    text: str,
+    output_format: str = "markdown",
+    max_chars: int | None = None,
+    max_tokens: int | None = None,
+    cursor: str | None = None,
+) -> str:
+    """
+    出力を上限以内に打ち切り、省略した内容の要約と続きのカーソルを付ける
+
+    Markdown / TSV は行単位で打ち切り、続きのページの先頭には再開位置の
+    テーブルのヘッダー行（TSV はヘッダー行）を繰り返します。JSON は rows の
+    要素単位で打ち切り、omitted_rows と next_cursor を追加します。
+
+    Args:
+        text: ツールの出力全体
+        output_format: 出力形式（markdown, json, tsv）
+        max_chars: 最大文字数（None は無制限）
+        max_tokens: 最大推定トークン数（None は無制限）
+        cursor: 前回の出力に含まれていたカーソル（続きを取得する場合）
+
+    Returns:
+        上限以内の出力
+    """
+    budget = OutputBudget(max_chars, max_tokens)
+    if cursor is None and (budget.unlimited or budget.fits_text(text)):
+        return text
+
+    digest = output_digest(text)
+    start = decode_cursor(cursor, digest) if cursor is not None else 0
+    if output_format == "json":
+        return _paginate_json(text, budget, start, digest)
+    return _paginate_lines(text, output_format, budget, start, digest)
@@ -0,0 +1,226 @@
+"""
+テーブル詳細ツール
+
+カラム・インデックス・外部キーを1回の呼び出しでまとめて取得、
+または複数テーブルのカラム情報を一括で取得
+"""
+
+from itertools import groupby
+from typing import Any
+
+from pgmcp.cache import get_catalog_cache
+from pgmcp.connection import env_int, pooled_connection, snapshot_connection
+from pgmcp.tools.budget import OutputBudget, estimate_tokens, paginate_output
+from pgmcp.tools.foreign_keys import _FOREIGN_KEYS_QUERY, _format_foreign_keys
+from pgmcp.tools.indexes import _TABLE_INDEXES_QUERY, _format_table_indexes
+from pgmcp.tools.schema import _TABLE_SCHEMA_QUERY, _format_table_schema
+
+# 複数テーブルのカラム情報（対象テーブルを先に絞り込み、PKは1回だけ展開して結合）
+_BULK_TABLE_SCHEMA_QUERY = """
+    WITH targets AS (
+        SELECT c.oid, c.relname
+        FROM pg_catalog.pg_class c
+        JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = %(schema)s
+          AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+          AND (%(tables)s::text[] IS NULL OR c.relname = ANY(%(tables)s::text[]))
+          AND (%(after)s::text IS NULL OR c.relname > %(after)s::name)
+        ORDER BY c.relname
+        LIMIT %(limit)s
+    ),
+    pk AS (
+        SELECT con.conrelid, k.attnum
+        FROM pg_catalog.pg_constraint con
+        CROSS JOIN LATERAL unnest(con.conkey) AS k(attnum)
+        WHERE con.contype = 'p'
+          AND con.conrelid IN (SELECT oid FROM targets)
+    )
+    SELECT
+        t.relname AS table_name,
+        a.attname AS column_name,
+        pg_catalog.format_type(a.atttypid, a.atttypmod) AS data_type,
+        CASE WHEN a.attnotnull THEN 'NO' ELSE 'YES' END AS is_nullable,
+        pg_catalog.pg_get_expr(d.adbin, d.adrelid) AS column_default,
+        pk.attnum IS NOT NULL AS is_primary_key,
+        pg_catalog.col_description(a.attrelid, a.attnum) AS column_comment
+    FROM targets t
+    JOIN pg_catalog.pg_attribute a ON a.attrelid = t.oid
+    LEFT JOIN pg_catalog.pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+    LEFT JOIN pk ON pk.conrelid = a.attrelid AND pk.attnum = a.attnum
+    WHERE a.attnum > 0
+      AND NOT a.attisdropped
+    ORDER BY t.relname, a.attnum
+"""
+
+
+def describe_table_impl(
+    table_name: str,
+    schema: str = "public",
+    max_chars: int | None = None,
+    max_tokens: int | None = None,
+    cursor: str | None = None,
+) -> str:
+    """
+    指定したテーブルのカラム・インデックス・外部キー情報をまとめて取得します。
+
+    3種類のカタログクエリを1つの接続・1つのスナップショットで実行するため、
+    各セクションは同じ時点のスキーマを表します。
+
+    Args:
+        table_name: テーブル名
+        schema: スキーマ名（デフォルト: "public"）
+        max_chars: 出力の最大文字数（省略時は無制限）
+        max_tokens: 出力の最大推定トークン数（省略時は無制限）
+        cursor: 前回の出力に含まれていた続きを取得するカーソル
+
+    Returns:
+        カラム・インデックス・外部キーの各セクションを含むMarkdown形式の文字列。
+    """
+    params = (table_name, schema)
+    cache = get_catalog_cache()
+
+    with snapshot_connection() as conn, conn.cursor() as cur:
+        columns = cache.fetch(
+            cur, schema, ("columns", table_name), _TABLE_SCHEMA_QUERY, params
+        )
+        if not columns:
+            return "テーブルが見つかりませんでした。"
+        indexes = cache.fetch(
+            cur, schema, ("indexes", table_name), _TABLE_INDEXES_QUERY, params
+        )
+        foreign_keys = cache.fetch(
+            cur, schema, ("foreign_keys", table_name), _FOREIGN_KEYS_QUERY, params
+        )
+
+    text = "\n".join(
+        [
+            f"## {schema}.{table_name}",
+            "",
+            "### カラム",
+            "",
+            _format_table_schema(columns),
+            "",
+            "### インデックス",
+            "",
+            _format_table_indexes(indexes),
+            "",
+            "### 外部キー",
+            "",
+            _format_foreign_keys(foreign_keys),
+        ]
+    )
+    return paginate_output(text, "markdown", max_chars, max_tokens, cursor)
+
+
+def _format_bulk_table_schema(
+    schema: str,
+    rows: list[tuple[Any, ...]],
+    budget: OutputBudget,
+) -> tuple[str, str | None]:
+    """
+    複数テーブルのカラム情報をテーブルごとのセクションにフォーマット
+
+    出力が budget を超える手前で打ち切ります（最初の1テーブルは必ず出力）。
+
+    Returns:
+        フォーマット済みの文字列と、打ち切った場合は最後に出力したテーブル名
+    """
+    sections: list[str] = []
+    chars = tokens = 0
+    last_table: str | None = None
+    for table_name, table_rows in groupby(rows, key=lambda row: row[0]):
+        section = "\n".join(
+            [
+                f"## {schema}.{table_name}",
+                "",
+                _format_table_schema([row[1:] for row in table_rows]),
+            ]
+        )
+        section_tokens = 0 if budget.max_tokens is None else estimate_tokens(section)
+        if sections and not budget.fits(chars + len(section), tokens + section_tokens):
+            return "\n\n".join(sections), last_table
+        sections.append(section)
+        chars += len(section) + 2
+        tokens += section_tokens + 1
+        last_table = table_name
+    return "\n\n".join(sections), None
+
+
+def describe_tables_impl(
+    schema: str = "public",
+    tables: list[str] | None = None,
+    after: str | None = None,
+    max_chars: int | None = None,
+    max_tokens: int | None = None,
+) -> str:
+    """
+    複数テーブルのカラム情報を一括で取得します。
+
+    対象テーブルのカラム・主キー・デフォルト値・コメントを1つのクエリで取得し、
+    テーブルごとのセクションとして出力します。出力が PGMCP_DESCRIBE_MAX_CHARS
+    文字（max_chars を指定した場合はその小さい方）、max_tokens の推定トークン数、
+    または PGMCP_DESCRIBE_MAX_TABLES テーブルを超える場合はテーブル単位で
+    ページに分割します。続きは after で取得するため cursor は使いません。
+
+    Args:
+        schema: スキーマ名（デフォルト: "public"）
+        tables: 対象テーブルのリスト（省略時はスキーマ内の全テーブル）
+        after: このテーブル名より後ろから取得（前ページ末尾に表示される値）
+        max_chars: 出力の最大文字数（省略時は PGMCP_DESCRIBE_MAX_CHARS）
+        max_tokens: 出力の最大推定トークン数（省略時は無制限）
+
+    Returns:
+        テーブルごとのカラム情報を含むMarkdown形式の文字列。
+        続きがある場合は次ページ取得用の after の値を末尾に含む。
+    """
+    env_max_chars = env_int("PGMCP_DESCRIBE_MAX_CHARS", 50000)
+    budget = OutputBudget(
+        env_max_chars if max_chars is None else min(max_chars, env_max_chars),
+        max_tokens,
+    )
+    max_tables = env_int("PGMCP_DESCRIBE_MAX_TABLES", 100)
+
+    params = {
+        "schema": schema,
+        "tables": tables,
+        "after": after,
+        # 続きの有無を判定するため1テーブル多く取得
+        "limit": max_tables + 1,
+    }
+    with pooled_connection() as conn, conn.cursor() as cur:
+        cur.execute(_BULK_TABLE_SCHEMA_QUERY, params)
+        rows = cur.fetchall()
+
+    if not rows:
+        return "テーブルが見つかりませんでした。"
+
+    table_names = list(dict.fromkeys(row[0] for row in rows))
+    has_more = len(table_names) > max_tables
+    if has_more:
+        # ORDER BY によりはみ出したテーブルの行は末尾にまとまっている
+        overflow = table_names.pop()
+        rows = [row for row in rows if row[0] != overflow]
+
+    body, next_after = _format_bulk_table_schema(schema, rows, budget)
+    if next_after is None and has_more:
+        next_after = table_names[-1]
+
+    parts = [body]
+    if tables is not None:
+        # このページの範囲にあるはずなのに見つからなかったテーブル
+        found = set(table_names)
+        missing = sorted(
+            name
+            for name in set(tables)
+            if name not in found
+            and (after is None or name > after)
+            and (next_after is None or name <= next_after)
+        )
+        if missing:
+            parts.append(f"見つからなかったテーブル: {', '.join(missing)}")
+    if next_after is not None:
+        parts.append(
+            f'続きがあります。次のページは after="{next_after}" を指定して取得してください。'
+        )
+
+    return "\n\n".join(parts)
@@ -1,396 +1,1402 @@
 """
 ER図生成ツール
 
-データベースのテーブル関係をMermaid形式のER図として出力
+データベースのテーブル関係をER図（Mermaid / Graphviz DOT / PlantUML / JSON）として出力
 """
 
-from typing import Any
+import json
+import random
+import sys
+from collections import Counter
+from collections.abc import Callable
+from contextlib import ExitStack
+from dataclasses import dataclass, replace
+from types import TracebackType
+from typing import Any, TypeVar, cast
 
-from pgmcp.connection import get_connection
+from psycopg2.extensions import cursor
+
+from pgmcp.cache import get_catalog_cache
+from pgmcp.connection import env_int, snapshot_connection
+from pgmcp.tools.budget import (
+    OutputBudget,
+    decode_cursor,
+    encode_cursor,
+    output_digest,
+    paginate_output,
+)
+from pgmcp.tools.output import format_rows, to_json, validate_output_format
+from pgmcp.tools.schema_graph import (
+    GraphColumn,
+    GraphEdge,
+    GraphTable,
+    SchemaGraph,
+    build_schema_graph,
+    get_renderer,
+    graph_document,
+)
+
+T = TypeVar("T")
+
+# 対象テーブルは「指定スキーマ（namespace OID）内のテーブル」と「OIDで指定した
+# テーブル」の和集合とし、他スキーマにある参照先テーブルも同じクエリで取得できる
+# ようにする。PK/FKの判定は相関サブクエリではなく、制約ごとにconkeyを1回だけ
+# 展開して (テーブル, カラム) 単位に集約したものと結合する
+_TABLES_INFO_QUERY = """
+    WITH ns AS (
+        SELECT oid FROM pg_catalog.pg_namespace
+        WHERE nspname = ANY(%(schemas)s::text[])
+    ),
+    targets AS (
+        SELECT c.oid, n.nspname, c.relname
+        FROM pg_catalog.pg_class c
+        JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+        WHERE c.relkind = 'r'
+          AND (
+            (
+                c.relnamespace IN (SELECT oid FROM ns)
+                AND (%(tables)s::text[] IS NULL OR c.relname = ANY(%(tables)s::text[]))
+            )
+            OR c.oid = ANY(%(relids)s::oid[])
+          )
+    ),
+    keys AS (
+        SELECT
+            con.conrelid,
+            k.attnum,
+            bool_or(con.contype = 'p') AS is_primary_key,
+            bool_or(con.contype = 'f') AS is_foreign_key
+        FROM pg_catalog.pg_constraint con
+        CROSS JOIN LATERAL unnest(con.conkey) AS k(attnum)
+        WHERE con.conrelid IN (SELECT oid FROM targets)
+          AND con.contype IN ('p', 'f')
+        GROUP BY con.conrelid, k.attnum
+    )
+    SELECT
+        t.nspname AS schema_name,
+        t.relname AS table_name,
+        a.attname AS column_name,
+        pg_catalog.format_type(a.atttypid, a.atttypmod) AS data_type,
+        COALESCE(keys.is_primary_key, FALSE) AS is_primary_key,
+        COALESCE(keys.is_foreign_key, FALSE) AS is_foreign_key,
+        pg_catalog.col_description(a.attrelid, a.attnum) AS column_comment
+    FROM targets t
+    JOIN pg_catalog.pg_attribute a ON a.attrelid = t.oid
+    LEFT JOIN keys ON keys.conrelid = a.attrelid AND keys.attnum = a.attnum
+    WHERE a.attnum > 0
+      AND NOT a.attisdropped
+    ORDER BY t.nspname, t.relname, a.attnum
+"""
+
+
+# 外部キー関係（参照元が指定スキーマのもの）。参照先が指定スキーマ内の場合は
+# 対象テーブルに含まれるものに限り、他スキーマの参照先はそのまま返す。
+# conkey と confkey は WITH ORDINALITY で同時に展開し、制約ごとに
+# 制約内のカラム順で並べる（複合外部キーは呼び出し側で1本の辺にまとめる）
+_FOREIGN_KEY_RELATIONS_QUERY = """
+    WITH ns AS (
+        SELECT oid FROM pg_catalog.pg_namespace
+        WHERE nspname = ANY(%(schemas)s::text[])
+    )
+    SELECT
+        con.oid AS constraint_oid,
+        nsp.nspname AS from_schema,
+        cls.relname AS from_table,
+        a.attname AS from_column,
+        ref_nsp.nspname AS to_schema,
+        ref_class.relname AS to_table,
+        ref_attr.attname AS to_column,
+        con.confrelid AS to_relid
+    FROM pg_catalog.pg_constraint con
+    JOIN pg_catalog.pg_class cls ON cls.oid = con.conrelid
+    JOIN pg_catalog.pg_namespace nsp ON nsp.oid = cls.relnamespace
+    CROSS JOIN LATERAL unnest(con.conkey, con.confkey)
+        WITH ORDINALITY AS k(attnum, ref_attnum, position)
+    JOIN pg_catalog.pg_attribute a ON a.attrelid = con.conrelid
+        AND a.attnum = k.attnum
+    JOIN pg_catalog.pg_class ref_class ON ref_class.oid = con.confrelid
+    JOIN pg_catalog.pg_namespace ref_nsp ON ref_nsp.oid = ref_class.relnamespace
+    JOIN pg_catalog.pg_attribute ref_attr ON ref_attr.attrelid = con.confrelid
+        AND ref_attr.attnum = k.ref_attnum
+    WHERE con.contype = 'f'
+      AND con.connamespace IN (SELECT oid FROM ns)
+      AND (%(tables)s::text[] IS NULL OR cls.relname = ANY(%(tables)s::text[]))
+      AND (
+        %(tables)s::text[] IS NULL
+        OR ref_class.relnamespace NOT IN (SELECT oid FROM ns)
+        OR ref_class.relname = ANY(%(tables)s::text[])
+      )
+    ORDER BY nsp.nspname, cls.relname, ref_nsp.nspname, ref_class.relname,
+        con.conname, k.position
+"""
+
+
+# 外部キーによるテーブル間の辺（近傍探索用。カラムは取得しない）
+_FOREIGN_KEY_EDGES_QUERY = """
+    SELECT DISTINCT
+        cls.relname AS from_table,
+        ref_class.relname AS to_table
+    FROM pg_catalog.pg_constraint con
+    JOIN pg_catalog.pg_class cls ON cls.oid = con.conrelid
+    JOIN pg_catalog.pg_namespace nsp ON nsp.oid = cls.relnamespace
+    JOIN pg_catalog.pg_class ref_class ON ref_class.oid = con.confrelid
+    JOIN pg_catalog.pg_namespace ref_nsp ON ref_nsp.oid = ref_class.relnamespace
+    WHERE con.contype = 'f'
+      AND nsp.nspname = %(schema)s
+      AND ref_nsp.nspname = %(schema)s
+"""
+
+
+# スキーマ内のテーブル名（クラスタ分割用。カラムは取得しない）
+_TABLE_NAMES_QUERY = """
+    SELECT c.relname
+    FROM pg_catalog.pg_class c
+    JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = %(schema)s
+      AND c.relkind = 'r'
+    ORDER BY c.relname
+"""
 
 
 def _get_tables_info(
-    schema: str, tables: list[str] | None = None
-) -> list[dict[str, Any]]:
+    cur: cursor,
+    schemas: list[str],
+    tables: list[str] | None = None,
+    relids: list[int] | None = None,
+) -> dict[str, list[GraphTable]]:
     """
     テーブルのカラム情報を取得
 
     Args:
-        schema: スキーマ名
+        cur: クエリを実行するカーソル
+        schemas: スキーマ名のリスト
         tables: 対象テーブルのリスト（Noneの場合は全テーブル）
+        relids: スキーマに関係なく追加で取得するテーブルのOID
 
     Returns:
-        テーブル情報のリスト
-    """
-    query = """
-        SELECT
-            c.relname AS table_name,
-            a.attname AS column_name,
-            pg_catalog.format_type(a.atttypid, a.atttypmod) AS data_type,
-            COALESCE(
-                (SELECT TRUE
-                 FROM pg_catalog.pg_constraint con
-                 WHERE con.conrelid = a.attrelid
-                   AND a.attnum = ANY(con.conkey)
-                   AND con.contype = 'p'),
-                FALSE
-            ) AS is_primary_key,
-            COALESCE(
-                (SELECT TRUE
-                 FROM pg_catalog.pg_constraint con
-                 WHERE con.conrelid = a.attrelid
-                   AND a.attnum = ANY(con.conkey)
-                   AND con.contype = 'f'),
-                FALSE
-            ) AS is_foreign_key,
-            pg_catalog.col_description(a.attrelid, a.attnum) AS column_comment
-        FROM pg_catalog.pg_attribute a
-        JOIN pg_catalog.pg_class c ON c.oid = a.attrelid
-        JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
-        WHERE n.nspname = %s
-          AND c.relkind = 'r'
-          AND a.attnum > 0
-          AND NOT a.attisdropped
-        ORDER BY c.relname, a.attnum
+        スキーマ名をキー、テーブルのリスト（カラムは定義順）を値とする辞書
     """
+    cur.execute(
+        _TABLES_INFO_QUERY,
+        {"schemas": schemas, "tables": tables, "relids": relids or []},
+    )
+    rows = cur.fetchall()
 
-    with get_connection() as conn, conn.cursor() as cur:
-        cur.execute(query, (schema,))
-        rows = cur.fetchall()
+    # テーブルの絞り込みはSQL側で行うが、念のためセットで再確認する
+    # （OIDで追加した他スキーマのテーブルは対象外）
+    table_set = set(tables) if tables is not None else None
 
-    # テーブルごとにグループ化
-    tables_dict: dict[str, list[dict[str, Any]]] = {}
-    for row in rows:
-        table_name, column_name, data_type, is_pk, is_fk, comment = row
-        if tables is not None and table_name not in tables:
+    # テーブルごとにグループ化（名前と型名は多くのカラムで重複するため共有する）
+    columns_by_table: dict[tuple[str, str], list[GraphColumn]] = {}
+    for schema_name, table_name, column_name, data_type, is_pk, is_fk, comment in rows:
+        if (
+            table_set is not None
+            and schema_name in schemas
+            and table_name not in table_set
+        ):
             continue
-        if table_name not in tables_dict:
-            tables_dict[table_name] = []
-        tables_dict[table_name].append(
-            {
-                "column_name": column_name,
-                "data_type": data_type,
-                "is_primary_key": is_pk,
-                "is_foreign_key": is_fk,
-                "comment": comment,
-            }
+        key = (schema_name, table_name)
+        columns = columns_by_table.get(key)
+        if columns is None:
+            key = (sys.intern(schema_name), sys.intern(table_name))
+            columns = columns_by_table[key] = []
+        columns.append(
+            GraphColumn(
+                sys.intern(column_name),
+                sys.intern(data_type),
+                is_pk,
+                is_fk,
+                comment,
+            )
         )
 
-    return [
-        {"table_name": name, "columns": columns}
-        for name, columns in tables_dict.items()
-    ]
+    tables_by_schema: dict[str, list[GraphTable]] = {}
+    for (schema_name, table_name), columns in columns_by_table.items():
+        tables_by_schema.setdefault(schema_name, []).append(
+            GraphTable(table_name, tuple(columns))
+        )
+    return tables_by_schema
+
+
+@dataclass(frozen=True, slots=True)
+class _ForeignKey:
+    """
+    スキーマ名付きの外部キー関係
+
+    Attributes:
+        from_schema: 参照元テーブルのスキーマ名
+        to_schema: 参照先テーブルのスキーマ名
+        to_relid: 参照先テーブルのOID
+        edge: 外部キー制約による辺（テーブル名はスキーマ名なし）
+    """
+
+    from_schema: str
+    to_schema: str
+    to_relid: int
+    edge: GraphEdge
 
 
 def _get_foreign_key_relations(
-    schema: str, tables: list[str] | None = None
-) -> list[dict[str, str]]:
+    cur: cursor, schemas: list[str], tables: list[str] | None = None
+) -> list[_ForeignKey]:
     """
     外部キー関係を取得
 
+    複合外部キーは制約ごとに1本の辺にまとめます。
+    参照先が指定スキーマ以外のテーブルでも関係を返します。
+
     Args:
-        schema: スキーマ名
+        cur: クエリを実行するカーソル
+        schemas: スキーマ名のリスト
         tables: 対象テーブルのリスト（Noneの場合は全テーブル）
 
     Returns:
-        外部キー関係のリスト
-    """
-    query = """
-        SELECT DISTINCT
-            cls.relname AS from_table,
-            a.attname AS from_column,
-            ref_class.relname AS to_table,
-            ref_attr.attname AS to_column
-        FROM pg_catalog.pg_constraint con
-        JOIN pg_catalog.pg_class cls ON cls.oid = con.conrelid
-        JOIN pg_catalog.pg_namespace nsp ON nsp.oid = cls.relnamespace
-        JOIN pg_catalog.pg_attribute a ON a.attrelid = con.conrelid
-            AND a.attnum = ANY(con.conkey)
-        JOIN pg_catalog.pg_class ref_class ON ref_class.oid = con.confrelid
-        JOIN pg_catalog.pg_namespace ref_nsp ON ref_nsp.oid = ref_class.relnamespace
-        JOIN pg_catalog.pg_attribute ref_attr ON ref_attr.attrelid = con.confrelid
-            AND ref_attr.attnum = ANY(con.confkey)
-            AND array_position(con.conkey, a.attnum) = array_position(con.confkey, ref_attr.attnum)
-        WHERE con.contype = 'f'
-          AND nsp.nspname = %s
-          AND ref_nsp.nspname = %s
-        ORDER BY cls.relname, ref_class.relname
-    """
-
-    with get_connection() as conn, conn.cursor() as cur:
-        cur.execute(query, (schema, schema))
-        rows = cur.fetchall()
+        外部キー関係のリスト（制約ごと）
+    """
+    cur.execute(_FOREIGN_KEY_RELATIONS_QUERY, {"schemas": schemas, "tables": tables})
+    rows = cur.fetchall()
 
-    relations = []
+    table_set = set(tables) if tables is not None else None
+
+    # 制約のOIDごとにカラムの組をまとめる（行は制約内のカラム順に並んでいる）
+    constraints: dict[int, tuple[tuple[Any, ...], list[str], list[str]]] = {}
     for row in rows:
-        from_table, from_column, to_table, to_column = row
-        # tablesが指定されている場合、両方のテーブルがリストに含まれている必要がある
-        if tables is not None and (from_table not in tables or to_table not in tables):
+        constraint_oid, _, from_table, from_column, to_schema, to_table, to_column = (
+            row[:7]
+        )
+        # tablesが指定されている場合、指定スキーマ内の参照先もリストに含まれている必要がある
+        if table_set is not None and (
+            from_table not in table_set
+            or (to_schema in schemas and to_table not in table_set)
+        ):
             continue
+        entry = constraints.get(constraint_oid)
+        if entry is None:
+            entry = constraints[constraint_oid] = (row, [], [])
+        entry[1].append(sys.intern(from_column))
+        entry[2].append(sys.intern(to_column))
+
+    relations = []
+    for row, from_columns, to_columns in constraints.values():
+        _, from_schema, from_table, _, to_schema, to_table, _, to_relid = row
         relations.append(
-            {
-                "from_table": from_table,
-                "from_column": from_column,
-                "to_table": to_table,
-                "to_column": to_column,
-            }
+            _ForeignKey(
+                sys.intern(from_schema),
+                sys.intern(to_schema),
+                to_relid,
+                GraphEdge(
+                    sys.intern(from_table),
+                    tuple(from_columns),
+                    sys.intern(to_table),
+                    tuple(to_columns),
+                    "real",
+                ),
+            )
         )
 
     return relations
 
 
+# _id / _no を除いた語幹から参照先テーブル名を推測する際の語尾変換
+# （優先順: 単数形, s, es, y -> ies）
+_PLURAL_FORMS: tuple[tuple[str, str], ...] = (
+    ("", ""),
+    ("", "s"),
+    ("", "es"),
+    ("y", "ies"),
+)
+
+
+def _build_candidate_index(table_names: list[str]) -> dict[str, list[str]]:
+    """
+    推測に使う語幹 → 候補テーブルの索引を作成
+
+    各テーブル名を複数形の語尾変換の逆で語幹に戻して登録します。
+    候補は _PLURAL_FORMS の優先順に並びます。
+
+    Args:
+        table_names: テーブル名のリスト
+
+    Returns:
+        語幹をキー、候補テーブル名のリストを値とする辞書
+    """
+    ranked: dict[str, list[tuple[int, str]]] = {}
+    for table_name in table_names:
+        for rank, (singular, plural) in enumerate(_PLURAL_FORMS):
+            if plural and not table_name.endswith(plural):
+                continue
+            stem = table_name[: len(table_name) - len(plural)] + singular
+            ranked.setdefault(stem, []).append((rank, table_name))
+    return {
+        stem: [name for _, name in sorted(candidates)]
+        for stem, candidates in ranked.items()
+    }
+
+
+def _preferred_pk_column(pk_columns: list[str]) -> str:
+    """参照先として使うPKカラム（idまたはnoを優先）"""
+    if "id" in pk_columns:
+        return "id"
+    if "no" in pk_columns:
+        return "no"
+    if pk_columns:
+        return pk_columns[0]
+    return "id"  # デフォルト
+
+
 def _detect_virtual_foreign_keys(
-    tables_info: list[dict[str, Any]], schema: str, tables: list[str] | None = None
-) -> list[dict[str, str]]:
+    tables_info: list[GraphTable], schema: str, tables: list[str] | None = None
+) -> list[GraphEdge]:
     """
     Virtual Foreign Keys（命名規則から推測される外部キー）を検出
 
+    テーブル名とPKカラム名の索引を最初に1回だけ作成するため、
+    検出にかかる時間はカラム数に比例します。
+
     Args:
-        tables_info: テーブル情報のリスト
+        tables_info: テーブルのリスト
         schema: スキーマ名
         tables: 対象テーブルのリスト
 
     Returns:
-        推測される外部キー関係のリスト
+        推測される外部キー関係の辺のリスト
     """
-    # テーブル名のセットを作成
-    table_names = {t["table_name"] for t in tables_info}
-
-    # 各テーブルのPKカラム名を収集
-    pk_columns: dict[str, set[str]] = {}
+    # 語幹 → 候補テーブル、テーブル → 参照先PKカラム、PKカラム名 → テーブルの索引
+    candidate_index = _build_candidate_index([t.name for t in tables_info])
+    ref_columns: dict[str, str] = {}
+    pk_index: dict[str, list[str]] = {}
     for table in tables_info:
-        pk_columns[table["table_name"]] = {
-            col["column_name"] for col in table["columns"] if col["is_primary_key"]
-        }
-
-    # 既存の外部キーカラムを収集
-    fk_columns: set[tuple[str, str]] = set()
-    for table in tables_info:
-        for col in table["columns"]:
-            if col["is_foreign_key"]:
-                fk_columns.add((table["table_name"], col["column_name"]))
+        pk_columns = [col.name for col in table.columns if col.is_primary_key]
+        ref_columns[table.name] = _preferred_pk_column(pk_columns)
+        for column_name in dict.fromkeys(pk_columns):
+            pk_index.setdefault(column_name, []).append(table.name)
 
     virtual_fks = []
     for table in tables_info:
-        for col in table["columns"]:
-            column_name = col["column_name"]
+        table_name = table.name
+        for col in table.columns:
             # 既に外部キーとして定義されている場合はスキップ
-            if (table["table_name"], column_name) in fk_columns:
+            if col.is_foreign_key:
                 continue
             # 自分自身がPKの場合はスキップ（PKは他テーブルへの参照ではない）
-            if col["is_primary_key"]:
+            if col.is_primary_key:
                 continue
 
+            column_name = col.name
             matched_table = None
             matched_column = None
 
             # パターン1: _id または _no で終わるカラムをチェック
             for suffix in ("_id", "_no"):
-                if column_name.endswith(suffix):
-                    # 推測されるテーブル名
-                    potential_table = column_name[: -len(suffix)]
-                    # 複数形も試す
-                    potential_tables = [
-                        potential_table,
-                        potential_table + "s",
-                        potential_table + "es",
-                    ]
-                    # 特殊なパターン: category -> categories
-                    if potential_table.endswith("y"):
-                        potential_tables.append(potential_table[:-1] + "ies")
-
-                    for pt in potential_tables:
-                        if pt in table_names and pt != table["table_name"]:
-                            matched_table = pt
-                            # 参照先のPKを探す（idまたはnoを優先）
-                            ref_pk = pk_columns.get(pt, set())
-                            if "id" in ref_pk:
-                                matched_column = "id"
-                            elif "no" in ref_pk:
-                                matched_column = "no"
-                            elif ref_pk:
-                                matched_column = next(iter(ref_pk))
-                            else:
-                                matched_column = "id"  # デフォルト
-                            break
-                    if matched_table:
+                if not column_name.endswith(suffix):
+                    continue
+                stem = column_name[: -len(suffix)]
+                for candidate in candidate_index.get(stem, ()):
+                    if candidate != table_name:
+                        matched_table = candidate
+                        matched_column = ref_columns[candidate]
                         break
+                if matched_table:
+                    break
 
             # パターン2: 他のテーブルのPKと同名のカラム（_id, _no サフィックスなし）
             if not matched_table:
-                for other_table in tables_info:
-                    if other_table["table_name"] == table["table_name"]:
-                        continue
-                    other_pk = pk_columns.get(other_table["table_name"], set())
-                    if column_name in other_pk:
-                        matched_table = other_table["table_name"]
+                for other_table in pk_index.get(column_name, ()):
+                    if other_table != table_name:
+                        matched_table = other_table
                         matched_column = column_name
                         break
 
             if matched_table and matched_column:
                 virtual_fks.append(
-                    {
-                        "from_table": table["table_name"],
-                        "from_column": column_name,
-                        "to_table": matched_table,
-                        "to_column": matched_column,
-                    }
+                    GraphEdge(
+                        table_name,
+                        (column_name,),
+                        matched_table,
+                        (matched_column,),
+                        "virtual",
+                    )
                 )
 
     return virtual_fks
 
 
-def _simplify_data_type(data_type: str) -> str:
+def _build_adjacency(edges: list[tuple[str, str]]) -> dict[str, set[str]]:
     """
-    データ型を簡略化してMermaid ER図用に変換
+    外部キーの辺から無向の隣接リストを作成
 
     Args:
-        data_type: PostgreSQLのデータ型
+        edges: (参照元テーブル, 参照先テーブル) のリスト
 
     Returns:
-        簡略化されたデータ型
-    """
-    # 括弧内の詳細情報を除去し、基本型名のみを取得
-    type_map = {
-        "integer": "integer",
-        "bigint": "bigint",
-        "smallint": "smallint",
-        "serial": "serial",
-        "bigserial": "bigserial",
-        "character varying": "varchar",
-        "character": "char",
-        "text": "text",
-        "boolean": "boolean",
-        "timestamp with time zone": "timestamptz",
-        "timestamp without time zone": "timestamp",
-        "date": "date",
-        "time with time zone": "timetz",
-        "time without time zone": "time",
-        "numeric": "numeric",
-        "decimal": "decimal",
-        "real": "real",
-        "double precision": "double",
-        "uuid": "uuid",
-        "json": "json",
-        "jsonb": "jsonb",
-        "bytea": "bytea",
-        "interval": "interval",
-    }
+        テーブル名をキー、隣接するテーブル名のセットを値とする辞書
+    """
+    adjacency: dict[str, set[str]] = {}
+    for from_table, to_table in edges:
+        if from_table == to_table:
+            continue
+        adjacency.setdefault(from_table, set()).add(to_table)
+        adjacency.setdefault(to_table, set()).add(from_table)
+    return adjacency
+
+
+def _neighborhood(
+    adjacency: dict[str, set[str]], seed_tables: list[str], depth: int
+) -> list[str]:
+    """
+    起点テーブルから depth ホップ以内のテーブルを幅優先探索で取得
+
+    Args:
+        adjacency: 無向の隣接リスト
+        seed_tables: 起点テーブルのリスト
+        depth: たどるホップ数（0の場合は起点テーブルのみ）
+
+    Returns:
+        発見順のテーブル名のリスト（起点テーブルを含む）
+    """
+    visited = dict.fromkeys(seed_tables)
+    frontier = list(visited)
+    for _ in range(depth):
+        next_frontier = []
+        for table_name in frontier:
+            for neighbor in sorted(adjacency.get(table_name, ())):
+                if neighbor not in visited:
+                    visited[neighbor] = None
+                    next_frontier.append(neighbor)
+        if not next_frontier:
+            break
+        frontier = next_frontier
+    return list(visited)
+
+
+def _bfs_order(nodes: list[str], adjacency: dict[str, set[str]]) -> list[list[str]]:
+    """
+    ノード集合を連結成分に分け、各成分を幅優先探索の順に並べる
+
+    Args:
+        nodes: 対象のノード（この集合の外への辺は無視する）
+        adjacency: 無向の隣接リスト
+
+    Returns:
+        連結成分ごとのノードのリスト
+    """
+    remaining = dict.fromkeys(nodes)
+    components = []
+    for start in nodes:
+        if start not in remaining:
+            continue
+        del remaining[start]
+        component = [start]
+        for node in component:
+            for neighbor in sorted(adjacency.get(node, ())):
+                if neighbor in remaining:
+                    del remaining[neighbor]
+                    component.append(neighbor)
+        components.append(component)
+    return components
+
+
+def _label_propagation(
+    nodes: list[str],
+    adjacency: dict[str, set[str]],
+    max_iterations: int = 20,
+    seed: int = 0,
+) -> list[list[str]]:
+    """
+    ラベル伝播法で連結成分をコミュニティに分割
+
+    各ノードは隣接ノードで最も多いラベルを採用します（現在のラベルが最多の
+    一つなら維持）。更新順と同数時の選択は乱数で決めますが、
+    結果を再現可能にするため乱数のシードは固定します。
+
+    Args:
+        nodes: 連結成分のノード
+        adjacency: 無向の隣接リスト
+        max_iterations: 最大反復回数
+        seed: 乱数のシード
+
+    Returns:
+        コミュニティごとのノードのリスト
+    """
+    rng = random.Random(seed)  # noqa: S311
+    members = set(nodes)
+    order = sorted(nodes)
+    labels = {node: node for node in order}
+    for _ in range(max_iterations):
+        rng.shuffle(order)
+        changed = False
+        for node in order:
+            counts = Counter(labels[n] for n in adjacency.get(node, ()) if n in members)
+            if not counts:
+                continue
+            best = max(counts.values())
+            if counts.get(labels[node]) == best:
+                continue
+            labels[node] = rng.choice(
+                sorted(label for label, c in counts.items() if c == best)
+            )
+            changed = True
+        if not changed:
+            break
+
+    communities: dict[str, list[str]] = {}
+    for node in nodes:
+        communities.setdefault(labels[node], []).append(node)
+    return list(communities.values())
+
+
+def _grow_pieces(
+    nodes: list[str], adjacency: dict[str, set[str]], max_size: int
+) -> list[list[str]]:
+    """
+    連結なノード集合を、起点から幅優先で max_size まで広げた断片に分割
+
+    断片はそれぞれ起点から到達したノードだけを含むため連結です。
+
+    Args:
+        nodes: ノード（この順に未割り当てのものを起点にする）
+        adjacency: 無向の隣接リスト
+        max_size: 断片の最大ノード数
+
+    Returns:
+        断片ごとのノードのリスト
+    """
+    remaining = dict.fromkeys(nodes)
+    pieces = []
+    for start in nodes:
+        if start not in remaining:
+            continue
+        del remaining[start]
+        piece = [start]
+        for node in piece:
+            if len(piece) >= max_size:
+                break
+            for neighbor in sorted(adjacency.get(node, ())):
+                if neighbor in remaining:
+                    del remaining[neighbor]
+                    piece.append(neighbor)
+                    if len(piece) >= max_size:
+                        break
+        pieces.append(piece)
+    return pieces
+
+
+def _partition_component(
+    component: list[str], adjacency: dict[str, set[str]], max_size: int
+) -> list[list[str]]:
+    """
+    max_size を超える連結成分を、つながりを保ちながら分割
+
+    ラベル伝播法で得たコミュニティ（の連結な部分）を単位とし、単独で max_size を
+    超える単位は起点から幅優先で広げた断片に分けます。単位の隣接関係の全域木を
+    葉の側からたどり、部分木を max_size まで親の単位にまとめるため、
+    各クラスタは連結です。
+
+    Args:
+        component: 連結成分のノード
+        adjacency: 無向の隣接リスト
+        max_size: 1クラスタの最大テーブル数
+
+    Returns:
+        クラスタごとのノードのリスト
+    """
+    units: list[list[str]] = []
+    for community in _label_propagation(component, adjacency):
+        # ラベル伝播法のコミュニティは連結とは限らないため、連結な部分に分ける
+        for part in _bfs_order(community, adjacency):
+            if len(part) > max_size:
+                units += _grow_pieces(part, adjacency, max_size)
+            else:
+                units.append(part)
+    units.sort(key=lambda unit: (-len(unit), min(unit)))
+
+    unit_of = {node: index for index, unit in enumerate(units) for node in unit}
+    unit_adjacency: list[set[int]] = [set() for _ in units]
+    for node, index in unit_of.items():
+        for neighbor in adjacency.get(node, ()):
+            other = unit_of.get(neighbor)
+            if other is not None and other != index:
+                unit_adjacency[index].add(other)
+
+    # 最大の単位を根とする単位の全域木を幅優先で作り、葉から順にまとめる。
+    # 子の部分木のまとまりは親の単位に隣接するため、親と合わせても連結
+    parent = [-1] * len(units)
+    order = [0]
+    visited = {0}
+    for index in order:
+        for other in sorted(unit_adjacency[index]):
+            if other not in visited:
+                visited.add(other)
+                parent[other] = index
+                order.append(other)
+
+    children: list[list[list[str]]] = [[] for _ in units]
+    clusters: list[list[str]] = []
+    for index in reversed(order):
+        group = list(units[index])
+        # 小さい部分木から親に含め、収まらない部分木はそれぞれ1クラスタにする
+        for child in sorted(children[index], key=len):
+            if len(group) + len(child) <= max_size:
+                group += child
+            else:
+                clusters.append(child)
+        if parent[index] >= 0:
+            children[parent[index]].append(group)
+        else:
+            clusters.append(group)
+    return clusters
+
+
+def _split_clusters(
+    table_names: list[str], adjacency: dict[str, set[str]], max_size: int
+) -> list[list[str]]:
+    """
+    テーブルを外部キーでつながるクラスタに分割
+
+    連結成分ごとに1クラスタとし、max_size を超える巨大な成分はラベル伝播法の
+    コミュニティを単位に分割します。
+    関係を持たないテーブルは末尾にまとめます。
+
+    Args:
+        table_names: スキーマ内の全テーブル名
+        adjacency: 無向の隣接リスト
+        max_size: 1クラスタの最大テーブル数
+
+    Returns:
+        クラスタごとのテーブル名のリスト（大きい順、関係のないテーブルは末尾）
+    """
+    clusters: list[list[str]] = []
+    isolated: list[str] = []
+    for component in _bfs_order(table_names, adjacency):
+        if len(component) == 1:
+            isolated.extend(component)
+            continue
+        if len(component) <= max_size:
+            clusters.append(component)
+            continue
+        clusters += _partition_component(component, adjacency, max_size)
+
+    clusters = [sorted(cluster) for cluster in clusters]
+    clusters.sort(key=lambda cluster: (-len(cluster), cluster[0]))
+    isolated.sort()
+    clusters += [
+        isolated[start : start + max_size]
+        for start in range(0, len(isolated), max_size)
+    ]
+    return clusters
+
+
+def _fetch_edges(
+    cur: cursor, schema: str, include_virtual_fks: bool
+) -> list[tuple[str, str]]:
+    """
+    テーブル間の辺を取得
+
+    Args:
+        cur: クエリを実行するカーソル
+        schema: スキーマ名
+        include_virtual_fks: Virtual Foreign Keysも辺として扱うか
+
+    Returns:
+        (参照元テーブル, 参照先テーブル) のリスト
+    """
+    cur.execute(_FOREIGN_KEY_EDGES_QUERY, {"schema": schema})
+    edges: list[tuple[str, str]] = cur.fetchall()
+    if include_virtual_fks:
+        # 命名規則の推測には全テーブルのカラムが必要
+        tables_info = _get_tables_info(cur, [schema]).get(schema, [])
+        virtual_fks = _detect_virtual_foreign_keys(tables_info, schema)
+        edges += [(vfk.from_table, vfk.to_table) for vfk in virtual_fks]
+    return edges
+
+
+class _GraphSession:
+    """
+    ER図の中間表現をカタログキャッシュ経由で取得するセッション
+
+    キャッシュで足りる間はデータベースに接続せず、最初のキャッシュミスで
+    スナップショット接続を開きます。以降の取得は全て同じスナップショットで行います。
+    複数のスキーマにまたがる値はスキーマ単位で鮮度を確認できないため、
+    キャッシュせずに毎回作成します（作成した値が他のスキーマのテーブルを
+    含む場合も同様です）。
+    """
+
+    def __init__(self, schemas: list[str]) -> None:
+        self.schemas = schemas
+        self.schema = schemas[0]
+        self._cache = get_catalog_cache()
+        self._stack = ExitStack()
+        self._cursor: cursor | None = None
+
+    def __enter__(self) -> "_GraphSession":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self._stack.close()
+
+    def _snapshot_cursor(self) -> cursor:
+        """スナップショット接続のカーソル（初回呼び出し時に接続）"""
+        if self._cursor is None:
+            conn = self._stack.enter_context(snapshot_connection())
+            self._cursor = self._stack.enter_context(conn.cursor())
+        return self._cursor
+
+    def get(
+        self,
+        key: tuple[str, ...],
+        build: Callable[[cursor], T],
+        cacheable: Callable[[T], bool] | None = None,
+    ) -> T:
+        """
+        キャッシュ済みの値を取得し、無ければ build で作成
+
+        Args:
+            key: スキーマ内でエントリを識別するキー
+            build: カーソルを受け取って値を作成する関数
+            cacheable: 作成した値をキャッシュするかを判定する関数
+
+        Returns:
+            キャッシュ済みまたは作成した値
+        """
+        if len(self.schemas) > 1:
+            return build(self._snapshot_cursor())
+        value = self._cache.peek(self.schema, key)
+        if value is not None:
+            return cast(T, value)
+        cur = self._snapshot_cursor()
+        return self._cache.get_or_build(
+            cur, self.schema, key, lambda: build(cur), cacheable
+        )
+
+
+def _graph_key(tables: list[str] | None) -> tuple[str, ...]:
+    """対象テーブルに対応するスキーマグラフのキャッシュキー"""
+    if tables is None:
+        return ("er_graph", "*")
+    return ("er_graph", "tables", *sorted(set(tables)))
+
+
+def _qualify(table: GraphTable, name: str) -> GraphTable:
+    return table if table.name == name else GraphTable(name, table.columns)
 
-    # 配列型の処理
-    if data_type.endswith("[]"):
-        base_type = data_type[:-2]
-        simplified = _simplify_data_type(base_type)
-        return f"{simplified}_array"
 
-    # 括弧前の型名を抽出
-    base_type = data_type.split("(")[0].strip()
+def _load_graph(
+    cur: cursor, schemas: list[str], tables: list[str] | None
+) -> SchemaGraph:
+    """
+    対象テーブルのカラム情報と外部キー関係を取得してスキーマグラフを作成
+
+    指定スキーマ以外のテーブルを参照する外部キーは、参照先テーブルをOIDで
+    まとめて1回のクエリで追加取得します。グラフが複数のスキーマにまたがる
+    場合、テーブル名は「スキーマ名.テーブル名」で表します。
+
+    Args:
+        cur: クエリを実行するカーソル
+        schemas: スキーマ名のリスト
+        tables: 対象テーブルのリスト（Noneの場合は全テーブル）
+
+    Returns:
+        スキーマグラフ
+    """
+    tables_by_schema = _get_tables_info(cur, schemas, tables)
+    foreign_keys = (
+        _get_foreign_key_relations(cur, schemas, tables) if tables_by_schema else []
+    )
+
+    external = sorted(
+        {fk.to_relid for fk in foreign_keys if fk.to_schema not in schemas}
+    )
+    if external:
+        for schema, referenced in _get_tables_info(cur, [], None, external).items():
+            tables_by_schema.setdefault(schema, []).extend(referenced)
+
+    # Virtual Foreign Keysはスキーマ内のテーブル名の命名規則から推測する
+    virtual_fks = [
+        (schema, vfk)
+        for schema in schemas
+        for vfk in _detect_virtual_foreign_keys(
+            tables_by_schema.get(schema, []), schema, tables
+        )
+    ]
 
-    return type_map.get(base_type, base_type.replace(" ", "_"))
+    qualified = len(tables_by_schema) > 1
+
+    def name(schema: str, table_name: str) -> str:
+        return f"{schema}.{table_name}" if qualified else table_name
+
+    graph_tables = [
+        _qualify(table, name(schema, table.name))
+        for schema, schema_tables in tables_by_schema.items()
+        for table in schema_tables
+    ]
+    relations = [
+        replace(
+            fk.edge,
+            from_table=name(fk.from_schema, fk.edge.from_table),
+            to_table=name(fk.to_schema, fk.edge.to_table),
+        )
+        for fk in foreign_keys
+    ]
+    virtual_edges = [
+        replace(
+            vfk,
+            from_table=name(schema, vfk.from_table),
+            to_table=name(schema, vfk.to_table),
+        )
+        for schema, vfk in virtual_fks
+    ]
+    return build_schema_graph(
+        ", ".join(schemas), graph_tables, relations, virtual_edges
+    )
+
+
+def _get_graph(session: _GraphSession, tables: list[str] | None) -> SchemaGraph:
+    """スキーマグラフをキャッシュ経由で取得"""
+    return session.get(
+        _graph_key(tables),
+        lambda cur: _load_graph(cur, session.schemas, tables),
+        _is_single_schema,
+    )
+
+
+def _is_single_schema(graph: SchemaGraph) -> bool:
+    """
+    グラフが1つのスキーマのテーブルだけを含むか
+
+    他のスキーマを参照する外部キーがあると参照先テーブルを追加し、全ての
+    テーブル名を「スキーマ名.テーブル名」にします。参照先のスキーマの変更は
+    フィンガープリントで検出できないため、そのようなグラフはキャッシュしません
+    （名前に . を含むテーブルも除外されますが、キャッシュしないだけで安全です）。
+    """
+    return all("." not in table.name for table in graph.tables)
+
+
+@dataclass(frozen=True)
+class _ClusterLayout:
+    """
+    スキーマのクラスタ分割結果
+
+    Attributes:
+        table_count: スキーマ内のテーブル数
+        clusters: クラスタごとのテーブル名
+        index: クラスタ一覧（Markdown Tableの行）
+    """
+
+    table_count: int
+    clusters: tuple[tuple[str, ...], ...]
+    index: tuple[str, ...]
+
+
+def _format_cluster_index(
+    clusters: list[list[str]], adjacency: dict[str, set[str]]
+) -> list[str]:
+    """クラスタ一覧をMarkdown Table形式の行で出力"""
+    lines = [
+        "| # | テーブル数 | 主なテーブル |",
+        "|---|---|---|",
+    ]
+    for number, cluster in enumerate(clusters, start=1):
+        # 関係の多いテーブルを代表として表示する
+        hubs = sorted(cluster, key=lambda t: (-len(adjacency.get(t, ())), t))[:3]
+        more = ", ..." if len(cluster) > len(hubs) else ""
+        # 関係を持たないテーブルをまとめたクラスタは区別して表示する
+        isolated = "（関係なし）" if not any(t in adjacency for t in cluster) else ""
+        lines.append(
+            f"| {number} | {len(cluster)} | {isolated}{', '.join(hubs)}{more} |"
+        )
+    return lines
+
+
+def _load_cluster_layout(
+    cur: cursor, schema: str, include_virtual_fks: bool, max_size: int
+) -> _ClusterLayout:
+    """
+    テーブル名と外部キーの辺を取得してクラスタに分割
+
+    Args:
+        cur: クエリを実行するカーソル
+        schema: スキーマ名
+        include_virtual_fks: Virtual Foreign Keysもクラスタ分割の辺として扱うか
+        max_size: 1クラスタの最大テーブル数
+
+    Returns:
+        クラスタ分割結果
+    """
+    cur.execute(_TABLE_NAMES_QUERY, {"schema": schema})
+    table_names = [row[0] for row in cur.fetchall()]
+    if not table_names:
+        return _ClusterLayout(0, (), ())
+    adjacency = _build_adjacency(_fetch_edges(cur, schema, include_virtual_fks))
+    clusters = _split_clusters(table_names, adjacency, max_size)
+    return _ClusterLayout(
+        len(table_names),
+        tuple(tuple(cluster) for cluster in clusters),
+        tuple(_format_cluster_index(clusters, adjacency)),
+    )
 
 
-def _format_mermaid_er_diagram(
-    tables_info: list[dict[str, Any]],
-    relations: list[dict[str, str]],
-    virtual_fks: list[dict[str, str]],
+def _generate_clustered_er_diagram(
+    session: _GraphSession,
+    page: int,
+    include_virtual_fks: bool,
+    diagram_format: str,
+    budget: OutputBudget,
+    cursor: str | None,
 ) -> str:
     """
-    Mermaid ER図形式にフォーマット
+    スキーマをクラスタに分割し、指定ページのクラスタのER図を生成
+
+    ページの出力が上限を超える場合は、クラスタの境界（1つのクラスタが収まらない
+    場合はクラスタ内のテーブルの境界）で打ち切るため、各図はそれだけで有効です。
 
     Args:
-        tables_info: テーブル情報のリスト
-        relations: 外部キー関係のリスト
-        virtual_fks: 推測される外部キー関係のリスト
+        session: スキーマグラフを取得するセッション
+        page: ページ番号（1始まり）
+        include_virtual_fks: Virtual Foreign Keysもクラスタ分割の辺として扱うか
+        diagram_format: 出力形式
+        budget: 出力サイズの上限
+        cursor: 前回の出力に含まれていたカーソル
 
     Returns:
-        Mermaid ER図形式の文字列
+        クラスタ一覧とクラスタごとのER図を含むMarkdown形式の文字列
     """
-    if not tables_info:
+    max_size = env_int("PGMCP_ER_MAX_CLUSTER_SIZE", 100)
+    per_page = env_int("PGMCP_ER_CLUSTERS_PER_PAGE", 5)
+    for name, value in (
+        ("PGMCP_ER_MAX_CLUSTER_SIZE", max_size),
+        ("PGMCP_ER_CLUSTERS_PER_PAGE", per_page),
+    ):
+        if value < 1:
+            raise ValueError(f"{name} は1以上を指定してください。")
+    render = get_renderer(diagram_format)
+
+    layout = session.get(
+        ("er_clusters", str(max_size), str(include_virtual_fks)),
+        lambda cur: _load_cluster_layout(
+            cur, session.schema, include_virtual_fks, max_size
+        ),
+    )
+    if not layout.clusters:
         return "対象のテーブルが見つかりませんでした。"
 
-    lines = ["erDiagram"]
+    clusters = layout.clusters
+    total_pages = (len(clusters) + per_page - 1) // per_page
+    start = (page - 1) * per_page
+    page_clusters = clusters[start : start + per_page]
 
-    # Virtual FK対象カラムを特定（FKマーカー付与用）
-    virtual_fk_columns = {
-        (vfk["from_table"], vfk["from_column"]) for vfk in virtual_fks
-    }
+    title = [
+        f"## ER図クラスタ（{len(clusters)}クラスタ / {layout.table_count}テーブル）",
+        "",
+    ]
+    index = [*layout.index, ""] if page == 1 else []
+    if not page_clusters:
+        lines = [*title, *index]
+        lines.append(f"ページ {page} にクラスタはありません（全{total_pages}ページ）。")
+        return "\n".join(lines)
 
-    # テーブル定義を出力
-    for table in sorted(tables_info, key=lambda t: t["table_name"]):
-        table_name = table["table_name"]
-        lines.append(f"    {table_name} {{")
-        for col in table["columns"]:
-            simplified_type = _simplify_data_type(col["data_type"])
-            markers = []
-            if col["is_primary_key"]:
-                markers.append("PK")
-            if (
-                col["is_foreign_key"]
-                or (table_name, col["column_name"]) in virtual_fk_columns
-            ):
-                markers.append("FK")
-            marker_str = " " + ",".join(markers) if markers else ""
-            comment = f' "{col["comment"]}"' if col["comment"] else ""
-            lines.append(
-                f"        {simplified_type} {col['column_name']}{marker_str}{comment}"
-            )
-        lines.append("    }")
-
-    # 関係を出力（実際の外部キー）
-    for rel in relations:
-        # 多対1の関係を表現: from_table は to_table の1つのレコードを参照
-        lines.append(f'    {rel["to_table"]} ||--o{{ {rel["from_table"]} : "has"')
-
-    # Virtual Foreign Keysを出力（破線スタイルはMermaidでは対応していないのでコメントで区別）
-    for vfk in virtual_fks:
-        # 重複チェック
-        is_duplicate = any(
-            r["from_table"] == vfk["from_table"]
-            and r["to_table"] == vfk["to_table"]
-            and r["from_column"] == vfk["from_column"]
-            for r in relations
+    footer = []
+    if page < total_pages:
+        footer.append(
+            f"続きがあります（{page}/{total_pages}ページ）。"
+            f"次のページは page={page + 1} を指定して取得してください。"
         )
-        if not is_duplicate:
+
+    # カラム情報はページ内のクラスタを出力するときに初めて取得する
+    sections = [
+        (number, len(cluster), _get_graph(session, list(cluster)))
+        for number, cluster in enumerate(page_clusters, start=start + 1)
+    ]
+
+    def section(number: int, size: int, graph: SchemaGraph, part: bool) -> list[str]:
+        heading = f"### クラスタ {number}（{size}テーブル）"
+        return [
+            heading + ("（続き）" if part else ""),
+            "",
+            f"```{diagram_format}",
+            render(graph),
+            "```",
+            "",
+        ]
+
+    full = "\n".join(
+        title
+        + index
+        + [line for n, size, g in sections for line in section(n, size, g, False)]
+        + footer
+    ).rstrip("\n")
+    if cursor is None and (budget.unlimited or budget.fits_text(full)):
+        return full
+
+    # 続きの位置はページ内のクラスタのテーブルを先頭から数えた番号
+    digest = output_digest(full)
+    position = decode_cursor(cursor, digest) if cursor is not None else 0
+    total = sum(len(graph.tables) for _, _, graph in sections)
+    if position and position >= total:
+        raise ValueError("cursor の位置が出力の範囲外です。")
+    head = title + (index if position == 0 else [])
+
+    def text(body: list[str], end: int) -> str:
+        lines = head + body
+        if end < total:
             lines.append(
-                f'    {vfk["to_table"]} ||..o{{ {vfk["from_table"]} : "references"'
+                f"…出力が上限を超えたため、残り{total - end}テーブルを省略しました。"
+                f'続きは cursor="{encode_cursor(end, digest)}" を指定して取得してください。'
+            )
+        else:
+            lines += footer
+        return "\n".join(lines).rstrip("\n")
+
+    body: list[str] = []
+    offset = 0
+    for number, size, graph in sections:
+        count = len(graph.tables)
+        if position >= offset + count:
+            offset += count
+            continue
+        begin = position - offset
+        part = begin > 0
+        whole = body + section(number, size, _subgraph(graph, begin, count), part)
+        if budget.fits_text(text(whole, offset + count)):
+            body = whole
+            position = offset = offset + count
+            continue
+        # 収まる最大のテーブル数を二分探索する（進み続けるため最低1テーブル）
+        low, high = (0 if body else 1), count - begin - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            sub = _subgraph(graph, begin, begin + middle)
+            if budget.fits_text(
+                text(body + section(number, size, sub, part), position + middle)
+            ):
+                low = middle
+            else:
+                high = middle - 1
+        if low:
+            sub = _subgraph(graph, begin, begin + low)
+            body += section(number, size, sub, part)
+            position += low
+        break
+    return text(body, position)
+
+
+# output_format="tsv" で出力する列名（1行1カラム）
+_GRAPH_TSV_COLUMNS = (
+    "table_name",
+    "column_name",
+    "data_type",
+    "primary_key",
+    "foreign_key",
+    "references",
+    "virtual_references",
+    "comment",
+)
+
+
+def _graph_records(graph: SchemaGraph) -> list[tuple[Any, ...]]:
+    """
+    スキーマグラフをカラムごとの行に変換
+
+    参照先は「テーブル名.カラム名」で表し、外部キー制約によるものを references、
+    推測したものを virtual_references に ", " 区切りで出力します。
+    """
+    targets: dict[tuple[str, str, str], list[str]] = {}
+    for edge in graph.edges:
+        for from_column, to_column in zip(
+            edge.from_columns, edge.to_columns, strict=True
+        ):
+            key = (edge.kind, edge.from_table, from_column)
+            targets.setdefault(key, []).append(f"{edge.to_table}.{to_column}")
+
+    records = []
+    for table in graph.tables:
+        for column in table.columns:
+            real = targets.get(("real", table.name, column.name))
+            virtual = targets.get(("virtual", table.name, column.name))
+            records.append(
+                (
+                    table.name,
+                    column.name,
+                    column.data_type,
+                    column.is_primary_key,
+                    column.is_foreign_key,
+                    ", ".join(real) if real else None,
+                    ", ".join(virtual) if virtual else None,
+                    column.comment,
+                )
             )
+    return records
+
+
+def _subgraph(graph: SchemaGraph, start: int, end: int) -> SchemaGraph:
+    """名前順で start 番目から end 番目までのテーブルと、それらが参照元の辺"""
+    tables = graph.tables[start:end]
+    names = {table.name for table in tables}
+    edges = tuple(edge for edge in graph.edges if edge.from_table in names)
+    return SchemaGraph(graph.schema, tables, edges)
+
 
-    return "\n".join(lines)
+def _paginate_graph(
+    graph: SchemaGraph,
+    render: Callable[[SchemaGraph], str],
+    budget: OutputBudget,
+    cursor: str | None,
+    prefix: str = "",
+    dump: Callable[[dict[str, Any]], str] | None = None,
+    warnings: list[str] | None = None,
+) -> str:
+    """
+    出力が上限を超える場合にテーブル単位でER図を打ち切る
+
+    行の途中ではなくテーブルの境界で打ち切るため、各ページはそれだけで
+    有効な図（または JSON）になります。ページに含めたテーブルが参照元の辺は
+    参照先が別ページのテーブルでも出力します（参照先は各形式のレンダラーが
+    端点として定義します）。
+
+    Args:
+        graph: スキーマグラフ
+        render: スキーマグラフを文字列に変換する関数
+        budget: 出力サイズの上限
+        cursor: 前回の出力に含まれていたカーソル
+        prefix: 最初のページの先頭に付ける文字列（警告など）
+        dump: JSON で出力する場合に dict を文字列に変換する関数
+            （省略時は末尾に要約の文を付ける）
+        warnings: JSON で出力する場合に最初のページの warnings に入れる警告
+
+    Returns:
+        上限以内のER図の文字列
+    """
+    full = prefix + render(graph)
+    if cursor is None and (budget.unlimited or budget.fits_text(full)):
+        return full
+
+    digest = output_digest(full)
+    start = decode_cursor(cursor, digest) if cursor is not None else 0
+    total = len(graph.tables)
+    if start and start >= total:
+        raise ValueError("cursor の位置が出力の範囲外です。")
+
+    def page(count: int) -> str:
+        end = start + count
+        sub = _subgraph(graph, start, end)
+        omitted = graph.tables[end:]
+        next_cursor = encode_cursor(end, digest) if omitted else None
+        if dump is not None:
+            document = graph_document(sub)
+            if warnings and start == 0:
+                document["warnings"] = warnings
+            if omitted:
+                document["omitted_tables"] = len(omitted)
+            document["next_cursor"] = next_cursor
+            return dump(document)
+        text = (prefix if start == 0 else "") + render(sub)
+        if omitted:
+            names = ", ".join(table.name for table in omitted[:3])
+            more = " など" if len(omitted) > 3 else ""
+            text += (
+                f"\n\n…出力が上限を超えたため、残り{len(omitted)}テーブル"
+                f"（{names}{more}）を省略しました。"
+                f'続きは cursor="{next_cursor}" を指定して取得してください。'
+            )
+        return text
+
+    # 上限に収まる最大のテーブル数を二分探索する（進み続けるため最低1テーブル）
+    low, high = 1, max(total - start, 1)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if budget.fits_text(page(middle)):
+            low = middle
+        else:
+            high = middle - 1
+    return page(low)
+
+
+def _expand_seed_tables(
+    cur: cursor,
+    schema: str,
+    seed_tables: list[str],
+    depth: int,
+    include_virtual_fks: bool,
+) -> list[str]:
+    """
+    起点テーブルを外部キーの近傍に展開
+
+    Args:
+        cur: クエリを実行するカーソル
+        schema: スキーマ名
+        seed_tables: 起点テーブルのリスト
+        depth: たどるホップ数
+        include_virtual_fks: Virtual Foreign Keysも辺として扱うか
+
+    Returns:
+        近傍のテーブル名のリスト
+    """
+    edges = _fetch_edges(cur, schema, include_virtual_fks)
+    return _neighborhood(_build_adjacency(edges), seed_tables, depth)
 
 
 def generate_er_diagram_impl(
     schema: str = "public",
     tables: list[str] | None = None,
+    seed_tables: list[str] | None = None,
+    depth: int = 1,
+    include_virtual_fks: bool = False,
+    split_clusters: bool = False,
+    page: int = 1,
+    diagram_format: str = "mermaid",
+    schemas: list[str] | None = None,
+    output_format: str = "markdown",
+    max_chars: int | None = None,
+    max_tokens: int | None = None,
+    cursor: str | None = None,
 ) -> str:
     """
-    データベースのテーブル関係をMermaid形式のER図として生成します。
+    データベースのテーブル関係をER図として生成します。
+
+    他のスキーマのテーブルを参照する外部キーは、参照先テーブルを含めて出力します。
+    schemas を指定した場合は複数スキーマのテーブルを1つのER図にまとめ、
+    テーブル名を「スキーマ名.テーブル名」で表します。
+
+    seed_tables を指定した場合は、外部キーの隣接リストを幅優先探索して
+    起点テーブルから depth ホップ以内のテーブルだけを出力します。
+    split_clusters を指定した場合は、スキーマを外部キーでつながるクラスタに
+    分割し、クラスタ一覧とページ内のクラスタごとのER図を出力します。
+    取得したスキーマグラフはカタログキャッシュに保存されるため、
+    別の出力形式での再生成ではデータベースに問い合わせません。
+    output_format に json / tsv を指定した場合は、図ではなくスキーマグラフの
+    データ（JSON は隣接リスト、TSV は1行1カラム）を出力します。
+    出力が max_chars / max_tokens を超える場合は、テーブルの境界で打ち切って
+    続きを取得するカーソルを付けます（TSV と split_clusters は行単位）。
 
     Args:
         schema: スキーマ名（デフォルト: "public"）
         tables: 対象テーブルのリスト（省略時は全テーブル）
+        seed_tables: 近傍探索の起点テーブルのリスト（tablesとは併用不可）
+        depth: 起点テーブルからたどるホップ数（デフォルト: 1）
+        include_virtual_fks: 近傍探索やクラスタ分割でVirtual Foreign Keysもたどるか
+        split_clusters: スキーマ全体をクラスタごとのER図に分割するか
+        page: split_clusters のページ番号（1始まり）
+        diagram_format: 出力形式（mermaid, dot, plantuml, json。デフォルト: mermaid）
+        schemas: ER図に含めるスキーマ名のリスト（指定時は schema より優先）
+        output_format: 出力形式（markdown, json, tsv。デフォルト: markdown）
+        max_chars: 出力の最大文字数（省略時は無制限）
+        max_tokens: 出力の最大推定トークン数（省略時は無制限）
+        cursor: 前回の出力に含まれていた続きを取得するカーソル
 
     Returns:
-        Mermaid ER図形式の文字列。
+        指定した形式のER図の文字列。
         テーブル名、カラム名、型、主キー、コメント、外部キー関係を含む。
     """
-    # テーブル情報を取得
-    tables_info = _get_tables_info(schema, tables)
+    render = get_renderer(diagram_format)
+    validate_output_format(output_format)
+    budget = OutputBudget(max_chars, max_tokens)
+    if output_format != "markdown":
+        if diagram_format != "mermaid":
+            raise ValueError(
+                "diagram_format は output_format が markdown の場合のみ指定できます。"
+            )
+        if split_clusters:
+            raise ValueError(
+                "split_clusters は output_format が markdown の場合のみ指定できます。"
+            )
+    if seed_tables is not None:
+        if tables is not None:
+            raise ValueError("tables と seed_tables は同時に指定できません。")
+        if depth < 0:
+            raise ValueError("depth は0以上を指定してください。")
+    if split_clusters:
+        if tables is not None or seed_tables is not None:
+            raise ValueError(
+                "split_clusters は tables / seed_tables と同時に指定できません。"
+            )
+        if page < 1:
+            raise ValueError("page は1以上を指定してください。")
+    if schemas is not None:
+        if not schemas:
+            raise ValueError("schemas には1つ以上のスキーマを指定してください。")
+        if seed_tables is not None or split_clusters:
+            raise ValueError(
+                "schemas は seed_tables / split_clusters と同時に指定できません。"
+            )
+    target_schemas = list(dict.fromkeys(schemas)) if schemas else [schema]
+
+    # カラム情報と外部キー関係は同じスナップショットで取得し、
+    # DDLと並行しても図の中身が食い違わないようにする
+    with _GraphSession(target_schemas) as session:
+        if split_clusters:
+            return _generate_clustered_er_diagram(
+                session, page, include_virtual_fks, diagram_format, budget, cursor
+            )
+        if seed_tables is not None:
+            seeds = seed_tables
+            tables = session.get(
+                (
+                    "er_neighborhood",
+                    str(depth),
+                    str(include_virtual_fks),
+                    *sorted(set(seeds)),
+                ),
+                lambda cur: _expand_seed_tables(
+                    cur, schema, seeds, depth, include_virtual_fks
+                ),
+            )
+        graph = _get_graph(session, tables)
 
     # テーブル数が多い場合の警告
-    warning = ""
-    if len(tables_info) > 100 and tables is None:
-        warning = (
-            f"⚠️ 警告: {len(tables_info)}個のテーブルが見つかりました。"
-            "tables パラメータで対象を絞り込むことをお勧めします。\n\n"
+    warnings: list[str] = []
+    if len(graph.tables) > 100 and tables is None:
+        warnings.append(
+            f"{len(graph.tables)}個のテーブルが見つかりました。"
+            "tables パラメータで対象を絞り込むか、split_clusters=True で"
+            "クラスタごとに分割することをお勧めします。"
+        )
+
+    def document(g: SchemaGraph) -> dict[str, Any]:
+        # JSON の出力では警告を文書のフィールドで返す（先頭に文を付けると無効になる）
+        result = graph_document(g)
+        if warnings:
+            result["warnings"] = warnings
+        return result
+
+    if output_format == "json":
+        return _paginate_graph(
+            graph,
+            lambda g: to_json(document(g)),
+            budget,
+            cursor,
+            dump=to_json,
+            warnings=warnings,
         )
+    if output_format == "tsv":
+        return paginate_output(
+            format_rows(output_format, _GRAPH_TSV_COLUMNS, _graph_records(graph)),
+            output_format,
+            max_chars,
+            max_tokens,
+            cursor,
+        )
+
+    if not graph.tables:
+        return "対象のテーブルが見つかりませんでした。"
 
-    # 外部キー関係を取得
-    relations = _get_foreign_key_relations(schema, tables)
+    # JSON の図はページごとに有効な JSON になるよう、警告や要約もフィールドで返す
+    if diagram_format == "json":
 
-    # Virtual Foreign Keysを検出
-    virtual_fks = _detect_virtual_foreign_keys(tables_info, schema, tables)
+        def dump(document: dict[str, Any]) -> str:
+            return json.dumps(document, ensure_ascii=False)
 
-    # Mermaid形式にフォーマット
-    diagram = _format_mermaid_er_diagram(tables_info, relations, virtual_fks)
+        return _paginate_graph(
+            graph,
+            lambda g: dump(document(g)),
+            budget,
+            cursor,
+            dump=dump,
+            warnings=warnings,
+        )
 
-    return warning + diagram
+    prefix = "".join(f"⚠️ 警告: {warning}\n\n" for warning in warnings)
+    return _paginate_graph(graph, render, budget, cursor, prefix)
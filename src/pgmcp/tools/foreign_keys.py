@@ -6,7 +6,94 @@
 
 from typing import Any
 
-from pgmcp.connection import get_connection
+from pgmcp.cache import get_catalog_cache
+from pgmcp.connection import pooled_connection
+from pgmcp.tools.budget import paginate_output
+from pgmcp.tools.output import format_rows, validate_output_format
+
+# テーブルの外部キー情報（パラメータ: テーブル名, スキーマ名）
+# conkey と confkey を WITH ORDINALITY で同時に展開し、同じ位置の
+# (参照元カラム, 参照先カラム) の組を attnum で pg_attribute と結合する
+_FOREIGN_KEYS_QUERY = """
+    SELECT
+        con.conname AS constraint_name,
+        a.attname AS column_name,
+        ref_class.relname AS foreign_table,
+        ref_attr.attname AS foreign_column,
+        con.confupdtype AS on_update,
+        con.confdeltype AS on_delete,
+        con.condeferrable AS is_deferrable,
+        con.condeferred AS initially_deferred
+    FROM pg_catalog.pg_constraint con
+    JOIN pg_catalog.pg_class cls ON cls.oid = con.conrelid
+    JOIN pg_catalog.pg_namespace nsp ON nsp.oid = cls.relnamespace
+    CROSS JOIN LATERAL unnest(con.conkey, con.confkey)
+        WITH ORDINALITY AS k(attnum, ref_attnum, position)
+    JOIN pg_catalog.pg_attribute a ON a.attrelid = con.conrelid
+        AND a.attnum = k.attnum
+    JOIN pg_catalog.pg_class ref_class ON ref_class.oid = con.confrelid
+    JOIN pg_catalog.pg_attribute ref_attr ON ref_attr.attrelid = con.confrelid
+        AND ref_attr.attnum = k.ref_attnum
+    WHERE con.contype = 'f'
+      AND cls.relname = %s
+      AND nsp.nspname = %s
+    ORDER BY con.conname, k.position
+"""
+
+# pg_constraint.confupdtype / confdeltype の値と参照動作の対応
+_REFERENTIAL_ACTIONS = {
+    "a": "NO ACTION",
+    "r": "RESTRICT",
+    "c": "CASCADE",
+    "n": "SET NULL",
+    "d": "SET DEFAULT",
+}
+
+
+# JSON / TSV で出力する列名
+_FOREIGN_KEYS_COLUMNS = (
+    "constraint_name",
+    "column_name",
+    "foreign_table",
+    "foreign_column",
+    "on_update",
+    "on_delete",
+    "deferrable",
+)
+
+
+def _deferrability(is_deferrable: bool, initially_deferred: bool) -> str:
+    """制約の遅延可否をSQLの表記で返す"""
+    if not is_deferrable:
+        return "NOT DEFERRABLE"
+    if initially_deferred:
+        return "DEFERRABLE INITIALLY DEFERRED"
+    return "DEFERRABLE INITIALLY IMMEDIATE"
+
+
+def _foreign_key_records(rows: list[tuple[Any, ...]]) -> list[tuple[Any, ...]]:
+    """外部キーの行の参照動作と遅延可否をSQLの表記に変換"""
+    return [
+        (
+            constraint_name,
+            column_name,
+            foreign_table,
+            foreign_column,
+            _REFERENTIAL_ACTIONS.get(on_update, on_update),
+            _REFERENTIAL_ACTIONS.get(on_delete, on_delete),
+            _deferrability(is_deferrable, initially_deferred),
+        )
+        for (
+            constraint_name,
+            column_name,
+            foreign_table,
+            foreign_column,
+            on_update,
+            on_delete,
+            is_deferrable,
+            initially_deferred,
+        ) in rows
+    ]
 
 
 def _format_foreign_keys(rows: list[tuple[Any, ...]]) -> str:
@@ -15,52 +102,60 @@ def _format_foreign_keys(rows: list[tuple[Any, ...]]) -> str:
         return "外部キーが見つかりませんでした。"
 
     lines = [
-        "| constraint_name | column_name | foreign_table | foreign_column |",
-        "|-----------------|-------------|---------------|----------------|",
+        "| constraint_name | column_name | foreign_table | foreign_column "
+        "| on_update | on_delete | deferrable |",
+        "|-----------------|-------------|---------------|----------------"
+        "|-----------|-----------|------------|",
     ]
-    for row in rows:
-        constraint_name, column_name, foreign_table, foreign_column = row
-        lines.append(
-            f"| {constraint_name} | {column_name} | {foreign_table} | {foreign_column} |"
-        )
+    for record in _foreign_key_records(rows):
+        lines.append(f"| {' | '.join(record)} |")
 
     return "\n".join(lines)
 
 
-def get_foreign_keys_impl(table_name: str, schema: str = "public") -> str:
+def get_foreign_keys_impl(
+    table_name: str,
+    schema: str = "public",
+    output_format: str = "markdown",
+    max_chars: int | None = None,
+    max_tokens: int | None = None,
+    cursor: str | None = None,
+) -> str:
     """
     指定したテーブルの外部キー情報を取得します。
 
     Args:
         table_name: テーブル名
         schema: スキーマ名（デフォルト: "public"）
+        output_format: 出力形式（markdown, json, tsv。デフォルト: markdown）
+        max_chars: 出力の最大文字数（省略時は無制限）
+        max_tokens: 出力の最大推定トークン数（省略時は無制限）
+        cursor: 前回の出力に含まれていた続きを取得するカーソル
 
     Returns:
-        外部キー情報のMarkdown Table形式の文字列。
-    """
-    query = """
-        SELECT
-            con.conname AS constraint_name,
-            a.attname AS column_name,
-            ref_class.relname AS foreign_table,
-            ref_attr.attname AS foreign_column
-        FROM pg_catalog.pg_constraint con
-        JOIN pg_catalog.pg_class cls ON cls.oid = con.conrelid
-        JOIN pg_catalog.pg_namespace nsp ON nsp.oid = cls.relnamespace
-        JOIN pg_catalog.pg_attribute a ON a.attrelid = con.conrelid
-            AND a.attnum = ANY(con.conkey)
-        JOIN pg_catalog.pg_class ref_class ON ref_class.oid = con.confrelid
-        JOIN pg_catalog.pg_attribute ref_attr ON ref_attr.attrelid = con.confrelid
-            AND ref_attr.attnum = ANY(con.confkey)
-            AND array_position(con.conkey, a.attnum) = array_position(con.confkey, ref_attr.attnum)
-        WHERE con.contype = 'f'
-          AND cls.relname = %s
-          AND nsp.nspname = %s
-        ORDER BY con.conname, a.attnum
+        外部キー情報の指定した形式の文字列。
+        複合外部キーは制約内のカラム順に1行ずつ出力し、参照動作
+        （ON UPDATE / ON DELETE）と遅延可否（DEFERRABLE）を含む。
     """
+    validate_output_format(output_format)
 
-    with get_connection() as conn, conn.cursor() as cur:
-        cur.execute(query, (table_name, schema))
-        rows = cur.fetchall()
+    with pooled_connection() as conn, conn.cursor() as cur:
+        rows = get_catalog_cache().fetch(
+            cur,
+            schema,
+            ("foreign_keys", table_name),
+            _FOREIGN_KEYS_QUERY,
+            (table_name, schema),
+        )
 
-    return _format_foreign_keys(rows)
+    if output_format != "markdown":
+        text = format_rows(
+            output_format,
+            _FOREIGN_KEYS_COLUMNS,
+            _foreign_key_records(rows),
+            schema=schema,
+            table=table_name,
+        )
+    else:
+        text = _format_foreign_keys(rows)
+    return paginate_output(text, output_format, max_chars, max_tokens, cursor)
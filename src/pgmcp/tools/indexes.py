@@ -6,7 +6,38 @@
 
 from typing import Any
 
-from pgmcp.connection import get_connection
+from pgmcp.cache import get_catalog_cache
+from pgmcp.connection import pooled_connection
+from pgmcp.tools.budget import paginate_output
+from pgmcp.tools.output import format_rows, validate_output_format
+
+# テーブルのインデックス情報（パラメータ: テーブル名, スキーマ名）
+_TABLE_INDEXES_QUERY = """
+    SELECT
+        i.relname AS index_name,
+        array_to_string(
+            ARRAY(
+                SELECT pg_catalog.pg_get_indexdef(ix.indexrelid, k + 1, true)
+                FROM generate_subscripts(ix.indkey, 1) AS k
+                ORDER BY k
+            ),
+            ', '
+        ) AS columns,
+        ix.indisunique AS is_unique,
+        am.amname AS index_type,
+        pg_catalog.pg_get_indexdef(ix.indexrelid) AS definition
+    FROM pg_catalog.pg_index ix
+    JOIN pg_catalog.pg_class i ON i.oid = ix.indexrelid
+    JOIN pg_catalog.pg_class t ON t.oid = ix.indrelid
+    JOIN pg_catalog.pg_namespace n ON n.oid = t.relnamespace
+    JOIN pg_catalog.pg_am am ON am.oid = i.relam
+    WHERE t.relname = %s
+      AND n.nspname = %s
+    ORDER BY i.relname
+"""
+
+# JSON / TSV で出力する列名
+_TABLE_INDEXES_COLUMNS = ("index_name", "columns", "unique", "type", "definition")
 
 
 def _format_table_indexes(rows: list[tuple[Any, ...]]) -> str:
@@ -28,43 +59,47 @@ def _format_table_indexes(rows: list[tuple[Any, ...]]) -> str:
     return "\n".join(lines)
 
 
-def get_table_indexes_impl(table_name: str, schema: str = "public") -> str:
+def get_table_indexes_impl(
+    table_name: str,
+    schema: str = "public",
+    output_format: str = "markdown",
+    max_chars: int | None = None,
+    max_tokens: int | None = None,
+    cursor: str | None = None,
+) -> str:
     """
     指定したテーブルのインデックス情報を取得します。
 
     Args:
         table_name: テーブル名
         schema: スキーマ名（デフォルト: "public"）
+        output_format: 出力形式（markdown, json, tsv。デフォルト: markdown）
+        max_chars: 出力の最大文字数（省略時は無制限）
+        max_tokens: 出力の最大推定トークン数（省略時は無制限）
+        cursor: 前回の出力に含まれていた続きを取得するカーソル
 
     Returns:
-        インデックス情報のMarkdown Table形式の文字列。
-    """
-    query = """
-        SELECT
-            i.relname AS index_name,
-            array_to_string(
-                ARRAY(
-                    SELECT pg_catalog.pg_get_indexdef(ix.indexrelid, k + 1, true)
-                    FROM generate_subscripts(ix.indkey, 1) AS k
-                    ORDER BY k
-                ),
-                ', '
-            ) AS columns,
-            ix.indisunique AS is_unique,
-            am.amname AS index_type,
-            pg_catalog.pg_get_indexdef(ix.indexrelid) AS definition
-        FROM pg_catalog.pg_index ix
-        JOIN pg_catalog.pg_class i ON i.oid = ix.indexrelid
-        JOIN pg_catalog.pg_class t ON t.oid = ix.indrelid
-        JOIN pg_catalog.pg_namespace n ON n.oid = t.relnamespace
-        JOIN pg_catalog.pg_am am ON am.oid = i.relam
-        WHERE t.relname = %s
-          AND n.nspname = %s
-        ORDER BY i.relname
+        インデックス情報の指定した形式の文字列。
     """
+    validate_output_format(output_format)
 
-    with get_connection() as conn, conn.cursor() as cur:
-        cur.execute(query, (table_name, schema))
-        rows = cur.fetchall()
+    with pooled_connection() as conn, conn.cursor() as cur:
+        rows = get_catalog_cache().fetch(
+            cur,
+            schema,
+            ("indexes", table_name),
+            _TABLE_INDEXES_QUERY,
+            (table_name, schema),
+        )
 
-    return _format_table_indexes(rows)
+    if output_format != "markdown":
+        text = format_rows(
+            output_format,
+            _TABLE_INDEXES_COLUMNS,
+            rows,
+            schema=schema,
+            table=table_name,
+        )
+    else:
+        text = _format_table_indexes(rows)
+    return paginate_output(text, output_format, max_chars, max_tokens, cursor)
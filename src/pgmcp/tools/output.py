@@ -0,0 +1,107 @@
+"""
+ツールの出力形式
+
+Markdown Table のほかに、クライアントが再パースせずに扱える JSON と、
+ヘッダー行付きの TSV で行データを出力します。JSON と TSV は列名を1回だけ
+出力するため、列の多いテーブルでは Markdown よりも小さくなります。
+"""
+
+import json
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+# output_format に指定できる値
+OUTPUT_FORMATS = ("markdown", "json", "tsv")
+
+# TSV でエスケープする文字（PostgreSQL の COPY のテキスト形式と同じ表記）
+_TSV_ESCAPES = (("\\", "\\\\"), ("\t", "\\t"), ("\n", "\\n"), ("\r", "\\r"))
+
+
+def validate_output_format(output_format: str) -> None:
+    """
+    output_format の値を検証
+
+    Args:
+        output_format: 出力形式名
+
+    Raises:
+        ValueError: 未対応の出力形式の場合
+    """
+    if output_format not in OUTPUT_FORMATS:
+        supported = ", ".join(OUTPUT_FORMATS)
+        raise ValueError(
+            f"output_format には {supported} のいずれかを指定してください。"
+        )
+
+
+def to_json(document: dict[str, Any]) -> str:
+    """区切り文字の空白を省いたJSON文字列に変換"""
+    return json.dumps(document, ensure_ascii=False, separators=(",", ":"))
+
+
+def _tsv_value(value: Any) -> str:
+    """TSVの1セルに変換（COPY と同様に NULL は \\N、真偽値は t / f）"""
+    if value is None:
+        return "\\N"
+    if value is True:
+        return "t"
+    if value is False:
+        return "f"
+    text = str(value)
+    # ほとんどの値はエスケープ不要なので、含まれる場合だけ置換する
+    if "\\" in text or "\t" in text or "\n" in text or "\r" in text:
+        for char, escaped in _TSV_ESCAPES:
+            text = text.replace(char, escaped)
+    return text
+
+
+def to_tsv(
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    next_after: str | None = None,
+) -> str:
+    """
+    ヘッダー行付きのTSVに変換
+
+    Args:
+        columns: 列名のリスト
+        rows: 行のリスト
+        next_after: 続きがある場合に次ページ取得用の after の値（末尾のコメント行）
+
+    Returns:
+        TSV文字列
+    """
+    lines = ["\t".join(columns)]
+    lines.extend("\t".join(_tsv_value(value) for value in row) for row in rows)
+    if next_after is not None:
+        lines.append(f"# after={next_after}")
+    return "\n".join(lines)
+
+
+def format_rows(
+    output_format: str,
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    **fields: Any,
+) -> str:
+    """
+    行データを JSON または TSV で出力
+
+    JSON は {"columns": [...], "rows": [[...], ...]} の形で、fields の値を
+    トップレベルに追加します。TSV では fields のうち next_after だけを
+    末尾のコメント行として出力します。
+
+    Args:
+        output_format: 出力形式（json または tsv）
+        columns: 列名のリスト
+        rows: 行のリスト
+        **fields: JSON のトップレベルに追加する値（schema, table, next_after など）
+
+    Returns:
+        指定した形式の文字列
+    """
+    if output_format == "tsv":
+        return to_tsv(columns, rows, fields.get("next_after"))
+    return to_json(
+        {**fields, "columns": list(columns), "rows": [list(row) for row in rows]}
+    )
@@ -6,10 +6,60 @@
 
 from typing import Any
 
-from pgmcp.connection import get_connection
+from pgmcp.cache import get_catalog_cache
+from pgmcp.connection import pooled_connection
+from pgmcp.tools.budget import paginate_output
+from pgmcp.tools.output import format_rows, validate_output_format
+
+# テーブルのカラム情報（パラメータ: テーブル名, スキーマ名）
+# PK判定は対象テーブルの主キー制約のconkeyを1回だけ展開して結合する
+_TABLE_SCHEMA_QUERY = """
+    WITH target AS (
+        SELECT c.oid
+        FROM pg_catalog.pg_class c
+        JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+        WHERE c.relname = %s
+          AND n.nspname = %s
+    ),
+    pk AS (
+        SELECT k.attnum
+        FROM pg_catalog.pg_constraint con
+        CROSS JOIN LATERAL unnest(con.conkey) AS k(attnum)
+        WHERE con.conrelid = (SELECT oid FROM target)
+          AND con.contype = 'p'
+    )
+    SELECT
+        a.attname AS column_name,
+        pg_catalog.format_type(a.atttypid, a.atttypmod) AS data_type,
+        CASE WHEN a.attnotnull THEN 'NO' ELSE 'YES' END AS is_nullable,
+        pg_catalog.pg_get_expr(d.adbin, d.adrelid) AS column_default,
+        pk.attnum IS NOT NULL AS is_primary_key,
+        pg_catalog.col_description(a.attrelid, a.attnum) AS column_comment
+    FROM pg_catalog.pg_attribute a
+    JOIN target t ON t.oid = a.attrelid
+    LEFT JOIN pg_catalog.pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+    LEFT JOIN pk ON pk.attnum = a.attnum
+    WHERE a.attnum > 0
+      AND NOT a.attisdropped
+    ORDER BY a.attnum
+"""
 
 
-def _format_table_list(rows: list[tuple[Any, ...]]) -> str:
+# JSON / TSV で出力する列名
+_TABLE_LIST_COLUMNS = ("table_name", "table_type")
+_TABLE_SCHEMA_COLUMNS = (
+    "column_name",
+    "data_type",
+    "nullable",
+    "default",
+    "primary_key",
+    "comment",
+)
+
+
+def _format_table_list(
+    rows: list[tuple[Any, ...]], next_after: str | None = None
+) -> str:
     """テーブル一覧をMarkdown Table形式にフォーマット"""
     if not rows:
         return "テーブルが見つかりませんでした。"
@@ -22,6 +72,12 @@ def _format_table_list(rows: list[tuple[Any, ...]]) -> str:
         table_name, table_type = row
         lines.append(f"| {table_name} | {table_type} |")
 
+    if next_after is not None:
+        lines.append("")
+        lines.append(
+            f'続きがあります。次のページは after="{next_after}" を指定して取得してください。'
+        )
+
     return "\n".join(lines)
 
 
@@ -49,71 +105,146 @@ def _format_table_schema(rows: list[tuple[Any, ...]]) -> str:
     return "\n".join(lines)
 
 
-def list_tables_impl(schema: str = "public") -> str:
+def _table_schema_records(rows: list[tuple[Any, ...]]) -> list[tuple[Any, ...]]:
+    """カラム情報の行をJSON / TSV用の値（nullable, PK は真偽値）に変換"""
+    return [
+        (column_name, data_type, is_nullable == "YES", default, bool(is_pk), comment)
+        for column_name, data_type, is_nullable, default, is_pk, comment in rows
+    ]
+
+
+def list_tables_impl(
+    schema: str = "public",
+    pattern: str | None = None,
+    after: str | None = None,
+    limit: int = 1000,
+    output_format: str = "markdown",
+    max_chars: int | None = None,
+    max_tokens: int | None = None,
+    cursor: str | None = None,
+) -> str:
     """
     指定したスキーマのテーブル一覧を取得します。
 
+    information_schema.tables と同じ種別・権限の判定を pg_class 上で直接行い、
+    テーブル名のキーセットでページングします。
+
     Args:
         schema: スキーマ名（デフォルト: "public"）
+        pattern: テーブル名のLIKEパターン（例: "user%"）。省略時は全テーブル
+        after: このテーブル名より後ろから取得（前ページの最後のテーブル名）
+        limit: 1ページあたりの最大件数（デフォルト: 1000）
+        output_format: 出力形式（markdown, json, tsv。デフォルト: markdown）
+        max_chars: 出力の最大文字数（省略時は無制限）
+        max_tokens: 出力の最大推定トークン数（省略時は無制限）
+        cursor: 前回の出力に含まれていた続きを取得するカーソル
 
     Returns:
-        テーブル情報のMarkdown Table形式の文字列。
+        テーブル情報の指定した形式の文字列。
+        続きがある場合は次ページ取得用の after の値を含む。
     """
+    validate_output_format(output_format)
+    if limit < 1:
+        raise ValueError("limit は1以上を指定してください。")
+
     query = """
         SELECT
-            table_name,
-            table_type
-        FROM information_schema.tables
-        WHERE table_schema = %s
-        ORDER BY table_name
+            c.relname AS table_name,
+            CASE
+                WHEN n.oid = pg_catalog.pg_my_temp_schema() THEN 'LOCAL TEMPORARY'
+                WHEN c.relkind IN ('r', 'p') THEN 'BASE TABLE'
+                WHEN c.relkind = 'v' THEN 'VIEW'
+                WHEN c.relkind = 'f' THEN 'FOREIGN'
+            END AS table_type
+        FROM pg_catalog.pg_class c
+        JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = %(schema)s
+          AND c.relkind IN ('r', 'p', 'v', 'f')
+          AND (%(pattern)s::text IS NULL OR c.relname LIKE %(pattern)s::text)
+          AND (%(after)s::text IS NULL OR c.relname > %(after)s::name)
+          AND (
+            pg_catalog.pg_has_role(c.relowner, 'USAGE')
+            OR pg_catalog.has_table_privilege(
+                c.oid, 'SELECT, INSERT, UPDATE, DELETE, TRUNCATE, REFERENCES, TRIGGER'
+            )
+            OR pg_catalog.has_any_column_privilege(
+                c.oid, 'SELECT, INSERT, UPDATE, REFERENCES'
+            )
+          )
+        ORDER BY c.relname
+        LIMIT %(limit)s
     """
-
-    with get_connection() as conn, conn.cursor() as cur:
-        cur.execute(query, (schema,))
+    params = {
+        "schema": schema,
+        "pattern": pattern,
+        "after": after,
+        # 続きの有無を判定するため1件多く取得
+        "limit": limit + 1,
+    }
+
+    with pooled_connection() as conn, conn.cursor() as cur:
+        cur.execute(query, params)
         rows = cur.fetchall()
 
-    return _format_table_list(rows)
-
-
-def get_table_schema_impl(table_name: str, schema: str = "public") -> str:
+    next_after = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_after = rows[-1][0]
+
+    if output_format != "markdown":
+        text = format_rows(
+            output_format,
+            _TABLE_LIST_COLUMNS,
+            rows,
+            schema=schema,
+            next_after=next_after,
+        )
+    else:
+        text = _format_table_list(rows, next_after)
+    return paginate_output(text, output_format, max_chars, max_tokens, cursor)
+
+
+def get_table_schema_impl(
+    table_name: str,
+    schema: str = "public",
+    output_format: str = "markdown",
+    max_chars: int | None = None,
+    max_tokens: int | None = None,
+    cursor: str | None = None,
+) -> str:
     """
     指定したテーブルのカラム情報を取得します。
 
     Args:
         table_name: テーブル名
         schema: スキーマ名（デフォルト: "public"）
+        output_format: 出力形式（markdown, json, tsv。デフォルト: markdown）
+        max_chars: 出力の最大文字数（省略時は無制限）
+        max_tokens: 出力の最大推定トークン数（省略時は無制限）
+        cursor: 前回の出力に含まれていた続きを取得するカーソル
 
     Returns:
-        カラム情報のMarkdown Table形式の文字列。
-    """
-    query = """
-        SELECT
-            a.attname AS column_name,
-            pg_catalog.format_type(a.atttypid, a.atttypmod) AS data_type,
-            CASE WHEN a.attnotnull THEN 'NO' ELSE 'YES' END AS is_nullable,
-            pg_catalog.pg_get_expr(d.adbin, d.adrelid) AS column_default,
-            COALESCE(
-                (SELECT TRUE
-                 FROM pg_catalog.pg_constraint con
-                 WHERE con.conrelid = a.attrelid
-                   AND a.attnum = ANY(con.conkey)
-                   AND con.contype = 'p'),
-                FALSE
-            ) AS is_primary_key,
-            pg_catalog.col_description(a.attrelid, a.attnum) AS column_comment
-        FROM pg_catalog.pg_attribute a
-        JOIN pg_catalog.pg_class c ON c.oid = a.attrelid
-        JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
-        LEFT JOIN pg_catalog.pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
-        WHERE c.relname = %s
-          AND n.nspname = %s
-          AND a.attnum > 0
-          AND NOT a.attisdropped
-        ORDER BY a.attnum
+        カラム情報の指定した形式の文字列。
     """
+    validate_output_format(output_format)
+
+    with pooled_connection() as conn, conn.cursor() as cur:
+        rows = get_catalog_cache().fetch(
+            cur,
+            schema,
+            ("columns", table_name),
+            _TABLE_SCHEMA_QUERY,
+            (table_name, schema),
+        )
 
-    with get_connection() as conn, conn.cursor() as cur:
-        cur.execute(query, (table_name, schema))
-        rows = cur.fetchall()
-
-    return _format_table_schema(rows)
+    if output_format != "markdown":
+        text = format_rows(
+            output_format,
+            _TABLE_SCHEMA_COLUMNS,
+            _table_schema_records(rows),
+            schema=schema,
+            table=table_name,
+        )
+    else:
+        text = _format_table_schema(rows)
+    return paginate_output(text, output_format, max_chars, max_tokens, cursor)
@@ -0,0 +1,528 @@
+"""
+スキーマグラフ
+
+ER図のもとになるテーブル・カラム・関係を、出力形式に依存しない不変の
+中間表現として保持し、Mermaid / Graphviz DOT / PlantUML / JSON の各形式に
+変換します。中間表現はカタログキャッシュに保存できるため、別の形式での
+再出力ではデータベースに問い合わせません。
+
+カラム数が数十万になるカタログでも省メモリになるよう、モデルは __slots__ 付きの
+dataclass とし、カタログから読み込む名前や型名は sys.intern で共有します。
+"""
+
+import html
+import json
+import re
+from collections.abc import Callable
+from dataclasses import dataclass, replace
+from typing import Any, Literal
+
+EdgeKind = Literal["real", "virtual"]
+
+
+@dataclass(frozen=True, slots=True)
+class GraphColumn:
+    """
+    スキーマグラフのカラム
+
+    Attributes:
+        name: カラム名
+        data_type: データ型
+        is_primary_key: 主キーか
+        is_foreign_key: 外部キー（推測を含む）か
+        comment: カラムコメント
+    """
+
+    name: str
+    data_type: str
+    is_primary_key: bool
+    is_foreign_key: bool
+    comment: str | None
+
+
+@dataclass(frozen=True, slots=True)
+class GraphTable:
+    """
+    スキーマグラフのテーブル
+
+    Attributes:
+        name: テーブル名
+        columns: カラム（定義順）
+    """
+
+    name: str
+    columns: tuple[GraphColumn, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class GraphEdge:
+    """
+    スキーマグラフの辺（参照元カラムから参照先カラムへの関係）
+
+    複合外部キーは制約ごとに1本の辺とし、カラムは制約内の順に保持します。
+
+    Attributes:
+        from_table: 参照元テーブル名
+        from_columns: 参照元カラム名
+        to_table: 参照先テーブル名
+        to_columns: 参照先カラム名（from_columns と同じ順で対応）
+        kind: real（外部キー制約）または virtual（命名規則からの推測）
+    """
+
+    from_table: str
+    from_columns: tuple[str, ...]
+    to_table: str
+    to_columns: tuple[str, ...]
+    kind: EdgeKind
+
+
+@dataclass(frozen=True, slots=True)
+class SchemaGraph:
+    """
+    スキーマグラフ
+
+    Attributes:
+        schema: スキーマ名
+        tables: テーブル（名前順）
+        edges: 辺（外部キー制約、推測した関係の順）
+    """
+
+    schema: str
+    tables: tuple[GraphTable, ...]
+    edges: tuple[GraphEdge, ...]
+
+
+def _mark_virtual_foreign_keys(
+    table: GraphTable, virtual_fk_columns: set[tuple[str, str]]
+) -> GraphTable:
+    """推測した関係の参照元カラムを外部キーとして扱うテーブルを返す"""
+    if not any((table.name, col.name) in virtual_fk_columns for col in table.columns):
+        return table
+    return replace(
+        table,
+        columns=tuple(
+            replace(col, is_foreign_key=True)
+            if (table.name, col.name) in virtual_fk_columns
+            else col
+            for col in table.columns
+        ),
+    )
+
+
+def build_schema_graph(
+    schema: str,
+    tables: list[GraphTable],
+    relations: list[GraphEdge],
+    virtual_fks: list[GraphEdge],
+) -> SchemaGraph:
+    """
+    カタログから取得したテーブルと関係からスキーマグラフを作成
+
+    同じ参照元・参照先・カラムの辺（同じカラムに重複して定義された外部キー制約）は
+    1本にまとめ、外部キー制約と同じ参照元カラム・参照先テーブルを持つ推測関係は
+    除外します。推測関係の参照元カラムは外部キーとして扱います。
+
+    Args:
+        schema: スキーマ名
+        tables: テーブルのリスト
+        relations: 外部キー制約による辺のリスト
+        virtual_fks: 命名規則から推測した辺のリスト
+
+    Returns:
+        スキーマグラフ
+    """
+    seen: set[tuple[str, str, tuple[str, ...], tuple[str, ...]]] = set()
+    real_keys: set[tuple[str, str, tuple[str, ...]]] = set()
+    edges = []
+    for edge in relations:
+        key = (edge.from_table, edge.to_table, edge.from_columns, edge.to_columns)
+        if key in seen:
+            continue
+        seen.add(key)
+        real_keys.add((edge.from_table, edge.to_table, edge.from_columns))
+        edges.append(edge)
+    for edge in virtual_fks:
+        if (edge.from_table, edge.to_table, edge.from_columns) not in real_keys:
+            edges.append(edge)
+
+    virtual_fk_columns = {
+        (e.from_table, column) for e in virtual_fks for column in e.from_columns
+    }
+    graph_tables = tuple(
+        _mark_virtual_foreign_keys(table, virtual_fk_columns)
+        for table in sorted(tables, key=lambda t: t.name)
+    )
+    return SchemaGraph(schema, graph_tables, tuple(edges))
+
+
+def _simplify_data_type(data_type: str) -> str:
+    """
+    データ型を簡略化してMermaid ER図用に変換
+
+    Args:
+        data_type: PostgreSQLのデータ型
+
+    Returns:
+        簡略化されたデータ型
+    """
+    # 括弧内の詳細情報を除去し、基本型名のみを取得
+    type_map = {
+        "integer": "integer",
+        "bigint": "bigint",
+        "smallint": "smallint",
+        "serial": "serial",
+        "bigserial": "bigserial",
+        "character varying": "varchar",
+        "character": "char",
+        "text": "text",
+        "boolean": "boolean",
+        "timestamp with time zone": "timestamptz",
+        "timestamp without time zone": "timestamp",
+        "date": "date",
+        "time with time zone": "timetz",
+        "time without time zone": "time",
+        "numeric": "numeric",
+        "decimal": "decimal",
+        "real": "real",
+        "double precision": "double",
+        "uuid": "uuid",
+        "json": "json",
+        "jsonb": "jsonb",
+        "bytea": "bytea",
+        "interval": "interval",
+    }
+
+    # 配列型の処理
+    if data_type.endswith("[]"):
+        base_type = data_type[:-2]
+        simplified = _simplify_data_type(base_type)
+        return f"{simplified}_array"
+
+    # 括弧前の型名を抽出
+    base_type = data_type.split("(")[0].strip()
+
+    return type_map.get(base_type, base_type.replace(" ", "_"))
+
+
+def _edge_label(edge: GraphEdge) -> str:
+    """辺のラベル（参照元カラム → 参照先カラム）"""
+    return f"{', '.join(edge.from_columns)} → {', '.join(edge.to_columns)}"
+
+
+def _column_markers(column: GraphColumn) -> list[str]:
+    markers = []
+    if column.is_primary_key:
+        markers.append("PK")
+    if column.is_foreign_key:
+        markers.append("FK")
+    return markers
+
+
+def _external_tables(graph: SchemaGraph) -> list[str]:
+    """
+    辺の端点のうちグラフにテーブルが含まれないもの（出現順）
+
+    出力をページに分割した場合、別ページのテーブルを参照する辺が該当します。
+    """
+    names = {t.name for t in graph.tables}
+    external: dict[str, None] = {}
+    for edge in graph.edges:
+        for name in (edge.to_table, edge.from_table):
+            if name not in names:
+                external[name] = None
+    return list(external)
+
+
+_MERMAID_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_-]*")
+
+
+def _mermaid_aliases(graph: SchemaGraph) -> dict[str, str]:
+    """
+    エンティティ名として使えないテーブル名（audit.logs など）に別名を割り当てる
+
+    グラフのテーブルに加えて、別ページのテーブルなど辺の端点にだけ現れる
+    テーブルにも割り当てます。別名は使えない文字を _ に置き換えたもので、
+    既存の名前と重複する場合は末尾に _ を付け足します。
+    """
+    names = [t.name for t in graph.tables] + _external_tables(graph)
+    used = {name for name in names if _MERMAID_IDENTIFIER.fullmatch(name)}
+    aliases = {}
+    for name in names:
+        if _MERMAID_IDENTIFIER.fullmatch(name):
+            aliases[name] = name
+            continue
+        alias = re.sub(r"[^A-Za-z0-9_]", "_", name)
+        if not _MERMAID_IDENTIFIER.fullmatch(alias):
+            alias = f"t_{alias}"
+        while alias in used:
+            alias += "_"
+        used.add(alias)
+        aliases[name] = alias
+    return aliases
+
+
+def render_mermaid(graph: SchemaGraph) -> str:
+    """
+    Mermaid ER図形式で出力
+
+    エンティティ名として使えないテーブル名は別名で定義し、
+    元の名前を表示名（alias["name"]）として出力します。別ページのテーブルを
+    参照する辺の端点は、別名の場合だけ属性のないエンティティとして定義します。
+
+    Args:
+        graph: スキーマグラフ
+
+    Returns:
+        Mermaid ER図形式の文字列
+    """
+    aliases = _mermaid_aliases(graph)
+    lines = ["erDiagram"]
+
+    # テーブル定義を出力
+    for table in graph.tables:
+        alias = aliases[table.name]
+        label = f'["{table.name}"]' if alias != table.name else ""
+        lines.append(f"    {alias}{label} {{")
+        for col in table.columns:
+            markers = _column_markers(col)
+            marker_str = " " + ",".join(markers) if markers else ""
+            comment = f' "{col.comment}"' if col.comment else ""
+            lines.append(
+                f"        {_simplify_data_type(col.data_type)} {col.name}"
+                f"{marker_str}{comment}"
+            )
+        lines.append("    }")
+
+    # 表示名が必要な別ページのテーブル（そのままの名前は関係の行だけで定義される）
+    for name in _external_tables(graph):
+        alias = aliases[name]
+        if alias != name:
+            lines += [f'    {alias}["{name}"] {{', "    }"]
+
+    # 関係を出力（多対1: from_table は to_table の1つのレコードを参照）
+    # ラベルは参照元カラムの一覧とし、推測した関係は破線（..）で区別する
+    for edge in graph.edges:
+        to_table = aliases[edge.to_table]
+        from_table = aliases[edge.from_table]
+        line = "--" if edge.kind == "real" else ".."
+        lines.append(
+            f"    {to_table} ||{line}o{{ {from_table} : "
+            f'"{", ".join(edge.from_columns)}"'
+        )
+
+    return "\n".join(lines)
+
+
+def _dot_id(name: str) -> str:
+    """DOT言語の識別子としてクォート"""
+    escaped = name.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def render_dot(graph: SchemaGraph) -> str:
+    """
+    Graphviz DOT形式で出力
+
+    テーブルはHTMLラベルの表、推測した関係は破線の辺として出力します。
+
+    Args:
+        graph: スキーマグラフ
+
+    Returns:
+        DOT形式の文字列
+    """
+    lines = [
+        f"digraph {_dot_id(graph.schema)} {{",
+        "    graph [rankdir=LR];",
+        '    node [shape=plaintext, fontname="Helvetica"];',
+        '    edge [fontname="Helvetica", fontsize=10];',
+    ]
+
+    for table in graph.tables:
+        rows = [
+            '<table border="0" cellborder="1" cellspacing="0">',
+            f'<tr><td bgcolor="lightgray"><b>{html.escape(table.name)}</b></td></tr>',
+        ]
+        for col in table.columns:
+            markers = _column_markers(col)
+            marker_str = f" [{','.join(markers)}]" if markers else ""
+            rows.append(
+                f'<tr><td align="left">{html.escape(col.name)} '
+                f"{html.escape(col.data_type)}{marker_str}</td></tr>"
+            )
+        rows.append("</table>")
+        lines.append(f"    {_dot_id(table.name)} [label=<{''.join(rows)}>];")
+
+    for edge in graph.edges:
+        style = "" if edge.kind == "real" else ", style=dashed"
+        label = _dot_id(_edge_label(edge))
+        lines.append(
+            f"    {_dot_id(edge.from_table)} -> {_dot_id(edge.to_table)}"
+            f" [label={label}{style}];"
+        )
+
+    lines.append("}")
+    return "\n".join(lines)
+
+
+_PLANTUML_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+def _plantuml_aliases(graph: SchemaGraph) -> dict[str, str]:
+    """
+    識別子として使えないテーブル名に重複しない別名を割り当てる
+
+    辺の端点にだけ現れる別ページのテーブルにも割り当てます。
+    """
+    names = [t.name for t in graph.tables] + _external_tables(graph)
+    used = {name for name in names if _PLANTUML_IDENTIFIER.fullmatch(name)}
+    aliases = {}
+    for index, name in enumerate(names):
+        if _PLANTUML_IDENTIFIER.fullmatch(name):
+            aliases[name] = name
+            continue
+        alias = f"table_{index}"
+        while alias in used:
+            alias += "_"
+        used.add(alias)
+        aliases[name] = alias
+    return aliases
+
+
+def render_plantuml(graph: SchemaGraph) -> str:
+    """
+    PlantUML（IE記法のER図）形式で出力
+
+    主キーは区切り線の上に、推測した関係は破線で出力します。
+
+    Args:
+        graph: スキーマグラフ
+
+    Returns:
+        PlantUML形式の文字列
+    """
+    aliases = _plantuml_aliases(graph)
+    lines = ["@startuml", "hide circle", "skinparam linetype ortho", ""]
+
+    for table in graph.tables:
+        lines.append(f'entity "{table.name}" as {aliases[table.name]} {{')
+        pk_columns = [c for c in table.columns if c.is_primary_key]
+        other_columns = [c for c in table.columns if not c.is_primary_key]
+        for col in pk_columns:
+            lines.append(f"  * {col.name} : {col.data_type} <<PK>>")
+        lines.append("  --")
+        for col in other_columns:
+            fk = " <<FK>>" if col.is_foreign_key else ""
+            lines.append(f"  {col.name} : {col.data_type}{fk}")
+        lines.append("}")
+        lines.append("")
+
+    # 表示名が必要な別ページのテーブル
+    for name in _external_tables(graph):
+        if aliases[name] != name:
+            lines += [f'entity "{name}" as {aliases[name]}', ""]
+
+    for edge in graph.edges:
+        line = "--" if edge.kind == "real" else ".."
+        lines.append(
+            f"{aliases[edge.to_table]} ||{line}o{{ "
+            f"{aliases[edge.from_table]} : {_edge_label(edge)}"
+        )
+
+    lines.append("@enduml")
+    return "\n".join(lines)
+
+
+def graph_document(graph: SchemaGraph) -> dict[str, Any]:
+    """
+    隣接リスト形式の dict に変換
+
+    tables にはテーブルごとのカラムと参照先・参照元テーブルの一覧、
+    edges には全ての辺を含みます。
+
+    Args:
+        graph: スキーマグラフ
+
+    Returns:
+        JSONに変換できる dict
+    """
+    # 出現順を保ったまま重複を除くため、値を持たない dict を順序付き集合として使う
+    references: dict[str, dict[str, None]] = {t.name: {} for t in graph.tables}
+    referenced_by: dict[str, dict[str, None]] = {t.name: {} for t in graph.tables}
+    for edge in graph.edges:
+        if edge.from_table in references:
+            references[edge.from_table][edge.to_table] = None
+        if edge.to_table in referenced_by:
+            referenced_by[edge.to_table][edge.from_table] = None
+
+    return {
+        "schema": graph.schema,
+        "tables": {
+            table.name: {
+                "columns": [
+                    {
+                        "name": col.name,
+                        "type": col.data_type,
+                        "primary_key": col.is_primary_key,
+                        "foreign_key": col.is_foreign_key,
+                        "comment": col.comment,
+                    }
+                    for col in table.columns
+                ],
+                "references": list(references[table.name]),
+                "referenced_by": list(referenced_by[table.name]),
+            }
+            for table in graph.tables
+        },
+        "edges": [
+            {
+                "from_table": edge.from_table,
+                "from_columns": list(edge.from_columns),
+                "to_table": edge.to_table,
+                "to_columns": list(edge.to_columns),
+                "kind": edge.kind,
+            }
+            for edge in graph.edges
+        ],
+    }
+
+
+def render_json(graph: SchemaGraph) -> str:
+    """
+    隣接リスト形式のJSONで出力
+
+    Args:
+        graph: スキーマグラフ
+
+    Returns:
+        JSON文字列（構造は graph_document を参照）
+    """
+    return json.dumps(graph_document(graph), ensure_ascii=False)
+
+
+# 出力形式名 → レンダラー
+RENDERERS: dict[str, Callable[[SchemaGraph], str]] = {
+    "mermaid": render_mermaid,
+    "dot": render_dot,
+    "plantuml": render_plantuml,
+    "json": render_json,
+}
+
+
+def get_renderer(diagram_format: str) -> Callable[[SchemaGraph], str]:
+    """
+    出力形式名からレンダラーを取得
+
+    Args:
+        diagram_format: 出力形式名（mermaid, dot, plantuml, json）
+
+    Returns:
+        スキーマグラフを文字列に変換する関数
+    """
+    renderer = RENDERERS.get(diagram_format)
+    if renderer is None:
+        supported = ", ".join(RENDERERS)
+        raise ValueError(
+            f"diagram_format には {supported} のいずれかを指定してください。"
+        )
+    return renderer
@@ -0,0 +1,76 @@
+"""
+カタログキャッシュの統合テスト
+"""
+
+from collections.abc import Generator
+
+import pytest
+
+from pgmcp.cache import CacheConfig, CatalogCache
+from pgmcp.connection import get_connection, pooled_connection
+
+SCHEMA = "pgmcp_cache_test"
+QUERY = """
+    SELECT a.attname
+    FROM pg_catalog.pg_attribute a
+    JOIN pg_catalog.pg_class c ON c.oid = a.attrelid
+    JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = %s AND c.relname = %s AND a.attnum > 0
+    ORDER BY a.attnum
+"""
+
+
+def _execute_ddl(sql: str) -> None:
+    """リードオンリーではない接続でDDLを実行"""
+    conn = get_connection()
+    try:
+        conn.set_session(readonly=False, autocommit=True)
+        with conn.cursor() as cur:
+            cur.execute(sql)
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def cache_schema(db_connection: bool) -> Generator[str, None, None]:
+    """テスト用のスキーマとテーブルを作成"""
+    _execute_ddl(
+        f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;"
+        f"CREATE SCHEMA {SCHEMA};"
+        f"CREATE TABLE {SCHEMA}.items (id integer PRIMARY KEY)"
+    )
+    yield SCHEMA
+    _execute_ddl(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+
+
+class TestCatalogCacheIntegration:
+    """カタログキャッシュの統合テスト"""
+
+    def _fetch(self, cache: CatalogCache, schema: str) -> list[tuple[str, ...]]:
+        with pooled_connection() as conn, conn.cursor() as cur:
+            return cache.fetch(
+                cur, schema, ("columns", "items"), QUERY, (schema, "items")
+            )
+
+    def test_cache_hit_and_invalidation_on_ddl(self, cache_schema: str) -> None:
+        """DDLでフィンガープリントが変化し、キャッシュが破棄されることを確認"""
+        cache = CatalogCache(CacheConfig(check_interval=0.0))
+
+        assert self._fetch(cache, cache_schema) == [("id",)]
+        assert self._fetch(cache, cache_schema) == [("id",)]
+        assert cache.stats().hits == 1
+
+        _execute_ddl(f"ALTER TABLE {cache_schema}.items ADD COLUMN name text")
+
+        assert self._fetch(cache, cache_schema) == [("id",), ("name",)]
+        assert cache.stats().invalidations == 1
+
+    def test_comment_change_invalidates(self, cache_schema: str) -> None:
+        """コメントの変更でもキャッシュが破棄されることを確認"""
+        cache = CatalogCache(CacheConfig(check_interval=0.0))
+        self._fetch(cache, cache_schema)
+
+        _execute_ddl(f"COMMENT ON COLUMN {cache_schema}.items.id IS 'ID'")
+        self._fetch(cache, cache_schema)
+
+        assert cache.stats().invalidations == 1
@@ -2,10 +2,21 @@
 データベース接続の統合テスト
 """
 
+import asyncio
+import os
+import time
+
 import psycopg2
 import pytest
 
-from pgmcp.connection import get_connection
+from pgmcp.connection import (
+    ConnectionPool,
+    PoolConfig,
+    get_connection,
+    pooled_connection,
+    snapshot_connection,
+)
+from pgmcp.executor import run_blocking
 
 
 class TestDatabaseConnection:
@@ -48,3 +59,146 @@ class TestDatabaseConnection:
             cur.execute("CREATE TEMP TABLE readonly_check(id int)")
 
         conn.close()
+
+
+class TestConnectionPoolIntegration:
+    """コネクションプールの統合テスト"""
+
+    def test_pooled_connection_is_reused(self, db_connection: bool) -> None:
+        """同じ物理接続（バックエンド）が再利用されることを確認"""
+        pool = ConnectionPool(PoolConfig(max_size=1))
+        try:
+            with pool.connection() as conn, conn.cursor() as cur:
+                cur.execute("SELECT pg_backend_pid()")
+                first = cur.fetchone()
+            with pool.connection() as conn, conn.cursor() as cur:
+                cur.execute("SELECT pg_backend_pid()")
+                second = cur.fetchone()
+        finally:
+            pool.close()
+
+        assert first == second
+
+    def test_pooled_connection_is_readonly(self, db_connection: bool) -> None:
+        """プールの接続もリードオンリーであることを確認"""
+        with (
+            pooled_connection() as conn,
+            conn.cursor() as cur,
+            pytest.raises(psycopg2.errors.ReadOnlySqlTransaction),
+        ):
+            cur.execute("CREATE TEMP TABLE readonly_check(id int)")
+
+        # 失敗したトランザクションは返却時にロールバックされ再利用できる
+        with pooled_connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT 1")
+            assert cur.fetchone() == (1,)
+
+    def test_snapshot_connection_is_repeatable_read(self, db_connection: bool) -> None:
+        """スナップショット接続はREPEATABLE READのトランザクションであることを確認"""
+        with snapshot_connection() as conn, conn.cursor() as cur:
+            cur.execute("SHOW transaction_isolation")
+            assert cur.fetchone() == ("repeatable read",)
+            cur.execute("SHOW transaction_read_only")
+            assert cur.fetchone() == ("on",)
+
+        # 返却後の接続はデフォルトの分離レベルに戻る
+        with pooled_connection() as conn, conn.cursor() as cur:
+            cur.execute("SHOW transaction_isolation")
+            assert cur.fetchone() == ("read committed",)
+
+
+class TestQueryTimeoutsIntegration:
+    """制限時間とキャンセルの統合テスト"""
+
+    def test_timeouts_are_transaction_local(
+        self, db_connection: bool, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """SET LOCAL で設定し、スナップショット接続でも有効"""
+        monkeypatch.setenv("PGMCP_STATEMENT_TIMEOUT", "1500")
+        monkeypatch.setenv("PGMCP_LOCK_TIMEOUT", "250")
+
+        with snapshot_connection() as conn, conn.cursor() as cur:
+            cur.execute("SHOW statement_timeout")
+            assert cur.fetchone() == ("1500ms",)
+            cur.execute("SHOW lock_timeout")
+            assert cur.fetchone() == ("250ms",)
+            cur.execute("SHOW transaction_isolation")
+            assert cur.fetchone() == ("repeatable read",)
+
+    def test_statement_timeout(
+        self, db_connection: bool, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """statement_timeout を超えたクエリはサーバー側で中断される"""
+        monkeypatch.setenv("PGMCP_STATEMENT_TIMEOUT", "100")
+
+        with (
+            pooled_connection() as conn,
+            conn.cursor() as cur,
+            pytest.raises(psycopg2.errors.QueryCanceled),
+        ):
+            cur.execute("SELECT pg_sleep(5)")
+
+    def test_lock_timeout(
+        self, db_connection: bool, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """ACCESS EXCLUSIVE ロックを待つクエリは lock_timeout で失敗する"""
+        monkeypatch.setenv("PGMCP_LOCK_TIMEOUT", "100")
+        locker = psycopg2.connect(
+            host=os.environ["PGHOST"],
+            port=os.environ["PGPORT"],
+            database=os.environ["PGDATABASE"],
+            user=os.environ["PGUSER"],
+            password=os.environ["PGPASSWORD"],
+        )
+        try:
+            with locker.cursor() as cur:
+                cur.execute("LOCK TABLE public.users IN ACCESS EXCLUSIVE MODE")
+
+            started = time.perf_counter()
+            with (
+                pooled_connection() as conn,
+                conn.cursor() as cur,
+                pytest.raises(psycopg2.errors.LockNotAvailable),
+            ):
+                cur.execute("SELECT count(*) FROM public.users")
+            assert time.perf_counter() - started < 2
+        finally:
+            locker.rollback()
+            locker.close()
+
+    @pytest.mark.asyncio
+    async def test_cancellation_cancels_backend_query(
+        self, db_connection: bool
+    ) -> None:
+        """リクエストのキャンセルで実行中のクエリも中断され接続が返却される"""
+        started = asyncio.Event()
+        loop = asyncio.get_running_loop()
+
+        def sleep_impl() -> None:
+            with pooled_connection() as conn, conn.cursor() as cur:
+                loop.call_soon_threadsafe(started.set)
+                cur.execute("SELECT pg_sleep(30)")
+
+        task = asyncio.create_task(run_blocking(sleep_impl))
+        await asyncio.wait_for(started.wait(), 5)
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        def sleeping_backends() -> int:
+            with pooled_connection() as conn, conn.cursor() as cur:
+                cur.execute(
+                    "SELECT count(*) FROM pg_stat_activity"
+                    " WHERE query = 'SELECT pg_sleep(30)' AND state = 'active'"
+                )
+                row = cur.fetchone()
+                assert row is not None
+                return int(row[0])
+
+        deadline = time.monotonic() + 5
+        while (
+            await asyncio.to_thread(sleeping_backends) and time.monotonic() < deadline
+        ):
+            await asyncio.sleep(0.1)
+        assert await asyncio.to_thread(sleeping_backends) == 0
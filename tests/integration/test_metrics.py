@@ -0,0 +1,60 @@
+"""
+メトリクスの統合テスト
+"""
+
+import pytest
+
+from pgmcp.cache import reset_catalog_cache
+from pgmcp.connection import ConnectionPool, PoolConfig, replace_pool
+from pgmcp.executor import run_blocking
+from pgmcp.metrics import get_metrics, measure_call, reset_metrics
+from pgmcp.tools import describe_table_impl, list_tables_impl
+
+
+class TestMetricsIntegration:
+    """メトリクスの統合テスト"""
+
+    @pytest.mark.asyncio
+    async def test_records_database_phases(self, db_connection: bool) -> None:
+        """接続の取得・クエリの実行・結果の取得をツールごとに記録する"""
+        reset_metrics()
+        try:
+            result = await run_blocking(list_tables_impl, "public")
+
+            metrics = get_metrics().snapshot()["list_tables"]
+        finally:
+            reset_metrics()
+
+        assert metrics["calls"] == 1
+        # 一覧のクエリ（制限時間の SET LOCAL は数えない）
+        assert metrics["queries"] == 1
+        assert metrics["phases"]["execute"]["sum"] > 0
+        assert metrics["phases"]["fetch"]["count"] == 1
+        # ヘッダー行を除いたテーブルの行数
+        table_rows = [line for line in result.splitlines() if line.startswith("| ")]
+        assert metrics["rows"]["sum"] == len(table_rows) - 1
+        assert metrics["output_bytes"]["sum"] == len(result.encode())
+
+    def test_internal_statements_are_not_counted(
+        self, db_connection: bool, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """疎通確認・SET LOCAL・SET TRANSACTION はツールのクエリとして数えない"""
+        monkeypatch.setenv("PGMCP_CACHE_ENABLED", "0")
+        reset_catalog_cache()
+        reset_metrics()
+        # 貸し出しのたびに疎通確認を行うプール
+        pool = ConnectionPool(PoolConfig(check_interval=0))
+        previous = replace_pool(pool)
+        try:
+            for _ in range(2):
+                measure_call("describe_table", lambda: describe_table_impl("users"))
+
+            metrics = get_metrics().snapshot()["describe_table"]
+        finally:
+            replace_pool(previous)
+            pool.close()
+            reset_metrics()
+            reset_catalog_cache()
+
+        # カラム・インデックス・外部キーのクエリのみ
+        assert metrics["queries"] == 6
@@ -0,0 +1,62 @@
+"""
+記録と再生の統合テスト
+"""
+
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from pgmcp.cache import reset_catalog_cache
+from pgmcp.replay import recording, replaying
+from pgmcp.tools import (
+    describe_table_impl,
+    describe_tables_impl,
+    generate_er_diagram_impl,
+    get_foreign_keys_impl,
+    get_table_indexes_impl,
+    get_table_schema_impl,
+    list_tables_impl,
+)
+
+CALLS: list[Callable[[], str]] = [
+    lambda: list_tables_impl("public"),
+    lambda: get_table_schema_impl("users"),
+    lambda: get_table_indexes_impl("orders"),
+    lambda: get_foreign_keys_impl("orders"),
+    lambda: describe_table_impl("users"),
+    lambda: describe_tables_impl("public"),
+    lambda: generate_er_diagram_impl("public"),
+    lambda: generate_er_diagram_impl("public", split_clusters=True),
+]
+
+
+class TestReplayIntegration:
+    """記録と再生の統合テスト"""
+
+    @pytest.mark.parametrize("cache_enabled", ["0", "1"])
+    def test_replay_matches_database(
+        self,
+        db_connection: bool,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+        cache_enabled: str,
+    ) -> None:
+        """記録したファイルからデータベースと同じ出力を再生できる"""
+        monkeypatch.setenv("PGMCP_CACHE_ENABLED", cache_enabled)
+        reset_catalog_cache()
+        path = str(tmp_path / "public.json.gz")
+        try:
+            with recording({"schema": "public"}) as recorded:
+                expected = [call() for call in CALLS]
+            recorded.save(path)
+
+            # 接続できないポートでも再生できる
+            monkeypatch.setenv("PGPORT", "1")
+            with replaying(path) as replayed:
+                actual = [call() for call in CALLS]
+        finally:
+            reset_catalog_cache()
+
+        assert replayed.meta == {"schema": "public"}
+        assert actual == expected
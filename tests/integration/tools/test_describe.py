@@ -0,0 +1,88 @@
+"""
+テーブル詳細ツールの統合テスト
+"""
+
+import pytest
+
+from pgmcp.tools import (
+    describe_table_impl,
+    describe_tables_impl,
+    get_foreign_keys_impl,
+    get_table_indexes_impl,
+    get_table_schema_impl,
+)
+
+
+class TestDescribeTableIntegration:
+    """describe_table の統合テスト"""
+
+    def test_describe_orders_table(self, db_connection: bool) -> None:
+        """ordersテーブルの全セクションを取得"""
+        result = describe_table_impl("orders", schema="public")
+
+        assert result.startswith("## public.orders")
+        assert "| user_id | integer | NO |" in result
+        assert "orders_user_id_idx" in result
+        assert "| orders_user_id_fkey | user_id | users | id |" in result
+
+    def test_describe_matches_individual_tools(self, db_connection: bool) -> None:
+        """個別ツールと同じ内容を返すことを確認"""
+        result = describe_table_impl("multiple_fk_test", schema="public")
+
+        assert get_table_schema_impl("multiple_fk_test") in result
+        assert get_table_indexes_impl("multiple_fk_test") in result
+        assert get_foreign_keys_impl("multiple_fk_test") in result
+
+    def test_describe_audit_table(self, db_connection: bool) -> None:
+        """別スキーマのテーブルを取得"""
+        result = describe_table_impl("logs", schema="audit")
+
+        assert result.startswith("## audit.logs")
+        assert "| old_data | jsonb |" in result
+
+    def test_describe_nonexistent_table(self, db_connection: bool) -> None:
+        """存在しないテーブルの場合"""
+        result = describe_table_impl("nonexistent_table", schema="public")
+
+        assert result == "テーブルが見つかりませんでした。"
+
+
+class TestDescribeTablesIntegration:
+    """describe_tables の統合テスト"""
+
+    def test_describe_selected_tables(self, db_connection: bool) -> None:
+        """指定したテーブルのカラム情報を一括取得"""
+        result = describe_tables_impl("public", ["users", "orders", "nope"])
+
+        assert "## public.users" in result
+        assert "## public.orders" in result
+        assert "見つからなかったテーブル: nope" in result
+
+    def test_matches_get_table_schema(self, db_connection: bool) -> None:
+        """単一テーブルのツールと同じカラム情報を返すことを確認"""
+        tables = ["composite_pk_test", "many_columns_test", "empty_default_test"]
+        result = describe_tables_impl("public", tables)
+
+        for table in tables:
+            assert get_table_schema_impl(table) in result
+
+    def test_whole_schema_pagination(
+        self, db_connection: bool, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """スキーマ全体をページングして重複・欠落なく取得できることを確認"""
+        monkeypatch.setenv("PGMCP_DESCRIBE_MAX_TABLES", "5")
+
+        headings: list[str] = []
+        after = None
+        while True:
+            page = describe_tables_impl("public", after=after)
+            headings.extend(
+                line for line in page.splitlines() if line.startswith("## ")
+            )
+            if 'after="' not in page:
+                break
+            after = page.rsplit('after="', 1)[1].split('"', 1)[0]
+
+        assert len(headings) == len(set(headings))
+        assert "## public.users" in headings
+        assert "## public.vfk_no_child" in headings
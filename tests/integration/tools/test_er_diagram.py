@@ -93,7 +93,7 @@ class TestGenerateErDiagramIntegration:
         assert "orders {" in result
 
         # 外部キー関係が含まれていることを確認
-        assert 'users ||--o{ orders : "has"' in result
+        assert 'users ||--o{ orders : "user_id"' in result
 
         # FKマーカーが含まれていることを確認
         assert "FK" in result
@@ -112,6 +112,61 @@ class TestGenerateErDiagramIntegration:
         # 指定していないテーブルが含まれていないことを確認
         assert "orders {" not in result
 
+    def test_generate_er_diagram_seed_tables(self, db_connection: bool) -> None:
+        """起点テーブルから外部キーで1ホップ以内のテーブルだけを出力"""
+        result = generate_er_diagram_impl(
+            schema="public",
+            seed_tables=["cascade_parent"],
+            depth=1,
+        )
+
+        assert "cascade_parent {" in result
+        assert "cascade_child {" in result
+        assert "cascade_set_null {" in result
+        assert "users {" not in result
+
+    def test_generate_er_diagram_seed_tables_depth(self, db_connection: bool) -> None:
+        """depthを増やすと近傍が広がる"""
+        shallow = generate_er_diagram_impl(
+            schema="public", seed_tables=["orders"], depth=1
+        )
+        deep = generate_er_diagram_impl(
+            schema="public", seed_tables=["orders"], depth=2
+        )
+
+        assert "users {" in shallow
+        assert "multiple_fk_test {" not in shallow
+        assert "multiple_fk_test {" in deep
+
+    def test_generate_er_diagram_split_clusters(self, db_connection: bool) -> None:
+        """外部キーでつながるテーブルごとにクラスタを分けて出力"""
+        result = generate_er_diagram_impl(schema="public", split_clusters=True)
+
+        assert "## ER図クラスタ" in result
+        assert "| # | テーブル数 | 主なテーブル |" in result
+        assert "```mermaid" in result
+        assert 'users ||--o{ orders : "user_id"' in result
+
+    @pytest.mark.parametrize(
+        ("diagram_format", "expected"),
+        [
+            ("dot", '"orders" -> "users"'),
+            ("plantuml", "users ||--o{ orders"),
+            ("json", '"references": ["users"]'),
+        ],
+    )
+    def test_generate_er_diagram_formats(
+        self, db_connection: bool, diagram_format: str, expected: str
+    ) -> None:
+        """Mermaid以外の出力形式"""
+        result = generate_er_diagram_impl(
+            schema="public",
+            tables=["users", "orders"],
+            diagram_format=diagram_format,
+        )
+
+        assert expected in result
+
     def test_generate_er_diagram_audit_schema(self, db_connection: bool) -> None:
         """auditスキーマのER図を生成"""
         result = generate_er_diagram_impl(schema="audit")
@@ -122,6 +177,34 @@ class TestGenerateErDiagramIntegration:
         # jsonb型が含まれていることを確認
         assert "jsonb" in result
 
+    def test_generate_er_diagram_cross_schema_reference(
+        self, db_connection: bool
+    ) -> None:
+        """他スキーマを参照する外部キーは参照先テーブルも含めて出力する"""
+        result = generate_er_diagram_impl(schema="reporting")
+
+        assert 'reporting_user_summaries["reporting.user_summaries"] {' in result
+        assert 'public_users["public.users"] {' in result
+        assert 'public_users ||--o{ reporting_user_summaries : "user_id"' in result
+        # 参照先スキーマの他のテーブルは含めない
+        assert "public.orders" not in result
+
+    def test_generate_er_diagram_multiple_schemas(self, db_connection: bool) -> None:
+        """複数スキーマのテーブルを1つのER図にまとめる"""
+        result = generate_er_diagram_impl(
+            schemas=["public", "audit"],
+            tables=["users", "orders", "logs"],
+            diagram_format="json",
+        )
+
+        document = json.loads(result)
+        assert set(document["tables"]) == {
+            "public.users",
+            "public.orders",
+            "audit.logs",
+        }
+        assert document["tables"]["public.orders"]["references"] == ["public.users"]
+
     def test_generate_er_diagram_nonexistent_schema(self, db_connection: bool) -> None:
         """存在しないスキーマの場合"""
         result = generate_er_diagram_impl(schema="nonexistent_schema")
@@ -158,7 +241,7 @@ class TestGenerateErDiagramIntegration:
         assert "multiple_fk_test {" in result
 
         # 外部キー関係が含まれていることを確認
-        assert "users ||--o{ multiple_fk_test" in result or "has" in result
+        assert 'users ||--o{ multiple_fk_test : "user_id"' in result
 
     def test_generate_er_diagram_cascade_tables(self, db_connection: bool) -> None:
         """カスケード削除・更新テーブルのER図を生成"""
@@ -175,6 +258,40 @@ class TestGenerateErDiagramIntegration:
         # 外部キー関係が含まれていることを確認
         assert "cascade_parent ||--o{ cascade_child" in result
 
+    def test_generate_er_diagram_tsv_output(self, db_connection: bool) -> None:
+        """TSVでは複合外部キーの参照先をカラムごとに対応付けて出力する"""
+        result = generate_er_diagram_impl(
+            schema="public",
+            tables=["composite_parent", "composite_child"],
+            output_format="tsv",
+        )
+
+        rows = {
+            tuple(line.split("\t")[:2]): line.split("\t")
+            for line in result.splitlines()[1:]
+        }
+        assert rows[("composite_child", "parent_item_no")][5] == (
+            "composite_parent.item_no"
+        )
+        assert rows[("composite_child", "parent_region_code")][5] == (
+            "composite_parent.region_code"
+        )
+
+    def test_generate_er_diagram_composite_foreign_key(
+        self, db_connection: bool
+    ) -> None:
+        """複合外部キーは1本の関係線にまとめ、カラムの一覧をラベルにする"""
+        result = generate_er_diagram_impl(
+            schema="public",
+            tables=["composite_parent", "composite_child"],
+        )
+
+        assert result.count("||--o{") == 1
+        assert (
+            "composite_parent ||--o{ composite_child : "
+            '"parent_item_no, parent_region_code"'
+        ) in result
+
     def test_generate_er_diagram_with_comments(self, db_connection: bool) -> None:
         """コメント付きテーブルのER図を生成"""
         result = generate_er_diagram_impl(
@@ -276,7 +393,7 @@ class TestGenerateErDiagramIntegration:
 
         assert "vfk_uuid_parent {" in result
         assert "vfk_uuid_child {" in result
-        assert 'vfk_uuid_parent ||..o{ vfk_uuid_child : "references"' in result
+        assert 'vfk_uuid_parent ||..o{ vfk_uuid_child : "vfk_uuid_parent_id"' in result
         # 親はPKのみ、子の参照カラムにFKマーカー
         assert "uuid vfk_uuid_parent_id PK" in result
         assert "uuid vfk_uuid_parent_id FK" in result
@@ -293,7 +410,7 @@ class TestGenerateErDiagramIntegration:
 
         assert "vfk_no_parent {" in result
         assert "vfk_no_child {" in result
-        assert 'vfk_no_parent ||..o{ vfk_no_child : "references"' in result
+        assert 'vfk_no_parent ||..o{ vfk_no_child : "vfk_no_parent_no"' in result
         assert "bigint vfk_no_parent_no PK" in result
         # 子テーブルの参照カラムにFKマーカーが付く
         assert "bigint vfk_no_parent_no FK" in result
@@ -341,12 +458,18 @@ class TestGenerateErDiagramIntegration:
         assert "erDiagram" in result
         assert "vfk_uuid_customer {" in result and "vfk_no_customer {" in result
         # 代表的なVirtual FKが検出されていることを確認
-        assert 'vfk_uuid_customer ||..o{ vfk_uuid_order : "references"' in result
-        assert 'vfk_uuid_order ||..o{ vfk_uuid_order_item : "references"' in result
-        assert 'vfk_uuid_order ||..o{ vfk_uuid_invoice : "references"' in result
-        assert 'vfk_uuid_invoice ||..o{ vfk_uuid_payment : "references"' in result
-        assert 'vfk_no_customer ||..o{ vfk_no_order : "references"' in result
-        assert 'vfk_no_order ||..o{ vfk_no_order_item : "references"' in result
+        assert (
+            'vfk_uuid_customer ||..o{ vfk_uuid_order : "vfk_uuid_customer_id"' in result
+        )
+        assert (
+            'vfk_uuid_order ||..o{ vfk_uuid_order_item : "vfk_uuid_order_id"' in result
+        )
+        assert 'vfk_uuid_order ||..o{ vfk_uuid_invoice : "vfk_uuid_order_id"' in result
+        assert (
+            'vfk_uuid_invoice ||..o{ vfk_uuid_payment : "vfk_uuid_invoice_id"' in result
+        )
+        assert 'vfk_no_customer ||..o{ vfk_no_order : "vfk_no_customer_no"' in result
+        assert 'vfk_no_order ||..o{ vfk_no_order_item : "vfk_no_order_no"' in result
 
 
 class TestMermaidSyntaxValidation:
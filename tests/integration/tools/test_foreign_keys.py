@@ -48,6 +48,21 @@ class TestGetForeignKeysIntegration:
 
         assert "parent_id" in result
         assert "cascade_parent" in result
+        assert "| CASCADE | CASCADE | NOT DEFERRABLE |" in result
+
+    def test_get_composite_foreign_keys(self, db_connection: bool) -> None:
+        """複合外部キーは制約内のカラム順に参照先カラムと対応付ける"""
+        result = get_foreign_keys_impl("composite_child", schema="public")
+
+        lines = [
+            line for line in result.splitlines() if "composite_child_parent" in line
+        ]
+        assert lines == [
+            "| composite_child_parent_fkey | parent_item_no | composite_parent "
+            "| item_no | NO ACTION | RESTRICT | DEFERRABLE INITIALLY DEFERRED |",
+            "| composite_child_parent_fkey | parent_region_code | composite_parent "
+            "| region_code | NO ACTION | RESTRICT | DEFERRABLE INITIALLY DEFERRED |",
+        ]
 
     def test_get_users_foreign_keys(self, db_connection: bool) -> None:
         """usersテーブルの外部キー情報を取得（外部キーなし）"""
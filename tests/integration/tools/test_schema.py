@@ -2,6 +2,8 @@
 スキーマ関連ツールの統合テスト
 """
 
+import json
+
 from pgmcp.tools import get_table_schema_impl, list_tables_impl
 
 
@@ -62,6 +64,38 @@ class TestListTablesIntegration:
         for table in expected_tables:
             assert table in result, f"テーブル '{table}' が一覧に含まれていません"
 
+    def test_list_tables_includes_partitioned_table(self, db_connection: bool) -> None:
+        """パーティションテーブルもBASE TABLEとして含まれることを確認"""
+        result = list_tables_impl(schema="public")
+
+        assert "| partitioned_logs | BASE TABLE |" in result
+        assert "| partitioned_logs_2024 | BASE TABLE |" in result
+
+    def test_list_tables_with_pattern(self, db_connection: bool) -> None:
+        """LIKEパターンで絞り込めることを確認"""
+        result = list_tables_impl(schema="public", pattern="cascade%")
+
+        assert "| cascade_parent | BASE TABLE |" in result
+        assert "| cascade_child | BASE TABLE |" in result
+        assert "| users |" not in result
+
+    def test_list_tables_pagination(self, db_connection: bool) -> None:
+        """afterとlimitでページングし、全ページで重複・欠落がないことを確認"""
+        full = list_tables_impl(schema="public")
+        expected = [line for line in full.splitlines() if line.startswith("| ")][1:]
+
+        collected: list[str] = []
+        after = None
+        while True:
+            page = list_tables_impl(schema="public", after=after, limit=7)
+            lines = page.splitlines()
+            collected.extend(line for line in lines[2:] if line.startswith("| "))
+            if 'after="' not in page:
+                break
+            after = page.rsplit('after="', 1)[1].split('"', 1)[0]
+
+        assert collected == expected
+
 
 class TestGetTableSchemaIntegration:
     """get_table_schema の統合テスト"""
@@ -87,6 +121,21 @@ class TestGetTableSchemaIntegration:
         assert "ユーザー名" in result
         assert "メールアドレス" in result
 
+    def test_get_users_table_schema_json_and_tsv(self, db_connection: bool) -> None:
+        """JSON / TSV でも Markdown と同じカラムを返す"""
+        document = json.loads(
+            get_table_schema_impl("users", schema="public", output_format="json")
+        )
+        tsv = get_table_schema_impl("users", schema="public", output_format="tsv")
+
+        assert document["columns"][0] == "column_name"
+        rows = {row[0]: row for row in document["rows"]}
+        assert rows["id"][4] is True
+        assert rows["email"][2] is True
+        assert rows["name"][5] == "ユーザー名"
+        assert len(tsv.splitlines()) == len(document["rows"]) + 1
+        assert "name\tcharacter varying(100)\tf\t\\N\tf\tユーザー名" in tsv
+
     def test_get_orders_table_schema(self, db_connection: bool) -> None:
         """ordersテーブルのスキーマを取得（外部キーを含む）"""
         result = get_table_schema_impl("orders", schema="public")
@@ -341,3 +390,22 @@ class TestOtherTablesIntegration:
         # 子テーブル固有のカラム
         assert "| email | character varying(255) |" in result
         assert "| birth_date | date |" in result
+
+    def test_many_columns_table_schema_with_max_chars(
+        self, db_connection: bool
+    ) -> None:
+        """max_chars で打ち切った出力を cursor でたどると全カラムを取得できる"""
+        full = get_table_schema_impl("many_columns_test", schema="public")
+        rows: list[str] = []
+        cursor = None
+        while True:
+            page = get_table_schema_impl(
+                "many_columns_test", schema="public", max_chars=800, cursor=cursor
+            )
+            assert len(page) <= 800
+            rows += [line for line in page.splitlines() if line.startswith("| col_")]
+            if 'cursor="' not in page:
+                break
+            cursor = page.split('cursor="')[1].split('"')[0]
+
+        assert rows == [line for line in full.splitlines() if line.startswith("| col_")]
@@ -0,0 +1,20 @@
+"""
+ユニットテスト用の共通フィクスチャ
+"""
+
+from collections.abc import Generator
+
+import pytest
+
+from pgmcp.cache import reset_catalog_cache
+
+
+@pytest.fixture(autouse=True)
+def disable_catalog_cache(
+    monkeypatch: pytest.MonkeyPatch,
+) -> Generator[None, None, None]:
+    """モックしたカーソルの結果がテスト間で共有されないようキャッシュを無効化"""
+    monkeypatch.setenv("PGMCP_CACHE_ENABLED", "0")
+    reset_catalog_cache()
+    yield
+    reset_catalog_cache()
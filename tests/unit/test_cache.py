@@ -0,0 +1,262 @@
+"""
+カタログキャッシュのユニットテスト
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from pgmcp.cache import (
+    _FINGERPRINT_QUERY,
+    CacheConfig,
+    CacheStats,
+    CatalogCache,
+    get_catalog_cache,
+    reset_catalog_cache,
+)
+
+QUERY = "SELECT * FROM columns WHERE table = %s"
+
+
+def _make_cursor(fingerprints: list[tuple[int, ...]]) -> MagicMock:
+    """フィンガープリントを順に返すカーソルのモックを作成"""
+    cur = MagicMock()
+    cur.connection.info.host = "localhost"
+    cur.connection.info.port = 5432
+    cur.connection.info.dbname = "testdb"
+    cur.fetchone.side_effect = fingerprints
+    cur.fetchall.side_effect = lambda: [("row", len(cur.fetchall.mock_calls))]
+    return cur
+
+
+def _catalog_queries(cur: MagicMock) -> int:
+    """フィンガープリント以外のクエリ実行回数"""
+    return sum(1 for c in cur.execute.call_args_list if c[0][0] != _FINGERPRINT_QUERY)
+
+
+class TestCacheConfig:
+    """CacheConfig のテスト"""
+
+    def test_from_env(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """環境変数から設定を読み込む"""
+        monkeypatch.setenv("PGMCP_CACHE_ENABLED", "false")
+        monkeypatch.setenv("PGMCP_CACHE_CHECK_INTERVAL", "0.5")
+        monkeypatch.setenv("PGMCP_CACHE_MAX_ENTRIES", "10")
+
+        assert CacheConfig.from_env() == CacheConfig(
+            enabled=False, check_interval=0.5, max_entries=10
+        )
+
+
+class TestCatalogCache:
+    """CatalogCache のテスト"""
+
+    def test_hit_within_interval(self) -> None:
+        """確認間隔内は同じキーでクエリを再実行しない"""
+        cache = CatalogCache(CacheConfig(check_interval=60.0))
+        cur = _make_cursor([(1, 100)])
+
+        first = cache.fetch(cur, "public", ("columns", "users"), QUERY, ("users",))
+        second = cache.fetch(cur, "public", ("columns", "users"), QUERY, ("users",))
+
+        assert first == second
+        assert _catalog_queries(cur) == 1
+        assert cache.stats() == CacheStats(
+            hits=1, misses=1, invalidations=0, fingerprint_checks=1, entries=1
+        )
+
+    def test_unchanged_fingerprint_keeps_entries(self) -> None:
+        """フィンガープリントが変わらなければ確認後もキャッシュを使う"""
+        cache = CatalogCache(CacheConfig(check_interval=0.0))
+        cur = _make_cursor([(1, 100), (1, 100)])
+
+        cache.fetch(cur, "public", ("columns", "users"), QUERY, ("users",))
+        cache.fetch(cur, "public", ("columns", "users"), QUERY, ("users",))
+
+        assert _catalog_queries(cur) == 1
+        assert cache.stats().fingerprint_checks == 2
+        assert cache.stats().invalidations == 0
+
+    def test_changed_fingerprint_invalidates_schema(self) -> None:
+        """フィンガープリントが変化するとスキーマのエントリを破棄する"""
+        cache = CatalogCache(CacheConfig(check_interval=0.0))
+        cur = _make_cursor([(1, 100), (1, 100), (2, 101)])
+
+        first = cache.fetch(cur, "public", ("columns", "users"), QUERY, ("users",))
+        cache.fetch(cur, "public", ("indexes", "users"), QUERY, ("users",))
+        second = cache.fetch(cur, "public", ("columns", "users"), QUERY, ("users",))
+
+        assert first != second
+        assert _catalog_queries(cur) == 3
+        stats = cache.stats()
+        assert stats.invalidations == 1
+        assert stats.entries == 1
+
+    def test_schemas_are_validated_independently(self) -> None:
+        """別スキーマの変更は他スキーマのエントリに影響しない"""
+        cache = CatalogCache(CacheConfig(check_interval=0.0))
+        cur = _make_cursor([(1, 100), (5, 500), (1, 100), (6, 600)])
+
+        cache.fetch(cur, "public", ("columns", "users"), QUERY, ("users",))
+        cache.fetch(cur, "audit", ("columns", "logs"), QUERY, ("logs",))
+        cache.fetch(cur, "public", ("columns", "users"), QUERY, ("users",))
+        cache.fetch(cur, "audit", ("columns", "logs"), QUERY, ("logs",))
+
+        stats = cache.stats()
+        assert stats.hits == 1
+        assert stats.invalidations == 1
+
+    def test_fingerprint_checked_at_most_once_per_interval(self) -> None:
+        """確認間隔が経過するまでフィンガープリントを再確認しない"""
+        cache = CatalogCache(CacheConfig(check_interval=10.0))
+        cur = _make_cursor([(1, 100), (1, 100)])
+
+        with patch("pgmcp.cache.time.monotonic", return_value=100.0):
+            cache.fetch(cur, "public", ("columns", "a"), QUERY, ("a",))
+            cache.fetch(cur, "public", ("columns", "b"), QUERY, ("b",))
+        with patch("pgmcp.cache.time.monotonic", return_value=111.0):
+            cache.fetch(cur, "public", ("columns", "a"), QUERY, ("a",))
+
+        assert cache.stats().fingerprint_checks == 2
+
+    def test_evicts_least_recently_used(self) -> None:
+        """上限を超えると最も古いエントリから破棄する"""
+        cache = CatalogCache(CacheConfig(check_interval=60.0, max_entries=2))
+        cur = _make_cursor([(1, 100)])
+
+        cache.fetch(cur, "public", ("columns", "a"), QUERY, ("a",))
+        cache.fetch(cur, "public", ("columns", "b"), QUERY, ("b",))
+        cache.fetch(cur, "public", ("columns", "a"), QUERY, ("a",))
+        cache.fetch(cur, "public", ("columns", "c"), QUERY, ("c",))
+        cache.fetch(cur, "public", ("columns", "a"), QUERY, ("a",))
+        cache.fetch(cur, "public", ("columns", "b"), QUERY, ("b",))
+
+        stats = cache.stats()
+        assert stats.entries == 2
+        assert stats.hits == 2
+        assert stats.misses == 4
+
+    def test_disabled_cache_always_queries(self) -> None:
+        """無効化されている場合は毎回クエリを実行する"""
+        cache = CatalogCache(CacheConfig(enabled=False))
+        cur = _make_cursor([])
+
+        cache.fetch(cur, "public", ("columns", "users"), QUERY, ("users",))
+        cache.fetch(cur, "public", ("columns", "users"), QUERY, ("users",))
+
+        assert cur.execute.call_count == 2
+        cur.fetchone.assert_not_called()
+
+    def test_clear(self) -> None:
+        """clearで全エントリを破棄する"""
+        cache = CatalogCache(CacheConfig(check_interval=60.0))
+        cur = _make_cursor([(1, 100), (1, 100)])
+        cache.fetch(cur, "public", ("columns", "users"), QUERY, ("users",))
+
+        cache.clear()
+
+        assert cache.stats().entries == 0
+
+
+class TestGetOrBuild:
+    """CatalogCache.peek / get_or_build のテスト"""
+
+    def test_build_once_per_fingerprint(self) -> None:
+        """組み立てた値をキャッシュし、同じキーでは再作成しない"""
+        cache = CatalogCache(CacheConfig(check_interval=60.0))
+        cur = _make_cursor([(1, 100)])
+        build = MagicMock(return_value=("graph",))
+
+        first = cache.get_or_build(cur, "public", ("er_graph", "*"), build)
+        second = cache.get_or_build(cur, "public", ("er_graph", "*"), build)
+
+        assert first is second
+        build.assert_called_once()
+
+    def test_value_built_before_invalidation_is_not_stored(self) -> None:
+        """作成中に別のスレッドがスキーマを破棄した場合、作成した値を保存しない"""
+        cache = CatalogCache(CacheConfig(check_interval=0.0))
+        cur = _make_cursor([(1, 100), (2, 101), (2, 101), (2, 101)])
+
+        def build_stale() -> str:
+            # 作成中に別のスレッドが変更後のフィンガープリントを確認する
+            cache.get_or_build(cur, "public", ("other",), lambda: "new")
+            return "stale"
+
+        stale = cache.get_or_build(cur, "public", ("er_graph", "*"), build_stale)
+        fresh = cache.get_or_build(cur, "public", ("er_graph", "*"), lambda: "fresh")
+
+        assert stale == "stale"
+        assert fresh == "fresh"
+        assert cache.stats().invalidations == 1
+
+    def test_value_built_before_clear_is_not_stored(self) -> None:
+        """作成中に clear された場合も作成した値を保存しない"""
+        cache = CatalogCache(CacheConfig(check_interval=60.0))
+        cur = _make_cursor([(1, 100), (1, 100)])
+
+        def build_stale() -> str:
+            cache.clear()
+            return "stale"
+
+        cache.get_or_build(cur, "public", ("er_graph", "*"), build_stale)
+
+        assert cache.stats().entries == 0
+
+    def test_uncacheable_value_is_rebuilt(self) -> None:
+        """cacheable が False を返した値はキャッシュしない"""
+        cache = CatalogCache(CacheConfig(check_interval=60.0))
+        cur = _make_cursor([(1, 100)])
+        build = MagicMock(return_value=("graph",))
+
+        for _ in range(2):
+            cache.get_or_build(
+                cur, "public", ("er_graph", "*"), build, lambda value: False
+            )
+
+        assert build.call_count == 2
+        assert cache.stats().entries == 0
+
+    def test_peek_without_database(self) -> None:
+        """確認間隔内はカーソル無しでキャッシュ済みの値を取得できる"""
+        cache = CatalogCache(CacheConfig(check_interval=60.0))
+        cur = _make_cursor([(1, 100)])
+
+        assert cache.peek("public", ("er_graph", "*")) is None
+        cache.get_or_build(cur, "public", ("er_graph", "*"), lambda: "graph")
+
+        assert cache.peek("public", ("er_graph", "*")) == "graph"
+        assert cache.peek("public", ("er_graph", "other")) is None
+        assert cache.stats().hits == 1
+
+    def test_peek_requires_fresh_fingerprint(self) -> None:
+        """確認間隔を過ぎたらpeekは値を返さない"""
+        cache = CatalogCache(CacheConfig(check_interval=10.0))
+        cur = _make_cursor([(1, 100)])
+
+        with patch("pgmcp.cache.time.monotonic", return_value=100.0):
+            cache.get_or_build(cur, "public", ("er_graph", "*"), lambda: "graph")
+        with patch("pgmcp.cache.time.monotonic", return_value=111.0):
+            assert cache.peek("public", ("er_graph", "*")) is None
+
+    def test_peek_disabled(self) -> None:
+        """無効化されている場合は常にNone"""
+        cache = CatalogCache(CacheConfig(enabled=False))
+
+        assert cache.peek("public", ("er_graph", "*")) is None
+
+
+class TestGetCatalogCache:
+    """get_catalog_cache のテスト"""
+
+    def test_singleton_reads_env(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """プロセス共有のキャッシュは環境変数の設定で作成される"""
+        monkeypatch.setenv("PGMCP_CACHE_ENABLED", "1")
+        monkeypatch.setenv("PGMCP_CACHE_CHECK_INTERVAL", "3")
+        reset_catalog_cache()
+
+        cache = get_catalog_cache()
+
+        assert cache is get_catalog_cache()
+        assert cache.config.enabled is True
+        assert cache.config.check_interval == 3.0
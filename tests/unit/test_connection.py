@@ -0,0 +1,280 @@
+"""
+コネクションプールのユニットテスト
+"""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import psycopg2
+import pytest
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, QueryCanceledError
+from psycopg2.pool import PoolError
+
+from pgmcp.connection import (
+    ConnectionPool,
+    PoolConfig,
+    QueryScope,
+    QueryTimeouts,
+)
+
+
+def _make_conn() -> MagicMock:
+    """psycopg2接続のモックを作成"""
+    conn = MagicMock()
+    conn.closed = 0
+    conn.get_transaction_status.return_value = TRANSACTION_STATUS_IDLE
+    return conn
+
+
+class TestPoolConfig:
+    """PoolConfig のテスト"""
+
+    def test_defaults(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """環境変数未設定時はデフォルト値を使用"""
+        for name in (
+            "PGMCP_POOL_MIN_SIZE",
+            "PGMCP_POOL_MAX_SIZE",
+            "PGMCP_POOL_IDLE_TIMEOUT",
+            "PGMCP_POOL_MAX_LIFETIME",
+            "PGMCP_POOL_TIMEOUT",
+            "PGMCP_POOL_CHECK_INTERVAL",
+        ):
+            monkeypatch.delenv(name, raising=False)
+
+        assert PoolConfig.from_env() == PoolConfig()
+
+    def test_from_env(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """環境変数から設定を読み込む"""
+        monkeypatch.setenv("PGMCP_POOL_MIN_SIZE", "2")
+        monkeypatch.setenv("PGMCP_POOL_MAX_SIZE", "20")
+        monkeypatch.setenv("PGMCP_POOL_IDLE_TIMEOUT", "60")
+        monkeypatch.setenv("PGMCP_POOL_MAX_LIFETIME", "600")
+        monkeypatch.setenv("PGMCP_POOL_TIMEOUT", "5")
+        monkeypatch.setenv("PGMCP_POOL_CHECK_INTERVAL", "0")
+
+        config = PoolConfig.from_env()
+
+        assert config == PoolConfig(
+            min_size=2,
+            max_size=20,
+            idle_timeout=60.0,
+            max_lifetime=600.0,
+            timeout=5.0,
+            check_interval=0.0,
+        )
+
+
+class TestQueryTimeouts:
+    """QueryTimeouts のテスト"""
+
+    def test_defaults(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.delenv("PGMCP_STATEMENT_TIMEOUT", raising=False)
+        monkeypatch.delenv("PGMCP_LOCK_TIMEOUT", raising=False)
+
+        assert QueryTimeouts.from_env() == QueryTimeouts(30000, 5000)
+
+    def test_per_tool_override(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """ツールごとの環境変数が全体の値より優先される"""
+        monkeypatch.setenv("PGMCP_STATEMENT_TIMEOUT", "10000")
+        monkeypatch.setenv("PGMCP_LOCK_TIMEOUT", "1000")
+        monkeypatch.setenv("PGMCP_STATEMENT_TIMEOUT_GENERATE_ER_DIAGRAM", "60000")
+
+        assert QueryTimeouts.from_env("generate_er_diagram") == QueryTimeouts(
+            60000, 1000
+        )
+        assert QueryTimeouts.from_env("list_tables") == QueryTimeouts(10000, 1000)
+
+
+class TestQueryScope:
+    """QueryScope のテスト"""
+
+    def test_cancel_running_queries(self) -> None:
+        """記録中の接続にだけキャンセル要求を送る"""
+        scope = QueryScope(QueryTimeouts())
+        running, finished = _make_conn(), _make_conn()
+        scope.attach(running)
+        scope.attach(finished)
+        scope.detach(finished)
+
+        scope.cancel()
+
+        running.cancel.assert_called_once()
+        finished.cancel.assert_not_called()
+
+    def test_detach_waits_for_cancel(self) -> None:
+        """送信中の cancel と並行した detach は送信の完了を待ってから返る"""
+        scope = QueryScope(QueryTimeouts())
+        conn = _make_conn()
+        scope.attach(conn)
+        sending = threading.Event()
+        events: list[str] = []
+
+        def slow_cancel() -> None:
+            sending.set()
+            time.sleep(0.05)
+            events.append("cancelled")
+
+        conn.cancel.side_effect = slow_cancel
+
+        canceller = threading.Thread(target=scope.cancel)
+        canceller.start()
+        assert sending.wait(1)
+        # 返却後にプールで再利用される接続へ要求が届かないよう、detach は待つ
+        scope.detach(conn)
+        events.append("detached")
+        canceller.join(1)
+
+        assert events == ["cancelled", "detached"]
+
+    def test_attach_after_cancel(self) -> None:
+        """キャンセル後は新しいクエリを始めない"""
+        scope = QueryScope(QueryTimeouts())
+        scope.cancel()
+
+        with pytest.raises(QueryCanceledError):
+            scope.attach(_make_conn())
+
+
+class TestConnectionPool:
+    """ConnectionPool のテスト"""
+
+    def test_reuses_connection(self) -> None:
+        """返却された接続が再利用される"""
+        connect = MagicMock(side_effect=[_make_conn(), _make_conn()])
+        pool = ConnectionPool(PoolConfig(), connect=connect)
+
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            pass
+
+        assert first is second
+        assert connect.call_count == 1
+        assert pool.size == 1
+        assert pool.idle_count == 1
+
+    def test_rollback_on_release(self) -> None:
+        """返却時にトランザクションを終了する"""
+        conn = _make_conn()
+        pool = ConnectionPool(PoolConfig(), connect=MagicMock(return_value=conn))
+
+        with pool.connection():
+            pass
+
+        conn.rollback.assert_called_once()
+
+    def test_concurrent_checkout_opens_new_connection(self) -> None:
+        """貸し出し中は別の物理接続を作成する"""
+        connect = MagicMock(side_effect=[_make_conn(), _make_conn()])
+        pool = ConnectionPool(PoolConfig(max_size=2), connect=connect)
+
+        with pool.connection() as first, pool.connection() as second:
+            assert first is not second
+
+        assert pool.size == 2
+        assert pool.idle_count == 2
+
+    def test_timeout_when_exhausted(self) -> None:
+        """上限に達して空きが出ない場合はPoolError"""
+        pool = ConnectionPool(
+            PoolConfig(max_size=1, timeout=0.01),
+            connect=MagicMock(return_value=_make_conn()),
+        )
+
+        with pool.connection(), pytest.raises(PoolError), pool.connection():
+            pass
+
+    def test_discard_after_max_lifetime(self) -> None:
+        """最大寿命を超えた接続は作り直される"""
+        old_conn = _make_conn()
+        new_conn = _make_conn()
+        connect = MagicMock(side_effect=[old_conn, new_conn])
+        pool = ConnectionPool(PoolConfig(max_lifetime=10.0), connect=connect)
+
+        with (
+            patch("pgmcp.connection.time.monotonic", return_value=100.0),
+            pool.connection(),
+        ):
+            pass
+        with (
+            patch("pgmcp.connection.time.monotonic", return_value=200.0),
+            pool.connection() as conn,
+        ):
+            assert conn is new_conn
+
+        old_conn.close.assert_called_once()
+        assert pool.size == 1
+
+    def test_idle_timeout_keeps_min_size(self) -> None:
+        """アイドルタイムアウトでもmin_sizeまでは保持する"""
+        conn = _make_conn()
+        pool = ConnectionPool(
+            PoolConfig(min_size=1, idle_timeout=1.0, check_interval=1000.0),
+            connect=MagicMock(return_value=conn),
+        )
+
+        with (
+            patch("pgmcp.connection.time.monotonic", return_value=100.0),
+            pool.connection(),
+        ):
+            pass
+        with (
+            patch("pgmcp.connection.time.monotonic", return_value=150.0),
+            pool.connection() as reused,
+        ):
+            assert reused is conn
+
+        conn.close.assert_not_called()
+
+    def test_health_check_discards_broken_connection(self) -> None:
+        """疎通確認に失敗した接続は破棄して作り直す"""
+        broken = _make_conn()
+        broken.cursor.return_value.__enter__.return_value.execute.side_effect = (
+            psycopg2.OperationalError("server closed the connection")
+        )
+        fresh = _make_conn()
+        connect = MagicMock(side_effect=[broken, fresh])
+        pool = ConnectionPool(PoolConfig(check_interval=0.0), connect=connect)
+
+        with pool.connection():
+            pass
+        with pool.connection() as conn:
+            assert conn is fresh
+
+        broken.close.assert_called_once()
+        assert pool.size == 1
+
+    def test_closed_connection_is_not_returned(self) -> None:
+        """切断済みの接続はプールに戻さない"""
+        conn = _make_conn()
+        pool = ConnectionPool(PoolConfig(), connect=MagicMock(return_value=conn))
+
+        with pool.connection():
+            conn.closed = 2
+
+        assert pool.size == 0
+        assert pool.idle_count == 0
+
+    def test_connect_failure_releases_slot(self) -> None:
+        """接続作成に失敗しても枠を消費しない"""
+        connect = MagicMock(side_effect=psycopg2.OperationalError("refused"))
+        pool = ConnectionPool(PoolConfig(max_size=1), connect=connect)
+
+        with pytest.raises(psycopg2.OperationalError), pool.connection():
+            pass
+
+        assert pool.size == 0
+
+    def test_close_pool(self) -> None:
+        """クローズ後は貸し出しできない"""
+        conn = _make_conn()
+        pool = ConnectionPool(PoolConfig(), connect=MagicMock(return_value=conn))
+        with pool.connection():
+            pass
+
+        pool.close()
+
+        conn.close.assert_called_once()
+        with pytest.raises(PoolError), pool.connection():
+            pass
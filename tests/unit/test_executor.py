@@ -0,0 +1,114 @@
+"""
+ブロッキング処理の非同期実行のユニットテスト
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from collections.abc import Generator
+from unittest.mock import MagicMock
+
+import pytest
+
+from pgmcp import executor
+from pgmcp.connection import QueryTimeouts, _query_scope
+from pgmcp.executor import run_blocking
+
+request_id: contextvars.ContextVar[str] = contextvars.ContextVar("request_id")
+
+
+@pytest.fixture(autouse=True)
+def reset_executor() -> Generator[None, None, None]:
+    """テストごとにスレッドプールを作り直す"""
+    executor.shutdown_executor()
+    yield
+    executor.shutdown_executor()
+
+
+class TestRunBlocking:
+    """run_blocking のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_runs_in_worker_thread(self) -> None:
+        """ワーカースレッドで実行される"""
+        thread_name = await run_blocking(lambda: threading.current_thread().name)
+
+        assert thread_name.startswith("pgmcp-tool")
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_overlap(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """ブロッキング処理が並行に実行されイベントループを塞がない"""
+        monkeypatch.setenv("PGMCP_EXECUTOR_THREADS", "4")
+
+        started = time.perf_counter()
+        await asyncio.gather(*(run_blocking(time.sleep, 0.2) for _ in range(4)))
+        elapsed = time.perf_counter() - started
+
+        assert elapsed < 0.6
+
+    @pytest.mark.asyncio
+    async def test_propagates_context_variables(self) -> None:
+        """コンテキスト変数がワーカースレッドに引き継がれる"""
+        request_id.set("req-1")
+
+        assert await run_blocking(request_id.get) == "req-1"
+
+    @pytest.mark.asyncio
+    async def test_passes_arguments_and_exceptions(self) -> None:
+        """引数と例外がそのまま受け渡される"""
+
+        def divide(a: int, b: int = 1) -> float:
+            return a / b
+
+        assert await run_blocking(divide, 6, b=3) == 2
+        with pytest.raises(ZeroDivisionError):
+            await run_blocking(divide, 1, b=0)
+
+    @pytest.mark.asyncio
+    async def test_sync_fallback(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """PGMCP_EXECUTOR_THREADS=0 の場合はイベントループ上で同期実行する"""
+        monkeypatch.setenv("PGMCP_EXECUTOR_THREADS", "0")
+
+        thread = await run_blocking(threading.current_thread)
+
+        assert thread is threading.current_thread()
+
+    @pytest.mark.asyncio
+    async def test_timeouts_per_tool(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """実装関数名から求めたツールごとの制限時間を適用する"""
+        monkeypatch.setenv("PGMCP_STATEMENT_TIMEOUT_LIST_TABLES", "1234")
+
+        def list_tables_impl() -> QueryTimeouts:
+            scope = _query_scope.get()
+            assert scope is not None
+            return scope.timeouts
+
+        timeouts = await run_blocking(list_tables_impl)
+
+        assert timeouts.statement_timeout == 1234
+
+    @pytest.mark.asyncio
+    async def test_cancellation_cancels_query(self) -> None:
+        """待機中のタスクがキャンセルされたら実行中のクエリにキャンセル要求を送る"""
+        attached = threading.Event()
+        cancelled = threading.Event()
+        conn = MagicMock()
+        conn.cancel.side_effect = cancelled.set
+
+        def query() -> None:
+            scope = _query_scope.get()
+            assert scope is not None
+            scope.attach(conn)
+            attached.set()
+            cancelled.wait(5)
+
+        task = asyncio.create_task(run_blocking(query))
+        await asyncio.to_thread(attached.wait, 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert await asyncio.to_thread(cancelled.wait, 5)
@@ -0,0 +1,155 @@
+"""
+メトリクスのユニットテスト
+"""
+
+import logging
+import time
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+
+from pgmcp.metrics import (
+    Histogram,
+    MetricsFileWriter,
+    current_call,
+    get_metrics,
+    measure_call,
+    render_prometheus,
+    reset_metrics,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics() -> Generator[None, None, None]:
+    """テストごとにレジストリを作り直す"""
+    reset_metrics()
+    yield
+    reset_metrics()
+
+
+class TestHistogram:
+    """Histogram のテスト"""
+
+    def test_cumulative(self) -> None:
+        """バケットの上限以下の件数を累積で数える"""
+        histogram = Histogram((1, 10))
+        for value in (0, 1, 5, 100):
+            histogram.observe(value)
+
+        assert histogram.cumulative() == [("1", 2), ("10", 3), ("+Inf", 4)]
+        assert histogram.sum == 106
+        assert histogram.count == 4
+
+
+class TestMeasureCall:
+    """measure_call のテスト"""
+
+    def test_records_phases(self) -> None:
+        """接続・実行・取得以外の時間は format として記録する"""
+
+        def impl() -> str:
+            call = current_call()
+            assert call is not None
+            call.connect += 0.001
+            call.execute += 0.002
+            call.rows += 3
+            call.queries += 1
+            time.sleep(0.01)
+            return "結果"
+
+        assert measure_call("list_tables", impl) == "結果"
+
+        metrics = get_metrics().snapshot()["list_tables"]
+        assert (metrics["calls"], metrics["errors"], metrics["queries"]) == (1, 0, 1)
+        assert metrics["phases"]["connect"]["sum"] == pytest.approx(0.001)
+        assert metrics["phases"]["format"]["sum"] >= 0.005
+        assert metrics["rows"]["sum"] == 3
+        assert metrics["output_bytes"]["sum"] == len("結果".encode())
+        assert current_call() is None
+
+    def test_records_errors(self) -> None:
+        def fail() -> str:
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            measure_call("list_tables", fail)
+
+        metrics = get_metrics().snapshot()["list_tables"]
+        assert metrics["errors"] == 1
+        assert metrics["output_bytes"]["count"] == 0
+
+    def test_disabled(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """PGMCP_METRICS_ENABLED=0 の場合は何も記録しない"""
+        monkeypatch.setenv("PGMCP_METRICS_ENABLED", "0")
+        reset_metrics()
+
+        assert measure_call("list_tables", current_call) is None
+        assert get_metrics().snapshot() == {}
+
+
+class TestRenderPrometheus:
+    """render_prometheus のテスト"""
+
+    def test_text_format(self) -> None:
+        measure_call("get_table_schema", lambda: "x")
+
+        text = render_prometheus(
+            get_metrics().snapshot(),
+            [("pgmcp_pool_max_size", "gauge", "上限", [({}, 10)])],
+        )
+
+        lines = text.splitlines()
+        assert "# TYPE pgmcp_tool_phase_seconds histogram" in lines
+        assert 'pgmcp_tool_calls_total{tool="get_table_schema"} 1' in lines
+        assert (
+            'pgmcp_tool_phase_seconds_bucket{tool="get_table_schema",'
+            'phase="total",le="+Inf"} 1'
+        ) in lines
+        assert 'pgmcp_tool_output_bytes_sum{tool="get_table_schema"} 1' in lines
+        assert "pgmcp_pool_max_size 10" in lines
+        assert text.endswith("\n")
+
+
+class TestMetricsFileWriter:
+    """MetricsFileWriter のテスト"""
+
+    def test_writes_on_stop(self, tmp_path: Path) -> None:
+        """停止時に最後の値を書き出す"""
+        path = tmp_path / "pgmcp.prom"
+        writer = MetricsFileWriter(str(path), lambda: "pgmcp_up 1\n", interval=60)
+        writer.start()
+        writer.stop()
+
+        assert path.read_text() == "pgmcp_up 1\n"
+        assert not (tmp_path / "pgmcp.prom.tmp").exists()
+
+    def test_keeps_running_after_write_error(
+        self, tmp_path: Path, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        """書き込みに失敗してもスレッドを止めず、停止時も例外を出さない"""
+        directory = tmp_path / "textfile"
+        path = directory / "pgmcp.prom"
+        writer = MetricsFileWriter(str(path), lambda: "pgmcp_up 1\n", interval=0.01)
+        with caplog.at_level(logging.WARNING, logger="pgmcp.metrics"):
+            writer.start()
+            time.sleep(0.05)
+            assert writer._thread.is_alive()
+
+            directory.mkdir()
+            writer.stop()
+
+        assert path.read_text() == "pgmcp_up 1\n"
+        messages = [record.getMessage() for record in caplog.records]
+        assert len(messages) == 2
+        assert "書き出せませんでした" in messages[0]
+        assert "回復しました" in messages[1]
+
+    def test_stop_does_not_raise_on_write_error(self, tmp_path: Path) -> None:
+        """停止時の書き込みに失敗しても例外を出さない"""
+        path = tmp_path / "missing" / "pgmcp.prom"
+        writer = MetricsFileWriter(str(path), lambda: "pgmcp_up 1\n", interval=60)
+        writer.start()
+        writer.stop()
+
+        assert not path.exists()
@@ -0,0 +1,121 @@
+"""
+記録と再生のユニットテスト
+"""
+
+from pathlib import Path
+
+import pytest
+
+from pgmcp.connection import get_pool, pool_stats, replace_pool
+from pgmcp.replay import (
+    QueryNotRecordedError,
+    Recording,
+    ReplayConnection,
+    replaying,
+)
+from pgmcp.tools import get_table_schema_impl
+from pgmcp.tools.schema import _TABLE_SCHEMA_QUERY
+
+USERS_COLUMNS = [
+    ("id", "integer", "NO", None, True, "ユーザーID"),
+    ("email", "character varying(255)", "NO", None, False, None),
+]
+
+
+def _recording() -> Recording:
+    recording = Recording({"schema": "public"})
+    recording.begin(_TABLE_SCHEMA_QUERY, ("users", "public")).extend(USERS_COLUMNS)
+    return recording
+
+
+class TestRecording:
+    """Recording のテスト"""
+
+    def test_lookup_ignores_whitespace(self) -> None:
+        """クエリの空白の違いは無視する"""
+        recording = Recording()
+        recording.begin("SELECT  1\n FROM t WHERE a = %s", (1,)).append((1,))
+
+        assert recording.lookup("SELECT 1 FROM t WHERE a = %s", [1]) == [(1,)]
+
+    def test_lookup_distinguishes_params(self) -> None:
+        recording = Recording()
+        recording.begin("SELECT %(a)s", {"a": 1}).append((1,))
+
+        with pytest.raises(QueryNotRecordedError, match="記録されていない"):
+            recording.lookup("SELECT %(a)s", {"a": 2})
+
+    def test_save_and_load(self, tmp_path: Path) -> None:
+        """保存したファイルから同じ結果を読み込める（行はタプル）"""
+        path = str(tmp_path / "catalog.json.gz")
+        recording = _recording()
+        recording.begin("SELECT %(names)s", {"names": ["a", "b"]}).append(
+            (["a", "b"], None)
+        )
+
+        recording.save(path)
+        loaded = Recording.load(path)
+
+        assert loaded.meta == {"schema": "public"}
+        assert len(loaded) == 2
+        assert loaded.lookup(_TABLE_SCHEMA_QUERY, ("users", "public")) == USERS_COLUMNS
+        assert loaded.lookup("SELECT %(names)s", {"names": ["a", "b"]}) == [
+            (["a", "b"], None)
+        ]
+
+    def test_results(self) -> None:
+        assert _recording().results(_TABLE_SCHEMA_QUERY) == [
+            (["users", "public"], USERS_COLUMNS)
+        ]
+
+
+class TestReplayConnection:
+    """ReplayConnection のテスト"""
+
+    def test_cursor(self) -> None:
+        """fetchone は1行ずつ、fetchall は残りの行を返す"""
+        conn = ReplayConnection(_recording())
+
+        with conn.cursor() as cur:
+            cur.execute(_TABLE_SCHEMA_QUERY, ("users", "public"))
+            first = cur.fetchone()
+            rest = cur.fetchall()
+
+        assert first == USERS_COLUMNS[0]
+        assert rest == USERS_COLUMNS[1:]
+
+    def test_session_statements_are_ignored(self) -> None:
+        """SET 文は記録が無くても実行できる"""
+        conn = ReplayConnection(Recording())
+
+        with conn.cursor() as cur:
+            cur.execute("SET LOCAL statement_timeout = %s", (1000,))
+
+            assert cur.fetchall() == []
+
+
+class TestReplaying:
+    """replaying のテスト"""
+
+    def test_tool_uses_recorded_rows(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """データベースに接続せずに記録した行からツールの出力を作る"""
+        monkeypatch.setenv("PGPORT", "1")
+
+        with replaying(_recording()):
+            result = get_table_schema_impl("users")
+
+        assert "| id | integer | NO | - | ✓ | ユーザーID |" in result
+
+    def test_restores_pool(self) -> None:
+        """ブロックを抜けると元のプールに戻す"""
+        pool = get_pool()
+        try:
+            with replaying(_recording()):
+                assert get_pool() is not pool
+                get_table_schema_impl("users")
+                assert pool_stats().size == 1
+
+            assert get_pool() is pool
+        finally:
+            replace_pool(None)
+            pool.close()
@@ -0,0 +1,185 @@
+"""
+MCPサーバーのユニットテスト
+"""
+
+import asyncio
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastmcp import Client
+from starlette.routing import Route
+
+from pgmcp.metrics import reset_metrics
+from pgmcp.server import (
+    _prometheus_text,
+    _register_metrics_route,
+    mcp,
+    prometheus_metrics,
+)
+
+
+class TestToolHandlers:
+    """ツールハンドラーのテスト"""
+
+    @pytest.mark.asyncio
+    @patch("pgmcp.server.list_tables_impl")
+    async def test_list_tables_calls_impl(self, mock_impl: MagicMock) -> None:
+        """ツール呼び出しが実装関数に委譲される"""
+        mock_impl.return_value = "| table_name | table_type |"
+
+        async with Client(mcp) as client:
+            result = await client.call_tool("list_tables", {"schema": "audit"})
+
+        mock_impl.assert_called_once_with(
+            "audit", None, None, 1000, "markdown", None, None, None
+        )
+        assert result.content[0].text == "| table_name | table_type |"
+
+    @pytest.mark.asyncio
+    @patch("pgmcp.server.get_table_schema_impl")
+    async def test_concurrent_calls_do_not_block_each_other(
+        self, mock_impl: MagicMock, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """遅いクエリが他のリクエストをブロックしない"""
+        monkeypatch.setenv("PGMCP_EXECUTOR_THREADS", "4")
+
+        def slow_impl(table_name: str, *args: object) -> str:
+            time.sleep(0.2)
+            return table_name
+
+        mock_impl.side_effect = slow_impl
+
+        async with Client(mcp) as client:
+            started = time.perf_counter()
+            results = await asyncio.gather(
+                *(
+                    client.call_tool("get_table_schema", {"table_name": f"t{i}"})
+                    for i in range(4)
+                )
+            )
+            elapsed = time.perf_counter() - started
+
+        assert [r.content[0].text for r in results] == ["t0", "t1", "t2", "t3"]
+        assert elapsed < 0.6
+
+    @pytest.mark.asyncio
+    @patch("pgmcp.server.get_table_indexes_impl")
+    async def test_json_output_returns_structured_content(
+        self, mock_impl: MagicMock
+    ) -> None:
+        """output_format="json" では同じ内容を構造化コンテンツとしても返す"""
+        mock_impl.return_value = '{"columns":["index_name"],"rows":[["users_pkey"]]}'
+
+        async with Client(mcp) as client:
+            result = await client.call_tool(
+                "get_table_indexes",
+                {"table_name": "users", "output_format": "json", "max_chars": 500},
+            )
+
+        mock_impl.assert_called_once_with("users", "public", "json", 500, None, None)
+        assert result.structured_content == {
+            "columns": ["index_name"],
+            "rows": [["users_pkey"]],
+        }
+        assert json.loads(result.content[0].text) == result.structured_content
+
+    @pytest.mark.asyncio
+    @patch("pgmcp.server.list_tables_impl")
+    async def test_identical_concurrent_calls_are_coalesced(
+        self, mock_impl: MagicMock
+    ) -> None:
+        """同じ引数の同時呼び出しは1回の実行にまとめられる"""
+
+        def slow_impl(*args: object) -> str:
+            time.sleep(0.2)
+            return "| table_name | table_type |"
+
+        mock_impl.side_effect = slow_impl
+
+        async with Client(mcp) as client:
+            results = await asyncio.gather(
+                *(
+                    client.call_tool("list_tables", {"schema": "public"})
+                    for _ in range(3)
+                )
+            )
+
+        assert mock_impl.call_count == 1
+        assert {r.content[0].text for r in results} == {"| table_name | table_type |"}
+
+
+class TestResources:
+    """リソースのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_cache_stats(self) -> None:
+        """カタログキャッシュの統計情報をJSONで返す"""
+        async with Client(mcp) as client:
+            contents = await client.read_resource("pgmcp://cache/stats")
+
+        stats = json.loads(contents[0].text)
+        assert set(stats) == {
+            "hits",
+            "misses",
+            "invalidations",
+            "fingerprint_checks",
+            "entries",
+        }
+
+    @pytest.mark.asyncio
+    async def test_single_flight_stats(self) -> None:
+        """合流の統計情報をJSONで返す"""
+        async with Client(mcp) as client:
+            contents = await client.read_resource("pgmcp://singleflight/stats")
+
+        stats = json.loads(contents[0].text)
+        assert set(stats) == {"calls", "coalesced", "in_flight", "coalescing_rate"}
+
+    @pytest.mark.asyncio
+    @patch("pgmcp.server.get_table_schema_impl")
+    async def test_metrics(self, mock_impl: MagicMock) -> None:
+        """ツールごとのメトリクスとプール・キャッシュ・合流の統計情報を返す"""
+        mock_impl.return_value = "| column_name |"
+        # ツール名は実装関数の名前から求める
+        mock_impl.__name__ = "get_table_schema_impl"
+        reset_metrics()
+
+        async with Client(mcp) as client:
+            await client.call_tool("get_table_schema", {"table_name": "users"})
+            contents = await client.read_resource("pgmcp://metrics")
+
+        document = json.loads(contents[0].text)
+        assert set(document) == {"enabled", "tools", "pool", "cache", "singleflight"}
+        assert document["tools"]["get_table_schema"]["calls"] == 1
+        assert 'pgmcp_tool_calls_total{tool="get_table_schema"} 1' in (
+            _prometheus_text().splitlines()
+        )
+
+    @pytest.mark.parametrize(
+        ("http", "enabled", "registered"),
+        [("", "1", False), ("1", "1", True), ("1", "0", False)],
+    )
+    def test_metrics_route_requires_opt_in(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+        http: str,
+        enabled: str,
+        registered: bool,
+    ) -> None:
+        """GET /metrics は PGMCP_METRICS_HTTP とメトリクスが有効な場合だけ登録する"""
+        monkeypatch.setenv("PGMCP_METRICS_HTTP", http)
+        monkeypatch.setenv("PGMCP_METRICS_ENABLED", enabled)
+        monkeypatch.setattr(mcp, "_additional_http_routes", [])
+        reset_metrics()
+        try:
+            assert _register_metrics_route() is registered
+            routes = list(mcp._additional_http_routes)
+        finally:
+            reset_metrics()
+
+        assert [
+            (route.path, route.endpoint) for route in routes if isinstance(route, Route)
+        ] == ([("/metrics", prometheus_metrics)] if registered else [])
+        assert len(routes) == registered
@@ -0,0 +1,134 @@
+"""
+同一リクエストの合流のユニットテスト
+"""
+
+import asyncio
+
+import pytest
+
+from pgmcp.singleflight import SingleFlight, get_single_flight, reset_single_flight
+
+
+class _Counter:
+    """呼び出し回数を数え、release が呼ばれるまで結果を返さない処理"""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.cancelled = False
+        self.release = asyncio.Event()
+
+    async def __call__(self) -> int:
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return self.calls
+
+
+class TestSingleFlight:
+    """SingleFlight のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_result(self) -> None:
+        """同じキーの同時呼び出しは1回だけ実行して結果を共有する"""
+        flight = SingleFlight()
+        call = _Counter()
+
+        tasks = [asyncio.create_task(flight.run("key", call)) for _ in range(5)]
+        await asyncio.sleep(0)
+        call.release.set()
+
+        assert await asyncio.gather(*tasks) == [1] * 5
+        assert call.calls == 1
+        stats = flight.stats()
+        assert (stats.calls, stats.coalesced, stats.in_flight) == (5, 4, 0)
+        assert stats.coalescing_rate == pytest.approx(0.8)
+
+    @pytest.mark.asyncio
+    async def test_different_keys_run_separately(self) -> None:
+        flight = SingleFlight()
+        call = _Counter()
+        call.release.set()
+
+        await asyncio.gather(flight.run("a", call), flight.run("b", call))
+
+        assert call.calls == 2
+        assert flight.stats().coalesced == 0
+
+    @pytest.mark.asyncio
+    async def test_runs_again_after_completion(self) -> None:
+        """実行が終わった後の呼び出しは結果を使い回さず新しく実行する"""
+        flight = SingleFlight()
+        call = _Counter()
+        call.release.set()
+
+        assert await flight.run("key", call) == 1
+        assert await flight.run("key", call) == 2
+
+    @pytest.mark.asyncio
+    async def test_exception_is_shared(self) -> None:
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def fail() -> None:
+            await release.wait()
+            raise ValueError("boom")
+
+        tasks = [asyncio.create_task(flight.run("key", fail)) for _ in range(2)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        assert all(isinstance(result, ValueError) for result in results)
+
+    @pytest.mark.asyncio
+    async def test_cancel_one_waiter(self) -> None:
+        """1つの呼び出し元がキャンセルされても他の呼び出し元は結果を受け取る"""
+        flight = SingleFlight()
+        call = _Counter()
+        first = asyncio.create_task(flight.run("key", call))
+        second = asyncio.create_task(flight.run("key", call))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.sleep(0)
+        call.release.set()
+
+        assert await second == 1
+        assert not call.cancelled
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    @pytest.mark.asyncio
+    async def test_cancel_all_waiters(self) -> None:
+        """全ての呼び出し元がキャンセルされたら実行中の処理もキャンセルする"""
+        flight = SingleFlight()
+        call = _Counter()
+        tasks = [asyncio.create_task(flight.run("key", call)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        assert call.cancelled
+        assert flight.stats().in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_disabled(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """PGMCP_SINGLEFLIGHT_ENABLED=0 の場合は合流しない"""
+        monkeypatch.setenv("PGMCP_SINGLEFLIGHT_ENABLED", "0")
+        reset_single_flight()
+        try:
+            flight = get_single_flight()
+            call = _Counter()
+            call.release.set()
+
+            await asyncio.gather(flight.run("key", call), flight.run("key", call))
+
+            assert call.calls == 2
+        finally:
+            reset_single_flight()
@@ -0,0 +1,175 @@
+"""
+出力サイズの上限のユニットテスト
+"""
+
+import json
+import re
+
+import pytest
+
+from pgmcp.tools.budget import (
+    OutputBudget,
+    decode_cursor,
+    encode_cursor,
+    estimate_tokens,
+    output_digest,
+    paginate_output,
+)
+from pgmcp.tools.output import format_rows
+
+
+def _cursor(text: str) -> str | None:
+    """出力に含まれる cursor の値を取り出す"""
+    match = re.search(r'cursor="?([A-Za-z0-9_-]+)', text)
+    return match.group(1) if match else None
+
+
+def _markdown_table(rows: int) -> str:
+    lines = ["## public.users", "", "| name | type |", "|------|------|"]
+    lines += [f"| column_{i:03d} | integer |" for i in range(rows)]
+    return "\n".join(lines)
+
+
+class TestEstimateTokens:
+    """estimate_tokens のテスト"""
+
+    def test_ascii(self) -> None:
+        """ASCII文字は4文字で1トークン（端数は切り上げ）"""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("abcd") == 1
+        assert estimate_tokens("abcde") == 2
+
+    def test_non_ascii(self) -> None:
+        """ASCII以外は1文字1トークン"""
+        assert estimate_tokens("ユーザー") == 4
+        assert estimate_tokens("id: ユーザーID") == 2 + 4
+
+
+class TestOutputBudget:
+    """OutputBudget のテスト"""
+
+    def test_unlimited(self) -> None:
+        budget = OutputBudget()
+
+        assert budget.unlimited
+        assert budget.fits_text("x" * 1_000_000)
+
+    def test_fits_text(self) -> None:
+        """文字数と推定トークン数の両方が上限以内か判定する"""
+        assert OutputBudget(max_chars=4).fits_text("abcd")
+        assert not OutputBudget(max_chars=3).fits_text("abcd")
+        assert not OutputBudget(max_tokens=3).fits_text("ユーザー")
+
+    @pytest.mark.parametrize("field", ["max_chars", "max_tokens"])
+    def test_invalid(self, field: str) -> None:
+        with pytest.raises(ValueError, match=field):
+            OutputBudget(**{field: 0})
+
+
+class TestCursor:
+    """カーソルのテスト"""
+
+    def test_round_trip(self) -> None:
+        digest = output_digest("text")
+
+        assert decode_cursor(encode_cursor(42, digest), digest) == 42
+
+    def test_output_changed(self) -> None:
+        """出力が変化した場合はエラー"""
+        cursor = encode_cursor(1, output_digest("before"))
+
+        with pytest.raises(ValueError, match="出力が変化"):
+            decode_cursor(cursor, output_digest("after"))
+
+    def test_malformed(self) -> None:
+        with pytest.raises(ValueError, match="形式"):
+            decode_cursor("not a cursor!", output_digest("text"))
+
+
+class TestPaginateOutput:
+    """paginate_output のテスト"""
+
+    def test_fits(self) -> None:
+        """上限以内の出力はそのまま返す"""
+        text = _markdown_table(3)
+
+        assert paginate_output(text, max_chars=len(text)) == text
+        assert paginate_output(text) == text
+
+    def test_markdown_pages(self) -> None:
+        """上限を超える場合は行単位で打ち切り、続きのページでヘッダーを繰り返す"""
+        text = _markdown_table(100)
+
+        first = paginate_output(text, max_chars=500)
+        cursor = _cursor(first)
+
+        assert len(first) <= 500
+        assert first.startswith("## public.users")
+        assert "を省略しました" in first
+        assert cursor is not None
+
+        second = paginate_output(text, max_chars=500, cursor=cursor)
+        assert second.startswith(
+            "## public.users\n\n| name | type |\n|------|------|\n"
+        )
+        assert len(second) <= 500
+
+    def test_markdown_all_pages(self) -> None:
+        """cursor をたどると全行を重複なく取得できる"""
+        text = _markdown_table(100)
+        rows: list[str] = []
+        cursor = None
+        for _ in range(100):
+            page = paginate_output(text, max_tokens=150, cursor=cursor)
+            rows += [line for line in page.splitlines() if "column_" in line]
+            cursor = _cursor(page)
+            if cursor is None:
+                break
+
+        assert rows == [line for line in text.splitlines() if "column_" in line]
+
+    def test_closes_code_block(self) -> None:
+        """コードブロックの途中で打ち切った場合は閉じて、続きで開き直す"""
+        text = "\n".join(["```mermaid", "erDiagram"] + ["    a ||--o{ b : x"] * 50)
+        text += "\n```"
+
+        first = paginate_output(text, max_chars=300)
+        second = paginate_output(text, max_chars=300, cursor=_cursor(first))
+
+        assert first.count("```") == 2
+        assert second.startswith("```mermaid\nerDiagram\n")
+
+    def test_tsv(self) -> None:
+        """TSV は続きのページでもヘッダー行から始まる"""
+        text = format_rows(
+            "tsv", ("name", "type"), [(f"c{i}", "int") for i in range(50)]
+        )
+
+        first = paginate_output(text, "tsv", max_chars=120)
+        second = paginate_output(text, "tsv", max_chars=120, cursor=_cursor(first))
+
+        assert first.splitlines()[-1].startswith("# truncated omitted_lines=")
+        assert second.splitlines()[0] == "name\ttype"
+
+    def test_json(self) -> None:
+        """JSON は rows の要素単位で打ち切り、next_cursor を追加する"""
+        text = format_rows(
+            "json", ("name",), [(f"c{i}",) for i in range(50)], schema="public"
+        )
+
+        first = json.loads(paginate_output(text, "json", max_chars=200))
+        assert first["schema"] == "public"
+        assert first["rows"][0] == ["c0"]
+        assert first["omitted_rows"] == 50 - len(first["rows"])
+
+        second = json.loads(
+            paginate_output(text, "json", max_chars=200, cursor=first["next_cursor"])
+        )
+        assert second["rows"][0] == [f"c{len(first['rows'])}"]
+
+    def test_stale_cursor(self) -> None:
+        """出力が変化した後のカーソルはエラー"""
+        first = paginate_output(_markdown_table(100), max_chars=500)
+
+        with pytest.raises(ValueError, match="出力が変化"):
+            paginate_output(_markdown_table(101), max_chars=500, cursor=_cursor(first))
@@ -0,0 +1,232 @@
+"""
+テーブル詳細ツールのユニットテスト
+"""
+
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from pgmcp.tools import describe_table_impl, describe_tables_impl
+
+
+class TestDescribeTable:
+    """describe_table ツールのテスト"""
+
+    @patch("pgmcp.tools.describe.snapshot_connection")
+    def test_describe_table_returns_all_sections(
+        self, mock_snapshot_connection: MagicMock
+    ) -> None:
+        """カラム・インデックス・外部キーの各セクションが返されることを確認"""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.side_effect = [
+            # カラム
+            [
+                ("id", "integer", "NO", None, True, "注文ID"),
+                ("user_id", "integer", "NO", None, False, None),
+            ],
+            # インデックス
+            [
+                (
+                    "orders_pkey",
+                    "id",
+                    True,
+                    "btree",
+                    "CREATE UNIQUE INDEX orders_pkey ON public.orders USING btree (id)",
+                ),
+            ],
+            # 外部キー
+            [("orders_user_id_fkey", "user_id", "users", "id", "a", "a", False, False)],
+        ]
+
+        mock_conn = MagicMock()
+        mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+        mock_conn.__exit__ = MagicMock(return_value=False)
+        mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
+        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_snapshot_connection.return_value = mock_conn
+
+        result = describe_table_impl("orders")
+
+        assert result.startswith("## public.orders")
+        assert "### カラム" in result
+        assert "| id | integer | NO | - | ✓ | 注文ID |" in result
+        assert "### インデックス" in result
+        assert "| orders_pkey | id | ✓ | btree |" in result
+        assert "### 外部キー" in result
+        assert "| orders_user_id_fkey | user_id | users | id |" in result
+
+        # 1つの接続で3つのクエリを実行する
+        mock_snapshot_connection.assert_called_once()
+        assert mock_cursor.execute.call_count == 3
+        for call in mock_cursor.execute.call_args_list:
+            assert call[0][1] == ("orders", "public")
+
+    @patch("pgmcp.tools.describe.snapshot_connection")
+    def test_describe_table_without_indexes_and_foreign_keys(
+        self, mock_snapshot_connection: MagicMock
+    ) -> None:
+        """インデックス・外部キーがない場合はそれぞれのメッセージを表示"""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.side_effect = [
+            [("value", "text", "YES", None, False, None)],
+            [],
+            [],
+        ]
+
+        mock_conn = MagicMock()
+        mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+        mock_conn.__exit__ = MagicMock(return_value=False)
+        mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
+        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_snapshot_connection.return_value = mock_conn
+
+        result = describe_table_impl("plain", schema="audit")
+
+        assert result.startswith("## audit.plain")
+        assert "インデックスが見つかりませんでした。" in result
+        assert "外部キーが見つかりませんでした。" in result
+
+    @patch("pgmcp.tools.describe.snapshot_connection")
+    def test_describe_nonexistent_table(
+        self, mock_snapshot_connection: MagicMock
+    ) -> None:
+        """存在しないテーブルの場合は残りのクエリを実行しない"""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.return_value = []
+
+        mock_conn = MagicMock()
+        mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+        mock_conn.__exit__ = MagicMock(return_value=False)
+        mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
+        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_snapshot_connection.return_value = mock_conn
+
+        result = describe_table_impl("nonexistent_table")
+
+        assert result == "テーブルが見つかりませんでした。"
+        assert mock_cursor.execute.call_count == 1
+
+
+def _mock_connection(rows: list[tuple[Any, ...]]) -> tuple[MagicMock, MagicMock]:
+    """カーソルが rows を返す接続のモックを作成"""
+    mock_cursor = MagicMock()
+    mock_cursor.fetchall.return_value = rows
+
+    mock_conn = MagicMock()
+    mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+    mock_conn.__exit__ = MagicMock(return_value=False)
+    mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
+    mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+    return mock_conn, mock_cursor
+
+
+BULK_ROWS: list[tuple[Any, ...]] = [
+    ("orders", "id", "integer", "NO", None, True, "注文ID"),
+    ("orders", "user_id", "integer", "NO", None, False, None),
+    ("products", "id", "integer", "NO", None, True, None),
+    ("users", "id", "integer", "NO", None, True, "ユーザーID"),
+    ("users", "name", "character varying(100)", "NO", None, False, None),
+]
+
+
+class TestDescribeTables:
+    """describe_tables ツールのテスト"""
+
+    @patch("pgmcp.tools.describe.pooled_connection")
+    def test_describe_tables_renders_section_per_table(
+        self, mock_pooled_connection: MagicMock
+    ) -> None:
+        """テーブルごとのセクションを1つのクエリで返す"""
+        mock_conn, mock_cursor = _mock_connection(BULK_ROWS)
+        mock_pooled_connection.return_value = mock_conn
+
+        result = describe_tables_impl(tables=["orders", "products", "users"])
+
+        assert "## public.orders" in result
+        assert "| user_id | integer | NO | - |  |  |" in result
+        assert "## public.products" in result
+        assert "## public.users" in result
+        assert "| id | integer | NO | - | ✓ | ユーザーID |" in result
+        assert "after=" not in result
+
+        mock_cursor.execute.assert_called_once()
+        params = mock_cursor.execute.call_args[0][1]
+        assert params["tables"] == ["orders", "products", "users"]
+        assert params["after"] is None
+
+    @patch("pgmcp.tools.describe.pooled_connection")
+    def test_describe_tables_reports_missing_tables(
+        self, mock_pooled_connection: MagicMock
+    ) -> None:
+        """指定したテーブルのうち存在しないものを報告する"""
+        mock_conn, _ = _mock_connection(BULK_ROWS)
+        mock_pooled_connection.return_value = mock_conn
+
+        result = describe_tables_impl(tables=["orders", "products", "users", "nope"])
+
+        assert "見つからなかったテーブル: nope" in result
+
+    @patch("pgmcp.tools.describe.pooled_connection")
+    def test_describe_tables_paginates_by_table_count(
+        self,
+        mock_pooled_connection: MagicMock,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """テーブル数の上限を超える場合は次ページを案内する"""
+        monkeypatch.setenv("PGMCP_DESCRIBE_MAX_TABLES", "2")
+        mock_conn, mock_cursor = _mock_connection(BULK_ROWS)
+        mock_pooled_connection.return_value = mock_conn
+
+        result = describe_tables_impl()
+
+        assert "## public.orders" in result
+        assert "## public.products" in result
+        assert "## public.users" not in result
+        assert 'after="products"' in result
+        assert mock_cursor.execute.call_args[0][1]["limit"] == 3
+
+    @patch("pgmcp.tools.describe.pooled_connection")
+    def test_describe_tables_paginates_by_size(
+        self,
+        mock_pooled_connection: MagicMock,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """出力サイズの上限を超える場合は次ページを案内する"""
+        monkeypatch.setenv("PGMCP_DESCRIBE_MAX_CHARS", "1")
+        mock_conn, _ = _mock_connection(BULK_ROWS)
+        mock_pooled_connection.return_value = mock_conn
+
+        result = describe_tables_impl()
+
+        # 最初の1テーブルは必ず出力する
+        assert "## public.orders" in result
+        assert "## public.products" not in result
+        assert 'after="orders"' in result
+
+    @patch("pgmcp.tools.describe.pooled_connection")
+    def test_describe_tables_paginates_by_max_tokens(
+        self, mock_pooled_connection: MagicMock
+    ) -> None:
+        """max_tokens を指定した場合も同じくテーブル単位で次ページを案内する"""
+        mock_conn, _ = _mock_connection(BULK_ROWS)
+        mock_pooled_connection.return_value = mock_conn
+
+        result = describe_tables_impl(max_tokens=1)
+
+        assert "## public.orders" in result
+        assert "## public.products" not in result
+        assert 'after="orders"' in result
+
+    @patch("pgmcp.tools.describe.pooled_connection")
+    def test_describe_tables_no_tables(self, mock_pooled_connection: MagicMock) -> None:
+        """テーブルが存在しない場合"""
+        mock_conn, _ = _mock_connection([])
+        mock_pooled_connection.return_value = mock_conn
+
+        result = describe_tables_impl(schema="empty")
+
+        assert result == "テーブルが見つかりませんでした。"
@@ -2,46 +2,82 @@
 ER図生成ツールのユニットテスト
 """
 
+import itertools
+import json
+import random
+import re
+from typing import Any
 from unittest.mock import MagicMock, patch
 
+import pytest
+
+from pgmcp.cache import reset_catalog_cache
 from pgmcp.tools.er_diagram import (
+    _bfs_order,
+    _build_adjacency,
     _detect_virtual_foreign_keys,
-    _format_mermaid_er_diagram,
-    _simplify_data_type,
+    _get_foreign_key_relations,
+    _get_tables_info,
+    _label_propagation,
+    _neighborhood,
+    _split_clusters,
     generate_er_diagram_impl,
 )
+from pgmcp.tools.schema_graph import GraphColumn, GraphEdge, GraphTable
+
 
+def _table(name: str, *columns: GraphColumn) -> GraphTable:
+    return GraphTable(name, columns)
 
-class TestSimplifyDataType:
-    """_simplify_data_type のテスト"""
 
-    def test_simplify_integer(self) -> None:
-        """integer型の変換"""
-        assert _simplify_data_type("integer") == "integer"
+def _column(name: str, pk: bool = False, fk: bool = False) -> GraphColumn:
+    return GraphColumn(name, "integer", pk, fk, None)
 
-    def test_simplify_varchar_with_length(self) -> None:
-        """character varying(n)型の変換"""
-        assert _simplify_data_type("character varying(100)") == "varchar"
 
-    def test_simplify_timestamp_with_timezone(self) -> None:
-        """timestamp with time zone型の変換"""
-        assert _simplify_data_type("timestamp with time zone") == "timestamptz"
+def _virtual(
+    from_table: str, from_column: str, to_table: str, to_column: str
+) -> GraphEdge:
+    return GraphEdge(from_table, (from_column,), to_table, (to_column,), "virtual")
 
-    def test_simplify_numeric_with_precision(self) -> None:
-        """numeric(p,s)型の変換"""
-        assert _simplify_data_type("numeric(10,2)") == "numeric"
 
-    def test_simplify_integer_array(self) -> None:
-        """integer[]型の変換"""
-        assert _simplify_data_type("integer[]") == "integer_array"
+_MERMAID_ID = r"[A-Za-z_][A-Za-z0-9_-]*"
+_MERMAID_ENTITY = re.compile(rf'^    ({_MERMAID_ID})(\["([^"]*)"\])? \{{$')
+_MERMAID_RELATION = re.compile(
+    rf'^    ({_MERMAID_ID}) \|\|(--|\.\.)o\{{ ({_MERMAID_ID}) : "[^"]*"$'
+)
 
-    def test_simplify_text_array(self) -> None:
-        """text[]型の変換"""
-        assert _simplify_data_type("text[]") == "text_array"
 
-    def test_simplify_unknown_type(self) -> None:
-        """未知の型の変換"""
-        assert _simplify_data_type("custom_type") == "custom_type"
+def _mermaid_entities(diagram: str) -> set[str]:
+    """Mermaid のER図として有効か確認し、定義されたエンティティの表示名を返す"""
+    lines = diagram.split("\n")
+    assert lines[0] == "erDiagram"
+    shown: set[str] = set()
+    in_entity = False
+    for line in lines[1:]:
+        if in_entity:
+            in_entity = line != "    }"
+            assert not in_entity or line.startswith("        "), line
+            continue
+        if match := _MERMAID_ENTITY.match(line):
+            shown.add(match.group(3) or match.group(1))
+            in_entity = True
+            continue
+        assert _MERMAID_RELATION.match(line), line
+    assert not in_entity
+    return shown
+
+
+def _all_pages(**kwargs: Any) -> list[str]:
+    """cursor をたどって全ページを取得"""
+    pages: list[str] = []
+    cursor: str | None = None
+    while True:
+        page = generate_er_diagram_impl(**kwargs, cursor=cursor)
+        pages.append(page)
+        match = re.search(r'cursor="([^"]+)"', page)
+        if match is None:
+            return pages
+        cursor = match.group(1)
 
 
 class TestDetectVirtualForeignKeys:
@@ -50,75 +86,20 @@ class TestDetectVirtualForeignKeys:
     def test_detect_simple_virtual_fk(self) -> None:
         """単純な _id パターンの検出"""
         tables_info = [
-            {
-                "table_name": "users",
-                "columns": [
-                    {
-                        "column_name": "id",
-                        "is_primary_key": True,
-                        "is_foreign_key": False,
-                    },
-                    {
-                        "column_name": "name",
-                        "is_primary_key": False,
-                        "is_foreign_key": False,
-                    },
-                ],
-            },
-            {
-                "table_name": "orders",
-                "columns": [
-                    {
-                        "column_name": "id",
-                        "is_primary_key": True,
-                        "is_foreign_key": False,
-                    },
-                    {
-                        "column_name": "user_id",
-                        "is_primary_key": False,
-                        "is_foreign_key": False,
-                    },
-                ],
-            },
+            _table("users", _column("id", pk=True), _column("name")),
+            _table("orders", _column("id", pk=True), _column("user_id")),
         ]
 
         virtual_fks = _detect_virtual_foreign_keys(tables_info, "public", None)
 
-        assert len(virtual_fks) == 1
-        assert virtual_fks[0]["from_table"] == "orders"
-        assert virtual_fks[0]["from_column"] == "user_id"
-        assert virtual_fks[0]["to_table"] == "users"
-        assert virtual_fks[0]["to_column"] == "id"
+        assert virtual_fks == [_virtual("orders", "user_id", "users", "id")]
 
     def test_skip_existing_foreign_key(self) -> None:
         """既存の外部キーはスキップされる"""
         tables_info = [
-            {
-                "table_name": "users",
-                "columns": [
-                    {
-                        "column_name": "id",
-                        "is_primary_key": True,
-                        "is_foreign_key": False,
-                    },
-                ],
-            },
-            {
-                "table_name": "orders",
-                "columns": [
-                    {
-                        "column_name": "id",
-                        "is_primary_key": True,
-                        "is_foreign_key": False,
-                    },
-                    # 既にFKとして定義されている
-                    {
-                        "column_name": "user_id",
-                        "is_primary_key": False,
-                        "is_foreign_key": True,
-                    },
-                ],
-            },
+            _table("users", _column("id", pk=True)),
+            # 既にFKとして定義されている
+            _table("orders", _column("id", pk=True), _column("user_id", fk=True)),
         ]
 
         virtual_fks = _detect_virtual_foreign_keys(tables_info, "public", None)
@@ -128,56 +109,19 @@ class TestDetectVirtualForeignKeys:
     def test_detect_plural_table_name(self) -> None:
         """複数形テーブル名の検出 (category -> categories)"""
         tables_info = [
-            {
-                "table_name": "categories",
-                "columns": [
-                    {
-                        "column_name": "id",
-                        "is_primary_key": True,
-                        "is_foreign_key": False,
-                    },
-                ],
-            },
-            {
-                "table_name": "products",
-                "columns": [
-                    {
-                        "column_name": "id",
-                        "is_primary_key": True,
-                        "is_foreign_key": False,
-                    },
-                    {
-                        "column_name": "category_id",
-                        "is_primary_key": False,
-                        "is_foreign_key": False,
-                    },
-                ],
-            },
+            _table("categories", _column("id", pk=True)),
+            _table("products", _column("id", pk=True), _column("category_id")),
         ]
 
         virtual_fks = _detect_virtual_foreign_keys(tables_info, "public", None)
 
         assert len(virtual_fks) == 1
-        assert virtual_fks[0]["to_table"] == "categories"
+        assert virtual_fks[0].to_table == "categories"
 
     def test_no_match_for_unknown_table(self) -> None:
         """存在しないテーブルへの参照は検出しない"""
         tables_info = [
-            {
-                "table_name": "orders",
-                "columns": [
-                    {
-                        "column_name": "id",
-                        "is_primary_key": True,
-                        "is_foreign_key": False,
-                    },
-                    {
-                        "column_name": "unknown_id",
-                        "is_primary_key": False,
-                        "is_foreign_key": False,
-                    },
-                ],
-            },
+            _table("orders", _column("id", pk=True), _column("unknown_id")),
         ]
 
         virtual_fks = _detect_virtual_foreign_keys(tables_info, "public", None)
@@ -187,243 +131,304 @@ class TestDetectVirtualForeignKeys:
     def test_detect_no_suffix_pattern(self) -> None:
         """_no サフィックスパターンの検出"""
         tables_info = [
-            {
-                "table_name": "orders",
-                "columns": [
-                    {
-                        "column_name": "order_no",
-                        "is_primary_key": True,
-                        "is_foreign_key": False,
-                    },
-                ],
-            },
-            {
-                "table_name": "order_items",
-                "columns": [
-                    {
-                        "column_name": "id",
-                        "is_primary_key": True,
-                        "is_foreign_key": False,
-                    },
-                    {
-                        "column_name": "order_no",
-                        "is_primary_key": False,
-                        "is_foreign_key": False,
-                    },
-                ],
-            },
+            _table("orders", _column("order_no", pk=True)),
+            _table("order_items", _column("id", pk=True), _column("order_no")),
         ]
 
         virtual_fks = _detect_virtual_foreign_keys(tables_info, "public", None)
 
-        assert len(virtual_fks) == 1
-        assert virtual_fks[0]["from_table"] == "order_items"
-        assert virtual_fks[0]["from_column"] == "order_no"
-        assert virtual_fks[0]["to_table"] == "orders"
-        assert virtual_fks[0]["to_column"] == "order_no"
+        assert virtual_fks == [
+            _virtual("order_items", "order_no", "orders", "order_no"),
+        ]
 
     def test_detect_same_pk_column_name(self) -> None:
         """他のテーブルのPKと同名のカラムを検出"""
         tables_info = [
-            {
-                "table_name": "users",
-                "columns": [
-                    {
-                        "column_name": "user_code",
-                        "is_primary_key": True,
-                        "is_foreign_key": False,
-                    },
-                    {
-                        "column_name": "name",
-                        "is_primary_key": False,
-                        "is_foreign_key": False,
-                    },
-                ],
-            },
-            {
-                "table_name": "orders",
-                "columns": [
-                    {
-                        "column_name": "id",
-                        "is_primary_key": True,
-                        "is_foreign_key": False,
-                    },
-                    {
-                        "column_name": "user_code",
-                        "is_primary_key": False,
-                        "is_foreign_key": False,
-                    },
-                ],
-            },
+            _table("users", _column("user_code", pk=True), _column("name")),
+            _table("orders", _column("id", pk=True), _column("user_code")),
         ]
 
         virtual_fks = _detect_virtual_foreign_keys(tables_info, "public", None)
 
-        assert len(virtual_fks) == 1
-        assert virtual_fks[0]["from_table"] == "orders"
-        assert virtual_fks[0]["from_column"] == "user_code"
-        assert virtual_fks[0]["to_table"] == "users"
-        assert virtual_fks[0]["to_column"] == "user_code"
+        assert virtual_fks == [
+            _virtual("orders", "user_code", "users", "user_code"),
+        ]
 
+    def test_detect_ies_plural_table_name(self) -> None:
+        """category_id から categories を推測する"""
+        tables_info = [
+            _table("categories", _column("id", pk=True)),
+            _table("products", _column("category_id")),
+        ]
 
-class TestFormatMermaidErDiagram:
-    """_format_mermaid_er_diagram のテスト"""
+        virtual_fks = _detect_virtual_foreign_keys(tables_info, "public", None)
+
+        assert virtual_fks == [
+            _virtual("products", "category_id", "categories", "id"),
+        ]
 
-    def test_format_single_table(self) -> None:
-        """単一テーブルのフォーマット"""
+    def test_candidate_priority_skips_own_table(self) -> None:
+        """候補は単数形を優先し、自分自身のテーブルは飛ばして次の候補を使う"""
         tables_info = [
-            {
-                "table_name": "users",
-                "columns": [
-                    {
-                        "column_name": "id",
-                        "data_type": "integer",
-                        "is_primary_key": True,
-                        "is_foreign_key": False,
-                        "comment": "ユーザーID",
-                    },
-                    {
-                        "column_name": "name",
-                        "data_type": "character varying(100)",
-                        "is_primary_key": False,
-                        "is_foreign_key": False,
-                        "comment": None,
-                    },
-                ],
-            },
-        ]
-
-        result = _format_mermaid_er_diagram(tables_info, [], [])
+            _table("nodes", _column("node_no", pk=True)),
+            _table("node", _column("id", pk=True), _column("node_id")),
+            _table("edges", _column("node_id")),
+        ]
 
-        assert "erDiagram" in result
-        assert "users {" in result
-        assert "integer id PK" in result
-        assert '"ユーザーID"' in result
-        assert "varchar name" in result
+        virtual_fks = _detect_virtual_foreign_keys(tables_info, "public", None)
 
-    def test_format_with_foreign_key_relation(self) -> None:
-        """外部キー関係のフォーマット"""
-        tables_info = [
-            {
-                "table_name": "users",
-                "columns": [
-                    {
-                        "column_name": "id",
-                        "data_type": "integer",
-                        "is_primary_key": True,
-                        "is_foreign_key": False,
-                        "comment": None,
-                    },
-                ],
-            },
-            {
-                "table_name": "orders",
-                "columns": [
-                    {
-                        "column_name": "id",
-                        "data_type": "integer",
-                        "is_primary_key": True,
-                        "is_foreign_key": False,
-                        "comment": None,
-                    },
-                    {
-                        "column_name": "user_id",
-                        "data_type": "integer",
-                        "is_primary_key": False,
-                        "is_foreign_key": True,
-                        "comment": None,
-                    },
-                ],
-            },
-        ]
-        relations = [
-            {
-                "from_table": "orders",
-                "from_column": "user_id",
-                "to_table": "users",
-                "to_column": "id",
-            },
-        ]
-
-        result = _format_mermaid_er_diagram(tables_info, relations, [])
-
-        assert 'users ||--o{ orders : "has"' in result
-
-    def test_format_with_virtual_foreign_key(self) -> None:
-        """Virtual Foreign Keyのフォーマット（点線）"""
-        tables_info = [
-            {
-                "table_name": "users",
-                "columns": [
-                    {
-                        "column_name": "id",
-                        "data_type": "integer",
-                        "is_primary_key": True,
-                        "is_foreign_key": False,
-                        "comment": None,
-                    },
-                ],
-            },
-            {
-                "table_name": "logs",
-                "columns": [
-                    {
-                        "column_name": "id",
-                        "data_type": "integer",
-                        "is_primary_key": True,
-                        "is_foreign_key": False,
-                        "comment": None,
-                    },
-                    {
-                        "column_name": "user_id",
-                        "data_type": "integer",
-                        "is_primary_key": False,
-                        "is_foreign_key": False,
-                        "comment": None,
-                    },
-                ],
-            },
-        ]
-        virtual_fks = [
-            {
-                "from_table": "logs",
-                "from_column": "user_id",
-                "to_table": "users",
-                "to_column": "id",
-            },
-        ]
-
-        result = _format_mermaid_er_diagram(tables_info, [], virtual_fks)
-
-        assert 'users ||..o{ logs : "references"' in result
-        assert "integer user_id FK" in result
-
-    def test_format_empty_tables(self) -> None:
-        """テーブルが空の場合"""
-        result = _format_mermaid_er_diagram([], [], [])
+        assert virtual_fks == [
+            _virtual("node", "node_id", "nodes", "node_no"),
+            _virtual("edges", "node_id", "node", "id"),
+        ]
 
-        assert result == "対象のテーブルが見つかりませんでした。"
+
+class TestGetTablesInfo:
+    """_get_tables_info のテスト"""
+
+    def test_rows_to_compact_model(self) -> None:
+        """行からスキーマごとのテーブルモデルを作成し、名前と型名の文字列を共有する"""
+        cur = MagicMock()
+        cur.fetchall.return_value = [
+            ("audit", "logs", "id", "integer", True, False, None),
+            ("public", "users", "id", "integer", True, False, "ユーザーID"),
+            (
+                "public",
+                "orders",
+                "".join(["i", "d"]),
+                "".join(["inte", "ger"]),
+                True,
+                False,
+                None,
+            ),
+            ("public", "orders", "user_id", "integer", False, True, None),
+        ]
+
+        tables = _get_tables_info(cur, ["public"], None, [16400])
+
+        assert tables == {
+            "audit": [
+                GraphTable("logs", (GraphColumn("id", "integer", True, False, None),))
+            ],
+            "public": [
+                GraphTable(
+                    "users",
+                    (GraphColumn("id", "integer", True, False, "ユーザーID"),),
+                ),
+                GraphTable(
+                    "orders",
+                    (
+                        GraphColumn("id", "integer", True, False, None),
+                        GraphColumn("user_id", "integer", False, True, None),
+                    ),
+                ),
+            ],
+        }
+        users, orders = tables["public"]
+        assert users.columns[0].name is orders.columns[0].name
+        assert users.columns[0].data_type is orders.columns[0].data_type
+        _, params = cur.execute.call_args[0]
+        assert params == {"schemas": ["public"], "tables": None, "relids": [16400]}
+
+
+class TestGetForeignKeyRelations:
+    """_get_foreign_key_relations のテスト"""
+
+    def test_composite_foreign_key_is_one_edge(self) -> None:
+        """複合外部キーは制約ごとに1本の辺にまとめ、カラム順を保つ"""
+        cur = MagicMock()
+        cur.fetchall.return_value = [
+            (200, "public", "child", "parent_no", "public", "parent", "no", 1),
+            (200, "public", "child", "parent_region", "public", "parent", "region", 1),
+            (201, "public", "child", "owner_id", "public", "users", "id", 2),
+        ]
+
+        relations = _get_foreign_key_relations(cur, ["public"])
+
+        assert [fk.edge for fk in relations] == [
+            GraphEdge(
+                "child",
+                ("parent_no", "parent_region"),
+                "parent",
+                ("no", "region"),
+                "real",
+            ),
+            GraphEdge("child", ("owner_id",), "users", ("id",), "real"),
+        ]
+
+
+class TestNeighborhood:
+    """_build_adjacency / _neighborhood のテスト"""
+
+    EDGES = [
+        ("orders", "users"),
+        ("order_items", "orders"),
+        ("order_items", "products"),
+        ("products", "categories"),
+        ("users", "users"),
+        ("logs", "audit"),
+    ]
+
+    def test_build_adjacency_is_undirected(self) -> None:
+        """辺は両方向に登録し、自己参照は無視する"""
+        adjacency = _build_adjacency(self.EDGES)
+
+        assert adjacency["users"] == {"orders"}
+        assert adjacency["orders"] == {"users", "order_items"}
+
+    def test_depth_zero_returns_seeds(self) -> None:
+        """depth=0では起点テーブルのみ"""
+        adjacency = _build_adjacency(self.EDGES)
+
+        assert _neighborhood(adjacency, ["users"], 0) == ["users"]
+
+    def test_neighborhood_by_depth(self) -> None:
+        """depthホップ以内のテーブルを発見順に返す"""
+        adjacency = _build_adjacency(self.EDGES)
+
+        assert _neighborhood(adjacency, ["users"], 1) == ["users", "orders"]
+        assert _neighborhood(adjacency, ["users"], 3) == [
+            "users",
+            "orders",
+            "order_items",
+            "products",
+        ]
+
+    def test_multiple_seeds_and_isolated_table(self) -> None:
+        """複数の起点と、辺を持たない起点を扱える"""
+        adjacency = _build_adjacency(self.EDGES)
+
+        assert _neighborhood(adjacency, ["logs", "isolated"], 2) == [
+            "logs",
+            "isolated",
+            "audit",
+        ]
+
+
+class TestSplitClusters:
+    """_bfs_order / _label_propagation / _split_clusters のテスト"""
+
+    @staticmethod
+    def _two_cliques() -> dict[str, set[str]]:
+        """2つの4ノード完全グラフを1本の辺でつないだグラフ"""
+        edges = []
+        for group in ("a", "b"):
+            names = [f"{group}{i}" for i in range(4)]
+            edges += [(x, y) for x in names for y in names if x < y]
+        edges.append(("a0", "b0"))
+        return _build_adjacency(edges)
+
+    def test_bfs_order_splits_components(self) -> None:
+        """連結成分ごとに幅優先探索の順で返す"""
+        adjacency = _build_adjacency([("a", "b"), ("b", "c"), ("x", "y")])
+
+        assert _bfs_order(["c", "a", "b", "x", "y", "z"], adjacency) == [
+            ["c", "b", "a"],
+            ["x", "y"],
+            ["z"],
+        ]
+
+    def test_label_propagation_finds_communities(self) -> None:
+        """密につながったグループをコミュニティとして分ける"""
+        adjacency = self._two_cliques()
+        nodes = sorted(adjacency)
+
+        communities = _label_propagation(nodes, adjacency)
+
+        assert sorted(sorted(c) for c in communities) == [
+            ["a0", "a1", "a2", "a3"],
+            ["b0", "b1", "b2", "b3"],
+        ]
+
+    def test_components_within_max_size(self) -> None:
+        """連結成分ごとのクラスタを大きい順に並べ、関係のないテーブルは末尾"""
+        adjacency = _build_adjacency(
+            [("orders", "users"), ("items", "orders"), ("logs", "events")]
+        )
+        names = ["events", "items", "logs", "orders", "settings", "users", "zz"]
+
+        clusters = _split_clusters(names, adjacency, max_size=10)
+
+        assert clusters == [
+            ["items", "orders", "users"],
+            ["events", "logs"],
+            ["settings", "zz"],
+        ]
+
+    def test_giant_component_is_split(self) -> None:
+        """max_sizeを超える連結成分はコミュニティに分割する"""
+        adjacency = self._two_cliques()
+
+        clusters = _split_clusters(sorted(adjacency), adjacency, max_size=5)
+
+        assert clusters == [
+            ["a0", "a1", "a2", "a3"],
+            ["b0", "b1", "b2", "b3"],
+        ]
+
+    def test_oversized_community_is_chunked(self) -> None:
+        """コミュニティもmax_sizeを超える場合は区切る"""
+        names = [f"t{i}" for i in range(7)]
+        adjacency = _build_adjacency([(x, y) for x in names for y in names if x < y])
+        isolated = [f"z{i}" for i in range(3)]
+
+        clusters = _split_clusters(names + isolated, adjacency, max_size=3)
+
+        assert [len(c) for c in clusters] == [3, 3, 1, 3]
+        assert sorted(t for c in clusters for t in c) == sorted(names + isolated)
+        assert clusters[-1] == isolated
+
+    @pytest.mark.parametrize("graph", ["tree", "random"])
+    def test_clusters_are_connected(self, graph: str) -> None:
+        """巨大な成分を分割した各クラスタは連結で、max_size 以下"""
+        rng = random.Random(1)  # noqa: S311
+        names = [f"t{i:04d}" for i in range(3000)]
+        if graph == "tree":
+            edges = [(names[i], names[rng.randrange(i)]) for i in range(1, 3000)]
+        else:
+            edges = [(rng.choice(names), rng.choice(names)) for _ in range(4500)]
+        adjacency = _build_adjacency([(a, b) for a, b in edges if a != b])
+        connected = [name for name in names if name in adjacency]
+
+        clusters = _split_clusters(connected, adjacency, max_size=100)
+
+        assert sorted(t for c in clusters for t in c) == sorted(connected)
+        assert all(len(cluster) <= 100 for cluster in clusters)
+        assert all(len(_bfs_order(cluster, adjacency)) == 1 for cluster in clusters)
+        # つながりを保つ分だけ増えるが、断片だらけにはならない
+        components = len(_bfs_order(connected, adjacency))
+        assert len(clusters) < components + len(connected) / 100 * 2
 
 
 class TestGenerateErDiagramImpl:
     """generate_er_diagram_impl のテスト"""
 
-    @patch("pgmcp.tools.er_diagram.get_connection")
-    def test_generate_er_diagram_basic(self, mock_get_connection: MagicMock) -> None:
+    @patch("pgmcp.tools.er_diagram.snapshot_connection")
+    def test_generate_er_diagram_basic(
+        self, mock_snapshot_connection: MagicMock
+    ) -> None:
         """基本的なER図生成"""
         # テーブル情報用のモックカーソル
         mock_cursor = MagicMock()
         mock_cursor.fetchall.side_effect = [
             # _get_tables_info のクエリ結果
             [
-                ("users", "id", "integer", True, False, "ユーザーID"),
-                ("users", "name", "character varying(100)", False, False, None),
-                ("orders", "id", "integer", True, False, None),
-                ("orders", "user_id", "integer", False, True, None),
+                ("public", "users", "id", "integer", True, False, "ユーザーID"),
+                (
+                    "public",
+                    "users",
+                    "name",
+                    "character varying(100)",
+                    False,
+                    False,
+                    None,
+                ),
+                ("public", "orders", "id", "integer", True, False, None),
+                ("public", "orders", "user_id", "integer", False, True, None),
             ],
             # _get_foreign_key_relations のクエリ結果
             [
-                ("orders", "user_id", "users", "id"),
+                (100, "public", "orders", "user_id", "public", "users", "id", 1),
             ],
         ]
 
@@ -433,28 +438,36 @@ class TestGenerateErDiagramImpl:
         mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
         mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
 
-        mock_get_connection.return_value = mock_conn
+        mock_snapshot_connection.return_value = mock_conn
 
         result = generate_er_diagram_impl()
 
         assert "erDiagram" in result
         assert "users {" in result
         assert "orders {" in result
-        assert 'users ||--o{ orders : "has"' in result
+        assert 'users ||--o{ orders : "user_id"' in result
 
-    @patch("pgmcp.tools.er_diagram.get_connection")
+    @patch("pgmcp.tools.er_diagram.snapshot_connection")
     def test_generate_er_diagram_with_table_filter(
-        self, mock_get_connection: MagicMock
+        self, mock_snapshot_connection: MagicMock
     ) -> None:
         """テーブルフィルターを指定したER図生成"""
         mock_cursor = MagicMock()
         mock_cursor.fetchall.side_effect = [
             # _get_tables_info のクエリ結果
             [
-                ("users", "id", "integer", True, False, None),
-                ("users", "name", "character varying(100)", False, False, None),
-                ("orders", "id", "integer", True, False, None),
-                ("products", "id", "integer", True, False, None),
+                ("public", "users", "id", "integer", True, False, None),
+                (
+                    "public",
+                    "users",
+                    "name",
+                    "character varying(100)",
+                    False,
+                    False,
+                    None,
+                ),
+                ("public", "orders", "id", "integer", True, False, None),
+                ("public", "products", "id", "integer", True, False, None),
             ],
             # _get_foreign_key_relations のクエリ結果
             [],
@@ -466,7 +479,7 @@ class TestGenerateErDiagramImpl:
         mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
         mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
 
-        mock_get_connection.return_value = mock_conn
+        mock_snapshot_connection.return_value = mock_conn
 
         result = generate_er_diagram_impl(tables=["users", "orders"])
 
@@ -474,15 +487,44 @@ class TestGenerateErDiagramImpl:
         assert "orders {" in result
         assert "products {" not in result
 
-    @patch("pgmcp.tools.er_diagram.get_connection")
+    @patch("pgmcp.tools.er_diagram.snapshot_connection")
+    def test_generate_er_diagram_filters_tables_in_sql(
+        self, mock_snapshot_connection: MagicMock
+    ) -> None:
+        """テーブルフィルターがSQLのパラメータとして渡される"""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.side_effect = [
+            [("public", "users", "id", "integer", True, False, None)],
+            [],
+        ]
+
+        mock_conn = MagicMock()
+        mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+        mock_conn.__exit__ = MagicMock(return_value=False)
+        mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
+        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_snapshot_connection.return_value = mock_conn
+
+        generate_er_diagram_impl(tables=["users", "orders"])
+
+        for call in mock_cursor.execute.call_args_list:
+            query, params = call[0]
+            assert "ANY(%(tables)s::text[])" in query
+            assert params["schemas"] == ["public"]
+            assert params["tables"] == ["users", "orders"]
+
+    @patch("pgmcp.tools.er_diagram.snapshot_connection")
     def test_generate_er_diagram_warning_for_many_tables(
-        self, mock_get_connection: MagicMock
+        self, mock_snapshot_connection: MagicMock
     ) -> None:
         """テーブルが多い場合の警告（100超）"""
         # 101個のテーブルを生成
         tables_data = []
         for i in range(101):
-            tables_data.append((f"table_{i}", "id", "integer", True, False, None))
+            tables_data.append(
+                ("public", f"table_{i}", "id", "integer", True, False, None)
+            )
 
         mock_cursor = MagicMock()
         mock_cursor.fetchall.side_effect = [
@@ -496,22 +538,65 @@ class TestGenerateErDiagramImpl:
         mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
         mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
 
-        mock_get_connection.return_value = mock_conn
+        mock_snapshot_connection.return_value = mock_conn
 
         result = generate_er_diagram_impl()
 
         assert "⚠️ 警告:" in result
         assert "101個のテーブル" in result
 
-    @patch("pgmcp.tools.er_diagram.get_connection")
+    @pytest.mark.parametrize(
+        ("kwargs", "pages"),
+        [
+            ({"diagram_format": "json"}, 1),
+            ({"output_format": "json"}, 1),
+            ({"diagram_format": "json", "max_chars": 2000}, 2),
+        ],
+    )
+    @patch("pgmcp.tools.er_diagram.snapshot_connection")
+    def test_generate_er_diagram_json_warning_in_document(
+        self,
+        mock_snapshot_connection: MagicMock,
+        kwargs: dict[str, Any],
+        pages: int,
+    ) -> None:
+        """JSON の出力では警告を warnings フィールドで返し、有効な JSON のまま"""
+        tables_data = [
+            ("public", f"table_{i}", "id", "integer", True, False, None)
+            for i in range(101)
+        ]
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.side_effect = itertools.cycle([tables_data, []])
+
+        mock_conn = MagicMock()
+        mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+        mock_conn.__exit__ = MagicMock(return_value=False)
+        mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
+        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_snapshot_connection.return_value = mock_conn
+
+        first = json.loads(generate_er_diagram_impl(**kwargs))
+
+        assert len(first["warnings"]) == 1
+        assert "101個のテーブル" in first["warnings"][0]
+        if pages > 1:
+            second = json.loads(
+                generate_er_diagram_impl(**kwargs, cursor=first["next_cursor"])
+            )
+            assert "warnings" not in second
+
+    @patch("pgmcp.tools.er_diagram.snapshot_connection")
     def test_generate_er_diagram_no_warning_for_100_tables(
-        self, mock_get_connection: MagicMock
+        self, mock_snapshot_connection: MagicMock
     ) -> None:
         """100テーブル以下では警告なし"""
         # 100個のテーブルを生成
         tables_data = []
         for i in range(100):
-            tables_data.append((f"table_{i}", "id", "integer", True, False, None))
+            tables_data.append(
+                ("public", f"table_{i}", "id", "integer", True, False, None)
+            )
 
         mock_cursor = MagicMock()
         mock_cursor.fetchall.side_effect = [
@@ -525,15 +610,15 @@ class TestGenerateErDiagramImpl:
         mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
         mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
 
-        mock_get_connection.return_value = mock_conn
+        mock_snapshot_connection.return_value = mock_conn
 
         result = generate_er_diagram_impl()
 
         assert "⚠️ 警告:" not in result
 
-    @patch("pgmcp.tools.er_diagram.get_connection")
+    @patch("pgmcp.tools.er_diagram.snapshot_connection")
     def test_generate_er_diagram_no_tables(
-        self, mock_get_connection: MagicMock
+        self, mock_snapshot_connection: MagicMock
     ) -> None:
         """テーブルが存在しない場合"""
         mock_cursor = MagicMock()
@@ -548,8 +633,523 @@ class TestGenerateErDiagramImpl:
         mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
         mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
 
-        mock_get_connection.return_value = mock_conn
+        mock_snapshot_connection.return_value = mock_conn
+
+        result = generate_er_diagram_impl()
+
+        assert result == "対象のテーブルが見つかりませんでした。"
+
+    @patch("pgmcp.tools.er_diagram.snapshot_connection")
+    def test_generate_er_diagram_uses_single_snapshot(
+        self, mock_snapshot_connection: MagicMock
+    ) -> None:
+        """カラム情報と外部キー関係を1つの接続・スナップショットで取得する"""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.side_effect = [
+            [
+                ("public", "users", "id", "integer", True, False, None),
+                ("public", "orders", "user_id", "integer", False, True, None),
+            ],
+            [(100, "public", "orders", "user_id", "public", "users", "id", 1)],
+        ]
+
+        mock_conn = MagicMock()
+        mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+        mock_conn.__exit__ = MagicMock(return_value=False)
+        mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
+        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_snapshot_connection.return_value = mock_conn
+
+        generate_er_diagram_impl()
+
+        mock_snapshot_connection.assert_called_once()
+        assert mock_cursor.execute.call_count == 2
+
+    @patch("pgmcp.tools.er_diagram.snapshot_connection")
+    def test_generate_er_diagram_skips_relations_without_tables(
+        self, mock_snapshot_connection: MagicMock
+    ) -> None:
+        """テーブルが無い場合は外部キー関係のクエリを実行しない"""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.side_effect = [[]]
+
+        mock_conn = MagicMock()
+        mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+        mock_conn.__exit__ = MagicMock(return_value=False)
+        mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
+        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_snapshot_connection.return_value = mock_conn
 
         result = generate_er_diagram_impl()
 
         assert result == "対象のテーブルが見つかりませんでした。"
+        assert mock_cursor.execute.call_count == 1
+
+    @patch("pgmcp.tools.er_diagram.snapshot_connection")
+    def test_generate_er_diagram_with_seed_tables(
+        self, mock_snapshot_connection: MagicMock
+    ) -> None:
+        """seed_tablesの近傍だけをSQLで絞り込んで取得する"""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.side_effect = [
+            # 外部キーの辺
+            [("orders", "users"), ("order_items", "orders"), ("logs", "users")],
+            # 近傍テーブルのカラム情報
+            [
+                ("public", "orders", "id", "integer", True, False, None),
+                ("public", "orders", "user_id", "integer", False, True, None),
+                ("public", "users", "id", "integer", True, False, None),
+            ],
+            # 外部キー関係
+            [(100, "public", "orders", "user_id", "public", "users", "id", 1)],
+        ]
+
+        mock_conn = MagicMock()
+        mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+        mock_conn.__exit__ = MagicMock(return_value=False)
+        mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
+        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_snapshot_connection.return_value = mock_conn
+
+        result = generate_er_diagram_impl(seed_tables=["orders"], depth=1)
+
+        assert 'users ||--o{ orders : "user_id"' in result
+        _, columns_params = mock_cursor.execute.call_args_list[1][0]
+        assert columns_params == {
+            "schemas": ["public"],
+            "tables": ["orders", "order_items", "users"],
+            "relids": [],
+        }
+
+    @patch("pgmcp.tools.er_diagram.snapshot_connection")
+    def test_generate_er_diagram_seed_tables_with_virtual_fks(
+        self, mock_snapshot_connection: MagicMock
+    ) -> None:
+        """include_virtual_fksでは推測した外部キーもたどる"""
+        all_columns = [
+            ("public", "users", "id", "integer", True, False, None),
+            ("public", "orders", "id", "integer", True, False, None),
+            ("public", "orders", "user_id", "integer", False, False, None),
+            ("public", "products", "id", "integer", True, False, None),
+        ]
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.side_effect = [
+            [],  # 外部キーの辺なし
+            all_columns,  # Virtual FK推測用の全テーブル
+            all_columns[:3],  # 近傍テーブルのカラム情報
+            [],  # 外部キー関係なし
+        ]
+
+        mock_conn = MagicMock()
+        mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+        mock_conn.__exit__ = MagicMock(return_value=False)
+        mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
+        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_snapshot_connection.return_value = mock_conn
+
+        generate_er_diagram_impl(seed_tables=["users"], include_virtual_fks=True)
+
+        _, columns_params = mock_cursor.execute.call_args_list[2][0]
+        assert columns_params == {
+            "schemas": ["public"],
+            "tables": ["users", "orders"],
+            "relids": [],
+        }
+
+    def test_generate_er_diagram_seed_tables_validation(self) -> None:
+        """tablesとの併用や負のdepthはエラー"""
+        with pytest.raises(ValueError, match="同時に指定できません"):
+            generate_er_diagram_impl(tables=["users"], seed_tables=["users"])
+        with pytest.raises(ValueError, match="depth"):
+            generate_er_diagram_impl(seed_tables=["users"], depth=-1)
+
+    @patch("pgmcp.tools.er_diagram.snapshot_connection")
+    def test_generate_er_diagram_split_clusters(
+        self, mock_snapshot_connection: MagicMock, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """クラスタ一覧とページ内のクラスタのER図だけを出力する"""
+        monkeypatch.setenv("PGMCP_ER_CLUSTERS_PER_PAGE", "1")
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.side_effect = [
+            # テーブル名
+            [("orders",), ("settings",), ("users",)],
+            # 外部キーの辺
+            [("orders", "users")],
+            # 1つ目のクラスタのカラム情報
+            [
+                ("public", "orders", "id", "integer", True, False, None),
+                ("public", "orders", "user_id", "integer", False, True, None),
+                ("public", "users", "id", "integer", True, False, None),
+            ],
+            # 1つ目のクラスタの外部キー関係
+            [(100, "public", "orders", "user_id", "public", "users", "id", 1)],
+        ]
+
+        mock_conn = MagicMock()
+        mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+        mock_conn.__exit__ = MagicMock(return_value=False)
+        mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
+        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_snapshot_connection.return_value = mock_conn
+
+        result = generate_er_diagram_impl(split_clusters=True)
+
+        assert "## ER図クラスタ（2クラスタ / 3テーブル）" in result
+        assert "| 1 | 2 | orders, users |" in result
+        assert "| 2 | 1 | （関係なし）settings |" in result
+        assert "### クラスタ 1（2テーブル）" in result
+        assert 'users ||--o{ orders : "user_id"' in result
+        assert "settings {" not in result
+        assert "page=2" in result
+        assert mock_cursor.execute.call_count == 4
+
+    def test_generate_er_diagram_split_clusters_validation(self) -> None:
+        """split_clustersはtables/seed_tablesと併用できない"""
+        with pytest.raises(ValueError, match="split_clusters"):
+            generate_er_diagram_impl(tables=["users"], split_clusters=True)
+        with pytest.raises(ValueError, match="page"):
+            generate_er_diagram_impl(split_clusters=True, page=0)
+
+    @pytest.mark.parametrize(
+        "name", ["PGMCP_ER_MAX_CLUSTER_SIZE", "PGMCP_ER_CLUSTERS_PER_PAGE"]
+    )
+    @patch("pgmcp.tools.er_diagram.snapshot_connection")
+    def test_generate_er_diagram_split_clusters_env_validation(
+        self,
+        mock_snapshot_connection: MagicMock,
+        monkeypatch: pytest.MonkeyPatch,
+        name: str,
+    ) -> None:
+        """クラスタの設定が1未満の場合は接続せずにエラー"""
+        monkeypatch.setenv(name, "0")
+
+        with pytest.raises(ValueError, match=f"{name} は1以上"):
+            generate_er_diagram_impl(split_clusters=True)
+        mock_snapshot_connection.assert_not_called()
+
+    @patch("pgmcp.tools.er_diagram.snapshot_connection")
+    def test_generate_er_diagram_other_format_uses_cached_graph(
+        self, mock_snapshot_connection: MagicMock, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """別の出力形式での再生成ではデータベースに接続しない"""
+        monkeypatch.setenv("PGMCP_CACHE_ENABLED", "1")
+        reset_catalog_cache()
+        mock_cursor = MagicMock()
+        mock_cursor.fetchone.return_value = (1, 100)
+        mock_cursor.fetchall.side_effect = [
+            [
+                ("public", "users", "id", "integer", True, False, None),
+                ("public", "orders", "user_id", "integer", False, True, None),
+            ],
+            [(100, "public", "orders", "user_id", "public", "users", "id", 1)],
+        ]
+
+        mock_conn = MagicMock()
+        mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+        mock_conn.__exit__ = MagicMock(return_value=False)
+        mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
+        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_snapshot_connection.return_value = mock_conn
+
+        mermaid = generate_er_diagram_impl(tables=["users", "orders"])
+        dot = generate_er_diagram_impl(tables=["orders", "users"], diagram_format="dot")
+
+        assert mermaid.startswith("erDiagram")
+        assert '"orders" -> "users"' in dot
+        mock_snapshot_connection.assert_called_once()
+
+    @patch("pgmcp.tools.er_diagram.snapshot_connection")
+    def test_generate_er_diagram_cross_schema_reference(
+        self, mock_snapshot_connection: MagicMock
+    ) -> None:
+        """他スキーマの参照先テーブルはOIDでまとめて追加取得する"""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.side_effect = [
+            [
+                ("audit", "logs", "id", "bigint", True, False, None),
+                ("audit", "logs", "user_id", "integer", False, True, None),
+            ],
+            [(100, "audit", "logs", "user_id", "public", "users", "id", 16385)],
+            # 参照先テーブルのカラム情報
+            [("public", "users", "id", "integer", True, False, None)],
+        ]
+
+        mock_conn = MagicMock()
+        mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+        mock_conn.__exit__ = MagicMock(return_value=False)
+        mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
+        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_snapshot_connection.return_value = mock_conn
+
+        result = generate_er_diagram_impl(schema="audit")
+
+        assert 'audit_logs["audit.logs"] {' in result
+        assert 'public_users["public.users"] {' in result
+        assert 'public_users ||--o{ audit_logs : "user_id"' in result
+        assert mock_cursor.execute.call_count == 3
+        _, params = mock_cursor.execute.call_args_list[2][0]
+        assert params == {"schemas": [], "tables": None, "relids": [16385]}
+
+    @patch("pgmcp.tools.er_diagram.snapshot_connection")
+    def test_generate_er_diagram_cross_schema_graph_is_not_cached(
+        self, mock_snapshot_connection: MagicMock, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """他スキーマのテーブルを含むグラフは参照先の変更を検出できないため再取得する"""
+        monkeypatch.setenv("PGMCP_CACHE_ENABLED", "1")
+        reset_catalog_cache()
+        mock_cursor = MagicMock()
+        mock_cursor.fetchone.return_value = (1, 100)
+        mock_cursor.fetchall.side_effect = [
+            [("audit", "logs", "user_id", "integer", False, True, None)],
+            [(100, "audit", "logs", "user_id", "public", "users", "id", 16385)],
+            [("public", "users", "id", "integer", True, False, None)],
+        ] * 2
+
+        mock_conn = MagicMock()
+        mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+        mock_conn.__exit__ = MagicMock(return_value=False)
+        mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
+        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_snapshot_connection.return_value = mock_conn
+
+        try:
+            first = generate_er_diagram_impl(schema="audit")
+            second = generate_er_diagram_impl(schema="audit")
+        finally:
+            reset_catalog_cache()
+
+        assert first == second
+        assert mock_snapshot_connection.call_count == 2
+        assert mock_cursor.fetchall.call_count == 6
+
+    @patch("pgmcp.tools.er_diagram.snapshot_connection")
+    def test_generate_er_diagram_multiple_schemas(
+        self, mock_snapshot_connection: MagicMock
+    ) -> None:
+        """複数スキーマを1回のクエリで取得し、スキーマ名付きで出力する"""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.side_effect = [
+            [
+                ("audit", "logs", "id", "bigint", True, False, None),
+                ("audit", "logs", "user_id", "integer", False, True, None),
+                ("public", "users", "id", "integer", True, False, None),
+            ],
+            [(100, "audit", "logs", "user_id", "public", "users", "id", 16385)],
+        ]
+
+        mock_conn = MagicMock()
+        mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+        mock_conn.__exit__ = MagicMock(return_value=False)
+        mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
+        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_snapshot_connection.return_value = mock_conn
+
+        result = generate_er_diagram_impl(
+            schemas=["public", "audit"], diagram_format="dot"
+        )
+
+        assert result.startswith('digraph "public, audit" {')
+        assert '"audit.logs" -> "public.users"' in result
+        assert mock_cursor.execute.call_count == 2
+        _, params = mock_cursor.execute.call_args_list[0][0]
+        assert params["schemas"] == ["public", "audit"]
+
+    def test_generate_er_diagram_schemas_validation(self) -> None:
+        """空のschemasや、seed_tables/split_clustersとの併用はエラー"""
+        with pytest.raises(ValueError, match="1つ以上"):
+            generate_er_diagram_impl(schemas=[])
+        with pytest.raises(ValueError, match="schemas"):
+            generate_er_diagram_impl(schemas=["public"], split_clusters=True)
+
+    def test_generate_er_diagram_unknown_format(self) -> None:
+        """未対応の出力形式はエラー"""
+        with pytest.raises(ValueError, match="diagram_format"):
+            generate_er_diagram_impl(diagram_format="svg")
+
+    @pytest.mark.parametrize(
+        ("kwargs", "message"),
+        [
+            ({"output_format": "csv"}, "output_format"),
+            ({"output_format": "json", "diagram_format": "dot"}, "diagram_format"),
+            ({"output_format": "tsv", "split_clusters": True}, "split_clusters"),
+        ],
+    )
+    def test_generate_er_diagram_output_format_validation(
+        self, kwargs: dict[str, Any], message: str
+    ) -> None:
+        """output_format の値と、図の形式・クラスタ分割との併用を検証する"""
+        with pytest.raises(ValueError, match=message):
+            generate_er_diagram_impl(**kwargs)
+
+    @patch("pgmcp.tools.er_diagram.snapshot_connection")
+    def test_generate_er_diagram_json_and_tsv_output(
+        self, mock_snapshot_connection: MagicMock
+    ) -> None:
+        """JSONは隣接リスト、TSVは参照先付きの1行1カラムで出力する"""
+        results = [
+            [
+                ("public", "users", "id", "integer", True, False, "ユーザーID"),
+                ("public", "orders", "id", "integer", True, False, None),
+                ("public", "orders", "user_id", "integer", False, True, None),
+            ],
+            [(100, "public", "orders", "user_id", "public", "users", "id", 1)],
+        ]
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.side_effect = results * 2
+
+        mock_conn = MagicMock()
+        mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+        mock_conn.__exit__ = MagicMock(return_value=False)
+        mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
+        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_snapshot_connection.return_value = mock_conn
+
+        document = json.loads(generate_er_diagram_impl(output_format="json"))
+        tsv = generate_er_diagram_impl(output_format="tsv")
+
+        assert document["tables"]["orders"]["references"] == ["users"]
+        assert tsv.splitlines() == [
+            "table_name\tcolumn_name\tdata_type\tprimary_key\tforeign_key"
+            "\treferences\tvirtual_references\tcomment",
+            "orders\tid\tinteger\tt\tf\t\\N\t\\N\t\\N",
+            "orders\tuser_id\tinteger\tf\tt\tusers.id\t\\N\t\\N",
+            "users\tid\tinteger\tt\tf\t\\N\t\\N\tユーザーID",
+        ]
+
+    @patch("pgmcp.tools.er_diagram.snapshot_connection")
+    def test_generate_er_diagram_max_chars(
+        self, mock_snapshot_connection: MagicMock
+    ) -> None:
+        """上限を超える場合はテーブルの境界で打ち切り、cursor で続きを取得する"""
+        tables_data = [
+            ("public", f"table_{i:02d}", "id", "integer", True, False, None)
+            for i in range(30)
+        ]
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.side_effect = [tables_data, []] * 2
+
+        mock_conn = MagicMock()
+        mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+        mock_conn.__exit__ = MagicMock(return_value=False)
+        mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
+        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_snapshot_connection.return_value = mock_conn
+
+        first = generate_er_diagram_impl(max_chars=400)
+        cursor = first.split('cursor="')[1].split('"')[0]
+        second = generate_er_diagram_impl(max_chars=400, cursor=cursor)
+
+        assert len(first) <= 400
+        assert first.startswith("erDiagram\n    table_00 {")
+        assert "テーブル（table_" in first
+        assert second.startswith("erDiagram\n")
+        assert "table_00 {" not in second
+
+    @patch("pgmcp.tools.er_diagram.snapshot_connection")
+    def test_generate_er_diagram_pages_are_valid_mermaid(
+        self, mock_snapshot_connection: MagicMock
+    ) -> None:
+        """複数スキーマを分割した各ページで、関係の両端がエンティティとして有効"""
+        tables_data = [("public", "users", "id", "integer", True, False, None)]
+        fk_data: list[tuple[Any, ...]] = []
+        for i in range(12):
+            table = f"summary_{i:02d}"
+            tables_data += [
+                ("reporting", table, "id", "integer", True, False, None),
+                ("reporting", table, "user_id", "integer", False, True, None),
+            ]
+            fk_data.append(
+                (100 + i, "reporting", table, "user_id", "public", "users", "id", 1)
+            )
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.side_effect = itertools.cycle([tables_data, fk_data])
+
+        mock_conn = MagicMock()
+        mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+        mock_conn.__exit__ = MagicMock(return_value=False)
+        mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
+        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_snapshot_connection.return_value = mock_conn
+
+        pages = _all_pages(schemas=["public", "reporting"], max_chars=300)
+
+        shown: set[str] = set()
+        for page in pages:
+            shown |= _mermaid_entities(page.split("\n\n…")[0])
+
+        assert len(pages) > 2
+        assert "public.users" in shown
+        assert {f"reporting.summary_{i:02d}" for i in range(12)} <= shown
+
+    @pytest.mark.parametrize(
+        ("diagram_format", "max_chars"), [("mermaid", 400), ("dot", 1500)]
+    )
+    @patch("pgmcp.tools.er_diagram.snapshot_connection")
+    def test_generate_er_diagram_split_clusters_pages_are_valid(
+        self,
+        mock_snapshot_connection: MagicMock,
+        monkeypatch: pytest.MonkeyPatch,
+        diagram_format: str,
+        max_chars: int,
+    ) -> None:
+        """クラスタの出力もテーブルの境界で打ち切り、各ページの図はそれだけで有効"""
+        monkeypatch.setenv("PGMCP_ER_CLUSTERS_PER_PAGE", "1")
+        names = [f"t{i}" for i in range(8)]
+        columns = [
+            ("public", name, column, "integer", column == "id", column == "t0_id", None)
+            for name in names
+            for column in ("id", "t0_id", "col_a", "col_b")
+        ]
+        fks = [
+            (100 + i, "public", name, "t0_id", "public", "t0", "id", 1)
+            for i, name in enumerate(names[1:])
+        ]
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.side_effect = itertools.cycle(
+            [
+                [(name,) for name in names],
+                [(name, "t0") for name in names[1:]],
+                columns,
+                fks,
+            ]
+        )
+
+        mock_conn = MagicMock()
+        mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+        mock_conn.__exit__ = MagicMock(return_value=False)
+        mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
+        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_snapshot_connection.return_value = mock_conn
+
+        pages = _all_pages(
+            split_clusters=True, diagram_format=diagram_format, max_chars=max_chars
+        )
+
+        shown: set[str] = set()
+        for page in pages:
+            assert len(page) <= max_chars
+            blocks = re.findall(rf"```{diagram_format}\n(.*?)\n```", page, re.S)
+            assert len(blocks) == 1
+            assert page.count("```") == 2
+            if diagram_format == "mermaid":
+                shown |= _mermaid_entities(blocks[0])
+            else:
+                assert blocks[0].startswith('digraph "public" {')
+                assert blocks[0].endswith("\n}")
+                shown |= set(re.findall(r'^    "(t\d)" \[', blocks[0], re.M))
+        assert len(pages) > 2
+        assert "### クラスタ 1（8テーブル）（続き）" in pages[1]
+        assert shown == set(names)
@@ -2,6 +2,7 @@
 外部キー関連ツールのユニットテスト
 """
 
+import json
 from unittest.mock import MagicMock, patch
 
 from pgmcp.tools import get_foreign_keys_impl
@@ -10,15 +11,24 @@ from pgmcp.tools import get_foreign_keys_impl
 class TestGetForeignKeys:
     """get_foreign_keys ツールのテスト"""
 
-    @patch("pgmcp.tools.foreign_keys.get_connection")
+    @patch("pgmcp.tools.foreign_keys.pooled_connection")
     def test_get_foreign_keys_returns_foreign_keys(
-        self, mock_get_connection: MagicMock
+        self, mock_pooled_connection: MagicMock
     ) -> None:
         """外部キー情報がMarkdown Table形式で正しく返されることを確認"""
         mock_cursor = MagicMock()
         mock_cursor.fetchall.return_value = [
-            ("orders_user_id_fkey", "user_id", "users", "id"),
-            ("orders_product_id_fkey", "product_id", "products", "id"),
+            ("orders_user_id_fkey", "user_id", "users", "id", "a", "a", False, False),
+            (
+                "orders_product_id_fkey",
+                "product_id",
+                "products",
+                "id",
+                "a",
+                "a",
+                False,
+                False,
+            ),
         ]
 
         mock_conn = MagicMock()
@@ -27,27 +37,39 @@ class TestGetForeignKeys:
         mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
         mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
 
-        mock_get_connection.return_value = mock_conn
+        mock_pooled_connection.return_value = mock_conn
 
         # テスト実行
         result = get_foreign_keys_impl("orders")
 
         # 検証
         assert (
-            "| constraint_name | column_name | foreign_table | foreign_column |"
-            in result
+            "| constraint_name | column_name | foreign_table | foreign_column "
+            "| on_update | on_delete | deferrable |" in result
+        )
+        assert (
+            "| orders_user_id_fkey | user_id | users | id "
+            "| NO ACTION | NO ACTION | NOT DEFERRABLE |" in result
         )
-        assert "| orders_user_id_fkey | user_id | users | id |" in result
         assert "| orders_product_id_fkey | product_id | products | id |" in result
 
-    @patch("pgmcp.tools.foreign_keys.get_connection")
+    @patch("pgmcp.tools.foreign_keys.pooled_connection")
     def test_get_foreign_keys_with_custom_schema(
-        self, mock_get_connection: MagicMock
+        self, mock_pooled_connection: MagicMock
     ) -> None:
         """カスタムスキーマを指定した場合のテスト"""
         mock_cursor = MagicMock()
         mock_cursor.fetchall.return_value = [
-            ("audit_logs_user_id_fkey", "user_id", "users", "id"),
+            (
+                "audit_logs_user_id_fkey",
+                "user_id",
+                "users",
+                "id",
+                "a",
+                "a",
+                False,
+                False,
+            ),
         ]
 
         mock_conn = MagicMock()
@@ -56,7 +78,7 @@ class TestGetForeignKeys:
         mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
         mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
 
-        mock_get_connection.return_value = mock_conn
+        mock_pooled_connection.return_value = mock_conn
 
         # カスタムスキーマでテスト実行
         result = get_foreign_keys_impl("audit_logs", schema="audit")
@@ -69,9 +91,9 @@ class TestGetForeignKeys:
         call_args = mock_cursor.execute.call_args
         assert call_args[0][1] == ("audit_logs", "audit")
 
-    @patch("pgmcp.tools.foreign_keys.get_connection")
+    @patch("pgmcp.tools.foreign_keys.pooled_connection")
     def test_get_foreign_keys_no_foreign_keys(
-        self, mock_get_connection: MagicMock
+        self, mock_pooled_connection: MagicMock
     ) -> None:
         """外部キーが存在しない場合のテスト"""
         mock_cursor = MagicMock()
@@ -83,8 +105,64 @@ class TestGetForeignKeys:
         mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
         mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
 
-        mock_get_connection.return_value = mock_conn
+        mock_pooled_connection.return_value = mock_conn
 
         result = get_foreign_keys_impl("users")
 
         assert result == "外部キーが見つかりませんでした。"
+
+    @patch("pgmcp.tools.foreign_keys.pooled_connection")
+    def test_get_foreign_keys_actions_and_deferrability(
+        self, mock_pooled_connection: MagicMock
+    ) -> None:
+        """参照動作と遅延可否をSQLの表記で出力する"""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.return_value = [
+            ("child_parent_fkey", "parent_id", "parent", "id", "c", "n", True, False),
+            ("child_owner_fkey", "owner_id", "owner", "id", "r", "d", True, True),
+        ]
+
+        mock_conn = MagicMock()
+        mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+        mock_conn.__exit__ = MagicMock(return_value=False)
+        mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
+        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_pooled_connection.return_value = mock_conn
+
+        result = get_foreign_keys_impl("child")
+
+        assert "| CASCADE | SET NULL | DEFERRABLE INITIALLY IMMEDIATE |" in result
+        assert "| RESTRICT | SET DEFAULT | DEFERRABLE INITIALLY DEFERRED |" in result
+
+    @patch("pgmcp.tools.foreign_keys.pooled_connection")
+    def test_get_foreign_keys_json(self, mock_pooled_connection: MagicMock) -> None:
+        """JSONでも参照動作と遅延可否はSQLの表記で返す"""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.return_value = [
+            ("child_parent_fkey", "parent_id", "parent", "id", "c", "a", False, False),
+        ]
+
+        mock_conn = MagicMock()
+        mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+        mock_conn.__exit__ = MagicMock(return_value=False)
+        mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
+        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_pooled_connection.return_value = mock_conn
+
+        result = get_foreign_keys_impl("child", output_format="json")
+
+        document = json.loads(result)
+        assert document["table"] == "child"
+        assert document["rows"] == [
+            [
+                "child_parent_fkey",
+                "parent_id",
+                "parent",
+                "id",
+                "CASCADE",
+                "NO ACTION",
+                "NOT DEFERRABLE",
+            ]
+        ]
@@ -10,9 +10,9 @@ from pgmcp.tools import get_table_indexes_impl
 class TestGetTableIndexes:
     """get_table_indexes ツールのテスト"""
 
-    @patch("pgmcp.tools.indexes.get_connection")
+    @patch("pgmcp.tools.indexes.pooled_connection")
     def test_get_table_indexes_returns_indexes(
-        self, mock_get_connection: MagicMock
+        self, mock_pooled_connection: MagicMock
     ) -> None:
         """インデックス情報がMarkdown Table形式で正しく返されることを確認"""
         mock_cursor = MagicMock()
@@ -46,7 +46,7 @@ class TestGetTableIndexes:
         mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
         mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
 
-        mock_get_connection.return_value = mock_conn
+        mock_pooled_connection.return_value = mock_conn
 
         # テスト実行
         result = get_table_indexes_impl("users")
@@ -57,9 +57,9 @@ class TestGetTableIndexes:
         assert "| users_email_idx | email | ✓ | btree |" in result
         assert "| users_created_at_idx | created_at |  | btree |" in result
 
-    @patch("pgmcp.tools.indexes.get_connection")
+    @patch("pgmcp.tools.indexes.pooled_connection")
     def test_get_table_indexes_with_custom_schema(
-        self, mock_get_connection: MagicMock
+        self, mock_pooled_connection: MagicMock
     ) -> None:
         """カスタムスキーマを指定した場合のテスト"""
         mock_cursor = MagicMock()
@@ -79,7 +79,7 @@ class TestGetTableIndexes:
         mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
         mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
 
-        mock_get_connection.return_value = mock_conn
+        mock_pooled_connection.return_value = mock_conn
 
         # カスタムスキーマでテスト実行
         result = get_table_indexes_impl("logs", schema="audit")
@@ -92,8 +92,10 @@ class TestGetTableIndexes:
         call_args = mock_cursor.execute.call_args
         assert call_args[0][1] == ("logs", "audit")
 
-    @patch("pgmcp.tools.indexes.get_connection")
-    def test_get_table_indexes_no_indexes(self, mock_get_connection: MagicMock) -> None:
+    @patch("pgmcp.tools.indexes.pooled_connection")
+    def test_get_table_indexes_no_indexes(
+        self, mock_pooled_connection: MagicMock
+    ) -> None:
         """インデックスが存在しない場合のテスト"""
         mock_cursor = MagicMock()
         mock_cursor.fetchall.return_value = []
@@ -104,8 +106,38 @@ class TestGetTableIndexes:
         mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
         mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
 
-        mock_get_connection.return_value = mock_conn
+        mock_pooled_connection.return_value = mock_conn
 
         result = get_table_indexes_impl("nonexistent_table")
 
         assert result == "インデックスが見つかりませんでした。"
+
+    @patch("pgmcp.tools.indexes.pooled_connection")
+    def test_get_table_indexes_tsv(self, mock_pooled_connection: MagicMock) -> None:
+        """TSVではヘッダー行に続けて1インデックス1行で出力する"""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.return_value = [
+            (
+                "users_pkey",
+                "id",
+                True,
+                "btree",
+                "CREATE UNIQUE INDEX users_pkey ON public.users USING btree (id)",
+            ),
+        ]
+
+        mock_conn = MagicMock()
+        mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+        mock_conn.__exit__ = MagicMock(return_value=False)
+        mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
+        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_pooled_connection.return_value = mock_conn
+
+        result = get_table_indexes_impl("users", output_format="tsv")
+
+        assert result.splitlines() == [
+            "index_name\tcolumns\tunique\ttype\tdefinition",
+            "users_pkey\tid\tt\tbtree\t"
+            "CREATE UNIQUE INDEX users_pkey ON public.users USING btree (id)",
+        ]
@@ -0,0 +1,68 @@
+"""
+出力形式のユニットテスト
+"""
+
+import json
+
+import pytest
+
+from pgmcp.tools.output import format_rows, to_tsv, validate_output_format
+
+
+class TestValidateOutputFormat:
+    """validate_output_format のテスト"""
+
+    @pytest.mark.parametrize("output_format", ["markdown", "json", "tsv"])
+    def test_supported_formats(self, output_format: str) -> None:
+        validate_output_format(output_format)
+
+    def test_unknown_format(self) -> None:
+        """未対応の形式はエラー"""
+        with pytest.raises(ValueError, match="output_format"):
+            validate_output_format("csv")
+
+
+class TestToTsv:
+    """to_tsv のテスト"""
+
+    def test_header_and_rows(self) -> None:
+        """ヘッダー行に続けて1行ずつタブ区切りで出力する"""
+        result = to_tsv(("name", "pk"), [("id", True), ("name", False)])
+
+        assert result == "name\tpk\nid\tt\nname\tf"
+
+    def test_escape_and_null(self) -> None:
+        """タブ・改行・バックスラッシュはエスケープし、NULLは \\N で表す"""
+        result = to_tsv(("comment",), [("a\tb\nc\\d",), (None,)])
+
+        assert result.splitlines() == ["comment", "a\\tb\\nc\\\\d", "\\N"]
+
+    def test_next_after(self) -> None:
+        """続きがある場合は末尾のコメント行に after の値を出力する"""
+        result = to_tsv(("table_name",), [("users",)], next_after="users")
+
+        assert result.splitlines()[-1] == "# after=users"
+
+
+class TestFormatRows:
+    """format_rows のテスト"""
+
+    def test_json_document(self) -> None:
+        """JSONは列名を1回だけ持ち、fieldsをトップレベルに追加する"""
+        result = format_rows(
+            "json", ("name", "pk"), [("id", True)], schema="public", next_after=None
+        )
+
+        assert " " not in result
+        assert json.loads(result) == {
+            "schema": "public",
+            "next_after": None,
+            "columns": ["name", "pk"],
+            "rows": [["id", True]],
+        }
+
+    def test_tsv_ignores_fields(self) -> None:
+        """TSVでは next_after 以外のfieldsを出力しない"""
+        result = format_rows("tsv", ("name",), [("id",)], schema="public")
+
+        assert result == "name\nid"
@@ -2,17 +2,20 @@
 スキーマ関連ツールのユニットテスト
 """
 
+import json
 from unittest.mock import MagicMock, patch
 
+import pytest
+
 from pgmcp.tools import get_table_schema_impl, list_tables_impl
 
 
 class TestListTables:
     """list_tables ツールのテスト"""
 
-    @patch("pgmcp.tools.schema.get_connection")
+    @patch("pgmcp.tools.schema.pooled_connection")
     def test_list_tables_returns_table_list(
-        self, mock_get_connection: MagicMock
+        self, mock_pooled_connection: MagicMock
     ) -> None:
         """テーブル一覧が正しくMarkdown Table形式で返されることを確認"""
         # モックカーソルの設定
@@ -30,7 +33,7 @@ class TestListTables:
         mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
         mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
 
-        mock_get_connection.return_value = mock_conn
+        mock_pooled_connection.return_value = mock_conn
 
         # テスト実行
         result = list_tables_impl()
@@ -41,9 +44,9 @@ class TestListTables:
         assert "| users | BASE TABLE |" in result
         assert "| user_view | VIEW |" in result
 
-    @patch("pgmcp.tools.schema.get_connection")
+    @patch("pgmcp.tools.schema.pooled_connection")
     def test_list_tables_with_custom_schema(
-        self, mock_get_connection: MagicMock
+        self, mock_pooled_connection: MagicMock
     ) -> None:
         """カスタムスキーマを指定した場合のテスト"""
         mock_cursor = MagicMock()
@@ -55,7 +58,7 @@ class TestListTables:
         mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
         mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
 
-        mock_get_connection.return_value = mock_conn
+        mock_pooled_connection.return_value = mock_conn
 
         # カスタムスキーマでテスト実行
         result = list_tables_impl(schema="audit")
@@ -66,10 +69,10 @@ class TestListTables:
         # スキーマパラメータが正しく渡されたか確認
         mock_cursor.execute.assert_called_once()
         call_args = mock_cursor.execute.call_args
-        assert call_args[0][1] == ("audit",)
+        assert call_args[0][1]["schema"] == "audit"
 
-    @patch("pgmcp.tools.schema.get_connection")
-    def test_list_tables_empty_result(self, mock_get_connection: MagicMock) -> None:
+    @patch("pgmcp.tools.schema.pooled_connection")
+    def test_list_tables_empty_result(self, mock_pooled_connection: MagicMock) -> None:
         """テーブルが存在しない場合のテスト"""
         mock_cursor = MagicMock()
         mock_cursor.fetchall.return_value = []
@@ -80,19 +83,109 @@ class TestListTables:
         mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
         mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
 
-        mock_get_connection.return_value = mock_conn
+        mock_pooled_connection.return_value = mock_conn
 
         result = list_tables_impl()
 
         assert result == "テーブルが見つかりませんでした。"
 
+    @patch("pgmcp.tools.schema.pooled_connection")
+    def test_list_tables_pagination(self, mock_pooled_connection: MagicMock) -> None:
+        """limitを超える行がある場合は次ページ用のafterを返す"""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.return_value = [
+            ("a_table", "BASE TABLE"),
+            ("b_table", "BASE TABLE"),
+            ("c_table", "VIEW"),
+        ]
+
+        mock_conn = MagicMock()
+        mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+        mock_conn.__exit__ = MagicMock(return_value=False)
+        mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
+        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_pooled_connection.return_value = mock_conn
+
+        result = list_tables_impl(pattern="%_table", after="0", limit=2)
+
+        assert "| a_table | BASE TABLE |" in result
+        assert "| b_table | BASE TABLE |" in result
+        assert "c_table" not in result
+        assert 'after="b_table"' in result
+
+        # limit+1件を取得して続きの有無を判定する
+        params = mock_cursor.execute.call_args[0][1]
+        assert params == {
+            "schema": "public",
+            "pattern": "%_table",
+            "after": "0",
+            "limit": 3,
+        }
+
+    @patch("pgmcp.tools.schema.pooled_connection")
+    def test_list_tables_last_page(self, mock_pooled_connection: MagicMock) -> None:
+        """最終ページでは次ページの案内を出さない"""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.return_value = [("a_table", "BASE TABLE")]
+
+        mock_conn = MagicMock()
+        mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+        mock_conn.__exit__ = MagicMock(return_value=False)
+        mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
+        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_pooled_connection.return_value = mock_conn
+
+        result = list_tables_impl(limit=2)
+
+        assert "after=" not in result
+
+    @patch("pgmcp.tools.schema.pooled_connection")
+    def test_list_tables_json_and_tsv(self, mock_pooled_connection: MagicMock) -> None:
+        """JSON / TSV でも次ページ用の after の値を返す"""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.return_value = [
+            ("a_table", "BASE TABLE"),
+            ("b_table", "VIEW"),
+        ]
+
+        mock_conn = MagicMock()
+        mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+        mock_conn.__exit__ = MagicMock(return_value=False)
+        mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
+        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_pooled_connection.return_value = mock_conn
+
+        document = json.loads(list_tables_impl(limit=1, output_format="json"))
+        tsv = list_tables_impl(limit=1, output_format="tsv")
+
+        assert document == {
+            "schema": "public",
+            "next_after": "a_table",
+            "columns": ["table_name", "table_type"],
+            "rows": [["a_table", "BASE TABLE"]],
+        }
+        assert tsv == "table_name\ttable_type\na_table\tBASE TABLE\n# after=a_table"
+
+    def test_list_tables_invalid_output_format(self) -> None:
+        """未対応の output_format はクエリを実行せずにエラー"""
+        with pytest.raises(ValueError, match="output_format"):
+            list_tables_impl(output_format="xml")
+
+    def test_list_tables_invalid_limit(self) -> None:
+        """limitが1未満の場合はエラー"""
+        with pytest.raises(ValueError):
+            list_tables_impl(limit=0)
+
 
 class TestGetTableSchema:
     """get_table_schema ツールのテスト"""
 
-    @patch("pgmcp.tools.schema.get_connection")
+    @patch("pgmcp.tools.schema.pooled_connection")
     def test_get_table_schema_returns_columns(
-        self, mock_get_connection: MagicMock
+        self, mock_pooled_connection: MagicMock
     ) -> None:
         """カラム情報がMarkdown Table形式で正しく返されることを確認"""
         mock_cursor = MagicMock()
@@ -116,7 +209,7 @@ class TestGetTableSchema:
         mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
         mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
 
-        mock_get_connection.return_value = mock_conn
+        mock_pooled_connection.return_value = mock_conn
 
         # テスト実行
         result = get_table_schema_impl("users")
@@ -132,9 +225,52 @@ class TestGetTableSchema:
         assert "| ユーザー名 |" in result
         assert "| email | character varying(255) | YES |" in result
 
-    @patch("pgmcp.tools.schema.get_connection")
+    @patch("pgmcp.tools.schema.pooled_connection")
+    def test_get_table_schema_json(self, mock_pooled_connection: MagicMock) -> None:
+        """JSONでは nullable と PK を真偽値、NULLを null で返す"""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.return_value = [
+            ("id", "integer", "NO", "nextval('users_id_seq'::regclass)", True, None),
+            ("email", "character varying(255)", "YES", None, False, "メール"),
+        ]
+
+        mock_conn = MagicMock()
+        mock_conn.__enter__ = MagicMock(return_value=mock_conn)
+        mock_conn.__exit__ = MagicMock(return_value=False)
+        mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
+        mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+
+        mock_pooled_connection.return_value = mock_conn
+
+        result = get_table_schema_impl("users", output_format="json")
+
+        assert json.loads(result) == {
+            "schema": "public",
+            "table": "users",
+            "columns": [
+                "column_name",
+                "data_type",
+                "nullable",
+                "default",
+                "primary_key",
+                "comment",
+            ],
+            "rows": [
+                [
+                    "id",
+                    "integer",
+                    False,
+                    "nextval('users_id_seq'::regclass)",
+                    True,
+                    None,
+                ],
+                ["email", "character varying(255)", True, None, False, "メール"],
+            ],
+        }
+
+    @patch("pgmcp.tools.schema.pooled_connection")
     def test_get_table_schema_with_custom_schema(
-        self, mock_get_connection: MagicMock
+        self, mock_pooled_connection: MagicMock
     ) -> None:
         """カスタムスキーマを指定した場合のテスト"""
         mock_cursor = MagicMock()
@@ -148,7 +284,7 @@ class TestGetTableSchema:
         mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
         mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
 
-        mock_get_connection.return_value = mock_conn
+        mock_pooled_connection.return_value = mock_conn
 
         # カスタムスキーマでテスト実行
         result = get_table_schema_impl("audit_log", schema="audit")
@@ -161,9 +297,9 @@ class TestGetTableSchema:
         call_args = mock_cursor.execute.call_args
         assert call_args[0][1] == ("audit_log", "audit")
 
-    @patch("pgmcp.tools.schema.get_connection")
+    @patch("pgmcp.tools.schema.pooled_connection")
     def test_get_table_schema_nonexistent_table(
-        self, mock_get_connection: MagicMock
+        self, mock_pooled_connection: MagicMock
     ) -> None:
         """存在しないテーブルの場合のテスト"""
         mock_cursor = MagicMock()
@@ -175,7 +311,7 @@ class TestGetTableSchema:
         mock_conn.cursor.return_value.__enter__ = MagicMock(return_value=mock_cursor)
         mock_conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
 
-        mock_get_connection.return_value = mock_conn
+        mock_pooled_connection.return_value = mock_conn
 
         result = get_table_schema_impl("nonexistent_table")
 
@@ -0,0 +1,346 @@
+"""
+スキーマグラフのユニットテスト
+"""
+
+import json
+from typing import Any
+
+import pytest
+
+from pgmcp.tools.schema_graph import (
+    EdgeKind,
+    GraphColumn,
+    GraphEdge,
+    GraphTable,
+    _simplify_data_type,
+    build_schema_graph,
+    get_renderer,
+    render_dot,
+    render_json,
+    render_mermaid,
+    render_plantuml,
+)
+
+
+def _column(
+    name: str,
+    data_type: str = "integer",
+    pk: bool = False,
+    fk: bool = False,
+    comment: str | None = None,
+) -> GraphColumn:
+    return GraphColumn(name, data_type, pk, fk, comment)
+
+
+def _edge(
+    from_table: str,
+    from_column: str,
+    to_table: str,
+    to_column: str,
+    kind: EdgeKind = "real",
+) -> GraphEdge:
+    return GraphEdge(from_table, (from_column,), to_table, (to_column,), kind)
+
+
+TABLES_INFO = [
+    GraphTable(
+        "users",
+        (_column("id", pk=True, comment="ユーザーID"), _column("name")),
+    ),
+    GraphTable("orders", (_column("id", pk=True), _column("user_id", fk=True))),
+    GraphTable("logs", (_column("id", pk=True), _column("order_id"))),
+]
+RELATIONS = [_edge("orders", "user_id", "users", "id")]
+VIRTUAL_FKS = [_edge("logs", "order_id", "orders", "id", "virtual")]
+
+
+class TestSimplifyDataType:
+    """_simplify_data_type のテスト"""
+
+    def test_simplify_integer(self) -> None:
+        """integer型の変換"""
+        assert _simplify_data_type("integer") == "integer"
+
+    def test_simplify_varchar_with_length(self) -> None:
+        """character varying(n)型の変換"""
+        assert _simplify_data_type("character varying(100)") == "varchar"
+
+    def test_simplify_timestamp_with_timezone(self) -> None:
+        """timestamp with time zone型の変換"""
+        assert _simplify_data_type("timestamp with time zone") == "timestamptz"
+
+    def test_simplify_numeric_with_precision(self) -> None:
+        """numeric(p,s)型の変換"""
+        assert _simplify_data_type("numeric(10,2)") == "numeric"
+
+    def test_simplify_integer_array(self) -> None:
+        """integer[]型の変換"""
+        assert _simplify_data_type("integer[]") == "integer_array"
+
+    def test_simplify_text_array(self) -> None:
+        """text[]型の変換"""
+        assert _simplify_data_type("text[]") == "text_array"
+
+    def test_simplify_unknown_type(self) -> None:
+        """未知の型の変換"""
+        assert _simplify_data_type("custom_type") == "custom_type"
+
+
+class TestRenderMermaid:
+    """render_mermaid のテスト"""
+
+    def test_format_single_table(self) -> None:
+        """単一テーブルのフォーマット"""
+        tables_info = [
+            GraphTable(
+                "users",
+                (
+                    _column("id", pk=True, comment="ユーザーID"),
+                    _column("name", "character varying(100)"),
+                ),
+            ),
+        ]
+
+        result = render_mermaid(build_schema_graph("public", tables_info, [], []))
+
+        assert "erDiagram" in result
+        assert "users {" in result
+        assert "integer id PK" in result
+        assert '"ユーザーID"' in result
+        assert "varchar name" in result
+
+    def test_format_with_foreign_key_relation(self) -> None:
+        """外部キー関係のフォーマット"""
+        result = render_mermaid(
+            build_schema_graph("public", TABLES_INFO[:2], RELATIONS, [])
+        )
+
+        assert 'users ||--o{ orders : "user_id"' in result
+
+    def test_format_with_virtual_foreign_key(self) -> None:
+        """Virtual Foreign Keyのフォーマット（点線）"""
+        tables_info = [
+            GraphTable("users", (_column("id", pk=True),)),
+            GraphTable("logs", (_column("id", pk=True), _column("user_id"))),
+        ]
+        virtual_fks = [_edge("logs", "user_id", "users", "id", "virtual")]
+
+        result = render_mermaid(
+            build_schema_graph("public", tables_info, [], virtual_fks)
+        )
+
+        assert 'users ||..o{ logs : "user_id"' in result
+        assert "integer user_id FK" in result
+
+    def test_format_aliases_qualified_names(self) -> None:
+        """エンティティ名に使えないテーブル名は別名と表示名で出力する"""
+        tables_info = [
+            GraphTable("audit.logs", (_column("id", pk=True), _column("user_id"))),
+            GraphTable("audit_logs", (_column("id", pk=True),)),
+            GraphTable("public.users", (_column("id", pk=True),)),
+        ]
+        relations = [_edge("audit.logs", "user_id", "public.users", "id")]
+
+        result = render_mermaid(
+            build_schema_graph("public, audit", tables_info, relations, [])
+        )
+
+        assert 'audit_logs_["audit.logs"] {' in result
+        assert "    audit_logs {" in result
+        assert 'public_users["public.users"] {' in result
+        assert 'public_users ||--o{ audit_logs_ : "user_id"' in result
+
+
+class TestBuildSchemaGraph:
+    """build_schema_graph のテスト"""
+
+    def test_tables_sorted_and_edges_typed(self) -> None:
+        """テーブルは名前順、辺は種類付きで保持する"""
+        graph = build_schema_graph("public", TABLES_INFO, RELATIONS, VIRTUAL_FKS)
+
+        assert [t.name for t in graph.tables] == ["logs", "orders", "users"]
+        assert [(e.from_table, e.kind) for e in graph.edges] == [
+            ("orders", "real"),
+            ("logs", "virtual"),
+        ]
+
+    def test_virtual_fk_column_is_marked(self) -> None:
+        """推測した関係の参照元カラムは外部キーとして扱う"""
+        graph = build_schema_graph("public", TABLES_INFO, [], VIRTUAL_FKS)
+
+        logs = graph.tables[0]
+        assert logs.columns[1].name == "order_id"
+        assert logs.columns[1].is_foreign_key is True
+
+    def test_virtual_fk_duplicating_real_fk_is_dropped(self) -> None:
+        """外部キー制約と重複する推測関係は除外する"""
+        duplicate = [_edge("orders", "user_id", "users", "id", "virtual")]
+
+        graph = build_schema_graph("public", TABLES_INFO, RELATIONS, duplicate)
+
+        assert [e.kind for e in graph.edges] == ["real"]
+
+    def test_duplicate_edges_are_merged(self) -> None:
+        """参照元・参照先・カラムが同じ辺は1本にまとめる"""
+        graph = build_schema_graph("public", TABLES_INFO, RELATIONS * 3, [])
+
+        assert graph.edges == tuple(RELATIONS)
+
+
+class TestCompositeEdges:
+    """複合外部キーの辺のテスト"""
+
+    @pytest.fixture
+    def graph(self) -> Any:
+        tables = [
+            GraphTable(
+                "parent",
+                (_column("region", pk=True), _column("no", pk=True)),
+            ),
+            GraphTable(
+                "child",
+                (
+                    _column("id", pk=True),
+                    _column("parent_no", fk=True),
+                    _column("parent_region", fk=True),
+                ),
+            ),
+        ]
+        relations = [
+            GraphEdge(
+                "child",
+                ("parent_no", "parent_region"),
+                "parent",
+                ("no", "region"),
+                "real",
+            )
+        ]
+        return build_schema_graph("public", tables, relations, [])
+
+    def test_render_mermaid_one_line(self, graph: Any) -> None:
+        """Mermaidでは1本の関係線にカラムの一覧をラベルとして付ける"""
+        result = render_mermaid(graph)
+
+        assert result.count("||--o{") == 1
+        assert 'parent ||--o{ child : "parent_no, parent_region"' in result
+
+    def test_render_dot_label(self, graph: Any) -> None:
+        """DOTでは参照元と参照先のカラムの対応をラベルにする"""
+        result = render_dot(graph)
+
+        assert result.count("->") == 1
+        assert 'label="parent_no, parent_region → no, region"' in result
+
+    def test_render_json_columns(self, graph: Any) -> None:
+        """JSONでは辺ごとにカラムの配列を持つ"""
+        document = json.loads(render_json(graph))
+
+        assert document["edges"] == [
+            {
+                "from_table": "child",
+                "from_columns": ["parent_no", "parent_region"],
+                "to_table": "parent",
+                "to_columns": ["no", "region"],
+                "kind": "real",
+            }
+        ]
+
+
+class TestRenderers:
+    """各形式のレンダラーのテスト"""
+
+    @pytest.fixture
+    def graph(self) -> Any:
+        return build_schema_graph("public", TABLES_INFO, RELATIONS, VIRTUAL_FKS)
+
+    def test_render_dot(self, graph: Any) -> None:
+        """DOT形式: HTMLラベルのテーブルと、推測関係は破線"""
+        result = render_dot(graph)
+
+        assert result.startswith('digraph "public" {')
+        assert '"users" [label=<' in result
+        assert "<b>users</b>" in result
+        assert "id integer [PK]" in result
+        assert '"orders" -> "users" [label="user_id → id"];' in result
+        assert '"logs" -> "orders" [label="order_id → id", style=dashed];' in result
+        assert result.endswith("}")
+
+    def test_render_dot_escapes_names(self) -> None:
+        """DOT形式: 特殊文字を含む名前をエスケープする"""
+        tables_info = [GraphTable('a"<b>', (_column("x&y", pk=True),))]
+
+        result = render_dot(build_schema_graph("public", tables_info, [], []))
+
+        assert '"a\\"<b>"' in result
+        assert "<b>a&quot;&lt;b&gt;</b>" in result
+        assert "x&amp;y" in result
+
+    def test_render_plantuml(self, graph: Any) -> None:
+        """PlantUML形式: 主キーは区切り線の上、推測関係は破線"""
+        result = render_plantuml(graph)
+
+        assert result.startswith("@startuml")
+        assert result.endswith("@enduml")
+        assert 'entity "users" as users {' in result
+        assert "  * id : integer <<PK>>" in result
+        assert "  user_id : integer <<FK>>" in result
+        assert "users ||--o{ orders : user_id → id" in result
+        assert "orders ||..o{ logs : order_id → id" in result
+
+    def test_render_plantuml_aliases_invalid_identifiers(self) -> None:
+        """PlantUML形式: 識別子として使えない名前には別名を付ける"""
+        tables_info = [
+            GraphTable("Special-Table!", (_column("id", pk=True),)),
+            GraphTable("table_0", (_column("id", pk=True),)),
+        ]
+        relations = [_edge("table_0", "id", "Special-Table!", "id")]
+
+        result = render_plantuml(
+            build_schema_graph("public", tables_info, relations, [])
+        )
+
+        assert 'entity "Special-Table!" as table_0_ {' in result
+        assert 'entity "table_0" as table_0 {' in result
+        assert "table_0_ ||--o{ table_0 : id → id" in result
+
+    def test_render_external_endpoints(self) -> None:
+        """グラフに含まれない辺の端点も別名で定義する（ページ分割時）"""
+        tables_info = [GraphTable("reporting.daily", (_column("user_id"),))]
+        relations = [_edge("reporting.daily", "user_id", "public.users", "id")]
+        graph = build_schema_graph("public, reporting", tables_info, relations, [])
+
+        mermaid = render_mermaid(graph)
+        plantuml = render_plantuml(graph)
+
+        assert '    public_users["public.users"] {\n    }' in mermaid
+        assert 'public_users ||--o{ reporting_daily : "user_id"' in mermaid
+        assert 'entity "public.users" as table_1\n' in plantuml
+        assert "table_1 ||--o{ table_0 : user_id → id" in plantuml
+
+    def test_render_json(self, graph: Any) -> None:
+        """JSON形式: テーブルごとの隣接リストと辺の一覧"""
+        document = json.loads(render_json(graph))
+
+        assert document["schema"] == "public"
+        assert document["tables"]["orders"]["references"] == ["users"]
+        assert document["tables"]["orders"]["referenced_by"] == ["logs"]
+        assert document["tables"]["users"]["columns"][0] == {
+            "name": "id",
+            "type": "integer",
+            "primary_key": True,
+            "foreign_key": False,
+            "comment": "ユーザーID",
+        }
+        assert document["edges"][1] == {
+            "from_table": "logs",
+            "from_columns": ["order_id"],
+            "to_table": "orders",
+            "to_columns": ["id"],
+            "kind": "virtual",
+        }
+
+    def test_get_renderer(self) -> None:
+        """形式名からレンダラーを取得し、未対応の形式はエラー"""
+        assert get_renderer("mermaid") is render_mermaid
+        with pytest.raises(ValueError, match="diagram_format"):
+            get_renderer("svg")